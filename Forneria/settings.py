@@ -12,7 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
-from decouple import config
+from decouple import config, Csv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 
@@ -278,4 +278,79 @@ SERVER_EMAIL = DEFAULT_FROM_EMAIL  # Para errores del servidor
 SITE_URL = config('SITE_URL', default='http://35.172.127.25')
 
 # Tiempo de expiración del token de recuperación (en horas)
-PASSWORD_RESET_TIMEOUT = 24  # 24 horas
\ No newline at end of file
+PASSWORD_RESET_TIMEOUT = 24  # 24 horas
+
+# ============================================================
+# FOLIOS DE BOLETAS
+# ============================================================
+# Cantidad de folios que cada proceso reserva de una vez en la tabla
+# secuencia_folio (ver ventas/funciones/folios.py). Un bloque más grande
+# significa menos consultas, pero más saltos en la numeración al reiniciar.
+FOLIO_TAMANO_BLOQUE = config('FOLIO_TAMANO_BLOQUE', default=100, cast=int)
+
+# ============================================================
+# CACHÉ
+# ============================================================
+# Por defecto cada proceso usa su propia caché en memoria. En producción con
+# varios workers conviene una caché compartida (ej: CACHE_BACKEND=
+# django.core.cache.backends.memcached.PyMemcacheCache y CACHE_LOCATION=
+# 127.0.0.1:11211) para que las invalidaciones se vean en todos los procesos.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='forneria'),
+    }
+}
+
+# Segundos que se guarda en caché el catálogo completo del POS
+# (ver ventas/funciones/catalogo_pos.py)
+CATALOGO_CACHE_SEGUNDOS = config('CATALOGO_CACHE_SEGUNDOS', default=60, cast=int)
+
+# Segundos hacia atrás que se vuelven a revisar en cada delta del catálogo,
+# para no perder productos cuya transacción confirmó después de la consulta
+# anterior (debe ser mayor que la transacción más larga que toca productos)
+CATALOGO_SOLAPAMIENTO_SEGUNDOS = config('CATALOGO_SOLAPAMIENTO_SEGUNDOS', default=10, cast=int)
+
+# ============================================================
+# EVENTOS PENDIENTES (OUTBOX)
+# ============================================================
+# El historial de boletas, los movimientos de inventario y las alertas de
+# stock de cada venta se generan fuera de la petición (ver
+# ventas/funciones/outbox.py).
+# - 'hilos': el mismo servidor los procesa en segundo plano al confirmar la venta
+# - 'comando': solo los procesa `python manage.py procesar_outbox`
+OUTBOX_MODO = config('OUTBOX_MODO', default='hilos')
+OUTBOX_HILOS = config('OUTBOX_HILOS', default=2, cast=int)
+OUTBOX_TAMANO_LOTE = config('OUTBOX_TAMANO_LOTE', default=100, cast=int)
+
+# ============================================================
+# RESUMEN DEL DASHBOARD
+# ============================================================
+# Segundos que se reutiliza el resumen de KPIs (/api/dashboard/resumen/).
+# Varias pantallas consultándolo a la vez comparten el mismo cálculo
+# (ver ventas/funciones/resumen_dashboard.py).
+DASHBOARD_RESUMEN_SEGUNDOS = config('DASHBOARD_RESUMEN_SEGUNDOS', default=10, cast=int)
+
+# ============================================================
+# EXPORTACIÓN A EXCEL
+# ============================================================
+# Reportes que se exportan a Excel en modo "solo escritura" de openpyxl
+# (fila por fila, sin armar el libro en memoria; ver
+# ventas/utils/exportadores.py). Los que no estén en la lista usan el
+# exportador normal. Valores: ventas, inventario, top_productos
+EXPORTACION_EXCEL_STREAMING = config(
+    'EXPORTACION_EXCEL_STREAMING',
+    default='ventas,inventario,top_productos',
+    cast=Csv()
+)
+
+# ============================================================
+# REPORTES EN SEGUNDO PLANO
+# ============================================================
+# Las exportaciones pedidas "en segundo plano" las genera el comando
+# `python manage.py procesar_reportes` (ver ventas/funciones/trabajos_reporte.py).
+# Los archivos quedan en REPORTES_DIRECTORIO (fuera de static/media: solo se
+# descargan a través de la vista, por el usuario que los pidió) y se borran
+# pasadas REPORTES_HORAS_EXPIRACION horas.
+REPORTES_DIRECTORIO = config('REPORTES_DIRECTORIO', default=str(BASE_DIR / 'reportes_generados'))
+REPORTES_HORAS_EXPIRACION = config('REPORTES_HORAS_EXPIRACION', default=24, cast=int)
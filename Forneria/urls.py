@@ -33,7 +33,7 @@ from ventas.views import (
     usuarios_list_view, usuario_crear_view, usuario_editar_view, usuario_eliminar_view,
     
     # Vistas del sistema POS (Punto de Venta)
-    pos_view, agregar_cliente_ajax, validar_producto_ajax, procesar_venta_ajax,
+    pos_view, catalogo_pos_api, buscar_productos_api, buscar_clientes_api, agregar_cliente_ajax, validar_producto_ajax, validar_carrito_ajax, procesar_venta_ajax,
     
     # Vistas del sistema de Alertas
     alertas_list_view, alerta_crear_view, alerta_editar_view, alerta_eliminar_view,
@@ -53,8 +53,9 @@ from ventas.views import (
     crear_alertas_masivo, mover_merma_masivo, activar_desactivar_masivo, eliminar_masivo,
     
     # Vistas de Métricas del Dashboard (NUEVO)
+    dashboard_resumen_api,
     ventas_del_dia_api, stock_bajo_api, alertas_pendientes_api, top_producto_api,
-    ventas_del_dia_lista_api, merma_lista_api,
+    ventas_del_dia_lista_api, merma_lista_api, ventas_por_hora_api,
     
     # Vistas de Historial de Boletas (NUEVO)
     historial_boletas_list_view, historial_boleta_detalle_view, historial_boleta_regenerar_pdf_view,
@@ -79,7 +80,8 @@ from ventas.views.views_vencimientos import (
 from ventas.views.view_dashboard import (
     perdida_siete_dias,
     perdida_catorce_dias,
-    perdida_treinta_dias
+    perdida_treinta_dias,
+    perdida_potencial_api
 )
 
 # Vistas de reportes avanzados (RF-V4, RF-V5, RF-I5)
@@ -102,6 +104,14 @@ from ventas.views.view_reportes_inventario import (
     exportar_inventario_pdf
 )
 
+# Reportes generados en segundo plano
+from ventas.views.view_trabajos_reporte import (
+    solicitar_reporte_api,
+    estado_trabajo_reporte_api,
+    mis_reportes_api,
+    descargar_reporte
+)
+
 # Vista de comprobante PDF (RF-V3)
 from ventas.views.view_comprobante import (
     comprobante_pdf_view,
@@ -183,8 +193,12 @@ urlpatterns = [
     path('pos/', pos_view, name='pos'),
     
     # APIs del POS (llamadas AJAX desde JavaScript)
+    path('api/pos/catalogo/', catalogo_pos_api, name='api_pos_catalogo'),
+    path('api/pos/buscar/productos/', buscar_productos_api, name='api_pos_buscar_productos'),
+    path('api/pos/buscar/clientes/', buscar_clientes_api, name='api_pos_buscar_clientes'),
     path('api/agregar-cliente/', agregar_cliente_ajax, name='api_agregar_cliente'),
     path('api/validar-producto/<int:producto_id>/', validar_producto_ajax, name='api_validar_producto'),
+    path('api/validar-carrito/', validar_carrito_ajax, name='api_validar_carrito'),
     path('api/procesar-venta/', procesar_venta_ajax, name='api_procesar_venta'),
     
     # Comprobante de venta (RF-V3)
@@ -209,6 +223,9 @@ urlpatterns = [
     # ============================================================
     # APIs PARA EL DASHBOARD
     # ============================================================
+    # Todos los KPIs en una respuesta (con caché corta)
+    path('api/dashboard/resumen/', dashboard_resumen_api, name='api_dashboard_resumen'),
+    
     # APIs de métricas principales
     path('api/ventas-del-dia/', ventas_del_dia_api, name='api_ventas_del_dia'),
     path('api/ventas-del-dia/lista/', ventas_del_dia_lista_api, name='api_ventas_del_dia_lista'),
@@ -216,6 +233,7 @@ urlpatterns = [
     path('api/alertas-pendientes/', alertas_pendientes_api, name='api_alertas_pendientes'),
     path('api/top-producto/', top_producto_api, name='api_top_producto'),
     path('api/merma/lista/', merma_lista_api, name='api_merma_lista'),
+    path('api/ventas/por-hora/', ventas_por_hora_api, name='api_ventas_por_hora'),
     
     # APIs de productos próximos a vencer
     path('api/proximos-vencimientos/', productos_por_vencer_api, name='api_proximos_vencimientos'),
@@ -226,6 +244,7 @@ urlpatterns = [
     path('api/perdida-potencial/', perdida_siete_dias, name='api_perdida_potencial'),
     path('api/perdida-potencial-14/', perdida_catorce_dias, name='api_perdida_potencial_14'),
     path('api/perdida-potencial-30/', perdida_treinta_dias, name='api_perdida_potencial_30'),
+    path('api/perdida-potencial/curva/', perdida_potencial_api, name='api_perdida_potencial_curva'),
     
     # ============================================================
     # SISTEMA DE ALERTAS (NUEVO)
@@ -288,6 +307,12 @@ urlpatterns = [
     path('reportes/inventario/exportar/excel/', exportar_inventario_excel, name='exportar_inventario_excel'),
     path('reportes/inventario/exportar/pdf/', exportar_inventario_pdf, name='exportar_inventario_pdf'),
     
+    # Exportaciones en segundo plano (las genera `python manage.py procesar_reportes`)
+    path('api/reportes/trabajos/', mis_reportes_api, name='api_mis_reportes'),
+    path('api/reportes/trabajos/solicitar/', solicitar_reporte_api, name='api_solicitar_reporte'),
+    path('api/reportes/trabajos/<int:trabajo_id>/', estado_trabajo_reporte_api, name='api_estado_trabajo_reporte'),
+    path('reportes/trabajos/<int:trabajo_id>/descargar/', descargar_reporte, name='descargar_reporte'),
+    
     # ============================================================
     # HISTORIAL DE BOLETAS (NUEVO)
     # ============================================================
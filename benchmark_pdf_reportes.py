@@ -0,0 +1,118 @@
+"""
+Benchmark: exportación a PDF de reportes grandes.
+
+Genera el PDF del reporte de ventas con filas sintéticas (no usa la base de
+datos) para 1.000, 5.000 y 10.000 filas con exportar_a_pdf_por_paginas()
+(ventas/utils/exportadores.py) y verifica que:
+- El tiempo crece en forma lineal con las filas (tiempo por fila estable)
+- 10.000 filas se generan en menos de LIMITE_SEGUNDOS
+
+Con --comparar además mide el método anterior (una sola tabla con un
+Paragraph por celda) para las cantidades chicas, como referencia.
+
+Ejecutar con: python benchmark_pdf_reportes.py [--comparar]
+"""
+
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Forneria.settings')
+django.setup()
+
+from ventas.utils.exportadores import exportar_a_pdf_por_paginas, REPORTLAB_AVAILABLE
+
+TAMANOS = [1000, 5000, 10000]
+TAMANOS_COMPARACION = [1000, 2000]   # El método anterior es muy lento con más filas
+LIMITE_SEGUNDOS = 60                 # Máximo aceptable para 10.000 filas
+MAX_VARIACION_POR_FILA = 2.0         # El tiempo por fila no debe más que duplicarse
+
+ENCABEZADOS = ['Folio', 'Fecha', 'Cliente', 'Canal', 'Total Neto', 'IVA', 'Total con IVA']
+CLIENTES = ['Cliente Genérico', 'Panadería La Espiga', 'María José Fuentes Araya', 'Supermercado Don Pedro Limitada']
+
+
+def filas_ventas(cantidad):
+    """Filas con el mismo formato que el reporte de ventas."""
+    inicio = datetime(2025, 1, 1, 8, 0)
+    for i in range(cantidad):
+        neto = Decimal(1000 + (i * 37) % 20000)
+        iva = (neto * Decimal('0.19')).quantize(Decimal('1'))
+        yield [
+            f'B{100000 + i}',
+            (inicio + timedelta(minutes=7 * i)).strftime('%d/%m/%Y %H:%M'),
+            CLIENTES[i % len(CLIENTES)],
+            'presencial' if i % 3 else 'delivery',
+            neto,
+            iva,
+            neto + iva,
+        ]
+
+
+def medir_por_paginas(cantidad):
+    inicio = time.perf_counter()
+    respuesta = exportar_a_pdf_por_paginas(filas_ventas(cantidad), ENCABEZADOS, 'benchmark', 'Reporte de Ventas')
+    tamano = sum(len(parte) for parte in respuesta.streaming_content)
+    return time.perf_counter() - inicio, tamano
+
+
+def medir_una_tabla(cantidad):
+    """Método anterior: una tabla con todas las filas y un Paragraph por celda."""
+    import io
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import cm
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import SimpleDocTemplate, Table, Paragraph
+
+    inicio = time.perf_counter()
+    salida = io.BytesIO()
+    doc = SimpleDocTemplate(salida, pagesize=A4, rightMargin=2*cm, leftMargin=2*cm, topMargin=2*cm, bottomMargin=2*cm)
+    normal = getSampleStyleSheet()['Normal']
+    datos = [[Paragraph(h, normal) for h in ENCABEZADOS]]
+    for fila in filas_ventas(cantidad):
+        datos.append([Paragraph(f"${v:,.0f}" if isinstance(v, Decimal) else str(v), normal) for v in fila])
+    doc.build([Table(datos, colWidths=[None] * len(ENCABEZADOS))])
+    return time.perf_counter() - inicio, len(salida.getvalue())
+
+
+def main():
+    if not REPORTLAB_AVAILABLE:
+        print('❌ ReportLab no está instalado')
+        sys.exit(1)
+
+    print('📄 Benchmark de exportación a PDF (reporte de ventas)\n')
+    resultados = {}
+    for cantidad in TAMANOS:
+        segundos, tamano = medir_por_paginas(cantidad)
+        resultados[cantidad] = segundos
+        print(f'   Por páginas  {cantidad:>6} filas: {segundos:6.2f}s '
+              f'({segundos / cantidad * 1000:.2f} ms/fila, {tamano / 1024:.0f} KB)')
+
+    if '--comparar' in sys.argv:
+        print()
+        for cantidad in TAMANOS_COMPARACION:
+            segundos, tamano = medir_una_tabla(cantidad)
+            print(f'   Una tabla    {cantidad:>6} filas: {segundos:6.2f}s '
+                  f'({segundos / cantidad * 1000:.2f} ms/fila, {tamano / 1024:.0f} KB)')
+
+    por_fila_menor = resultados[TAMANOS[0]] / TAMANOS[0]
+    por_fila_mayor = resultados[TAMANOS[-1]] / TAMANOS[-1]
+    errores = []
+    if resultados[TAMANOS[-1]] > LIMITE_SEGUNDOS:
+        errores.append(f'{TAMANOS[-1]} filas tardaron más de {LIMITE_SEGUNDOS}s')
+    if por_fila_mayor > por_fila_menor * MAX_VARIACION_POR_FILA:
+        errores.append('el tiempo por fila crece con el tamaño del reporte')
+
+    print()
+    if errores:
+        for error in errores:
+            print(f'❌ {error}')
+        sys.exit(1)
+    print('✅ El tiempo crece en forma lineal y el reporte de 10.000 filas está dentro del límite')
+
+
+if __name__ == '__main__':
+    main()
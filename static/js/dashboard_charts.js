@@ -94,4 +94,137 @@ function initGaugeChart(containerSelector, dataUrl, maxValue, label) {
             // Opcional: Mostrar un mensaje de error en el contenedor
             d3.select(containerSelector).html(`<p style="color: red; text-align: center;">No se pudo cargar el gráfico.</p>`);
         });
-}
\ No newline at end of file
+}
+/**
+ * Inicializa varios velocímetros de pérdida potencial con UNA sola petición.
+ *
+ * La API de la curva entrega todos los horizontes a la vez ({'7': ..., '14': ..., '30': ...}).
+ *
+ * @param {string} dataUrl - URL de la API de la curva de pérdida potencial.
+ * @param {Array<{selector: string, dias: number}>} gauges - Contenedor y horizonte de cada gráfico.
+ * @param {number} maxValue - El valor máximo para la escala de los gráficos.
+ * @param {string} label - La etiqueta para los gráficos.
+ */
+function initGaugeChartsPerdida(dataUrl, gauges, maxValue, label) {
+    fetch(dataUrl)
+        .then(response => {
+            if (!response.ok) {
+                throw new Error(`Error en la red: ${response.statusText}`);
+            }
+            return response.json();
+        })
+        .then(data => {
+            gauges.forEach(gauge => {
+                drawGauge(gauge.selector, data.horizontes[String(gauge.dias)] || 0, maxValue, label);
+            });
+        })
+        .catch(error => {
+            console.error('Error al inicializar los gráficos de pérdida potencial:', error);
+            gauges.forEach(gauge => {
+                d3.select(gauge.selector).html(`<p style="color: red; text-align: center;">No se pudo cargar el gráfico.</p>`);
+            });
+        });
+}
+
+/**
+ * Dibuja un mapa de calor de ventas por día de la semana (filas) y hora (columnas).
+ *
+ * @param {string} containerSelector - El selector CSS para el div contenedor.
+ * @param {Object} data - Respuesta de la API de ventas por hora
+ *                        ({dias, celdas: [{dia, hora, ventas, total}], max_ventas}).
+ */
+function drawHeatmap(containerSelector, data) {
+    // Limpiar el contenedor por si ya existía un gráfico previo
+    d3.select(containerSelector).select("svg").remove();
+
+    // --- Configuración del gráfico ---
+    const container = d3.select(containerSelector);
+    const margin = { top: 20, right: 10, bottom: 10, left: 80 };
+    const cellSize = 26;
+    const width = margin.left + 24 * cellSize + margin.right;
+    const height = margin.top + 7 * cellSize + margin.bottom;
+
+    const svg = container.append("svg")
+        .attr("viewBox", `0 0 ${width} ${height}`)
+        .attr("width", "100%")
+        .append("g")
+        .attr("transform", `translate(${margin.left}, ${margin.top})`);
+
+    // --- Escala de color (más ventas = más oscuro) ---
+    const color = d3.scaleSequential(d3.interpolateYlOrBr)
+        .domain([0, Math.max(data.max_ventas, 1)]);
+
+    // Indexar las celdas con ventas (las demás quedan en 0)
+    const porCelda = {};
+    data.celdas.forEach(celda => { porCelda[`${celda.dia}-${celda.hora}`] = celda; });
+
+    const celdas = [];
+    for (let dia = 0; dia < 7; dia++) {
+        for (let hora = 0; hora < 24; hora++) {
+            celdas.push(porCelda[`${dia}-${hora}`] || { dia: dia, hora: hora, ventas: 0, total: 0 });
+        }
+    }
+
+    // --- Celdas ---
+    svg.selectAll("rect")
+        .data(celdas)
+        .enter()
+        .append("rect")
+        .attr("x", d => d.hora * cellSize)
+        .attr("y", d => d.dia * cellSize)
+        .attr("width", cellSize - 2)
+        .attr("height", cellSize - 2)
+        .attr("rx", 3)
+        .style("fill", d => d.ventas > 0 ? color(d.ventas) : "#f3f3f3")
+        .append("title") // Tooltip nativo del navegador
+        .text(d => `${data.dias[d.dia]} ${String(d.hora).padStart(2, '0')}:00 - ${d.ventas} ventas, $${Math.round(d.total).toLocaleString('es-CL')}`);
+
+    // --- Textos ---
+    // 1. Días de la semana (a la izquierda)
+    svg.selectAll(".heatmap-dia")
+        .data(data.dias)
+        .enter()
+        .append("text")
+        .attr("class", "heatmap-dia")
+        .attr("x", -8)
+        .attr("y", (d, i) => i * cellSize + cellSize / 2)
+        .attr("dy", "0.35em")
+        .attr("text-anchor", "end")
+        .style("font-size", "0.75em")
+        .text(d => d);
+
+    // 2. Horas (arriba, cada 2 horas)
+    svg.selectAll(".heatmap-hora")
+        .data(d3.range(0, 24, 2))
+        .enter()
+        .append("text")
+        .attr("class", "heatmap-hora")
+        .attr("x", d => d * cellSize + cellSize / 2)
+        .attr("y", -6)
+        .attr("text-anchor", "middle")
+        .style("font-size", "0.7em")
+        .text(d => `${d}h`);
+}
+
+/**
+ * Inicializa el mapa de calor de ventas por hora, obteniendo los datos de una URL.
+ *
+ * @param {string} containerSelector - El selector CSS para el div contenedor.
+ * @param {string} dataUrl - La URL de la API de ventas por hora (acepta ?desde=&hasta=).
+ */
+function initHeatmapChart(containerSelector, dataUrl) {
+    fetch(dataUrl)
+        .then(response => {
+            if (!response.ok) {
+                throw new Error(`Error en la red: ${response.statusText}`);
+            }
+            return response.json();
+        })
+        .then(data => {
+            drawHeatmap(containerSelector, data);
+        })
+        .catch(error => {
+            console.error(`Error al inicializar el mapa de calor para ${containerSelector}:`, error);
+            d3.select(containerSelector).html(`<p style="color: red; text-align: center;">No se pudo cargar el gráfico.</p>`);
+        });
+}
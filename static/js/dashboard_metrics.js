@@ -19,6 +19,39 @@ function formatearMoneda(valor) {
     return '$' + Math.round(valor).toLocaleString('es-CL');
 }
 
+/**
+ * Muestra las ventas del día en su tarjeta
+ * @param {Object} data - Respuesta de la API (o la sección del resumen)
+ */
+function mostrarVentasDelDia(data) {
+    console.log('Datos ventas del día:', data);
+    // Actualizar el valor de ventas - usar múltiples selectores para mayor robustez
+    const ventasCol = document.querySelector('.dashboard-row .dashboard-col:first-child');
+    const ventasValue = ventasCol?.querySelector('.metric-card-value');
+    const ventasSubtitle = ventasCol?.querySelector('.metric-card-subtitle');
+    
+    console.log('Elementos encontrados - ventasValue:', ventasValue, 'ventasSubtitle:', ventasSubtitle);
+    
+    if (ventasValue && ventasSubtitle) {
+        if (data.error) {
+            console.error('Error en API ventas del día:', data.error);
+            ventasValue.textContent = 'Error';
+            ventasSubtitle.textContent = '0 transacciones';
+        } else {
+            const totalFormateado = formatearMoneda(data.total_ventas || 0);
+            const transacciones = data.num_transacciones || 0;
+            console.log('Actualizando ventas del día:', totalFormateado, transacciones);
+            ventasValue.textContent = totalFormateado;
+            ventasSubtitle.textContent = `${transacciones} transacciones`;
+        }
+    } else {
+        console.warn('No se encontraron elementos para ventas del día. Buscando alternativas...');
+        // Intentar con selector alternativo
+        const altValue = document.querySelector('.metric-card-title:contains("Ventas del Día")')?.nextElementSibling;
+        console.warn('Selector alternativo:', altValue);
+    }
+}
+
 /**
  * Carga las ventas del día desde la API
  */
@@ -32,34 +65,7 @@ function cargarVentasDelDia() {
             }
             return response.json();
         })
-        .then(data => {
-            console.log('Datos ventas del día:', data);
-            // Actualizar el valor de ventas - usar múltiples selectores para mayor robustez
-            const ventasCol = document.querySelector('.dashboard-row .dashboard-col:first-child');
-            const ventasValue = ventasCol?.querySelector('.metric-card-value');
-            const ventasSubtitle = ventasCol?.querySelector('.metric-card-subtitle');
-            
-            console.log('Elementos encontrados - ventasValue:', ventasValue, 'ventasSubtitle:', ventasSubtitle);
-            
-            if (ventasValue && ventasSubtitle) {
-                if (data.error) {
-                    console.error('Error en API ventas del día:', data.error);
-                    ventasValue.textContent = 'Error';
-                    ventasSubtitle.textContent = '0 transacciones';
-                } else {
-                    const totalFormateado = formatearMoneda(data.total_ventas || 0);
-                    const transacciones = data.num_transacciones || 0;
-                    console.log('Actualizando ventas del día:', totalFormateado, transacciones);
-                    ventasValue.textContent = totalFormateado;
-                    ventasSubtitle.textContent = `${transacciones} transacciones`;
-                }
-            } else {
-                console.warn('No se encontraron elementos para ventas del día. Buscando alternativas...');
-                // Intentar con selector alternativo
-                const altValue = document.querySelector('.metric-card-title:contains("Ventas del Día")')?.nextElementSibling;
-                console.warn('Selector alternativo:', altValue);
-            }
-        })
+        .then(mostrarVentasDelDia)
         .catch(error => {
             console.error('Error al cargar ventas del día:', error);
             const ventasValue = document.querySelector('.dashboard-row .dashboard-col:nth-child(1) .metric-card-value');
@@ -71,6 +77,70 @@ function cargarVentasDelDia() {
         });
 }
 
+/**
+ * Muestra el número de productos con stock bajo en su tarjeta
+ * @param {Object} data - Respuesta de la API (o la sección del resumen)
+ */
+function mostrarStockBajo(data) {
+    console.log('Datos stock bajo:', data);
+    // Actualizar el valor de stock bajo - usar múltiples selectores
+    const stockCol = document.querySelector('.dashboard-row .dashboard-col:nth-child(2)');
+    const stockCard = stockCol?.querySelector('.dashboard-metric-card');
+    const stockValue = stockCol?.querySelector('.metric-card-value');
+    const stockSubtitle = stockCol?.querySelector('.metric-card-subtitle');
+    
+    console.log('Elementos encontrados - stockValue:', stockValue, 'stockSubtitle:', stockSubtitle);
+    
+    if (stockValue && stockSubtitle) {
+        if (data.error) {
+            console.error('Error en API stock bajo:', data.error);
+            stockValue.textContent = 'Error';
+            stockSubtitle.textContent = 'Error';
+        } else {
+            const numProductos = data.num_productos || 0;
+            console.log('Actualizando stock bajo:', numProductos);
+            stockValue.textContent = numProductos;
+            stockSubtitle.textContent = 'Productos';
+        
+            // Cambiar color si hay productos con stock bajo
+            if (data.num_productos > 0) {
+                stockValue.style.color = '#ff6b6b';
+                
+                // Agregar enlace al inventario si no existe
+                if (stockCard && !stockCard.querySelector('.btn-ver-inventario')) {
+                    const linkInventario = document.createElement('a');
+                    linkInventario.href = '/inventario/';
+                    linkInventario.className = 'btn-ver-inventario';
+                    linkInventario.textContent = 'Ver Inventario';
+                    linkInventario.style.cssText = `
+                        display: inline-block;
+                        margin-top: 10px;
+                        padding: 6px 16px;
+                        background-color: #D4AF37;
+                        color: #1a1a1a;
+                        text-decoration: none;
+                        border-radius: 4px;
+                        font-size: 0.9rem;
+                        font-weight: 600;
+                        transition: background-color 0.2s;
+                    `;
+                    linkInventario.onmouseover = function() { this.style.backgroundColor = '#c9a030'; };
+                    linkInventario.onmouseout = function() { this.style.backgroundColor = '#D4AF37'; };
+                    stockCard.appendChild(linkInventario);
+                }
+            } else {
+                // Remover enlace si no hay productos con stock bajo
+                const linkInventario = stockCard?.querySelector('.btn-ver-inventario');
+                if (linkInventario) {
+                    linkInventario.remove();
+                }
+            }
+        }
+    } else {
+        console.warn('No se encontraron elementos para stock bajo');
+    }
+}
+
 /**
  * Carga los productos con stock bajo desde la API
  */
@@ -84,65 +154,7 @@ function cargarStockBajo() {
             }
             return response.json();
         })
-        .then(data => {
-            console.log('Datos stock bajo:', data);
-            // Actualizar el valor de stock bajo - usar múltiples selectores
-            const stockCol = document.querySelector('.dashboard-row .dashboard-col:nth-child(2)');
-            const stockCard = stockCol?.querySelector('.dashboard-metric-card');
-            const stockValue = stockCol?.querySelector('.metric-card-value');
-            const stockSubtitle = stockCol?.querySelector('.metric-card-subtitle');
-            
-            console.log('Elementos encontrados - stockValue:', stockValue, 'stockSubtitle:', stockSubtitle);
-            
-            if (stockValue && stockSubtitle) {
-                if (data.error) {
-                    console.error('Error en API stock bajo:', data.error);
-                    stockValue.textContent = 'Error';
-                    stockSubtitle.textContent = 'Error';
-                } else {
-                    const numProductos = data.num_productos || 0;
-                    console.log('Actualizando stock bajo:', numProductos);
-                    stockValue.textContent = numProductos;
-                    stockSubtitle.textContent = 'Productos';
-                
-                    // Cambiar color si hay productos con stock bajo
-                    if (data.num_productos > 0) {
-                        stockValue.style.color = '#ff6b6b';
-                        
-                        // Agregar enlace al inventario si no existe
-                        if (stockCard && !stockCard.querySelector('.btn-ver-inventario')) {
-                            const linkInventario = document.createElement('a');
-                            linkInventario.href = '/inventario/';
-                            linkInventario.className = 'btn-ver-inventario';
-                            linkInventario.textContent = 'Ver Inventario';
-                            linkInventario.style.cssText = `
-                                display: inline-block;
-                                margin-top: 10px;
-                                padding: 6px 16px;
-                                background-color: #D4AF37;
-                                color: #1a1a1a;
-                                text-decoration: none;
-                                border-radius: 4px;
-                                font-size: 0.9rem;
-                                font-weight: 600;
-                                transition: background-color 0.2s;
-                            `;
-                            linkInventario.onmouseover = function() { this.style.backgroundColor = '#c9a030'; };
-                            linkInventario.onmouseout = function() { this.style.backgroundColor = '#D4AF37'; };
-                            stockCard.appendChild(linkInventario);
-                        }
-                    } else {
-                        // Remover enlace si no hay productos con stock bajo
-                        const linkInventario = stockCard?.querySelector('.btn-ver-inventario');
-                        if (linkInventario) {
-                            linkInventario.remove();
-                        }
-                    }
-                }
-            } else {
-                console.warn('No se encontraron elementos para stock bajo');
-            }
-        })
+        .then(mostrarStockBajo)
         .catch(error => {
             console.error('Error al cargar stock bajo:', error);
             const stockValue = document.querySelector('.dashboard-row .dashboard-col:nth-child(2) .metric-card-value');
@@ -154,6 +166,76 @@ function cargarStockBajo() {
         });
 }
 
+/**
+ * Muestra las alertas pendientes en su tarjeta
+ * @param {Object} data - Respuesta de la API (o la sección del resumen)
+ */
+function mostrarAlertasPendientes(data) {
+    console.log('Datos alertas:', data);
+    // Actualizar el valor de alertas - usar múltiples selectores
+    const alertasCol = document.querySelector('.dashboard-row .dashboard-col:nth-child(3)');
+    const alertasCard = alertasCol?.querySelector('.dashboard-metric-card');
+    const alertasValue = alertasCol?.querySelector('.metric-card-value');
+    const alertasSubtitle = alertasCol?.querySelector('.metric-card-subtitle');
+    
+    console.log('Elementos encontrados - alertasValue:', alertasValue, 'alertasSubtitle:', alertasSubtitle);
+    
+    if (alertasValue && alertasSubtitle) {
+        const numAlertas = data.num_alertas || 0;
+        console.log('Actualizando alertas:', numAlertas);
+        alertasValue.textContent = numAlertas;
+        
+        // Mostrar desglose por tipo
+        const rojas = data.por_tipo?.roja || 0;
+        const amarillas = data.por_tipo?.amarilla || 0;
+        const verdes = data.por_tipo?.verde || 0;
+        
+        alertasSubtitle.innerHTML = `
+            <span style="color: #ff6b6b;">${rojas} rojas</span> | 
+            <span style="color: #ffd93d;">${amarillas} amarillas</span> | 
+            <span style="color: #6bcf7f;">${verdes} verdes</span>
+        `;
+        
+        // Cambiar color si hay alertas rojas
+        if (rojas > 0) {
+            alertasValue.style.color = '#ff6b6b';
+        } else {
+            alertasValue.style.color = '';
+        }
+        
+        // Agregar enlace a alertas si hay alertas y no existe el botón
+        if (numAlertas > 0 && alertasCard && !alertasCard.querySelector('.btn-ver-alertas')) {
+            const linkAlertas = document.createElement('a');
+            linkAlertas.href = '/alertas/';
+            linkAlertas.className = 'btn-ver-alertas';
+            linkAlertas.textContent = 'Ver Alertas';
+            linkAlertas.style.cssText = `
+                display: inline-block;
+                margin-top: 10px;
+                padding: 6px 16px;
+                background-color: #D4AF37;
+                color: #1a1a1a;
+                text-decoration: none;
+                border-radius: 4px;
+                font-size: 0.9rem;
+                font-weight: 600;
+                transition: background-color 0.2s;
+            `;
+            linkAlertas.onmouseover = function() { this.style.backgroundColor = '#c9a030'; };
+            linkAlertas.onmouseout = function() { this.style.backgroundColor = '#D4AF37'; };
+            alertasCard.appendChild(linkAlertas);
+        } else if (numAlertas === 0) {
+            // Remover enlace si no hay alertas
+            const linkAlertas = alertasCard?.querySelector('.btn-ver-alertas');
+            if (linkAlertas) {
+                linkAlertas.remove();
+            }
+        }
+    } else {
+        console.warn('No se encontraron elementos para alertas');
+    }
+}
+
 /**
  * Carga las alertas pendientes desde la API
  */
@@ -167,46 +249,60 @@ function cargarAlertasPendientes() {
             }
             return response.json();
         })
-        .then(data => {
-            console.log('Datos alertas:', data);
-            // Actualizar el valor de alertas - usar múltiples selectores
-            const alertasCol = document.querySelector('.dashboard-row .dashboard-col:nth-child(3)');
-            const alertasCard = alertasCol?.querySelector('.dashboard-metric-card');
-            const alertasValue = alertasCol?.querySelector('.metric-card-value');
-            const alertasSubtitle = alertasCol?.querySelector('.metric-card-subtitle');
-            
-            console.log('Elementos encontrados - alertasValue:', alertasValue, 'alertasSubtitle:', alertasSubtitle);
-            
+        .then(mostrarAlertasPendientes)
+        .catch(error => {
+            console.error('Error al cargar alertas pendientes:', error);
+            const alertasValue = document.querySelector('.dashboard-row .dashboard-col:nth-child(3) .metric-card-value');
+            const alertasSubtitle = document.querySelector('.dashboard-row .dashboard-col:nth-child(3) .metric-card-subtitle');
             if (alertasValue && alertasSubtitle) {
-                const numAlertas = data.num_alertas || 0;
-                console.log('Actualizando alertas:', numAlertas);
-                alertasValue.textContent = numAlertas;
-                
-                // Mostrar desglose por tipo
-                const rojas = data.por_tipo?.roja || 0;
-                const amarillas = data.por_tipo?.amarilla || 0;
-                const verdes = data.por_tipo?.verde || 0;
-                
-                alertasSubtitle.innerHTML = `
-                    <span style="color: #ff6b6b;">${rojas} rojas</span> | 
-                    <span style="color: #ffd93d;">${amarillas} amarillas</span> | 
-                    <span style="color: #6bcf7f;">${verdes} verdes</span>
-                `;
-                
-                // Cambiar color si hay alertas rojas
-                if (rojas > 0) {
-                    alertasValue.style.color = '#ff6b6b';
-                } else {
-                    alertasValue.style.color = '';
-                }
+                alertasValue.textContent = 'Error';
+                alertasSubtitle.textContent = 'Error';
+            }
+        });
+}
+
+/**
+ * Muestra el producto más vendido del día en su tarjeta
+ * @param {Object} data - Respuesta de la API (o la sección del resumen)
+ */
+function mostrarTopProducto(data) {
+    console.log('Datos top producto:', data);
+    // Actualizar el valor del top producto - usar múltiples selectores
+    const topCol = document.querySelector('.dashboard-row .dashboard-col:nth-child(4)');
+    const topCard = topCol?.querySelector('.dashboard-metric-card');
+    const topValue = topCol?.querySelector('.metric-card-value');
+    const topSubtitle = topCol?.querySelector('.metric-card-subtitle');
+    
+    console.log('Elementos encontrados - topValue:', topValue, 'topSubtitle:', topSubtitle);
+    
+    if (topValue && topSubtitle) {
+        if (data.error) {
+            console.error('Error en API top producto:', data.error);
+            topValue.textContent = 'Error';
+            topSubtitle.textContent = '0 unidades';
+            topValue.style.color = '#888';
+        } else {
+            const nombre = data.nombre || 'Sin ventas';
+            const unidades = data.unidades || 0;
+            console.log('Actualizando top producto:', nombre, unidades);
+            topValue.textContent = nombre;
+            topSubtitle.textContent = `${unidades} unidades`;
+            
+            // Cambiar estilo si es "Sin ventas"
+            if (data.nombre === 'Sin ventas' || !data.nombre) {
+                topValue.style.color = '#888';
+                topValue.style.fontSize = '1.2rem';
+            } else {
+                topValue.style.color = '#D4AF37';
+                topValue.style.fontSize = '1.5rem';
                 
-                // Agregar enlace a alertas si hay alertas y no existe el botón
-                if (numAlertas > 0 && alertasCard && !alertasCard.querySelector('.btn-ver-alertas')) {
-                    const linkAlertas = document.createElement('a');
-                    linkAlertas.href = '/alertas/';
-                    linkAlertas.className = 'btn-ver-alertas';
-                    linkAlertas.textContent = 'Ver Alertas';
-                    linkAlertas.style.cssText = `
+                // Agregar enlace al reporte de top productos si no existe
+                if (topCard && !topCard.querySelector('.btn-ver-top-productos')) {
+                    const linkTopProductos = document.createElement('a');
+                    linkTopProductos.href = '/reportes/top-productos/';
+                    linkTopProductos.className = 'btn-ver-top-productos';
+                    linkTopProductos.textContent = 'Ver Reporte';
+                    linkTopProductos.style.cssText = `
                         display: inline-block;
                         margin-top: 10px;
                         padding: 6px 16px;
@@ -218,29 +314,15 @@ function cargarAlertasPendientes() {
                         font-weight: 600;
                         transition: background-color 0.2s;
                     `;
-                    linkAlertas.onmouseover = function() { this.style.backgroundColor = '#c9a030'; };
-                    linkAlertas.onmouseout = function() { this.style.backgroundColor = '#D4AF37'; };
-                    alertasCard.appendChild(linkAlertas);
-                } else if (numAlertas === 0) {
-                    // Remover enlace si no hay alertas
-                    const linkAlertas = alertasCard?.querySelector('.btn-ver-alertas');
-                    if (linkAlertas) {
-                        linkAlertas.remove();
-                    }
+                    linkTopProductos.onmouseover = function() { this.style.backgroundColor = '#c9a030'; };
+                    linkTopProductos.onmouseout = function() { this.style.backgroundColor = '#D4AF37'; };
+                    topCard.appendChild(linkTopProductos);
                 }
-            } else {
-                console.warn('No se encontraron elementos para alertas');
-            }
-        })
-        .catch(error => {
-            console.error('Error al cargar alertas pendientes:', error);
-            const alertasValue = document.querySelector('.dashboard-row .dashboard-col:nth-child(3) .metric-card-value');
-            const alertasSubtitle = document.querySelector('.dashboard-row .dashboard-col:nth-child(3) .metric-card-subtitle');
-            if (alertasValue && alertasSubtitle) {
-                alertasValue.textContent = 'Error';
-                alertasSubtitle.textContent = 'Error';
             }
-        });
+        }
+    } else {
+        console.warn('No se encontraron elementos para top producto');
+    }
 }
 
 /**
@@ -256,65 +338,7 @@ function cargarTopProducto() {
             }
             return response.json();
         })
-        .then(data => {
-            console.log('Datos top producto:', data);
-            // Actualizar el valor del top producto - usar múltiples selectores
-            const topCol = document.querySelector('.dashboard-row .dashboard-col:nth-child(4)');
-            const topCard = topCol?.querySelector('.dashboard-metric-card');
-            const topValue = topCol?.querySelector('.metric-card-value');
-            const topSubtitle = topCol?.querySelector('.metric-card-subtitle');
-            
-            console.log('Elementos encontrados - topValue:', topValue, 'topSubtitle:', topSubtitle);
-            
-            if (topValue && topSubtitle) {
-                if (data.error) {
-                    console.error('Error en API top producto:', data.error);
-                    topValue.textContent = 'Error';
-                    topSubtitle.textContent = '0 unidades';
-                    topValue.style.color = '#888';
-                } else {
-                    const nombre = data.nombre || 'Sin ventas';
-                    const unidades = data.unidades || 0;
-                    console.log('Actualizando top producto:', nombre, unidades);
-                    topValue.textContent = nombre;
-                    topSubtitle.textContent = `${unidades} unidades`;
-                    
-                    // Cambiar estilo si es "Sin ventas"
-                    if (data.nombre === 'Sin ventas' || !data.nombre) {
-                        topValue.style.color = '#888';
-                        topValue.style.fontSize = '1.2rem';
-                    } else {
-                        topValue.style.color = '#D4AF37';
-                        topValue.style.fontSize = '1.5rem';
-                        
-                        // Agregar enlace al reporte de top productos si no existe
-                        if (topCard && !topCard.querySelector('.btn-ver-top-productos')) {
-                            const linkTopProductos = document.createElement('a');
-                            linkTopProductos.href = '/reportes/top-productos/';
-                            linkTopProductos.className = 'btn-ver-top-productos';
-                            linkTopProductos.textContent = 'Ver Reporte';
-                            linkTopProductos.style.cssText = `
-                                display: inline-block;
-                                margin-top: 10px;
-                                padding: 6px 16px;
-                                background-color: #D4AF37;
-                                color: #1a1a1a;
-                                text-decoration: none;
-                                border-radius: 4px;
-                                font-size: 0.9rem;
-                                font-weight: 600;
-                                transition: background-color 0.2s;
-                            `;
-                            linkTopProductos.onmouseover = function() { this.style.backgroundColor = '#c9a030'; };
-                            linkTopProductos.onmouseout = function() { this.style.backgroundColor = '#D4AF37'; };
-                            topCard.appendChild(linkTopProductos);
-                        }
-                    }
-                }
-            } else {
-                console.warn('No se encontraron elementos para top producto');
-            }
-        })
+        .then(mostrarTopProducto)
         .catch(error => {
             console.error('Error al cargar top producto:', error);
             const topValue = document.querySelector('.dashboard-row .dashboard-col:nth-child(4) .metric-card-value');
@@ -327,6 +351,39 @@ function cargarTopProducto() {
         });
 }
 
+/**
+ * Carga las cuatro tarjetas del dashboard con UNA sola petición.
+ *
+ * /api/dashboard/resumen/ calcula todos los KPIs con pocas consultas y los
+ * guarda en caché unos segundos, así varias pantallas abiertas no
+ * multiplican la carga. Si falla, se usan los endpoints por métrica.
+ */
+function cargarResumenDashboard() {
+    fetch('/api/dashboard/resumen/')
+        .then(response => {
+            if (!response.ok) {
+                throw new Error(`HTTP error! status: ${response.status}`);
+            }
+            return response.json();
+        })
+        .then(data => {
+            if (data.error) {
+                throw new Error(data.error);
+            }
+            mostrarVentasDelDia(data.ventas_del_dia);
+            mostrarStockBajo(data.stock_bajo);
+            mostrarAlertasPendientes(data.alertas);
+            mostrarTopProducto(data.top_producto);
+        })
+        .catch(error => {
+            console.error('Error al cargar el resumen del dashboard, usando endpoints por métrica:', error);
+            cargarVentasDelDia();
+            cargarStockBajo();
+            cargarAlertasPendientes();
+            cargarTopProducto();
+        });
+}
+
 /**
  * Carga la tabla detallada de productos con stock bajo
  */
@@ -389,6 +446,10 @@ function cargarTablaStockBajo() {
             });
             
             html += '</tbody></table>';
+            // La API entrega solo la primera página (los más críticos primero)
+            if (data.num_productos > data.productos.length) {
+                html += `<p class="text-muted" style="font-size: 0.8rem;">Mostrando ${data.productos.length} de ${data.num_productos} - <a href="/inventario/">Ver inventario</a></p>`;
+            }
             container.innerHTML = html;
             console.log('Tabla stock bajo actualizada correctamente');
         })
@@ -476,8 +537,15 @@ function cargarTablaMerma() {
         });
 }
 
+// Ventas del día que ya tiene la tabla (para pedir solo las nuevas en cada refresco)
+const VENTAS_DIA_EN_TABLA = 10;
+let ventasDiaEstado = { fecha: null, ultimoId: null, ventas: [] };
+
 /**
  * Carga la tabla detallada de ventas del día
+ *
+ * La primera vez pide las 10 ventas más recientes; en los refrescos pide
+ * solo las ventas nuevas (?after=<último id>) y las agrega arriba.
  */
 function cargarTablaVentasDia() {
     console.log('[TABLA] Cargando tabla ventas del día...');
@@ -493,8 +561,12 @@ function cargarTablaVentasDia() {
         loadingMsg.remove();
     }
     
-    console.log('[TABLA] Contenedor encontrado, haciendo petición a /api/ventas-del-dia/lista/');
-    fetch('/api/ventas-del-dia/lista/')
+    let url = `/api/ventas-del-dia/lista/?limit=${VENTAS_DIA_EN_TABLA}`;
+    if (ventasDiaEstado.ultimoId !== null) {
+        url += `&after=${ventasDiaEstado.ultimoId}`;
+    }
+    console.log('[TABLA] Contenedor encontrado, haciendo petición a', url);
+    fetch(url)
         .then(response => {
             console.log('Respuesta ventas del día:', response.status);
             if (!response.ok) {
@@ -511,17 +583,24 @@ function cargarTablaVentasDia() {
                 return;
             }
             
-            if (!data.ventas || data.ventas.length === 0) {
+            // Si cambió el día se empieza de nuevo con la lista
+            if (ventasDiaEstado.fecha !== data.fecha) {
+                ventasDiaEstado = { fecha: data.fecha, ultimoId: null, ventas: [] };
+            }
+            ventasDiaEstado.ventas = data.ventas.concat(ventasDiaEstado.ventas).slice(0, VENTAS_DIA_EN_TABLA);
+            ventasDiaEstado.ultimoId = data.ultimo_id;
+            
+            if (ventasDiaEstado.ventas.length === 0) {
                 console.log('[TABLA] No hay ventas del día');
                 container.innerHTML = '<p class="text-muted"><i class="bi bi-info-circle"></i> No hay ventas registradas hoy</p>';
                 return;
             }
             
-            console.log(`[TABLA] Procesando ${data.ventas.length} ventas del día`);
+            console.log(`[TABLA] Procesando ${ventasDiaEstado.ventas.length} ventas del día`);
             let html = '<table class="table table-sm table-hover" style="font-size: 0.85rem;">';
             html += '<thead><tr><th>Folio</th><th>Hora</th><th>Total</th><th>Cliente</th></tr></thead><tbody>';
             
-            data.ventas.slice(0, 10).forEach(venta => {
+            ventasDiaEstado.ventas.forEach(venta => {
                 html += `
                     <tr>
                         <td>
@@ -537,8 +616,8 @@ function cargarTablaVentasDia() {
             });
             
             html += '</tbody></table>';
-            if (data.ventas.length > 10) {
-                html += `<p class="text-muted small">Mostrando 10 de ${data.ventas.length} ventas</p>`;
+            if (data.total_ventas > ventasDiaEstado.ventas.length) {
+                html += `<p class="text-muted small">Mostrando ${ventasDiaEstado.ventas.length} de ${data.total_ventas} ventas</p>`;
             }
             console.log('[TABLA] Actualizando HTML de ventas del día...');
             container.innerHTML = html;
@@ -580,10 +659,7 @@ function inicializarMetricas() {
         ventasDia: !!tablaVentasDia
     });
     
-    cargarVentasDelDia();
-    cargarStockBajo();
-    cargarAlertasPendientes();
-    cargarTopProducto();
+    cargarResumenDashboard();
     
     // Cargar tablas detalladas (con un pequeño delay para asegurar que el DOM esté listo)
     setTimeout(() => {
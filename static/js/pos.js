@@ -13,7 +13,7 @@
 // 3. Validación de productos (stock, disponibilidad)
 // 4. Procesamiento de ventas (envío a Django vía AJAX)
 // 5. Gestión de clientes (crear clientes rápidos)
-// 6. Búsqueda y filtrado de productos
+// 6. Búsqueda y filtrado de productos (grilla armada desde el catálogo versionado)
 // 7. Descuentos individuales por producto
 // 8. Generación de comprobantes de venta
 //
@@ -39,6 +39,32 @@ let carrito = [];
 // Tipo de venta seleccionado: 'presencial' o 'delivery'
 let tipoVenta = 'presencial';
 
+// Versión del catálogo de productos que tiene esta pantalla
+// (la entrega api/pos/catalogo/ y se usa para pedir solo los cambios)
+let catalogoVersion = null;
+
+// Último JSON recibido de cada producto del catálogo (id -> texto), para
+// saltar los que el delta repite sin cambios
+let catalogoRecibido = {};
+
+// Cada cuánto se piden los cambios del catálogo (milisegundos)
+const CATALOGO_INTERVALO_MS = 30000;
+
+// Espera después de la última tecla antes de buscar en el servidor (milisegundos)
+const BUSQUEDA_ESPERA_MS = 250;
+
+// Cantidad de productos que muestra la grilla al buscar
+const BUSQUEDA_LIMITE_PRODUCTOS = 50;
+
+// Cola local de ventas pendientes (sobrevive a recargar la página)
+const COLA_VENTAS_KEY = 'pos_ventas_pendientes';
+
+// Ventas de la cola que el servidor rechazó y el cajero debe resolver
+const VENTAS_RECHAZADAS_KEY = 'pos_ventas_rechazadas';
+
+// Cada cuánto se reintentan las ventas pendientes (milisegundos)
+const COLA_VENTAS_INTERVALO_MS = 15000;
+
 // Token CSRF de Django (para seguridad en peticiones AJAX)
 // Lo obtenemos del template HTML
 const csrfToken = document.querySelector('[name=csrfmiddlewaretoken]').value;
@@ -57,6 +83,25 @@ document.addEventListener('DOMContentLoaded', function() {
     actualizarHora();
     setInterval(actualizarHora, 1000);
     
+    // --- Catálogo de productos ---
+    // Cargar la grilla y luego pedir solo los cambios cada cierto tiempo
+    cargarCatalogo();
+    setInterval(actualizarCatalogo, CATALOGO_INTERVALO_MS);
+    
+    // --- Ventas pendientes (cola local) ---
+    // Reintentar al cargar, cada cierto tiempo y cuando vuelve la conexión
+    actualizarIndicadorPendientes();
+    procesarColaVentas();
+    setInterval(procesarColaVentas, COLA_VENTAS_INTERVALO_MS);
+    window.addEventListener('online', procesarColaVentas);
+    
+    // Ventas rechazadas de antes: se muestran apenas se abre el POS
+    document.getElementById('ventas-rechazadas').addEventListener('click', abrirVentasRechazadas);
+    actualizarIndicadorRechazadas();
+    if (leerVentasRechazadas().length > 0) {
+        abrirVentasRechazadas();
+    }
+    
     // --- Botones de Presencial/Delivery ---
     // Asignar eventos a los botones de tipo de venta
     document.getElementById('btn-presencial').addEventListener('click', function() {
@@ -71,9 +116,19 @@ document.addEventListener('DOMContentLoaded', function() {
     // Evento del campo de búsqueda
     const inputBuscar = document.getElementById('input-buscar-producto');
     if (inputBuscar) {
-        inputBuscar.addEventListener('input', function() {
-            filtrarProductos(this.value);
-        });
+        inputBuscar.addEventListener('input', conEspera(function() {
+            filtrarProductos(inputBuscar.value);
+        }));
+    }
+    
+    // --- Buscar clientes ---
+    // El selector de clientes se llena con la búsqueda del servidor
+    const inputBuscarCliente = document.getElementById('input-buscar-cliente');
+    if (inputBuscarCliente) {
+        inputBuscarCliente.addEventListener('input', conEspera(function() {
+            buscarClientes(inputBuscarCliente.value);
+        }));
+        buscarClientes('');
     }
     
     // --- Botón de cancelar venta ---
@@ -953,6 +1008,75 @@ function abrirModalConfirmacion() {
         return;
     }
     
+    // Revalidar TODO el carrito en una sola petición antes de cobrar
+    validarCarritoEnServidor().then(valido => {
+        if (valido) {
+            mostrarModalConfirmacion();
+        }
+    });
+}
+
+
+// ================================================================
+// =         FUNCIÓN: VALIDAR CARRITO EN EL SERVIDOR              =
+// ================================================================
+//
+// Envía todas las líneas del carrito a api/validar-carrito/ y actualiza
+// el stock de cada item con la respuesta. Retorna una promesa con true
+// si se puede continuar al pago.
+//
+// Si no hay conexión se deja continuar: procesar_venta_ajax vuelve a
+// validar todo al registrar la venta.
+
+function validarCarritoEnServidor() {
+    const datos = {
+        carrito: carrito.map(item => ({ producto_id: item.producto_id, cantidad: item.cantidad }))
+    };
+    
+    return fetch('/api/validar-carrito/', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'X-CSRFToken': csrfToken
+        },
+        body: JSON.stringify(datos)
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (!data.success) {
+            mostrarAlerta('error', data.mensaje || 'No se pudo validar el carrito');
+            return false;
+        }
+        
+        // Actualizar el stock conocido de cada item
+        data.lineas.forEach(linea => {
+            const item = carrito.find(i => i.producto_id === linea.producto_id);
+            if (item) {
+                item.stock = linea.stock_vigente;
+            }
+        });
+        renderizarCarrito();
+        
+        if (!data.valido) {
+            const errores = data.lineas.filter(l => !l.disponible).map(l => l.mensaje);
+            mostrarAlerta('error', errores.join(' | '));
+        }
+        return data.valido;
+    })
+    .catch(error => {
+        console.error('Error al validar carrito:', error);
+        return true;
+    });
+}
+
+
+// ================================================================
+// =         FUNCIÓN: MOSTRAR MODAL DE CONFIRMACIÓN               =
+// ================================================================
+//
+// Calcula los totales y abre el modal de pago (el carrito ya fue validado)
+
+function mostrarModalConfirmacion() {
     // Calcular totales actuales (precio ya incluye IVA)
     let totalConIvaIncluido = 0;
     carrito.forEach(item => {
@@ -1113,54 +1237,54 @@ function procesarVenta() {
         carrito: carritoParaEnviar,
         medio_pago: medioPago,
         monto_pagado: montoPagado,
-        descuento: 0  // Descuento global (no lo usamos, solo descuentos individuales)
+        descuento: 0,  // Descuento global (no lo usamos, solo descuentos individuales)
+        // Identifica esta venta: si se reenvía, el servidor no la duplica
+        clave_idempotencia: nuevaClaveVenta(),
+        // Solo para mostrar la venta si queda rechazada (no se envían)
+        detalle: carrito.map(item => ({ nombre: item.nombre, cantidad: item.cantidad })),
+        total_pantalla: total
     };
-    
-    // --- Enviar petición AJAX a Django ---
-    fetch('/api/procesar-venta/', {
-        method: 'POST',
-        headers: {
-            'Content-Type': 'application/json',
-            'X-CSRFToken': csrfToken
-        },
-        body: JSON.stringify(datosVenta)
-    })
-    .then(response => response.json())
-    .then(data => {
-        if (data.success) {
-            // Cerrar el modal
-            const modal = bootstrap.Modal.getInstance(document.getElementById('modal-confirmar-venta'));
-            modal.hide();
-            
-            // Obtener información de la venta procesada
-            const ventaInfo = data.venta || {};
-            const ventaId = ventaInfo.id || data.id;
+    const clave = datosVenta.clave_idempotencia;
+    
+    // --- Guardar en la cola local ANTES de enviar ---
+    // Si se corta la conexión o la BD no responde, la venta no se pierde:
+    // queda en la cola y se reintenta (en orden) con la misma clave
+    agregarAColaVentas(datosVenta);
+    ventaEnPantalla = clave;
+    
+    procesarColaVentas()
+    .then(() => {
+        const resultado = resultadosVentas[clave];
+        delete resultadosVentas[clave];
+        
+        if (!resultado) {
+            // Sigue en la cola: se cierra la venta en pantalla y se enviará después
+            finalizarVentaEnPantalla();
+            mostrarAlerta('warning', 'Sin conexión con el servidor. La venta quedó guardada y se enviará automáticamente.');
+        } else if (resultado.estado === 'sin_sesion') {
+            // También sigue en la cola; se envía al volver a iniciar sesión
+            finalizarVentaEnPantalla();
+            mostrarAlerta('warning', 'La sesión expiró. La venta quedó guardada y se enviará al volver a iniciar sesión.');
+        } else if (resultado.estado === 'ok') {
+            const ventaInfo = resultado.data.venta || {};
+            const ventaId = ventaInfo.id || resultado.data.id;
             const folio = ventaInfo.folio || 'N/A';
             
             // Generar comprobante
             generarComprobante(ventaId, folio, datosVenta);
             
-            // Limpiar carrito
-            carrito = [];
-            renderizarCarrito();
-            actualizarTotales();
-            
-            // Mostrar mensaje de éxito
+            finalizarVentaEnPantalla();
             mostrarAlerta('success', `✓ Venta procesada exitosamente. Folio: ${folio}`);
             
-            // Resetear formulario
-            document.getElementById('select-cliente').value = '';
-            seleccionarTipoVenta('presencial');
+            // Traer el stock actualizado de los productos vendidos
+            actualizarCatalogo();
         } else {
-            // Mostrar error
-            mostrarAlerta('error', data.mensaje || 'Error al procesar la venta');
+            // Rechazada por el servidor (stock, monto, etc.): se puede corregir y reenviar
+            mostrarAlerta('error', resultado.data.mensaje || 'Error al procesar la venta');
         }
     })
-    .catch(error => {
-        console.error('Error:', error);
-        mostrarAlerta('error', 'Error de conexión con el servidor');
-    })
     .finally(() => {
+        ventaEnPantalla = null;
         // Re-habilitar el botón
         btnConfirmar.disabled = false;
         btnConfirmar.textContent = 'Confirmar Venta';
@@ -1168,6 +1292,295 @@ function procesarVenta() {
 }
 
 
+// Cierra el modal y deja el POS listo para la siguiente venta
+function finalizarVentaEnPantalla() {
+    const modal = bootstrap.Modal.getInstance(document.getElementById('modal-confirmar-venta'));
+    if (modal) {
+        modal.hide();
+    }
+    
+    // Limpiar carrito
+    carrito = [];
+    renderizarCarrito();
+    actualizarTotales();
+    
+    // Resetear formulario
+    document.getElementById('select-cliente').value = '';
+    seleccionarTipoVenta('presencial');
+}
+
+
+// ================================================================
+// =          COLA LOCAL DE VENTAS (REINTENTOS SIN DUPLICAR)      =
+// ================================================================
+//
+// Cada venta se guarda en localStorage con su clave de idempotencia antes
+// de enviarse. La cola se envía en orden, de a una venta:
+// - Respuesta OK (o 'repetida': el servidor ya la tenía) -> se quita
+// - Rechazo 4xx (sin stock, cliente inexistente...) -> si es la venta que
+//   el cajero tiene en pantalla, se avisa y puede corregirla. Si venía de
+//   la cola (el cliente ya se fue con los productos) pasa a la lista de
+//   VENTAS RECHAZADAS (localStorage), que no se borra sola: el cajero debe
+//   reintentarla o descartarla desde el modal de ventas rechazadas
+// - Sesión vencida o token CSRF inválido (el servidor redirige al login o
+//   responde HTML en vez de JSON) -> se detiene y se muestra un aviso fijo
+//   para volver a iniciar sesión; la cola queda intacta
+// - Sin conexión o error 5xx -> se detiene y se reintenta más tarde
+//   (reenviarla es seguro: el servidor deduplica por la clave)
+
+// Clave de la venta que el cajero está esperando en el modal
+let ventaEnPantalla = null;
+
+// Resultado de cada venta procesada por la cola (clave -> resultado)
+const resultadosVentas = {};
+
+// Promesa del envío en curso (para no procesar la cola dos veces a la vez)
+let colaEnProceso = null;
+
+function nuevaClaveVenta() {
+    if (window.crypto && crypto.randomUUID) {
+        return crypto.randomUUID();
+    }
+    // Navegadores sin randomUUID (o sin HTTPS): UUID v4 con getRandomValues
+    return ([1e7] + -1e3 + -4e3 + -8e3 + -1e11).replace(/[018]/g, c =>
+        (c ^ crypto.getRandomValues(new Uint8Array(1))[0] & 15 >> c / 4).toString(16)
+    );
+}
+
+function leerColaVentas() {
+    try {
+        return JSON.parse(localStorage.getItem(COLA_VENTAS_KEY)) || [];
+    } catch (error) {
+        return [];
+    }
+}
+
+function guardarColaVentas(cola) {
+    localStorage.setItem(COLA_VENTAS_KEY, JSON.stringify(cola));
+    actualizarIndicadorPendientes();
+}
+
+function agregarAColaVentas(datosVenta) {
+    const cola = leerColaVentas();
+    cola.push(Object.assign({ creada: new Date().toISOString() }, datosVenta));
+    guardarColaVentas(cola);
+}
+
+function quitarDeColaVentas(clave) {
+    guardarColaVentas(leerColaVentas().filter(item => item.clave_idempotencia !== clave));
+}
+
+function actualizarIndicadorPendientes() {
+    const indicador = document.getElementById('ventas-pendientes');
+    if (!indicador) {
+        return;
+    }
+    // La venta que el cajero está esperando no cuenta como pendiente
+    const pendientes = leerColaVentas().filter(item => item.clave_idempotencia !== ventaEnPantalla).length;
+    document.getElementById('ventas-pendientes-cantidad').textContent = pendientes;
+    indicador.classList.toggle('d-none', pendientes === 0);
+}
+
+// Envía una venta y clasifica la respuesta: 'ok', 'rechazada', 'sin_sesion' o 'pendiente'
+function enviarVenta(datosVenta) {
+    const { creada, detalle, total_pantalla, ...datos } = datosVenta;
+    
+    return fetch('/api/procesar-venta/', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'X-CSRFToken': csrfToken
+        },
+        body: JSON.stringify(datos)
+    })
+    .then(response => {
+        if (response.status >= 500) {
+            return { estado: 'pendiente' };
+        }
+        // Sesión vencida: login_required redirige a la página de login (HTML).
+        // Token CSRF inválido: Django responde un 403 en HTML. Ninguno es un
+        // rechazo de la venta, así que no se quita de la cola
+        const tipoContenido = response.headers.get('Content-Type') || '';
+        if (response.redirected || response.status === 401 || !tipoContenido.includes('application/json')) {
+            return { estado: 'sin_sesion' };
+        }
+        return response.json().then(data => ({
+            estado: response.ok && data.success ? 'ok' : 'rechazada',
+            data: data
+        }));
+    })
+    .catch(() => ({ estado: 'pendiente' }));
+}
+
+// Envía las ventas de la cola en orden hasta vaciarla o hasta el primer error transitorio
+function procesarColaVentas() {
+    if (colaEnProceso) {
+        return colaEnProceso;
+    }
+    
+    colaEnProceso = (async () => {
+        while (true) {
+            const cola = leerColaVentas();
+            if (cola.length === 0) {
+                break;
+            }
+            const item = cola[0];
+            const resultado = await enviarVenta(item);
+            if (resultado.estado === 'pendiente') {
+                break;  // Se reintenta en el próximo ciclo, sin saltarse el orden
+            }
+            if (resultado.estado === 'sin_sesion') {
+                mostrarAvisoSesion(true);
+                if (item.clave_idempotencia === ventaEnPantalla) {
+                    resultadosVentas[item.clave_idempotencia] = resultado;
+                }
+                break;  // Nada se enviará hasta volver a iniciar sesión
+            }
+            mostrarAvisoSesion(false);
+            
+            quitarDeColaVentas(item.clave_idempotencia);
+            if (item.clave_idempotencia === ventaEnPantalla) {
+                resultadosVentas[item.clave_idempotencia] = resultado;
+            } else {
+                notificarVentaDeCola(item, resultado);
+            }
+        }
+    })().finally(() => {
+        colaEnProceso = null;
+        actualizarIndicadorPendientes();
+    });
+    return colaEnProceso;
+}
+
+// Avisa el resultado de una venta que se envió desde la cola
+function notificarVentaDeCola(item, resultado) {
+    if (resultado.estado === 'ok') {
+        const folio = (resultado.data.venta || {}).folio || 'N/A';
+        mostrarAlerta('success', `✓ Venta pendiente registrada. Folio: ${folio}`);
+        actualizarCatalogo();
+    } else {
+        // El cliente ya se fue: la venta no se pierde, queda para que el cajero la resuelva
+        console.error('Venta pendiente rechazada:', item, resultado.data);
+        agregarAVentasRechazadas(item, resultado.data.mensaje || 'Error desconocido');
+        mostrarAlerta('error', `Una venta pendiente fue rechazada: ${resultado.data.mensaje || 'error desconocido'}`);
+        if (!document.querySelector('.modal.show')) {
+            abrirVentasRechazadas();
+        }
+    }
+}
+
+// Muestra u oculta el aviso fijo de sesión vencida
+function mostrarAvisoSesion(visible) {
+    const aviso = document.getElementById('aviso-sesion-pos');
+    if (aviso) {
+        aviso.classList.toggle('d-none', !visible);
+    }
+}
+
+
+// ================================================================
+// =          VENTAS RECHAZADAS (PENDIENTES DE RESOLVER)          =
+// ================================================================
+//
+// Ventas de la cola que el servidor rechazó después de que el cliente se
+// llevó los productos. Quedan en localStorage hasta que el cajero las
+// reintenta (por ejemplo, después de corregir el stock) o las descarta.
+
+function leerVentasRechazadas() {
+    try {
+        return JSON.parse(localStorage.getItem(VENTAS_RECHAZADAS_KEY)) || [];
+    } catch (error) {
+        return [];
+    }
+}
+
+function guardarVentasRechazadas(rechazadas) {
+    localStorage.setItem(VENTAS_RECHAZADAS_KEY, JSON.stringify(rechazadas));
+    actualizarIndicadorRechazadas();
+}
+
+function agregarAVentasRechazadas(item, motivo) {
+    const rechazadas = leerVentasRechazadas();
+    rechazadas.push(Object.assign({}, item, { motivo: motivo, rechazada: new Date().toISOString() }));
+    guardarVentasRechazadas(rechazadas);
+}
+
+function actualizarIndicadorRechazadas() {
+    const indicador = document.getElementById('ventas-rechazadas');
+    if (!indicador) {
+        return;
+    }
+    const cantidad = leerVentasRechazadas().length;
+    document.getElementById('ventas-rechazadas-cantidad').textContent = cantidad;
+    indicador.classList.toggle('d-none', cantidad === 0);
+}
+
+// Dibuja la lista del modal de ventas rechazadas
+function dibujarVentasRechazadas() {
+    const contenedor = document.getElementById('lista-ventas-rechazadas');
+    const rechazadas = leerVentasRechazadas();
+    
+    if (rechazadas.length === 0) {
+        contenedor.innerHTML = '<p class="text-muted mb-0">No hay ventas rechazadas.</p>';
+        return;
+    }
+    
+    contenedor.innerHTML = rechazadas.map(venta => {
+        const fecha = new Date(venta.creada).toLocaleString('es-CL');
+        const productos = (venta.detalle || []).map(linea =>
+            `${escaparHtml(linea.nombre)} x ${Number(linea.cantidad)}`
+        ).join(', ') || `${venta.carrito.length} producto(s)`;
+        const total = venta.total_pantalla != null ? `$${Math.round(venta.total_pantalla)}` : '';
+        return `
+            <div class="border rounded p-2 mb-2">
+                <div class="d-flex justify-content-between">
+                    <strong>${fecha}</strong>
+                    <span>${total} &bull; ${escaparHtml(venta.medio_pago)}</span>
+                </div>
+                <div class="small">${productos}</div>
+                <div class="small text-danger mb-2">Motivo: ${escaparHtml(venta.motivo)}</div>
+                <button type="button" class="btn btn-sm btn-warning"
+                    onclick="reintentarVentaRechazada('${venta.clave_idempotencia}')">
+                    <i class="bi bi-arrow-repeat"></i> Reintentar
+                </button>
+                <button type="button" class="btn btn-sm btn-outline-danger"
+                    onclick="descartarVentaRechazada('${venta.clave_idempotencia}')">
+                    <i class="bi bi-trash"></i> Descartar
+                </button>
+            </div>`;
+    }).join('');
+}
+
+function abrirVentasRechazadas() {
+    dibujarVentasRechazadas();
+    bootstrap.Modal.getOrCreateInstance(document.getElementById('modal-ventas-rechazadas')).show();
+}
+
+// Vuelve a poner la venta en la cola (con una clave nueva: la anterior no quedó registrada)
+function reintentarVentaRechazada(clave) {
+    const rechazadas = leerVentasRechazadas();
+    const venta = rechazadas.find(item => item.clave_idempotencia === clave);
+    if (!venta) {
+        return;
+    }
+    guardarVentasRechazadas(rechazadas.filter(item => item.clave_idempotencia !== clave));
+    
+    const { motivo, rechazada, ...datosVenta } = venta;
+    datosVenta.clave_idempotencia = nuevaClaveVenta();
+    agregarAColaVentas(datosVenta);
+    dibujarVentasRechazadas();
+    procesarColaVentas().then(dibujarVentasRechazadas);
+}
+
+function descartarVentaRechazada(clave) {
+    if (!confirm('La venta NO quedará registrada en el sistema. ¿Descartarla de todas formas?')) {
+        return;
+    }
+    guardarVentasRechazadas(leerVentasRechazadas().filter(item => item.clave_idempotencia !== clave));
+    dibujarVentasRechazadas();
+}
+
+
 // ================================================================
 // =              FUNCIÓN: GENERAR COMPROBANTE                    =
 // ================================================================
@@ -1302,28 +1715,285 @@ PRODUCTOS:
 // =              FUNCIÓN: FILTRAR PRODUCTOS                      =
 // ================================================================
 //
-// Filtra los productos mostrados según el texto de búsqueda
+// Filtra los productos mostrados según el texto de búsqueda.
+// La búsqueda se hace en el servidor (api/pos/buscar/productos/), que
+// también encuentra por marca, tipo o código; la grilla muestra solo
+// las tarjetas de los productos encontrados.
 //
 // @param {string} textoBusqueda - Texto ingresado por el usuario
 
+// Número de la última búsqueda enviada (para ignorar respuestas atrasadas)
+let busquedaProductosActual = 0;
+
 function filtrarProductos(textoBusqueda) {
-    // Convertir a minúsculas para búsqueda case-insensitive
-    const busqueda = textoBusqueda.toLowerCase();
-    
-    // Obtener todas las tarjetas de productos
+    const busqueda = textoBusqueda.trim();
     const productos = document.querySelectorAll('.producto-card');
     
-    productos.forEach(card => {
-        // Obtener el nombre del producto
-        const nombreProducto = card.dataset.productoNombre.toLowerCase();
+    // Sin texto: mostrar todos
+    if (!busqueda) {
+        busquedaProductosActual++;
+        productos.forEach(card => card.parentElement.style.display = '');
+        return;
+    }
+    
+    const numeroBusqueda = ++busquedaProductosActual;
+    const url = document.getElementById('input-buscar-producto').dataset.buscarUrl;
+    
+    fetch(`${url}?q=${encodeURIComponent(busqueda)}&limite=${BUSQUEDA_LIMITE_PRODUCTOS}`)
+        .then(response => response.json())
+        .then(data => {
+            if (numeroBusqueda !== busquedaProductosActual) {
+                return;  // Llegó la respuesta de una búsqueda anterior
+            }
+            const encontrados = new Set(data.resultados.map(p => String(p.id)));
+            document.querySelectorAll('.producto-card').forEach(card => {
+                card.parentElement.style.display = encontrados.has(card.dataset.productoId) ? '' : 'none';
+            });
+        })
+        .catch(error => {
+            // Sin conexión: filtrar por nombre con los productos que ya están en pantalla
+            console.error('Error:', error);
+            const texto = busqueda.toLowerCase();
+            document.querySelectorAll('.producto-card').forEach(card => {
+                const coincide = card.dataset.productoNombre.toLowerCase().includes(texto);
+                card.parentElement.style.display = coincide ? '' : 'none';
+            });
+        });
+}
+
+
+// ================================================================
+// =              FUNCIÓN: BUSCAR CLIENTES                        =
+// ================================================================
+//
+// Llena el selector de clientes con los resultados de la búsqueda
+// (api/pos/buscar/clientes/) por nombre o RUT. El cliente que ya estaba
+// seleccionado se mantiene aunque no aparezca en los resultados.
+//
+// @param {string} textoBusqueda - Texto ingresado por el usuario
+
+let busquedaClientesActual = 0;
+
+function buscarClientes(textoBusqueda) {
+    const input = document.getElementById('input-buscar-cliente');
+    const numeroBusqueda = ++busquedaClientesActual;
+    
+    fetch(`${input.dataset.buscarUrl}?q=${encodeURIComponent(textoBusqueda.trim())}`)
+        .then(response => response.json())
+        .then(data => {
+            if (numeroBusqueda !== busquedaClientesActual || !data.success) {
+                return;
+            }
+            const select = document.getElementById('select-cliente');
+            const seleccionado = select.selectedIndex > 0 ? select.options[select.selectedIndex] : null;
+            
+            // Dejar solo la opción vacía (y la seleccionada, si hay)
+            Array.from(select.options).forEach((opcion, indice) => {
+                if (indice > 0 && opcion !== seleccionado) {
+                    opcion.remove();
+                }
+            });
+            
+            data.resultados.forEach(cliente => {
+                if (seleccionado && seleccionado.value === String(cliente.id)) {
+                    return;
+                }
+                const opcion = document.createElement('option');
+                opcion.value = cliente.id;
+                opcion.textContent = cliente.rut ? `${cliente.nombre} - ${cliente.rut}` : cliente.nombre;
+                select.appendChild(opcion);
+            });
+            
+            // Si se escribió algo y hay un único resultado, seleccionarlo
+            if (textoBusqueda.trim() && !seleccionado && data.resultados.length === 1) {
+                select.value = String(data.resultados[0].id);
+            }
+        })
+        .catch(error => console.error('Error al buscar clientes:', error));
+}
+
+
+// Retorna una función que ejecuta `funcion` solo cuando el usuario deja
+// de escribir por BUSQUEDA_ESPERA_MS (evita una petición por tecla)
+function conEspera(funcion) {
+    let temporizador = null;
+    return function() {
+        clearTimeout(temporizador);
+        temporizador = setTimeout(funcion, BUSQUEDA_ESPERA_MS);
+    };
+}
+
+
+// ================================================================
+// =          CATÁLOGO DE PRODUCTOS (VERSIONADO)                  =
+// ================================================================
+//
+// La grilla de productos se arma con el JSON de api/pos/catalogo/:
+// - Al cargar la página se pide el catálogo completo (servido desde caché)
+// - Luego se pide ?since=<versión> y solo llegan los productos que cambiaron
+//   (los que ya no se pueden vender vienen con disponible = false)
+// - El delta repite a propósito los productos de los últimos segundos (ver
+//   catalogo_pos.py); los que llegan iguales a lo ya recibido se saltan
+
+function urlCatalogo() {
+    return document.getElementById('productos-grid').dataset.catalogoUrl;
+}
+
+function escaparHtml(texto) {
+    const div = document.createElement('div');
+    div.textContent = texto == null ? '' : String(texto);
+    return div.innerHTML;
+}
+
+// Construye la columna (div.col) con la tarjeta de un producto del catálogo
+function crearTarjetaProducto(producto) {
+    const col = document.createElement('div');
+    col.className = 'col';
+    
+    const stock = producto.unidad_stock === 'unidad'
+        ? Number(producto.stock).toFixed(0)
+        : Number(producto.stock).toFixed(3);
+    const marcaTipo = [producto.marca, producto.tipo].filter(Boolean).map(escaparHtml).join(' &bull; ');
+    
+    col.innerHTML = `
+        <div class="producto-card" data-producto-id="${producto.id}"
+            data-producto-nombre="${escaparHtml(producto.nombre)}"
+            data-producto-precio="${Number(producto.precio).toFixed(2)}"
+            data-producto-precio-original="${producto.precio}"
+            data-producto-stock="${producto.stock}"
+            data-producto-unidad-venta="${escaparHtml(producto.unidad_venta)}"
+            data-producto-unidad-stock="${escaparHtml(producto.unidad_stock)}">
+            <div class="producto-nombre text-truncate" title="${escaparHtml(producto.nombre)}">
+                ${escaparHtml(producto.nombre)}
+            </div>
+            ${marcaTipo ? `<div class="text-muted small mb-2">${marcaTipo}</div>` : ''}
+            <div class="producto-precio">
+                $${Math.round(producto.precio)}
+                <small class="text-muted">/ ${escaparHtml(producto.unidad_venta_nombre)}</small>
+            </div>
+            <div class="producto-stock">
+                <small class="text-muted">
+                    <i class="bi bi-box-seam"></i> Stock: ${stock} ${escaparHtml(producto.unidad_stock_nombre)}
+                </small>
+            </div>
+            <button type="button" class="btn-agregar-producto" onclick="agregarAlCarrito(${producto.id})">
+                <i class="bi bi-cart-plus"></i> Agregar
+            </button>
+        </div>`;
+    return col;
+}
+
+// Muestra el mensaje de "sin productos" si la grilla quedó vacía
+function actualizarMensajeSinProductos() {
+    const grid = document.getElementById('productos-grid');
+    let mensaje = document.getElementById('productos-vacio');
+    const hayProductos = grid.querySelector('.producto-card') !== null;
+    
+    if (!hayProductos && !mensaje) {
+        mensaje = document.createElement('div');
+        mensaje.className = 'col-12';
+        mensaje.id = 'productos-vacio';
+        mensaje.innerHTML = `
+            <div class="alert alert-info text-center">
+                <i class="bi bi-exclamation-circle"></i>
+                No hay productos disponibles en este momento.
+            </div>`;
+        grid.appendChild(mensaje);
+    } else if (hayProductos && mensaje) {
+        mensaje.remove();
+    }
+}
+
+// Pide el catálogo completo y dibuja la grilla desde cero
+function cargarCatalogo() {
+    fetch(urlCatalogo())
+        .then(response => response.json())
+        .then(data => {
+            if (!data.success) {
+                throw new Error(data.mensaje || 'Error al cargar productos');
+            }
+            const grid = document.getElementById('productos-grid');
+            const fragmento = document.createDocumentFragment();
+            data.productos.forEach(producto => fragmento.appendChild(crearTarjetaProducto(producto)));
+            grid.innerHTML = '';
+            grid.appendChild(fragmento);
+            catalogoVersion = data.version;
+            catalogoRecibido = {};
+            data.productos.forEach(producto => {
+                catalogoRecibido[producto.id] = JSON.stringify(producto);
+            });
+            
+            actualizarMensajeSinProductos();
+            filtrarProductos(document.getElementById('input-buscar-producto').value || '');
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            mostrarAlerta('error', 'No se pudo cargar el catálogo de productos');
+        });
+}
+
+// Pide solo los productos que cambiaron desde la última versión recibida
+function actualizarCatalogo() {
+    if (catalogoVersion === null) {
+        return;  // Todavía no termina la carga inicial
+    }
+    
+    fetch(`${urlCatalogo()}?since=${catalogoVersion}`)
+        .then(response => response.json())
+        .then(data => {
+            if (data.success) {
+                aplicarCambiosCatalogo(data.productos);
+                catalogoVersion = data.version;
+            }
+        })
+        .catch(error => console.error('Error al actualizar catálogo:', error));
+}
+
+// Reemplaza, agrega o quita las tarjetas de los productos que cambiaron
+function aplicarCambiosCatalogo(productos) {
+    if (!productos.length) {
+        return;
+    }
+    const grid = document.getElementById('productos-grid');
+    
+    productos.forEach(producto => {
+        // Repetido por el solapamiento del delta y sin cambios: nada que hacer
+        const recibido = JSON.stringify(producto);
+        if (catalogoRecibido[producto.id] === recibido) {
+            return;
+        }
+        catalogoRecibido[producto.id] = recibido;
         
-        // Mostrar u ocultar según coincidencia
-        if (nombreProducto.includes(busqueda)) {
-            card.parentElement.style.display = '';  // Mostrar
+        const cardActual = grid.querySelector(`.producto-card[data-producto-id="${producto.id}"]`);
+        
+        if (!producto.disponible) {
+            if (cardActual) {
+                cardActual.parentElement.remove();
+            }
+        } else if (cardActual) {
+            cardActual.parentElement.replaceWith(crearTarjetaProducto(producto));
         } else {
-            card.parentElement.style.display = 'none';  // Ocultar
+            // Insertar respetando el orden alfabético de la grilla
+            const nueva = crearTarjetaProducto(producto);
+            const siguiente = Array.from(grid.querySelectorAll('.producto-card')).find(
+                card => card.dataset.productoNombre.localeCompare(producto.nombre) > 0
+            );
+            if (siguiente) {
+                grid.insertBefore(nueva, siguiente.parentElement);
+            } else {
+                grid.appendChild(nueva);
+            }
+        }
+        
+        // Mantener al día el stock de los productos que ya están en el carrito
+        const item = carrito.find(i => i.producto_id === producto.id);
+        if (item) {
+            item.stock = producto.disponible ? producto.stock : 0;
         }
     });
+    
+    actualizarMensajeSinProductos();
+    filtrarProductos(document.getElementById('input-buscar-producto').value || '');
 }
 
 
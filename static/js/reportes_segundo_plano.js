@@ -0,0 +1,178 @@
+/*
+================================================================
+=                                                              =
+=        REPORTES EN SEGUNDO PLANO (EXCEL / PDF / CSV)         =
+=                                                              =
+================================================================
+
+Los botones con la clase .btn-reporte-segundo-plano piden la exportación
+al servidor en vez de descargarla directamente. El reporte se genera
+aparte (comando procesar_reportes) y aquí se muestra su avance y el enlace
+de descarga cuando está listo.
+
+Atributos de cada botón:
+- data-reporte: ventas | inventario | top_productos
+- data-formato: excel | pdf | csv
+- data-tipo (opcional): tipo de ranking de top productos
+
+Los filtros son los mismos de la página (parámetros de la URL actual).
+*/
+
+// Cada cuánto se consulta el avance mientras haya reportes en preparación
+const REPORTES_INTERVALO_MS = 3000;
+let reportesTemporizador = null;
+
+const REPORTES_NOMBRES = {
+    ventas: 'Ventas',
+    inventario: 'Inventario',
+    top_productos: 'Top productos'
+};
+
+/**
+ * Obtiene el valor de una cookie (para el token CSRF)
+ */
+function reportesGetCookie(name) {
+    let cookieValue = null;
+    if (document.cookie && document.cookie !== '') {
+        const cookies = document.cookie.split(';');
+        for (let i = 0; i < cookies.length; i++) {
+            const cookie = cookies[i].trim();
+            if (cookie.substring(0, name.length + 1) === (name + '=')) {
+                cookieValue = decodeURIComponent(cookie.substring(name.length + 1));
+                break;
+            }
+        }
+    }
+    return cookieValue;
+}
+
+/**
+ * Pide generar un reporte en segundo plano
+ */
+function solicitarReporte(boton) {
+    const formData = new FormData();
+    formData.append('reporte', boton.dataset.reporte);
+    formData.append('formato', boton.dataset.formato);
+    if (boton.dataset.tipo) {
+        formData.append('tipo', boton.dataset.tipo);
+    }
+
+    // Filtros actuales de la página
+    new URLSearchParams(window.location.search).forEach((valor, nombre) => {
+        if (nombre !== 'generar' && valor !== '') {
+            formData.append(nombre, valor);
+        }
+    });
+
+    boton.disabled = true;
+    fetch('/api/reportes/trabajos/solicitar/', {
+        method: 'POST',
+        headers: {
+            'X-CSRFToken': reportesGetCookie('csrftoken')
+        },
+        body: formData
+    })
+        .then(response => response.json())
+        .then(data => {
+            if (!data.success) {
+                mostrarMensajeReportes(data.mensaje, 'danger');
+                return;
+            }
+            mostrarMensajeReportes(data.mensaje, 'info');
+            cargarMisReportes();
+        })
+        .catch(error => {
+            console.error('Error al solicitar el reporte:', error);
+            mostrarMensajeReportes('Error de conexión. Intenta nuevamente.', 'danger');
+        })
+        .finally(() => {
+            boton.disabled = false;
+        });
+}
+
+/**
+ * Muestra un mensaje breve sobre la lista de reportes
+ */
+function mostrarMensajeReportes(mensaje, tipo) {
+    const contenedor = document.getElementById('reportes-segundo-plano-mensaje');
+    if (!contenedor) {
+        return;
+    }
+    contenedor.innerHTML = `<div class="alert alert-${tipo} py-2 mb-2">${mensaje}</div>`;
+    setTimeout(() => {
+        contenedor.innerHTML = '';
+    }, 5000);
+}
+
+/**
+ * Carga los últimos reportes del usuario y sigue consultando mientras
+ * alguno esté en preparación
+ */
+function cargarMisReportes() {
+    const contenedor = document.getElementById('reportes-segundo-plano');
+    if (!contenedor) {
+        return;
+    }
+
+    fetch('/api/reportes/trabajos/')
+        .then(response => response.json())
+        .then(data => {
+            dibujarMisReportes(contenedor, data.trabajos || []);
+
+            const enPreparacion = (data.trabajos || []).some(
+                trabajo => trabajo.estado === 'pendiente' || trabajo.estado === 'procesando'
+            );
+            clearTimeout(reportesTemporizador);
+            if (enPreparacion) {
+                reportesTemporizador = setTimeout(cargarMisReportes, REPORTES_INTERVALO_MS);
+            }
+        })
+        .catch(error => {
+            console.error('Error al cargar los reportes:', error);
+        });
+}
+
+/**
+ * Dibuja la lista de reportes con su avance o enlace de descarga
+ */
+function dibujarMisReportes(contenedor, trabajos) {
+    if (trabajos.length === 0) {
+        contenedor.innerHTML = '';
+        return;
+    }
+
+    let html = '<div class="card"><div class="card-body py-2">';
+    html += '<h6 class="mb-2"><i class="bi bi-hourglass-split"></i> Reportes en segundo plano</h6>';
+    html += '<ul class="list-unstyled mb-0">';
+
+    trabajos.forEach(trabajo => {
+        const nombre = `${REPORTES_NOMBRES[trabajo.reporte] || trabajo.reporte} (${trabajo.formato.toUpperCase()})`;
+        let estado = '';
+        if (trabajo.url_descarga) {
+            estado = `<a href="${trabajo.url_descarga}" class="btn btn-sm btn-success">
+                          <i class="bi bi-download"></i> Descargar
+                      </a>
+                      <small class="text-muted">disponible hasta ${trabajo.expira}</small>`;
+        } else if (trabajo.estado === 'pendiente' || trabajo.estado === 'procesando') {
+            estado = `<div class="progress d-inline-flex align-middle" style="width: 150px; height: 18px;">
+                          <div class="progress-bar progress-bar-striped progress-bar-animated"
+                               style="width: ${trabajo.progreso}%">${trabajo.progreso}%</div>
+                      </div>`;
+        } else if (trabajo.estado === 'error') {
+            estado = `<span class="text-danger">${trabajo.error}</span>`;
+        } else {
+            estado = '<span class="text-muted">Expirado</span>';
+        }
+        html += `<li class="mb-1">${nombre} <small class="text-muted">${trabajo.creado}</small> ${estado}</li>`;
+    });
+
+    html += '</ul></div></div>';
+    contenedor.innerHTML = html;
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+    document.querySelectorAll('.btn-reporte-segundo-plano').forEach(boton => {
+        boton.addEventListener('click', () => solicitarReporte(boton));
+    });
+    cargarMisReportes();
+});
@@ -0,0 +1,210 @@
+"""
+Prueba de estrés: ventas concurrentes desde varios terminales POS.
+
+Lanza cientos de ventas simultáneas (varios hilos, cada uno con su propia
+conexión a MySQL) sobre unos pocos productos con poco stock, mezcladas con
+recepciones de lotes nuevos de esos mismos productos, y verifica que:
+- Ningún lote queda con cantidad negativa
+- Lo vendido (detalle_venta) coincide exactamente con lo descontado de los lotes
+  (más lo recibido)
+- No hay deadlocks (los lotes se bloquean siempre en orden de id)
+- El stock precalculado (stock_producto) es igual a la suma de los lotes,
+  aunque una recepción y una venta cambien a la vez lotes distintos del
+  mismo producto
+- El outbox generó el historial de boletas de cada venta
+
+Los eventos del outbox se procesan al final con procesar_pendientes() (modo
+'comando'), para que la limpieza no compita con los hilos del outbox.
+
+Usa la base de datos local configurada en .env y elimina todos los datos
+de prueba al terminar.
+
+Ejecutar con: python test_concurrencia_ventas.py
+"""
+
+import os
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Forneria.settings')
+django.setup()
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction, OperationalError
+from django.db.models import Sum
+from django.utils import timezone
+
+from ventas.models import (
+    Productos, Lote, Clientes, Ventas, DetalleVenta, MovimientosInventario, HistorialBoletas,
+    EventoOutbox, StockProducto, VentasResumenDiario, Alertas
+)
+from ventas.funciones import outbox
+from ventas.funciones.checkout import registrar_venta, normalizar_carrito, VentaInvalidaError
+from ventas.funciones.resumen_ventas import reconstruir_resumen
+from ventas.funciones.stock_productos import sumar_lotes
+
+# Los eventos se procesan al final con procesar_pendientes(), no en hilos
+outbox.OUTBOX_MODO = 'comando'
+
+N_VENTAS = 300          # Ventas a disparar en total
+N_HILOS = 16            # Terminales POS simultáneos
+N_PRODUCTOS = 4         # Productos en disputa
+LOTES_POR_PRODUCTO = 3
+STOCK_POR_LOTE = Decimal('40')
+RECEPCION_CADA = 10     # Una recepción de lote cada N ventas
+STOCK_POR_RECEPCION = Decimal('15')
+
+resultados = {'ok': 0, 'sin_stock': 0, 'deadlock': 0, 'error': 0, 'recepciones': 0}
+lock_resultados = threading.Lock()
+
+
+def contar(clave):
+    with lock_resultados:
+        resultados[clave] += 1
+
+
+def diferencias_stock(producto_ids):
+    """Productos cuyo stock_producto no coincide con la suma de sus lotes."""
+    reales = sumar_lotes(producto_ids)
+    guardadas = {
+        (f.productos_id, f.estado): (f.cantidad, f.lotes, f.lotes_con_stock)
+        for f in StockProducto.objects.filter(productos_id__in=producto_ids)
+    }
+    return sorted({
+        clave[0] for clave in set(reales) | set(guardadas)
+        if reales.get(clave, (0, 0, 0)) != guardadas.get(clave, (0, 0, 0))
+    })
+
+
+def vender(cliente, productos):
+    """Ejecuta una venta aleatoria de 1 a 3 productos (corre en un hilo)."""
+    try:
+        elegidos = random.sample(productos, random.randint(1, min(3, len(productos))))
+        carrito = [
+            {'producto_id': p.id, 'cantidad': random.randint(1, 5), 'precio_unitario': 1000, 'descuento': 0}
+            for p in elegidos
+        ]
+        registrar_venta(
+            cliente=cliente,
+            lineas=normalizar_carrito(carrito),
+            canal_venta='presencial',
+            medio_pago='efectivo',
+            monto_pagado=Decimal('100000'),
+            descuento_global=Decimal('0'),
+            usuario_emisor='test_concurrencia',
+        )
+        contar('ok')
+    except VentaInvalidaError:
+        contar('sin_stock')
+    except OperationalError as e:
+        # 1213 = deadlock, 1205 = lock wait timeout
+        contar('deadlock' if e.args and e.args[0] in (1213, 1205) else 'error')
+    except Exception as e:
+        print(f"❌ Error inesperado: {e}")
+        contar('error')
+    finally:
+        connection.close()
+
+
+def recibir(producto, numero):
+    """Recibe un lote nuevo del producto, como la recepción de una factura (corre en un hilo)."""
+    try:
+        with transaction.atomic():
+            Lote.objects.create(
+                productos=producto,
+                numero_lote=f'PRUEBA-CONC-{numero}',
+                cantidad=STOCK_POR_RECEPCION,
+                cantidad_inicial=STOCK_POR_RECEPCION,
+                fecha_caducidad=date.today() + timedelta(days=5),
+                origen='compra',
+            )
+        contar('recepciones')
+    except OperationalError as e:
+        contar('deadlock' if e.args and e.args[0] in (1213, 1205) else 'error')
+    except Exception as e:
+        print(f"❌ Error inesperado en recepción: {e}")
+        contar('error')
+    finally:
+        connection.close()
+
+
+cliente = Clientes.objects.create(nombre='Cliente prueba concurrencia')
+productos = []
+for i in range(N_PRODUCTOS):
+    producto = Productos.objects.create(
+        nombre=f'Producto prueba concurrencia {i + 1}',
+        precio=Decimal('1000'),
+        precio_por_unidad_venta=Decimal('1000'),
+        cantidad=STOCK_POR_LOTE * LOTES_POR_PRODUCTO,
+        caducidad=date.today() + timedelta(days=1),
+    )
+    for j in range(LOTES_POR_PRODUCTO):
+        Lote.objects.create(
+            productos=producto,
+            cantidad=STOCK_POR_LOTE,
+            cantidad_inicial=STOCK_POR_LOTE,
+            fecha_caducidad=date.today() + timedelta(days=j + 1),
+        )
+    productos.append(producto)
+
+stock_inicial = STOCK_POR_LOTE * LOTES_POR_PRODUCTO * N_PRODUCTOS
+producto_ids = [p.id for p in productos]
+dia_inicio = timezone.localdate()
+print(f"Disparando {N_VENTAS} ventas con {N_HILOS} hilos sobre {N_PRODUCTOS} productos (stock total: {stock_inicial})")
+
+try:
+    with ThreadPoolExecutor(max_workers=N_HILOS) as pool:
+        for i in range(N_VENTAS):
+            pool.submit(vender, cliente, productos)
+            if i % RECEPCION_CADA == 0:
+                pool.submit(recibir, random.choice(productos), i)
+
+    eventos = outbox.procesar_pendientes()
+    print(f"Eventos del outbox procesados: {eventos}")
+
+    lotes_negativos = Lote.objects.filter(productos_id__in=producto_ids, cantidad__lt=0).count()
+    stock_final = Lote.objects.filter(productos_id__in=producto_ids).aggregate(t=Sum('cantidad'))['t'] or Decimal('0')
+    recibido = STOCK_POR_RECEPCION * resultados['recepciones']
+    vendido = DetalleVenta.objects.filter(productos_id__in=producto_ids).aggregate(t=Sum('cantidad'))['t'] or 0
+    stock_distinto = diferencias_stock(producto_ids)
+    sin_historial = Ventas.objects.filter(clientes=cliente).exclude(
+        id__in=HistorialBoletas.objects.values('venta_id')
+    ).count()
+
+    print(f"Ventas exitosas: {resultados['ok']} | Rechazadas por stock: {resultados['sin_stock']} | "
+          f"Recepciones: {resultados['recepciones']} | Deadlocks: {resultados['deadlock']} | "
+          f"Errores: {resultados['error']}")
+    print(f"Stock inicial: {stock_inicial} | Recibido: {recibido} | Vendido: {vendido} | "
+          f"Stock final en lotes: {stock_final}")
+
+    print(f"{'✅' if lotes_negativos == 0 else '❌'} Lotes con cantidad negativa: {lotes_negativos}")
+    print(f"{'✅' if stock_inicial + recibido - Decimal(vendido) == stock_final else '❌'} "
+          f"Vendido + stock final = stock inicial + recibido")
+    print(f"{'✅' if resultados['deadlock'] == 0 else '❌'} Sin deadlocks")
+    print(f"{'✅' if not stock_distinto else '❌'} stock_producto = suma de lotes"
+          f"{'' if not stock_distinto else f' (distintos: {stock_distinto})'}")
+    print(f"{'✅' if sin_historial == 0 else '❌'} Ventas sin historial de boleta: {sin_historial}")
+finally:
+    # Limpiar: eliminar todos los datos de prueba
+    venta_ids = list(Ventas.objects.filter(clientes=cliente).values_list('id', flat=True))
+    EventoOutbox.objects.filter(tipo=outbox.TIPO_VENTA_REGISTRADA, referencia_id__in=venta_ids).delete()
+    HistorialBoletas.objects.filter(venta_id__in=venta_ids).delete()
+    DetalleVenta.objects.filter(ventas_id__in=venta_ids).delete()
+    MovimientosInventario.objects.filter(productos_id__in=producto_ids).delete()
+    Ventas.objects.filter(id__in=venta_ids).delete()
+    Lote.objects.filter(productos_id__in=producto_ids).delete()
+    # Eventos de stock que generó el borrado de los lotes, incluidos
+    EventoOutbox.objects.filter(tipo=outbox.TIPO_STOCK_MODIFICADO, referencia_id__in=producto_ids).delete()
+    StockProducto.objects.filter(productos_id__in=producto_ids).delete()
+    Alertas.objects.filter(productos_id__in=producto_ids).delete()
+    VentasResumenDiario.objects.filter(productos_id__in=producto_ids).delete()
+    Productos.objects.filter(id__in=producto_ids).delete()
+    cliente.delete()
+    # Los totales del día (filas sin producto) incluían las ventas de prueba
+    reconstruir_resumen(dia_inicio, timezone.localdate())
+    print("\n🧹 Datos de prueba eliminados")
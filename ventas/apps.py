@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class VentasConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ventas'
+
+    def ready(self):
+        # Registrar las señales (catálogo versionado del POS)
+        from ventas import signals  # noqa: F401
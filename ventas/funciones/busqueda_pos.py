@@ -0,0 +1,290 @@
+# ================================================================
+# =                                                              =
+# =      BÚSQUEDA RÁPIDA (TYPEAHEAD) DE PRODUCTOS Y CLIENTES     =
+# =                                                              =
+# ================================================================
+#
+# Este archivo implementa la búsqueda por prefijo que usa el POS para
+# encontrar productos y clientes mientras el cajero escribe.
+#
+# PROBLEMA QUE RESUELVE:
+# El POS enviaba la lista completa de clientes en el HTML y filtraba en
+# pos.js; con miles de clientes la página pesaba cada vez más.
+#
+# ESTRATEGIA:
+# - Cada proceso mantiene un ÍNDICE DE PREFIJOS en memoria por tabla: una
+#   lista ordenada de palabras normalizadas (sin tildes, minúsculas) con el
+#   id al que pertenecen. Buscar un prefijo es una búsqueda binaria (bisect),
+#   sin recorrer la tabla
+# - Se indexan: productos por nombre, marca, tipo y código (id); clientes
+#   por nombre y RUT (sin puntos ni guión, así "12345" encuentra "12.345.678-9")
+# - Cuando un producto o cliente se guarda o elimina (ventas/signals.py) se
+#   incrementa la GENERACIÓN del índice en la caché y cada proceso lo
+#   reconstruye en la siguiente búsqueda. Además el índice se reconstruye si
+#   tiene más de BUSQUEDA_INDICE_MAX_SEGUNDOS (por si la caché es local)
+# - El índice solo guarda texto: los datos que se retornan (stock, precio)
+#   se leen de la BD por clave primaria, siempre actualizados
+
+from bisect import bisect_left
+import re
+import threading
+import time
+import unicodedata
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from ventas.models import Productos, Clientes
+
+# Segundos máximos que un proceso usa un índice sin reconstruirlo
+BUSQUEDA_INDICE_MAX_SEGUNDOS = getattr(settings, 'BUSQUEDA_INDICE_MAX_SEGUNDOS', 300)
+
+# Límite de resultados por página (el POS pide pocos, es un typeahead)
+LIMITE_POR_DEFECTO = 20
+LIMITE_MAXIMO = 50
+
+# Máximo de candidatos que se verifican en la BD por búsqueda
+MAX_CANDIDATOS = 500
+
+_SEPARADORES = re.compile(r'[^0-9a-z]+')
+
+
+def normalizar(texto):
+    """Pasa el texto a minúsculas y sin tildes (ej: 'Pañuelo Ácido' -> 'panuelo acido')."""
+    texto = unicodedata.normalize('NFKD', str(texto or '').lower())
+    return ''.join(c for c in texto if not unicodedata.combining(c))
+
+
+def _palabras(texto):
+    """Divide un texto normalizado en palabras alfanuméricas."""
+    return [p for p in _SEPARADORES.split(normalizar(texto)) if p]
+
+
+def _compactar_codigo(texto):
+    """Quita puntos, guiones y espacios de un RUT o código (ej: '12.345.678-9' -> '123456789')."""
+    return re.sub(r'[\s.\-]', '', normalizar(texto))
+
+
+def palabras_consulta(consulta):
+    """
+    Convierte lo que escribió el cajero en prefijos a buscar.
+
+    Las palabras con dígitos se compactan (un RUT escrito con puntos y guión
+    es un solo prefijo); el resto se divide igual que al indexar.
+    """
+    prefijos = []
+    for palabra in str(consulta or '').split():
+        if any(c.isdigit() for c in palabra):
+            compacta = _compactar_codigo(palabra)
+            if compacta:
+                prefijos.append(compacta)
+        else:
+            prefijos.extend(_palabras(palabra))
+    return prefijos
+
+
+class IndicePrefijos:
+    """
+    Índice de prefijos en memoria: (palabra, id) ordenados alfabéticamente.
+
+    Cada id también tiene una posición de orden (por nombre) para que los
+    resultados salgan en el mismo orden que el resto del POS.
+    """
+
+    def __init__(self, registros):
+        """
+        Args:
+            registros (iterable): Tuplas (id, [palabras]) ya ordenadas por nombre
+        """
+        entradas = []
+        self.orden = {}
+        for posicion, (registro_id, palabras) in enumerate(registros):
+            self.orden[registro_id] = posicion
+            for palabra in set(palabras):
+                entradas.append((palabra, registro_id))
+        entradas.sort()
+        self._palabras = [e[0] for e in entradas]
+        self._ids = [e[1] for e in entradas]
+
+    def _ids_con_prefijo(self, prefijo):
+        """Retorna el conjunto de ids que tienen alguna palabra que empieza con `prefijo`."""
+        inicio = bisect_left(self._palabras, prefijo)
+        fin = bisect_left(self._palabras, prefijo + '\uffff', lo=inicio)
+        return set(self._ids[inicio:fin])
+
+    def buscar(self, prefijos):
+        """
+        Busca los ids que cumplen TODOS los prefijos (ej: 'pan int' -> 'Pan Integral').
+
+        Returns:
+            list: Ids ordenados por nombre (todos los registros si no hay prefijos)
+        """
+        if not prefijos:
+            return sorted(self.orden, key=self.orden.get)
+
+        # Empezar por el prefijo más largo (el que suele dar menos candidatos)
+        prefijos = sorted(set(prefijos), key=len, reverse=True)
+        ids = self._ids_con_prefijo(prefijos[0])
+        for prefijo in prefijos[1:]:
+            if not ids:
+                break
+            ids &= self._ids_con_prefijo(prefijo)
+        return sorted(ids, key=self.orden.get)
+
+
+# ================================================================
+# =              ÍNDICES POR TABLA (UNO POR PROCESO)             =
+# ================================================================
+
+def _registros_productos():
+    productos = Productos.objects.filter(eliminado__isnull=True).order_by('nombre').values_list(
+        'id', 'nombre', 'marca', 'tipo'
+    )
+    for producto_id, nombre, marca, tipo in productos:
+        yield producto_id, _palabras(nombre) + _palabras(marca) + _palabras(tipo) + [str(producto_id)]
+
+
+def _registros_clientes():
+    for cliente_id, nombre, rut in Clientes.objects.order_by('nombre').values_list('id', 'nombre', 'rut'):
+        palabras = _palabras(nombre)
+        if rut:
+            palabras.append(_compactar_codigo(rut))
+        yield cliente_id, palabras
+
+
+_CONSTRUCTORES = {
+    'productos': _registros_productos,
+    'clientes': _registros_clientes,
+}
+
+_indices = {}
+_lock = threading.Lock()
+
+
+def _clave_generacion(tabla):
+    return f'pos:busqueda:generacion:{tabla}'
+
+
+def _vigente(actual, generacion):
+    """Indica si el índice construido sigue sirviendo (misma generación y no muy antiguo)."""
+    return (
+        actual is not None
+        and actual['generacion'] == generacion
+        and time.monotonic() - actual['creado'] < BUSQUEDA_INDICE_MAX_SEGUNDOS
+    )
+
+
+def obtener_indice(tabla):
+    """
+    Retorna el índice de la tabla ('productos' o 'clientes'), reconstruyéndolo si cambió.
+    """
+    generacion = cache.get(_clave_generacion(tabla))
+    if generacion is None:
+        generacion = 0
+        cache.add(_clave_generacion(tabla), generacion, None)
+
+    actual = _indices.get(tabla)
+    if _vigente(actual, generacion):
+        return actual['indice']
+
+    with _lock:
+        actual = _indices.get(tabla)
+        if _vigente(actual, generacion):
+            return actual['indice']
+        indice = IndicePrefijos(_CONSTRUCTORES[tabla]())
+        _indices[tabla] = {'indice': indice, 'generacion': generacion, 'creado': time.monotonic()}
+        return indice
+
+
+def invalidar_indice(tabla):
+    """
+    Marca el índice de la tabla como desactualizado (al confirmar la transacción).
+
+    Args:
+        tabla (str): 'productos' o 'clientes'
+    """
+    def _incrementar():
+        try:
+            cache.incr(_clave_generacion(tabla))
+        except ValueError:
+            # La clave no existía (caché recién iniciada)
+            cache.set(_clave_generacion(tabla), 1, None)
+    transaction.on_commit(_incrementar)
+
+
+def _paginar(ids, pagina, limite):
+    inicio = (pagina - 1) * limite
+    return ids[inicio:inicio + limite], len(ids) > inicio + limite
+
+
+# ================================================================
+# =                   BÚSQUEDAS PARA EL POS                      =
+# ================================================================
+
+def buscar_productos(consulta, pagina=1, limite=LIMITE_POR_DEFECTO):
+    """
+    Busca productos a la venta por nombre, marca, tipo o código.
+
+    Args:
+        consulta (str): Texto escrito por el cajero
+        pagina (int): Página de resultados (desde 1)
+        limite (int): Resultados por página
+
+    Returns:
+        dict: {'resultados': [dict, ...], 'hay_mas': bool}
+    """
+    candidatos = obtener_indice('productos').buscar(palabras_consulta(consulta))
+
+    # El índice no sabe de stock: se filtran los vendibles en la BD (por PK)
+    # tomando solo los candidatos necesarios para llegar a la página pedida
+    necesarios = min(len(candidatos), max(MAX_CANDIDATOS, pagina * limite + 1))
+    vendibles = set(
+        Productos.objects.filter(
+            id__in=candidatos[:necesarios],
+            eliminado__isnull=True,
+            estado_merma='activo',
+            cantidad__gt=0,
+        ).values_list('id', flat=True)
+    )
+    ids = [pid for pid in candidatos[:necesarios] if pid in vendibles]
+    ids_pagina, hay_mas = _paginar(ids, pagina, limite)
+
+    productos = Productos.objects.in_bulk(ids_pagina)
+    resultados = []
+    for producto in (productos.get(pid) for pid in ids_pagina):
+        if producto is None:
+            continue
+        resultados.append({
+            'id': producto.id,
+            'nombre': producto.nombre,
+            'marca': producto.marca or '',
+            'precio': float(producto.precio_por_unidad_venta or 0),
+            'stock': float(producto.cantidad or 0),
+            'unidad_venta': producto.unidad_venta,
+        })
+    return {'resultados': resultados, 'hay_mas': hay_mas or len(candidatos) > necesarios}
+
+
+def buscar_clientes(consulta, pagina=1, limite=LIMITE_POR_DEFECTO):
+    """
+    Busca clientes por nombre o RUT (con o sin puntos y guión).
+
+    Args:
+        consulta (str): Texto escrito por el cajero
+        pagina (int): Página de resultados (desde 1)
+        limite (int): Resultados por página
+
+    Returns:
+        dict: {'resultados': [dict, ...], 'hay_mas': bool}
+    """
+    ids = obtener_indice('clientes').buscar(palabras_consulta(consulta))
+    ids_pagina, hay_mas = _paginar(ids, pagina, limite)
+
+    clientes = Clientes.objects.in_bulk(ids_pagina)
+    resultados = [
+        {'id': c.id, 'nombre': c.nombre, 'rut': c.rut or ''}
+        for c in (clientes.get(cid) for cid in ids_pagina)
+        if c is not None  # Pudo eliminarse después de construir el índice
+    ]
+    return {'resultados': resultados, 'hay_mas': hay_mas}
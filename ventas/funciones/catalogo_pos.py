@@ -0,0 +1,170 @@
+# ================================================================
+# =                                                              =
+# =        CATÁLOGO VERSIONADO DEL POS (CON CACHÉ)              =
+# =                                                              =
+# ================================================================
+#
+# Este archivo arma el catálogo de productos que usa la pantalla del POS
+# (id, nombre, precio, stock, caducidad, categoría) como JSON.
+#
+# PROBLEMA QUE RESUELVE:
+# Cada carga del POS consultaba y renderizaba TODOS los productos, y el
+# stock mostrado quedaba desactualizado hasta recargar la página.
+#
+# ESTRATEGIA:
+# - VERSIÓN: es la fecha de modificación más reciente de la tabla productos
+#   (en segundos). Cualquier cambio en un producto o en uno de sus lotes
+#   actualiza `productos.modificado` (ver ventas/signals.py), así que la
+#   versión avanza sola y es la misma para todos los procesos
+# - CATÁLOGO COMPLETO: se guarda en caché y se descarta cuando cambia un
+#   producto o un lote (invalidar_catalogo)
+# - DELTA (?since=<versión>): solo los productos con modificado >= versión,
+#   usando el índice de `modificado`. Se incluyen también los que dejaron de
+#   estar a la venta (disponible=False) para que el POS los quite de la grilla
+# - SOLAPAMIENTO: `modificado` se marca con la hora en que se escribe, no con
+#   la de la confirmación. Un producto marcado antes de un delta pero
+#   confirmado después quedaría atrás del siguiente `since` y el POS no lo
+#   recibiría nunca. Por eso cada delta vuelve a revisar los últimos
+#   CATALOGO_SOLAPAMIENTO_SEGUNDOS antes de `since`. Los productos repetidos
+#   no cambian nada en el POS (pos.js los reemplaza por id y salta los que
+#   llegan iguales)
+#
+# NOTA: con la caché en memoria por defecto (LocMemCache) cada proceso tiene
+# su propia copia; la invalidación es inmediata en el proceso que hizo el
+# cambio y en los demás la copia vence a los CATALOGO_CACHE_SEGUNDOS. Los
+# deltas siempre se leen de la BD, por lo que el stock del POS no depende de ello.
+
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from ventas.models import Productos
+
+# Segundos que se mantiene en caché el catálogo completo
+CATALOGO_CACHE_SEGUNDOS = getattr(settings, 'CATALOGO_CACHE_SEGUNDOS', 60)
+
+# Segundos antes de `since` que se vuelven a revisar en cada delta
+CATALOGO_SOLAPAMIENTO_SEGUNDOS = getattr(settings, 'CATALOGO_SOLAPAMIENTO_SEGUNDOS', 10)
+
+CLAVE_CATALOGO = 'pos:catalogo:completo'
+
+
+def _productos_a_la_venta(queryset):
+    """Filtra los productos que se pueden vender en el POS (mismo criterio que pos_view)."""
+    return queryset.filter(
+        eliminado__isnull=True,
+        estado_merma='activo',
+        cantidad__gt=0,
+    )
+
+
+def _version_de(fecha):
+    """Convierte una fecha de modificación en número de versión (segundos epoch)."""
+    return int(fecha.timestamp()) if fecha else 0
+
+
+def _serializar(producto, disponible=True):
+    """Convierte un producto en el dict que consume pos.js."""
+    return {
+        'id': producto.id,
+        'nombre': producto.nombre,
+        'marca': producto.marca or '',
+        'tipo': producto.tipo or '',
+        'precio': float(producto.precio_por_unidad_venta or 0),
+        'stock': float(producto.cantidad or 0),
+        'caducidad': producto.caducidad.isoformat() if producto.caducidad else None,
+        'categoria': producto.categorias.nombre if producto.categorias_id else None,
+        'unidad_venta': producto.unidad_venta,
+        'unidad_venta_nombre': producto.get_unidad_venta_display(),
+        'unidad_stock': producto.unidad_stock,
+        'unidad_stock_nombre': producto.get_unidad_stock_display(),
+        'disponible': disponible,
+    }
+
+
+def _es_vendible(producto):
+    return (
+        producto.eliminado is None
+        and producto.estado_merma == 'activo'
+        and (producto.cantidad or 0) > 0
+    )
+
+
+def obtener_catalogo():
+    """
+    Retorna el catálogo completo de productos a la venta (desde caché si existe).
+
+    Returns:
+        dict: {'version': int, 'productos': [dict, ...]}
+    """
+    catalogo = cache.get(CLAVE_CATALOGO)
+    if catalogo is not None:
+        return catalogo
+
+    # La versión se lee ANTES que los productos: si algo cambia entre ambas
+    # consultas, el cliente lo volverá a recibir en el siguiente delta
+    version = _version_de(Productos.objects.aggregate(m=Max('modificado'))['m'])
+    productos = _productos_a_la_venta(Productos.objects.all()).select_related('categorias').order_by('nombre')
+
+    catalogo = {
+        'version': version,
+        'productos': [_serializar(p) for p in productos],
+    }
+    cache.set(CLAVE_CATALOGO, catalogo, CATALOGO_CACHE_SEGUNDOS)
+    return catalogo
+
+
+def obtener_cambios_catalogo(since):
+    """
+    Retorna los productos que cambiaron desde la versión indicada.
+
+    Incluye también los modificados en los CATALOGO_SOLAPAMIENTO_SEGUNDOS
+    anteriores (ver SOLAPAMIENTO arriba), así que puede repetir productos.
+
+    Args:
+        since (int): Versión que tiene el cliente (la que recibió en la última respuesta)
+
+    Returns:
+        dict: {'version': int, 'productos': [dict, ...]} donde cada producto
+              trae 'disponible' para saber si hay que mostrarlo o quitarlo
+    """
+    desde = datetime.fromtimestamp(max(since - CATALOGO_SOLAPAMIENTO_SEGUNDOS, 0), tz=dt_timezone.utc)
+    cambiados = Productos.objects.filter(modificado__gte=desde).select_related('categorias').order_by('nombre')
+
+    version = since
+    productos = []
+    for producto in cambiados:
+        version = max(version, _version_de(producto.modificado))
+        productos.append(_serializar(producto, disponible=_es_vendible(producto)))
+    return {'version': version, 'productos': productos}
+
+
+def invalidar_catalogo():
+    """
+    Descarta el catálogo en caché cuando termine la transacción actual.
+
+    Se usa on_commit para que otra petición no vuelva a guardar en caché
+    datos que todavía no se han confirmado.
+    """
+    transaction.on_commit(lambda: cache.delete(CLAVE_CATALOGO))
+
+
+def marcar_productos_modificados(producto_ids):
+    """
+    Actualiza `modificado` de los productos indicados e invalida el catálogo.
+
+    Se usa en los caminos que no pasan por Productos.save() (update() o
+    bulk_update() sobre productos o lotes), para que el cambio aparezca en
+    el siguiente delta del POS.
+
+    Args:
+        producto_ids (iterable): IDs de los productos que cambiaron
+    """
+    producto_ids = [pid for pid in set(producto_ids) if pid is not None]
+    if producto_ids:
+        Productos.objects.filter(id__in=producto_ids).update(modificado=timezone.now())
+    invalidar_catalogo()
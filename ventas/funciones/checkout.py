@@ -0,0 +1,373 @@
+# ================================================================
+# =                                                              =
+# =        MOTOR DE CHECKOUT DEL POS (VENTA EN LOTE)            =
+# =                                                              =
+# ================================================================
+#
+# Este archivo contiene la lógica que registra una venta completa
+# del POS con un número CONSTANTE de consultas SQL, sin importar
+# cuántas líneas tenga el carrito.
+#
+# ESTRATEGIA:
+# 1. Cargar todos los productos del carrito en UNA consulta
+# 2. Bloquear todos sus lotes activos en orden de id (ver reserva_stock.py)
+# 3. Calcular la asignación FIFO de cada línea en memoria
+# 4. Escribir detalles, lotes y productos con bulk_create / bulk_update
+#    (una sentencia por tabla)
+# 5. Registrar un evento 'venta_registrada' en la misma transacción; el
+#    historial, los movimientos y las alertas se generan después (outbox.py)
+#
+# Antes, un carrito de 20 líneas generaba más de 150 consultas
+# (tres get() por producto, consultas de lotes por línea, refresh_from_db,
+# etc.). Con este motor el número de consultas por venta es fijo.
+
+from collections import OrderedDict
+from decimal import Decimal, ROUND_HALF_UP
+import logging
+import uuid
+
+from django.db import transaction, IntegrityError
+from django.db.models import Sum, Min, Case, When, F, DecimalField
+from django.utils import timezone
+
+from ventas.models import Productos, Ventas, DetalleVenta, Lote
+from ventas.funciones.folios import generar_folio_boleta
+from ventas.funciones.catalogo_pos import invalidar_catalogo
+from ventas.funciones.outbox import registrar_evento, TIPO_VENTA_REGISTRADA
+from ventas.funciones.stock_productos import recalcular_stock
+from ventas.funciones.reserva_stock import (
+    bloquear_lotes_activos, descontar_fifo, resumen_lotes, StockInsuficienteError
+)
+
+logger = logging.getLogger('ventas')
+
+# Tasa de IVA en Chile (19%). El precio de los productos YA incluye IVA.
+IVA_RATE = Decimal('0.19')
+
+
+class VentaInvalidaError(ValueError):
+    """
+    Error de validación del carrito (producto inexistente, sin stock, etc.).
+
+    Lleva el código HTTP que la vista debe retornar (400 o 404) para
+    que el POS muestre el mensaje al cajero sin tratarlo como error del servidor.
+    """
+
+    def __init__(self, mensaje, status=400):
+        super().__init__(mensaje)
+        self.mensaje = mensaje
+        self.status = status
+
+
+def normalizar_carrito(carrito):
+    """
+    Convierte el carrito recibido desde JavaScript en líneas con Decimal.
+
+    Args:
+        carrito (list): Lista de dicts con producto_id, cantidad, precio_unitario y descuento
+
+    Returns:
+        list: Lista de dicts con producto_id entero y el resto de los campos en Decimal
+    """
+    lineas = []
+    for item in carrito:
+        try:
+            producto_id = int(item.get('producto_id'))
+        except (TypeError, ValueError):
+            raise VentaInvalidaError(f'Producto con ID {item.get("producto_id")} no encontrado', status=404)
+        lineas.append({
+            'producto_id': producto_id,
+            'cantidad': Decimal(str(item.get('cantidad', 0))),
+            'precio_unitario': Decimal(str(item.get('precio_unitario', 0))),
+            'descuento': Decimal(str(item.get('descuento', 0))),
+        })
+    return lineas
+
+
+def calcular_totales(lineas, descuento_global):
+    """
+    Calcula los totales de la venta a partir de las líneas del carrito.
+
+    IMPORTANTE: El precio unitario YA INCLUYE IVA, por lo que el IVA se
+    desglosa del total (total / 1.19) en lugar de sumarse.
+
+    Args:
+        lineas (list): Líneas normalizadas con normalizar_carrito()
+        descuento_global (Decimal): Descuento en pesos aplicado a toda la venta
+
+    Returns:
+        tuple: (total_sin_iva, total_iva, total_con_iva) redondeados a 2 decimales
+    """
+    total_con_iva_incluido = Decimal('0.00')
+    for linea in lineas:
+        subtotal = linea['cantidad'] * linea['precio_unitario']
+        if linea['descuento'] > 0:
+            subtotal = subtotal - (subtotal * linea['descuento'] / 100)
+        total_con_iva_incluido += subtotal
+
+    total_con_iva_incluido = total_con_iva_incluido - descuento_global
+    total_sin_iva = total_con_iva_incluido / (Decimal('1') + IVA_RATE)
+    total_iva = total_sin_iva * IVA_RATE
+
+    total_sin_iva = total_sin_iva.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+    total_iva = total_iva.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+    total_con_iva = total_con_iva_incluido.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+    return total_sin_iva, total_iva, total_con_iva
+
+
+def _cantidades_por_producto(lineas):
+    """Suma la cantidad pedida por producto (un producto puede repetirse en el carrito)."""
+    cantidades = OrderedDict()
+    for linea in lineas:
+        cantidades[linea['producto_id']] = cantidades.get(linea['producto_id'], Decimal('0')) + linea['cantidad']
+    return cantidades
+
+
+def validar_carrito(lineas):
+    """
+    Valida un carrito completo (disponibilidad, cobertura FIFO y vencimiento) sin bloquear nada.
+
+    Usa exactamente DOS consultas sin importar el tamaño del carrito: una para
+    los productos y un agregado sobre los lotes activos de todos ellos.
+    Es una validación previa al pago; registrar_venta() vuelve a validar con
+    los lotes bloqueados.
+
+    Args:
+        lineas (list): Líneas normalizadas con normalizar_carrito()
+
+    Returns:
+        dict: {'valido': bool, 'lineas': [dict por producto con disponible,
+              stock, stock_vigente, cantidad_vencida, proxima_caducidad, mensaje]}
+    """
+    cantidades = _cantidades_por_producto(lineas)
+    hoy = timezone.localdate()
+
+    productos = Productos.objects.in_bulk(list(cantidades.keys()))
+
+    # Un solo agregado: stock total, stock no vencido y caducidad más próxima por producto
+    decimal = DecimalField(max_digits=10, decimal_places=3)
+    resumen = {
+        fila['productos_id']: fila
+        for fila in Lote.objects.filter(
+            productos_id__in=list(cantidades.keys()),
+            estado='activo',
+            cantidad__gt=0,
+        ).values('productos_id').annotate(
+            total=Sum('cantidad'),
+            vigente=Sum(Case(When(fecha_caducidad__gte=hoy, then=F('cantidad')), default=0, output_field=decimal)),
+            proxima_caducidad=Min('fecha_caducidad'),
+        )
+    }
+
+    resultado = []
+    for producto_id, cantidad in cantidades.items():
+        producto = productos.get(producto_id)
+        fila = resumen.get(producto_id, {})
+        total = fila.get('total') or Decimal('0')
+        vigente = fila.get('vigente') or Decimal('0')
+        proxima = fila.get('proxima_caducidad')
+
+        linea = {
+            'producto_id': producto_id,
+            'nombre': producto.nombre if producto else None,
+            'cantidad': float(cantidad),
+            'stock': float(total),
+            'stock_vigente': float(vigente),
+            # Los lotes vencidos salen primero en FIFO (ordenado por caducidad)
+            'cantidad_vencida': float(total - vigente),
+            'proxima_caducidad': proxima.isoformat() if proxima else None,
+            'disponible': False,
+            'mensaje': '',
+        }
+
+        if producto is None:
+            linea['mensaje'] = f'Producto con ID {producto_id} no encontrado'
+        elif producto.eliminado is not None:
+            linea['mensaje'] = f'El producto "{producto.nombre}" ya no está disponible'
+        elif producto.estado_merma != 'activo':
+            estado = dict(Productos.ESTADO_MERMA_CHOICES).get(producto.estado_merma, producto.estado_merma)
+            linea['mensaje'] = f'{producto.nombre}: producto no disponible ({estado})'
+        elif total < cantidad:
+            linea['mensaje'] = f'Stock insuficiente para {producto.nombre}. Disponible: {total}, Solicitado: {cantidad}'
+        elif total - vigente > 0:
+            # FIFO tomaría primero stock vencido
+            linea['mensaje'] = f'{producto.nombre}: hay {total - vigente} en lotes vencidos (revisar antes de vender)'
+        else:
+            linea['disponible'] = True
+        resultado.append(linea)
+
+    return {'valido': all(l['disponible'] for l in resultado), 'lineas': resultado}
+
+
+def normalizar_clave_idempotencia(clave):
+    """
+    Valida la clave de idempotencia enviada por el POS (un UUID).
+
+    Args:
+        clave (str | None): Clave recibida en la petición
+
+    Returns:
+        str | None: UUID en formato canónico, o None si no se envió
+
+    Raises:
+        VentaInvalidaError: Si la clave no es un UUID válido
+    """
+    if clave in (None, ''):
+        return None
+    try:
+        return str(uuid.UUID(str(clave)))
+    except ValueError:
+        raise VentaInvalidaError('Clave de idempotencia inválida')
+
+
+def _resultado_venta_existente(clave_idempotencia):
+    """
+    Busca una venta ya registrada con la clave y arma el mismo resultado que registrar_venta().
+
+    Returns:
+        dict | None: Resultado con 'repetida': True, o None si no existe
+    """
+    venta = Ventas.objects.filter(clave_idempotencia=clave_idempotencia).first()
+    if venta is None:
+        return None
+    return {
+        'venta': venta,
+        'total_con_iva': venta.total_con_iva,
+        'vuelto': venta.vuelto or Decimal('0.00'),
+        'repetida': True,
+    }
+
+
+def registrar_venta(cliente, lineas, canal_venta, medio_pago, monto_pagado, descuento_global,
+                    usuario_emisor=None, clave_idempotencia=None):
+    """
+    Registra una venta completa del POS en una sola transacción.
+
+    Valida stock, crea la venta, sus detalles, descuenta los lotes (FIFO),
+    recalcula cantidad y caducidad de cada producto y registra el evento que
+    genera (fuera de la petición) los movimientos de inventario, el historial
+    de la boleta y las alertas de stock bajo.
+
+    Si se entrega `clave_idempotencia` y ya existe una venta con esa clave
+    (el POS reenvió la misma venta), NO se registra otra: se retorna la
+    venta original con 'repetida': True.
+
+    Args:
+        cliente (Clientes): Cliente de la venta
+        lineas (list): Líneas normalizadas con normalizar_carrito()
+        canal_venta (str): 'presencial' o 'delivery'
+        medio_pago (str): Medio de pago (ver Ventas.MEDIO_PAGO_CHOICES)
+        monto_pagado (Decimal): Monto entregado por el cliente
+        descuento_global (Decimal): Descuento en pesos de la venta
+        usuario_emisor (str, optional): Username del cajero (para el historial)
+        clave_idempotencia (str, optional): UUID de la venta generado por el POS
+
+    Returns:
+        dict: {'venta': Ventas, 'total_con_iva': Decimal, 'vuelto': Decimal, 'repetida': bool}
+
+    Raises:
+        VentaInvalidaError: Si algún producto no existe, está eliminado,
+            no tiene stock suficiente o el monto pagado no alcanza
+    """
+    if clave_idempotencia:
+        existente = _resultado_venta_existente(clave_idempotencia)
+        if existente:
+            logger.info(f'[VENTA] Reintento de {existente["venta"].folio} (clave {clave_idempotencia}): no se duplica')
+            return existente
+
+    total_sin_iva, total_iva, total_con_iva = calcular_totales(lineas, descuento_global)
+
+    vuelto = monto_pagado - total_con_iva
+    if vuelto < 0:
+        raise VentaInvalidaError(
+            f'Monto insuficiente. Total: ${total_con_iva:.2f}, Pagado: ${monto_pagado:.2f}'
+        )
+
+    cantidades = _cantidades_por_producto(lineas)
+
+    # El folio se toma ANTES de abrir la transacción: sale de un bloque
+    # reservado en memoria, así que normalmente no cuesta ninguna consulta
+    folio = generar_folio_boleta()
+
+    try:
+        with transaction.atomic():
+            # Los lotes se bloquean primero y en orden de id; los productos no se
+            # bloquean, así las ventas de productos distintos no se serializan
+            lotes_por_producto = bloquear_lotes_activos(cantidades.keys())
+            productos = Productos.objects.in_bulk(list(cantidades.keys()))
+
+            # --- Validar todos los productos antes de escribir nada ---
+            lotes_modificados = []
+            for producto_id, cantidad in cantidades.items():
+                producto = productos.get(producto_id)
+                if producto is None:
+                    raise VentaInvalidaError(f'Producto con ID {producto_id} no encontrado', status=404)
+                if producto.eliminado is not None:
+                    raise VentaInvalidaError(f'El producto "{producto.nombre}" ya no está disponible')
+                try:
+                    lotes_modificados.extend(descontar_fifo(producto, lotes_por_producto[producto_id], cantidad))
+                except StockInsuficienteError as e:
+                    raise VentaInvalidaError(str(e))
+
+            # --- Recalcular cantidad y caducidad de cada producto en memoria ---
+            # bulk_update no aplica auto_now: se fija `modificado` a mano para que
+            # el cambio de stock llegue al catálogo del POS (catalogo_pos.py)
+            ahora = timezone.now()
+            for producto_id, producto in productos.items():
+                producto.cantidad, producto.caducidad = resumen_lotes(lotes_por_producto[producto_id])
+                producto.modificado = ahora
+
+            # Para pagos que no son en efectivo no hay vuelto y se cobra el total exacto
+            vuelto_registrado = vuelto if medio_pago == 'efectivo' else Decimal('0.00')
+            if medio_pago != 'efectivo':
+                monto_pagado = total_con_iva
+
+            venta = Ventas.objects.create(
+                clientes=cliente,
+                canal_venta=canal_venta,
+                total_sin_iva=total_sin_iva,
+                total_iva=total_iva,
+                descuento=descuento_global,
+                total_con_iva=total_con_iva,
+                folio=folio,
+                clave_idempotencia=clave_idempotencia,
+                medio_pago=medio_pago,
+                monto_pagado=monto_pagado,
+                vuelto=vuelto_registrado,
+            )
+
+            detalles = [
+                DetalleVenta(
+                    ventas=venta,
+                    productos=productos[linea['producto_id']],
+                    cantidad=linea['cantidad'],
+                    precio_unitario=linea['precio_unitario'],
+                    descuento_pct=linea['descuento'],
+                )
+                for linea in lineas
+            ]
+            DetalleVenta.objects.bulk_create(detalles)
+
+            if lotes_modificados:
+                Lote.objects.bulk_update(lotes_modificados, ['cantidad', 'estado'])
+                recalcular_stock(cantidades.keys())
+            Productos.objects.bulk_update(list(productos.values()), ['cantidad', 'caducidad', 'modificado'])
+            invalidar_catalogo()
+
+            # Historial de boleta, movimientos de inventario y alertas de stock
+            # se generan fuera de la petición (ver outbox.py); el evento queda
+            # en la misma transacción, así que nunca se pierde ni queda huérfano
+            registrar_evento(TIPO_VENTA_REGISTRADA, venta.id, {'usuario_emisor': usuario_emisor})
+    except IntegrityError:
+        # Dos envíos simultáneos de la misma venta: el segundo choca con el
+        # índice único de clave_idempotencia y se responde con la original
+        existente = _resultado_venta_existente(clave_idempotencia) if clave_idempotencia else None
+        if existente is None:
+            raise
+        return existente
+
+    logger.info(
+        f'[VENTA] {venta.folio}: {len(lineas)} líneas, {len(lotes_modificados)} lotes descontados, '
+        f'total ${total_con_iva}'
+    )
+    return {'venta': venta, 'total_con_iva': total_con_iva, 'vuelto': vuelto, 'repetida': False}
@@ -0,0 +1,129 @@
+# ================================================================
+# =                                                              =
+# =        GENERADOR DE FOLIOS DE BOLETAS                       =
+# =                                                              =
+# ================================================================
+#
+# Antes el folio se armaba con la hora ('BOL-%Y%m%d%H%M%S'), por lo que dos
+# ventas en el mismo segundo quedaban con el mismo folio y las búsquedas en
+# HistorialBoletas por folio devolvían boletas mezcladas.
+#
+# Ahora los folios salen de un contador en la tabla `secuencia_folio`:
+# - Cada proceso reserva un bloque de números (FOLIO_TAMANO_BLOQUE) con un
+#   solo UPDATE y los entrega desde memoria: no hay consulta por venta
+# - La reserva se hace en una conexión PROPIA y se confirma de inmediato.
+#   Así, si la venta que pidió el folio falla y se revierte, el bloque
+#   igual queda reservado y ningún otro proceso puede repetir esos números
+# - Si el proceso se reinicia, los números que no alcanzó a usar quedan
+#   como saltos en la numeración (los folios son únicos, no correlativos)
+#
+# Formato: BOL-0000001234 (serie + número de 10 dígitos)
+
+import threading
+import logging
+
+from django.conf import settings
+from django.db import connections, IntegrityError
+
+logger = logging.getLogger('ventas')
+
+# Cantidad de folios que reserva cada proceso en cada viaje a la BD
+TAMANO_BLOQUE = getattr(settings, 'FOLIO_TAMANO_BLOQUE', 100)
+
+
+class GeneradorFolios:
+    """
+    Entrega folios únicos de una serie reservando bloques en la base de datos.
+
+    Es seguro usarlo desde varios hilos del mismo proceso.
+    """
+
+    def __init__(self, serie='BOL', tamano_bloque=TAMANO_BLOQUE):
+        self.serie = serie
+        self.tamano_bloque = tamano_bloque
+        self._actual = 0
+        self._limite = 0
+        self._lock = threading.Lock()
+        self._conexion = None
+
+    def siguiente(self):
+        """
+        Retorna el siguiente folio de la serie (ej: 'BOL-0000001234').
+        """
+        with self._lock:
+            if self._actual >= self._limite:
+                self._actual, self._limite = self._reservar_bloque()
+            numero = self._actual
+            self._actual += 1
+        return f"{self.serie}-{numero:010d}"
+
+    def _obtener_conexion(self):
+        """
+        Crea (una sola vez) una conexión dedicada a la BD para las reservas.
+
+        Es independiente de la conexión de la petición, por lo que la reserva
+        se confirma aunque la venta esté dentro de transaction.atomic().
+        """
+        if self._conexion is None:
+            self._conexion = connections.create_connection('default')
+            # La conexión se comparte entre los hilos del proceso (protegida por self._lock)
+            self._conexion.inc_thread_sharing()
+        self._conexion.close_if_unusable_or_obsolete()
+        return self._conexion
+
+    def _reservar_bloque(self):
+        """
+        Reserva el siguiente bloque de números de la serie.
+
+        Returns:
+            tuple: (primer número del bloque, primer número fuera del bloque)
+        """
+        conexion = self._obtener_conexion()
+        conexion.set_autocommit(False)
+        try:
+            with conexion.cursor() as cursor:
+                # El UPDATE bloquea la fila de la serie hasta el commit, así dos
+                # procesos que reservan a la vez reciben bloques consecutivos
+                cursor.execute(
+                    "UPDATE secuencia_folio SET siguiente = siguiente + %s, modificado = CURRENT_TIMESTAMP "
+                    "WHERE serie = %s",
+                    [self.tamano_bloque, self.serie]
+                )
+                if cursor.rowcount == 0:
+                    # Primera vez que se usa la serie: crearla ya con el primer bloque reservado
+                    cursor.execute(
+                        "INSERT INTO secuencia_folio (serie, siguiente, modificado) VALUES (%s, %s, CURRENT_TIMESTAMP)",
+                        [self.serie, self.tamano_bloque + 1]
+                    )
+                cursor.execute("SELECT siguiente FROM secuencia_folio WHERE serie = %s", [self.serie])
+                limite = cursor.fetchone()[0]
+            conexion.commit()
+        except IntegrityError:
+            # Otro proceso creó la serie al mismo tiempo: reintentar con UPDATE
+            conexion.rollback()
+            conexion.set_autocommit(True)
+            return self._reservar_bloque()
+        except Exception:
+            conexion.rollback()
+            conexion.close()
+            raise
+        finally:
+            if conexion.connection is not None and not conexion.get_autocommit():
+                conexion.set_autocommit(True)
+
+        logger.info(f'[FOLIOS] Serie {self.serie}: reservado bloque {limite - self.tamano_bloque} a {limite - 1}')
+        return limite - self.tamano_bloque, limite
+
+
+# Generador compartido por todo el proceso para las boletas del POS
+_generador_boletas = GeneradorFolios(serie='BOL')
+
+
+def generar_folio_boleta():
+    """
+    Retorna un folio único para una boleta nueva.
+
+    Returns:
+        str: Folio con formato 'BOL-0000001234'
+    """
+    return _generador_boletas.siguiente()
@@ -173,6 +173,7 @@ class AlertaFiltroForm(forms.Form):
     
     Permite filtrar por:
     - Tipo de alerta (roja, amarilla, verde)
+    - Categoría (vencimiento, stock bajo, factura, manual)
     - Estado (activa, resuelta, ignorada)
     - Producto (búsqueda por nombre)
     - Rango de fechas
@@ -193,6 +194,16 @@ class AlertaFiltroForm(forms.Form):
         })
     )
     
+    # --- Campo: Categoría ---
+    categoria_alerta = forms.ChoiceField(
+        label='Categoría',
+        choices=[('', 'Todas las categorías')] + Alertas.CATEGORIA_CHOICES,
+        required=False,
+        widget=forms.Select(attrs={
+            'class': 'form-select form-select-sm',
+        })
+    )
+    
     # --- Campo: Estado ---
     estado = forms.ChoiceField(
         label='Estado',
@@ -0,0 +1,333 @@
+# ================================================================
+# =                                                              =
+# =          MOTOR DE ALERTAS AUTOMÁTICAS (EN LOTE)             =
+# =                                                              =
+# ================================================================
+#
+# Este archivo calcula y aplica las alertas automáticas de:
+# - VENCIMIENTO de productos (roja / amarilla / verde según días)
+# - STOCK BAJO de productos (roja si cantidad <= stock_minimo, o <= 5;
+#   la regla está en stock_bajo.py y la evalúa la BD)
+# - FACTURAS de proveedores por pagar (roja / amarilla / verde)
+#
+# PROBLEMA QUE RESUELVE:
+# Alertas.generar_alertas_automaticas() recorría producto por producto y,
+# por cada uno, buscaba sus alertas con `mensaje__contains` (un LIKE que
+# MySQL no puede indexar) y las guardaba con save()/create() una a una.
+# Con 10.000 productos eran decenas de miles de consultas.
+#
+# ESTRATEGIA (número fijo de consultas, sin importar cuántos productos haya):
+# 1. Cargar las alertas activas de las categorías evaluadas en una consulta
+#    (columna `categoria_alerta`, indexada) y agruparlas en memoria por
+#    clave: (producto, categoría) o (factura, 'factura')
+# 2. Cargar productos y facturas en una consulta cada uno y calcular el
+#    ESTADO DESEADO: qué alerta debería existir para cada clave
+# 3. Comparar ambos en memoria y aplicar los cambios en lote:
+#    - Claves sin alerta        -> bulk_create
+#    - Alertas con otro mensaje -> bulk_update
+#    - Alertas que sobran       -> un solo UPDATE a 'resuelta'
+#
+# PASADA INCREMENTAL vs. PASADA COMPLETA:
+# - Cada cambio de lotes o de un producto deja un evento 'stock_modificado'
+#   en el outbox; el procesador llama a evaluar_alertas(ids, ...) solo con
+#   los productos tocados (ver outbox.py). Así el stock bajo está al día
+#   sin recorrer el catálogo
+# - Los días para vencer cambian aunque nadie toque el producto, y las
+#   facturas no dependen del stock: eso lo cubre la pasada completa diaria
+#   (`python manage.py generar_alertas` en un cron nocturno). Si el cron no
+#   corrió, el dashboard la ejecuta una sola vez al día (generar_alertas_del_dia)
+#
+# Las reglas (días, colores y textos de los mensajes) son las mismas del
+# generador original. Las alertas creadas por el usuario tienen categoría
+# 'manual' y el motor nunca las modifica.
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from ventas.models import Alertas, Productos, FacturaProveedor
+from ventas.funciones.stock_bajo import anotar_stock_bajo, STOCK_MINIMO_POR_DEFECTO
+
+# Categorías de alerta que maneja el motor
+CATEGORIA_VENCIMIENTO = 'vencimiento'
+CATEGORIA_STOCK_BAJO = 'stock_bajo'
+CATEGORIA_FACTURA = 'factura'
+
+CATEGORIAS_PRODUCTO = (CATEGORIA_VENCIMIENTO, CATEGORIA_STOCK_BAJO)
+
+# Tamaño de los lotes de bulk_create / bulk_update
+TAMANO_LOTE = 500
+
+# Segundos que se recuerda en la caché que ya se hizo la pasada completa del día
+DURACION_MARCA_PASADA = 2 * 24 * 60 * 60
+
+
+# ================================================================
+# =                    ESTADO DESEADO                            =
+# ================================================================
+
+def alerta_vencimiento(producto, hoy):
+    """
+    Calcula el tipo (color) y el mensaje de vencimiento de un producto.
+
+    Args:
+        producto (Productos): Producto con caducidad definida
+        hoy (date): Fecha de referencia
+
+    Returns:
+        tuple: (tipo, mensaje)
+    """
+    dias_hasta_vencer = (producto.caducidad - hoy).days
+    if dias_hasta_vencer < 0:
+        return 'roja', f"{producto.nombre} YA VENCIÓ hace {abs(dias_hasta_vencer)} días"
+    if dias_hasta_vencer <= 13:
+        return 'roja', f"{producto.nombre} vence en {dias_hasta_vencer} días - URGENTE"
+    if dias_hasta_vencer <= 29:
+        return 'amarilla', f"{producto.nombre} vence en {dias_hasta_vencer} días - PRECAUCIÓN"
+    return 'verde', f"{producto.nombre} vence en {dias_hasta_vencer} días - OK"
+
+
+def _alerta_vencimiento(producto, hoy):
+    """Retorna (tipo, mensaje) de vencimiento del producto, o None si no tiene stock o caducidad."""
+    if not producto.cantidad or producto.cantidad <= 0 or producto.caducidad is None:
+        return None
+    return alerta_vencimiento(producto, hoy)
+
+
+def _alerta_stock_bajo(producto):
+    """
+    Retorna (tipo, mensaje) de stock bajo del producto, o None si el stock es normal.
+
+    Si el producto viene de anotar_stock_bajo() la decisión la tomó la BD
+    (`es_stock_bajo`), con la misma regla que stock_bajo_api y el dashboard.
+    """
+    stock_minimo = producto.stock_minimo if producto.stock_minimo is not None else STOCK_MINIMO_POR_DEFECTO
+    es_stock_bajo = getattr(producto, 'es_stock_bajo', None)
+    if es_stock_bajo is None:
+        es_stock_bajo = producto.cantidad <= stock_minimo
+    if es_stock_bajo:
+        return 'roja', f"{producto.nombre} - STOCK BAJO: {producto.cantidad} unidades (mínimo: {stock_minimo})"
+    return None
+
+
+def _alerta_factura(factura, hoy):
+    """Retorna (tipo, mensaje) de la factura por pagar."""
+    dias_para_vencer = (factura.fecha_vencimiento - hoy).days
+    detalle = f"Factura {factura.numero_factura} de {factura.proveedor.nombre}"
+    if dias_para_vencer < 0:
+        return 'roja', f"{detalle} VENCIDA hace {abs(dias_para_vencer)} días - ${factura.total_con_iva}"
+    if dias_para_vencer <= 7:
+        tipo = 'roja'
+    elif dias_para_vencer <= 30:
+        tipo = 'amarilla'
+    else:
+        tipo = 'verde'
+    return tipo, f"{detalle} vence en {dias_para_vencer} días - ${factura.total_con_iva}"
+
+
+# ================================================================
+# =                    APLICAR DIFERENCIAS                       =
+# ================================================================
+
+def _aplicar(deseadas, existentes, claves_evaluadas, categorias_que_se_resuelven, resumen):
+    """
+    Compara las alertas deseadas con las existentes y escribe las diferencias en lote.
+
+    Args:
+        deseadas (dict): {clave: (tipo, mensaje, kwargs para crear)}
+        existentes (dict): {clave: Alertas} (alertas activas actuales)
+        claves_evaluadas (set): Claves cuyo estado se calculó en esta pasada;
+            solo estas pueden resolverse
+        categorias_que_se_resuelven (set): Categorías cuya alerta se resuelve
+            cuando ya no corresponde (el vencimiento nunca se resolvía solo)
+        resumen (dict): Contadores a actualizar
+    """
+    ahora = timezone.now()
+    nuevas, actualizadas, a_resolver = [], [], []
+
+    for clave, (tipo, mensaje, campos) in deseadas.items():
+        alerta = existentes.get(clave)
+        if alerta is None:
+            nuevas.append(Alertas(
+                tipo_alerta=tipo, mensaje=mensaje, estado='activa', categoria_alerta=clave[1], **campos
+            ))
+        elif alerta.tipo_alerta != tipo or alerta.mensaje != mensaje:
+            alerta.tipo_alerta = tipo
+            alerta.mensaje = mensaje
+            alerta.fecha_generada = ahora
+            actualizadas.append(alerta)
+        else:
+            continue
+        _contar(resumen, clave[1], tipo)
+
+    for clave, alerta in existentes.items():
+        if (
+            clave[1] in categorias_que_se_resuelven
+            and clave in claves_evaluadas
+            and clave not in deseadas
+        ):
+            a_resolver.append(alerta.id)
+
+    if nuevas:
+        Alertas.objects.bulk_create(nuevas, batch_size=TAMANO_LOTE)
+    if actualizadas:
+        Alertas.objects.bulk_update(actualizadas, ['tipo_alerta', 'mensaje', 'fecha_generada'], batch_size=TAMANO_LOTE)
+    for inicio in range(0, len(a_resolver), TAMANO_LOTE):
+        Alertas.objects.filter(id__in=a_resolver[inicio:inicio + TAMANO_LOTE]).update(estado='resuelta')
+
+    resumen['resueltas'] += len(a_resolver)
+
+
+def _contar(resumen, categoria, tipo):
+    """Suma una alerta creada/actualizada a los contadores (mismo formato de siempre)."""
+    if categoria == CATEGORIA_STOCK_BAJO:
+        resumen['stock_bajo'] += 1
+    else:
+        resumen[tipo] += 1
+        if categoria == CATEGORIA_FACTURA:
+            resumen['facturas_vencidas'] += 1
+    resumen['total'] += 1
+
+
+# ================================================================
+# =                    PUNTO DE ENTRADA                          =
+# ================================================================
+
+def evaluar_alertas(producto_ids=None, categorias=None):
+    """
+    Crea, actualiza y resuelve alertas automáticas en lote.
+
+    Args:
+        producto_ids (iterable, optional): Solo evaluar estos productos.
+            Si es None se evalúan todos los productos activos y las facturas.
+        categorias (iterable, optional): Categorías a evaluar
+            ('vencimiento', 'stock_bajo', 'factura'). Por defecto todas.
+
+    Returns:
+        dict: {'roja', 'amarilla', 'verde', 'stock_bajo', 'facturas_vencidas',
+               'total', 'resueltas'} con la cantidad de alertas creadas o actualizadas
+    """
+    hoy = timezone.localdate()
+    categorias = set(categorias or (CATEGORIA_VENCIMIENTO, CATEGORIA_STOCK_BAJO, CATEGORIA_FACTURA))
+    pasada_completa = producto_ids is None and len(categorias) == 3
+    if producto_ids is not None:
+        producto_ids = {int(pid) for pid in producto_ids if pid is not None}
+        # Las facturas no dependen de los productos: solo en la pasada completa
+        categorias.discard(CATEGORIA_FACTURA)
+
+    resumen = {
+        'roja': 0,
+        'amarilla': 0,
+        'verde': 0,
+        'stock_bajo': 0,
+        'facturas_vencidas': 0,
+        'total': 0,
+        'resueltas': 0,
+    }
+    if producto_ids is not None and not producto_ids:
+        return resumen
+
+    with transaction.atomic():
+        # 1. Alertas activas actuales, agrupadas por clave (una consulta)
+        activas = Alertas.objects.filter(
+            estado='activa',
+            categoria_alerta__in=categorias,
+        ).only(
+            'id', 'tipo_alerta', 'mensaje', 'categoria_alerta', 'productos_id', 'factura_proveedor_id'
+        ).order_by('id')
+        if producto_ids is not None:
+            activas = activas.filter(productos_id__in=producto_ids)
+
+        existentes = {}
+        for alerta in activas:
+            categoria = alerta.categoria_alerta
+            referencia = alerta.factura_proveedor_id if categoria == CATEGORIA_FACTURA else alerta.productos_id
+            # Si hay duplicadas se usa la más antigua (igual que el .first() anterior)
+            existentes.setdefault((referencia, categoria), alerta)
+
+        deseadas = {}
+        evaluadas = set()
+
+        # 2. Estado deseado de los productos (una consulta)
+        if categorias & set(CATEGORIAS_PRODUCTO):
+            productos = anotar_stock_bajo(Productos.objects.filter(
+                eliminado__isnull=True,
+                estado_merma='activo',  # Solo productos activos (no en merma)
+            ).only('id', 'nombre', 'cantidad', 'caducidad', 'stock_minimo'))
+            if producto_ids is not None:
+                productos = productos.filter(id__in=producto_ids)
+
+            for producto in productos:
+                if CATEGORIA_VENCIMIENTO in categorias:
+                    clave = (producto.id, CATEGORIA_VENCIMIENTO)
+                    evaluadas.add(clave)
+                    resultado = _alerta_vencimiento(producto, hoy)
+                    if resultado:
+                        deseadas[clave] = (*resultado, {'productos_id': producto.id})
+                if CATEGORIA_STOCK_BAJO in categorias:
+                    clave = (producto.id, CATEGORIA_STOCK_BAJO)
+                    evaluadas.add(clave)
+                    resultado = _alerta_stock_bajo(producto)
+                    if resultado:
+                        deseadas[clave] = (*resultado, {'productos_id': producto.id})
+
+        # 3. Estado deseado de las facturas por pagar (una consulta)
+        if CATEGORIA_FACTURA in categorias:
+            facturas = FacturaProveedor.objects.filter(
+                eliminado__isnull=True,
+                estado_pago__in=['pendiente', 'parcial'],  # Solo facturas no pagadas completamente
+            ).select_related('proveedor')
+            por_pagar = set()
+            for factura in facturas:
+                por_pagar.add(factura.id)
+                if not factura.fecha_vencimiento:
+                    continue  # Si no tiene fecha de vencimiento, se deja como está
+                clave = (factura.id, CATEGORIA_FACTURA)
+                evaluadas.add(clave)
+                deseadas[clave] = (*_alerta_factura(factura, hoy), {'factura_proveedor_id': factura.id})
+
+            # Las facturas que se pagaron (o se eliminaron) ya no deben tener alerta activa
+            evaluadas.update(
+                clave for clave in existentes
+                if clave[1] == CATEGORIA_FACTURA and clave[0] not in por_pagar
+            )
+
+        # 4. Diferencias en lote
+        _aplicar(
+            deseadas,
+            existentes,
+            evaluadas,
+            categorias_que_se_resuelven={CATEGORIA_STOCK_BAJO, CATEGORIA_FACTURA},
+            resumen=resumen,
+        )
+
+    if pasada_completa:
+        cache.set(_clave_pasada_completa(hoy), True, DURACION_MARCA_PASADA)
+
+    return resumen
+
+
+def _clave_pasada_completa(hoy):
+    return f'alertas:pasada_completa:{hoy.isoformat()}'
+
+
+def generar_alertas_del_dia():
+    """
+    Ejecuta la pasada completa solo si todavía no se hizo hoy.
+
+    La usan las vistas que antes regeneraban todas las alertas en cada carga
+    (dashboard). Durante el día las alertas de productos se mantienen con la
+    pasada incremental del outbox.
+
+    Returns:
+        dict or None: El resumen de evaluar_alertas(), o None si ya se había hecho
+    """
+    hoy = timezone.localdate()
+    if not cache.add(_clave_pasada_completa(hoy), True, DURACION_MARCA_PASADA):
+        return None
+    try:
+        return evaluar_alertas()
+    except Exception:
+        # Que la siguiente carga lo vuelva a intentar
+        cache.delete(_clave_pasada_completa(hoy))
+        raise
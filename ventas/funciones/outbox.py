@@ -0,0 +1,361 @@
+# ================================================================
+# =                                                              =
+# =        PROCESADOR DE EVENTOS PENDIENTES (OUTBOX)            =
+# =                                                              =
+# ================================================================
+#
+# Este archivo registra y procesa los eventos de la tabla `eventos_outbox`
+# (ver ventas/models/outbox.py).
+#
+# FLUJO DE UNA VENTA:
+# 1. registrar_venta() escribe la venta y UN evento 'venta_registrada'
+#    en la misma transacción (ver checkout.py)
+# 2. Al confirmar la transacción se avisa al procesador (según OUTBOX_MODO)
+# 3. El procesador toma los eventos pendientes EN LOTE y para todas esas
+#    ventas a la vez:
+#    - Crea el historial de boletas (bulk_create)
+#    - Crea los movimientos de inventario (bulk_create)
+#    - Suma las ventas al resumen diario (resumen_ventas.py)
+#
+# CAMBIOS DE STOCK:
+# Cada vez que cambian los lotes o la cantidad/caducidad de un producto se
+# registra un evento 'stock_modificado' por producto (ver stock_productos.py
+# y signals.py). El procesador junta todos los productos del lote y
+# reevalúa SOLO sus alertas de vencimiento y stock bajo (motor_alertas.py);
+# además descarta la curva de pérdida potencial (perdida_potencial.py).
+#
+# MODOS (settings.OUTBOX_MODO):
+# - 'hilos': un pool de hilos del mismo proceso web procesa los eventos
+#   apenas se confirma la venta (fuera de la petición del cajero)
+# - 'comando': solo los procesa `python manage.py procesar_outbox`
+# En ambos casos el comando sirve para recuperar eventos que quedaron
+# pendientes (por ejemplo, si el servidor se reinició).
+#
+# Los eventos se toman con SELECT ... FOR UPDATE SKIP LOCKED, así varios
+# procesadores (hilos o comandos) pueden trabajar a la vez sin repetirse.
+# Además cada efecto revisa si ya existe, por lo que reprocesar un evento
+# no duplica historiales ni movimientos.
+
+from concurrent.futures import ThreadPoolExecutor
+from collections import defaultdict
+from decimal import Decimal
+import logging
+
+from django.conf import settings
+from django.db import transaction, connection, close_old_connections
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from ventas.models import (
+    EventoOutbox, Ventas, DetalleVenta, MovimientosInventario, HistorialBoletas
+)
+from ventas.funciones.historial_boletas import construir_historial_boleta
+from ventas.funciones.motor_alertas import evaluar_alertas, CATEGORIA_VENCIMIENTO, CATEGORIA_STOCK_BAJO
+from ventas.funciones.perdida_potencial import invalidar_curva
+from ventas.funciones.resumen_ventas import sumar_ventas, aplicar_sumas
+
+logger = logging.getLogger('ventas')
+
+OUTBOX_MODO = getattr(settings, 'OUTBOX_MODO', 'hilos')
+OUTBOX_HILOS = getattr(settings, 'OUTBOX_HILOS', 2)
+OUTBOX_TAMANO_LOTE = getattr(settings, 'OUTBOX_TAMANO_LOTE', 100)
+
+# Después de este número de fallos el evento queda en estado 'error'
+MAX_INTENTOS = 5
+
+TIPO_VENTA_REGISTRADA = 'venta_registrada'
+TIPO_STOCK_MODIFICADO = 'stock_modificado'
+
+
+# ================================================================
+# =                   REGISTRO DE EVENTOS                        =
+# ================================================================
+
+_pool = None
+
+
+def _obtener_pool():
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=OUTBOX_HILOS, thread_name_prefix='outbox')
+    return _pool
+
+
+def _procesar_en_hilo():
+    """Procesa los pendientes desde un hilo del pool (con su propia conexión a la BD)."""
+    try:
+        procesar_pendientes()
+    except Exception as e:
+        logger.error(f'[OUTBOX] Error procesando eventos en segundo plano: {e}', exc_info=True)
+    finally:
+        connection.close()
+
+
+def _despertar_pool():
+    _obtener_pool().submit(_procesar_en_hilo)
+
+
+def _avisar_al_confirmar():
+    """
+    Despierta el pool al confirmar la transacción, UNA vez por transacción.
+
+    Una venta registra varios eventos (venta + stock de cada producto); sin
+    esto cada uno encolaba su propio procesamiento. Se revisa la lista de
+    on_commit de la conexión en vez de guardar una bandera: si la transacción
+    (o el savepoint) hace rollback, Django saca el aviso de la lista y el
+    siguiente evento lo vuelve a registrar.
+    """
+    if OUTBOX_MODO != 'hilos':
+        return
+    conexion = transaction.get_connection()
+    if any(entrada[1] is _despertar_pool for entrada in conexion.run_on_commit):
+        return
+    transaction.on_commit(_despertar_pool)
+
+
+def registrar_evento(tipo, referencia_id, datos=None):
+    """
+    Guarda un evento pendiente. Debe llamarse DENTRO de la transacción de la operación.
+
+    Args:
+        tipo (str): Tipo de evento (ej: TIPO_VENTA_REGISTRADA)
+        referencia_id (int): ID del registro que originó el evento
+        datos (dict, optional): Datos adicionales para el procesador
+
+    Returns:
+        EventoOutbox: El evento creado
+    """
+    evento = EventoOutbox.objects.create(tipo=tipo, referencia_id=referencia_id, datos=datos or {})
+    _avisar_al_confirmar()
+    return evento
+
+
+def registrar_eventos(tipo, referencia_ids, datos=None):
+    """
+    Guarda un evento pendiente por cada referencia, con un solo INSERT.
+
+    Args:
+        tipo (str): Tipo de evento (ej: TIPO_STOCK_MODIFICADO)
+        referencia_ids (iterable): IDs de los registros que originaron los eventos
+        datos (dict, optional): Datos adicionales (iguales para todos)
+    """
+    eventos = [
+        EventoOutbox(tipo=tipo, referencia_id=referencia_id, datos=datos or {})
+        for referencia_id in sorted(set(referencia_ids))
+    ]
+    if eventos:
+        EventoOutbox.objects.bulk_create(eventos)
+        _avisar_al_confirmar()
+
+
+# ================================================================
+# =                 MANEJADORES POR TIPO DE EVENTO               =
+# ================================================================
+
+def _manejar_ventas_registradas(eventos):
+    """
+    Materializa historial, movimientos y resumen diario de un lote de ventas.
+
+    Las alertas de los productos vendidos las reevalúa el evento
+    'stock_modificado' que registra la misma venta al descontar los lotes.
+
+    Usa un número fijo de consultas para todo el lote (no por venta).
+    """
+    datos_por_venta = {e.referencia_id: e.datos for e in eventos}
+    venta_ids = list(datos_por_venta.keys())
+
+    ventas = Ventas.objects.select_related('clientes').in_bulk(venta_ids)
+    detalles_por_venta = defaultdict(list)
+    for detalle in DetalleVenta.objects.filter(ventas_id__in=venta_ids).select_related('productos').order_by('id'):
+        detalles_por_venta[detalle.ventas_id].append(detalle)
+
+    # Lo que ya existe no se vuelve a crear (el evento pudo procesarse a medias)
+    con_historial = set(HistorialBoletas.objects.filter(venta_id__in=venta_ids).values_list('venta_id', flat=True))
+    con_movimientos = set(
+        MovimientosInventario.objects.filter(
+            tipo_referencia='venta', referencia_id__in=venta_ids
+        ).values_list('referencia_id', flat=True)
+    )
+
+    historiales, movimientos, nuevas = [], [], []
+    for venta_id in venta_ids:
+        venta = ventas.get(venta_id)
+        if venta is None:
+            continue
+        detalles = detalles_por_venta[venta_id]
+
+        if venta_id not in con_historial:
+            historiales.append(construir_historial_boleta(
+                venta, usuario_emisor=datos_por_venta[venta_id].get('usuario_emisor'), detalles=detalles
+            ))
+            # El historial y el resumen se escriben juntos: si ya hay historial,
+            # la venta ya está sumada en el resumen diario
+            nuevas.append(venta)
+
+        cantidades = defaultdict(Decimal)
+        for detalle in detalles:
+            cantidades[detalle.productos_id] += detalle.cantidad
+        if venta_id not in con_movimientos:
+            movimientos.extend(
+                MovimientosInventario(
+                    tipo_movimiento='salida',
+                    cantidad=cantidad,
+                    productos_id=producto_id,
+                    origen='venta',
+                    referencia_id=venta_id,
+                    tipo_referencia='venta',
+                )
+                for producto_id, cantidad in cantidades.items()
+            )
+
+    if historiales:
+        HistorialBoletas.objects.bulk_create(historiales)
+    if movimientos:
+        MovimientosInventario.objects.bulk_create(movimientos)
+        # `fecha` es auto_now_add: se corrige para que quede la hora de la venta
+        # y no la hora en que se procesó el evento
+        MovimientosInventario.objects.filter(
+            tipo_referencia='venta',
+            referencia_id__in=venta_ids,
+        ).update(fecha=Subquery(Ventas.objects.filter(id=OuterRef('referencia_id')).values('fecha')[:1]))
+
+    aplicar_sumas(sumar_ventas(nuevas, detalles_por_venta))
+
+    logger.info(
+        f'[OUTBOX] {len(venta_ids)} ventas: {len(historiales)} historiales, {len(movimientos)} movimientos'
+    )
+
+
+def _manejar_stock_modificado(eventos):
+    """
+    Reevalúa las alertas de vencimiento y stock bajo de los productos que cambiaron.
+
+    Todo el lote de eventos se evalúa junto (un producto repetido se evalúa una vez).
+    También descarta la curva de pérdida potencial en caché.
+    """
+    producto_ids = {e.referencia_id for e in eventos}
+    resumen = evaluar_alertas(producto_ids, categorias=[CATEGORIA_VENCIMIENTO, CATEGORIA_STOCK_BAJO])
+    transaction.on_commit(invalidar_curva)
+    logger.info(f'[OUTBOX] Alertas reevaluadas para {len(producto_ids)} productos: {resumen}')
+
+
+MANEJADORES = {
+    TIPO_VENTA_REGISTRADA: _manejar_ventas_registradas,
+    TIPO_STOCK_MODIFICADO: _manejar_stock_modificado,
+}
+
+
+# ================================================================
+# =                 PROCESAMIENTO DE PENDIENTES                  =
+# ================================================================
+
+def _procesar_grupo(manejador, eventos):
+    """
+    Ejecuta el manejador para un grupo de eventos del mismo tipo.
+
+    Si el lote completo falla se reintenta evento por evento, para que un
+    solo evento con problemas no bloquee a los demás.
+
+    Returns:
+        tuple: (eventos procesados, eventos con error)
+    """
+    try:
+        with transaction.atomic():
+            manejador(eventos)
+        return eventos, []
+    except Exception:
+        if len(eventos) == 1:
+            raise
+
+    procesados, fallidos = [], []
+    for evento in eventos:
+        try:
+            with transaction.atomic():
+                manejador([evento])
+            procesados.append(evento)
+        except Exception as e:
+            evento.ultimo_error = str(e)[:2000]
+            fallidos.append(evento)
+    return procesados, fallidos
+
+
+def procesar_lote(tamano_lote=OUTBOX_TAMANO_LOTE, excluir=()):
+    """
+    Toma y procesa un lote de eventos pendientes.
+
+    Args:
+        tamano_lote (int): Máximo de eventos a tomar
+        excluir (iterable): IDs de eventos que no se deben tomar (fallaron recién)
+
+    Returns:
+        tuple: (cantidad de eventos tomados, lista de IDs que fallaron)
+    """
+    with transaction.atomic():
+        eventos = list(
+            EventoOutbox.objects.select_for_update(skip_locked=True)
+            .filter(estado='pendiente')
+            .exclude(id__in=list(excluir))
+            .order_by('id')[:tamano_lote]
+        )
+        if not eventos:
+            return 0, []
+        ids_fallidos = []
+
+        por_tipo = defaultdict(list)
+        for evento in eventos:
+            por_tipo[evento.tipo].append(evento)
+
+        ahora = timezone.now()
+        for tipo, grupo in por_tipo.items():
+            manejador = MANEJADORES.get(tipo)
+            if manejador is None:
+                procesados, fallidos = [], grupo
+                for evento in grupo:
+                    evento.ultimo_error = f'Tipo de evento desconocido: {tipo}'
+            else:
+                try:
+                    procesados, fallidos = _procesar_grupo(manejador, grupo)
+                except Exception as e:
+                    grupo[0].ultimo_error = str(e)[:2000]
+                    procesados, fallidos = [], grupo
+
+            for evento in procesados:
+                evento.estado = 'procesado'
+                evento.procesado = ahora
+            for evento in fallidos:
+                ids_fallidos.append(evento.id)
+                evento.intentos += 1
+                if evento.intentos >= MAX_INTENTOS:
+                    evento.estado = 'error'
+                logger.error(f'[OUTBOX] Evento {evento.id} ({evento.tipo} #{evento.referencia_id}): {evento.ultimo_error}')
+
+        EventoOutbox.objects.bulk_update(eventos, ['estado', 'procesado', 'intentos', 'ultimo_error'])
+    return len(eventos), ids_fallidos
+
+
+def procesar_pendientes(tamano_lote=OUTBOX_TAMANO_LOTE, max_lotes=None):
+    """
+    Procesa lotes de eventos hasta que no queden pendientes.
+
+    Args:
+        tamano_lote (int): Eventos por lote
+        max_lotes (int, optional): Límite de lotes por llamada
+
+    Los eventos que fallan no se reintentan en la misma llamada, sino en la
+    siguiente (siguiente venta, siguiente ciclo del comando).
+
+    Returns:
+        int: Total de eventos tomados
+    """
+    close_old_connections()
+    total = 0
+    lotes = 0
+    fallidos = set()
+    while max_lotes is None or lotes < max_lotes:
+        tomados, ids_fallidos = procesar_lote(tamano_lote, excluir=fallidos)
+        fallidos.update(ids_fallidos)
+        total += tomados
+        lotes += 1
+        if tomados < tamano_lote:
+            break
+    return total
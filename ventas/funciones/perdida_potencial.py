@@ -0,0 +1,150 @@
+# ================================================================
+# =                                                              =
+# =       PÉRDIDA POTENCIAL POR VENCIMIENTO (SOBRE LOTES)        =
+# =                                                              =
+# ================================================================
+#
+# Calcula cuánto dinero se perdería si el stock que vence en los próximos
+# días no se vende (precio * cantidad).
+#
+# PROBLEMA QUE RESUELVE:
+# calcular_perdida_por_dias() recorría los productos en Python y se llamaba
+# una vez por horizonte (7, 14 y 30 días: tres endpoints, tres recorridos).
+# Además usaba la `caducidad` del producto, aunque el stock real está en
+# lotes con fechas distintas: un producto con un lote que vence mañana y
+# otro en dos meses se contaba entero en ambos casos o en ninguno.
+#
+# ESTRATEGIA:
+# - UNA consulta agrupada por `fecha_caducidad` sobre los lotes activos con
+#   stock que vencen entre hoy y hoy + DIAS_MAXIMOS (usa el índice
+#   idx_estado_caducidad de lotes). El resultado es la CURVA diaria: valor
+#   que vence cada día y su acumulado
+# - Cualquier horizonte (7, 14, 30 o uno a pedido) es el acumulado de la
+#   curva en ese día, sin volver a consultar
+# - Los productos antiguos SIN lotes se suman por su propia `caducidad`
+#   (otra consulta agrupada), como hacía el cálculo anterior
+# - La curva se guarda en la caché hasta el fin del día. Cuando cambia el
+#   stock de algún producto (evento 'stock_modificado' del outbox) se
+#   invalida y la siguiente consulta la vuelve a calcular
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Sum, F, Q, Case, When, Value, Exists, OuterRef, DecimalField, ExpressionWrapper
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from ventas.models import Productos, Lote
+
+# Horizontes (en días) que muestra el dashboard
+HORIZONTES_POR_DEFECTO = (7, 14, 30)
+
+# Días hacia adelante que cubre la curva (límite de los horizontes a pedido)
+DIAS_MAXIMOS = 365
+
+
+def _clave_cache(hoy):
+    return f'perdida_potencial:curva:{hoy.isoformat()}'
+
+
+def calcular_curva(hoy=None, dias_maximos=DIAS_MAXIMOS):
+    """
+    Calcula la curva diaria de pérdida potencial (sin caché).
+
+    Args:
+        hoy (date, optional): Fecha de referencia (por defecto, hoy)
+        dias_maximos (int): Días hacia adelante que cubre la curva
+
+    Returns:
+        list: [{'fecha': date, 'dias': int, 'valor': Decimal}] ordenada por fecha;
+              solo los días en que vence algo
+    """
+    hoy = hoy or timezone.localdate()
+    limite = hoy + timedelta(days=dias_maximos)
+    decimal = DecimalField(max_digits=14, decimal_places=2)
+    valor_por_fecha = {}
+
+    # 1. Lotes activos con stock, agrupados por fecha de caducidad (una consulta)
+    lotes = Lote.objects.filter(
+        estado='activo',
+        fecha_caducidad__gte=hoy,
+        fecha_caducidad__lte=limite,
+        cantidad__gt=0,
+        productos__eliminado__isnull=True,
+    ).values('fecha_caducidad').annotate(
+        valor=Sum(ExpressionWrapper(F('cantidad') * F('productos__precio'), output_field=decimal)),
+    ).order_by()
+    for fila in lotes:
+        valor_por_fecha[fila['fecha_caducidad']] = fila['valor'] or Decimal('0')
+
+    # 2. Productos sin lotes, por su propia caducidad (una consulta)
+    # El stock es `cantidad`, o `stock_actual` si la cantidad es 0 (igual que antes)
+    cantidad = DecimalField(max_digits=10, decimal_places=3)
+    stock_real = Case(
+        When(cantidad__gt=0, then=F('cantidad')),
+        default=Coalesce(F('stock_actual'), Value(Decimal('0')), output_field=cantidad),
+        output_field=cantidad,
+    )
+    sin_lotes = Productos.objects.filter(
+        eliminado__isnull=True,
+        caducidad__gte=hoy,
+        caducidad__lte=limite,
+    ).filter(
+        Q(cantidad__gt=0) | Q(stock_actual__gt=0)
+    ).exclude(
+        Exists(Lote.objects.filter(productos=OuterRef('pk')))
+    ).values('caducidad').annotate(
+        valor=Sum(ExpressionWrapper(F('precio') * stock_real, output_field=decimal)),
+    ).order_by()
+    for fila in sin_lotes:
+        fecha = fila['caducidad']
+        valor_por_fecha[fecha] = valor_por_fecha.get(fecha, Decimal('0')) + (fila['valor'] or Decimal('0'))
+
+    return [
+        {'fecha': fecha, 'dias': (fecha - hoy).days, 'valor': valor}
+        for fecha, valor in sorted(valor_por_fecha.items())
+    ]
+
+
+def obtener_curva(hoy=None):
+    """
+    Retorna la curva de pérdida potencial desde la caché (o la calcula).
+
+    La entrada de la caché dura hasta el fin del día local.
+
+    Returns:
+        list: Mismo formato que calcular_curva()
+    """
+    hoy = hoy or timezone.localdate()
+    clave = _clave_cache(hoy)
+    curva = cache.get(clave)
+    if curva is None:
+        curva = calcular_curva(hoy)
+        manana = timezone.make_aware(datetime.combine(hoy + timedelta(days=1), datetime.min.time()))
+        segundos = int((manana - timezone.now()).total_seconds())
+        cache.set(clave, curva, max(segundos, 60))
+    return curva
+
+
+def invalidar_curva():
+    """Descarta la curva de hoy (se llama cuando cambia el stock)."""
+    cache.delete(_clave_cache(timezone.localdate()))
+
+
+def perdida_por_horizontes(horizontes=HORIZONTES_POR_DEFECTO, curva=None):
+    """
+    Suma la pérdida potencial hasta cada horizonte.
+
+    Args:
+        horizontes (iterable): Días hacia adelante (ej: 7, 14, 30)
+        curva (list, optional): Curva ya calculada (por defecto, obtener_curva())
+
+    Returns:
+        dict: {dias: Decimal} con la pérdida de lo que vence entre hoy y hoy + dias
+    """
+    curva = obtener_curva() if curva is None else curva
+    return {
+        dias: sum((punto['valor'] for punto in curva if punto['dias'] <= dias), Decimal('0'))
+        for dias in horizontes
+    }
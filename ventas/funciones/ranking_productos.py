@@ -0,0 +1,132 @@
+# ================================================================
+# =                                                              =
+# =          RANKING DE PRODUCTOS VENDIDOS (TOP PRODUCTOS)       =
+# =                                                              =
+# ================================================================
+#
+# Calcula el ranking de productos de un rango de fechas por unidades
+# vendidas o por monto neto (reporte RF-V5 y sus exportaciones).
+#
+# PROBLEMA QUE RESUELVE:
+# El reporte armaba el top 20 y después, por CADA producto, volvía a leer
+# sus detalles de venta para sumar cantidad x precio en Python (20 + 20
+# consultas extra). El ranking por neto además tomaba 20 productos sin
+# orden y los ordenaba después, así que podía dejar fuera a los que más
+# vendieron. Y el "neto" no descontaba el `descuento_pct` de cada línea.
+#
+# ESTRATEGIA:
+# - UNA consulta agrupada por producto sobre `detalle_venta` (filtrando
+#   por la fecha de la venta) que suma unidades y neto:
+#       neto = cantidad x precio_unitario x (100 - descuento_pct) / 100
+#   igual que DetalleVenta.calcular_subtotal()
+# - El orden (unidades o neto) y el límite se aplican en la BD
+# - El precio promedio es neto / unidades (sin consultar de nuevo)
+# - El resultado se guarda en la caché por rango y orden. Un rango que ya
+#   terminó no cambia (se guarda un día); si incluye hoy, solo unos minutos
+
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Sum, F, Value, DecimalField, ExpressionWrapper
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from ventas.models import DetalleVenta
+from ventas.funciones.resumen_dashboard import rango_dia_local
+
+# Productos que muestra el ranking
+LIMITE_POR_DEFECTO = 20
+
+# Órdenes permitidos: campo anotado por el que se ordena
+ORDENES = {
+    'cantidad': 'total_cantidad',
+    'neto': 'total_neto',
+}
+
+# Segundos que se guarda un rango que incluye hoy / un rango cerrado
+SEGUNDOS_RANGO_ABIERTO = 5 * 60
+SEGUNDOS_RANGO_CERRADO = 24 * 60 * 60
+
+
+def calcular_ranking(desde=None, hasta=None, orden='cantidad', limite=LIMITE_POR_DEFECTO):
+    """
+    Calcula el ranking de productos vendidos (sin caché).
+
+    Args:
+        desde (date, optional): Primer día (incluido); sin límite si es None
+        hasta (date, optional): Último día (incluido); sin límite si es None
+        orden (str): 'cantidad' (unidades) o 'neto' (monto con descuentos)
+        limite (int): Productos del ranking
+
+    Returns:
+        list: [{'producto_id', 'nombre', 'cantidad_vendida', 'total_neto',
+                'precio_promedio'}] ordenada de mayor a menor
+    """
+    campo_orden = ORDENES.get(orden, ORDENES['cantidad'])
+    decimal = DecimalField(max_digits=14, decimal_places=2)
+
+    detalles = DetalleVenta.objects.all()
+    if desde:
+        detalles = detalles.filter(ventas__fecha__gte=rango_dia_local(desde)[0])
+    if hasta:
+        detalles = detalles.filter(ventas__fecha__lt=rango_dia_local(hasta)[1])
+
+    # Neto de cada línea, igual que DetalleVenta.calcular_subtotal()
+    # (se divide por 100 al final para no perder decimales del porcentaje)
+    neto_linea = ExpressionWrapper(
+        F('cantidad') * F('precio_unitario')
+        * (Value(Decimal('100')) - Coalesce(F('descuento_pct'), Value(Decimal('0'))))
+        / Value(Decimal('100')),
+        output_field=decimal,
+    )
+
+    filas = detalles.values(
+        'productos_id',
+        'productos__nombre',
+    ).annotate(
+        total_cantidad=Sum('cantidad'),
+        total_neto=Sum(neto_linea),
+    ).order_by(f'-{campo_orden}', 'productos__nombre')[:limite]
+
+    ranking = []
+    for fila in filas:
+        cantidad = fila['total_cantidad'] or Decimal('0')
+        neto = (fila['total_neto'] or Decimal('0')).quantize(Decimal('0.01'))
+        ranking.append({
+            'producto_id': fila['productos_id'],
+            'nombre': fila['productos__nombre'],
+            'cantidad_vendida': cantidad,
+            'total_neto': neto,
+            'precio_promedio': (neto / cantidad).quantize(Decimal('0.01')) if cantidad > 0 else Decimal('0.00'),
+        })
+    return ranking
+
+
+def obtener_ranking(desde=None, hasta=None, orden='cantidad', limite=LIMITE_POR_DEFECTO):
+    """
+    Retorna el ranking de productos desde la caché (o lo calcula).
+
+    Args:
+        desde (date, optional): Primer día (incluido)
+        hasta (date, optional): Último día (incluido)
+        orden (str): 'cantidad' o 'neto'
+        limite (int): Productos del ranking
+
+    Returns:
+        list: Mismo formato que calcular_ranking()
+    """
+    orden = orden if orden in ORDENES else 'cantidad'
+    hoy = timezone.localdate()
+
+    clave = 'ranking_productos:{}:{}:{}:{}'.format(
+        orden,
+        desde.isoformat() if desde else 'inicio',
+        hasta.isoformat() if hasta else 'hoy',
+        limite,
+    )
+    ranking = cache.get(clave)
+    if ranking is None:
+        ranking = calcular_ranking(desde, hasta, orden, limite)
+        abierto = hasta is None or hasta >= hoy
+        cache.set(clave, ranking, SEGUNDOS_RANGO_ABIERTO if abierto else SEGUNDOS_RANGO_CERRADO)
+    return ranking
@@ -0,0 +1,138 @@
+# ================================================================
+# =                                                              =
+# =        RESERVA DE STOCK (BLOQUEO DE LOTES SIN CARRERAS)     =
+# =                                                              =
+# ================================================================
+#
+# Este archivo centraliza el bloqueo de lotes para todas las operaciones
+# que DESCUENTAN stock (ventas del POS, ajustes de salida, merma).
+#
+# PROBLEMA QUE RESUELVE:
+# Dos cajeros vendiendo las últimas unidades del mismo pan podían pasar
+# ambos la validación de stock, porque los lotes se leían sin bloqueo y
+# luego se guardaba `lote.cantidad` calculado en Python (leer-modificar-escribir).
+#
+# ESTRATEGIA:
+# - Los lotes se bloquean con SELECT ... FOR UPDATE dentro de transaction.atomic()
+# - El bloqueo se toma SIEMPRE en el mismo orden (por id del lote), así dos
+#   terminales que venden productos en común nunca se bloquean mutuamente (deadlock)
+# - Solo se bloquean los lotes de los productos involucrados: ventas de
+#   productos distintos siguen ejecutándose en paralelo
+# - Una vez bloqueados, el cálculo FIFO en memoria es seguro, porque nadie
+#   más puede modificar esos lotes hasta que la transacción termine
+#
+# IMPORTANTE: Estas funciones deben llamarse dentro de transaction.atomic().
+
+from decimal import Decimal
+
+from ventas.models import Lote
+
+
+class StockInsuficienteError(ValueError):
+    """Los lotes activos del producto no alcanzan para la cantidad solicitada."""
+    pass
+
+
+def bloquear_lotes_activos(producto_ids):
+    """
+    Bloquea los lotes activos con stock de los productos indicados.
+
+    Primero se obtienen los ids de los lotes candidatos y luego se bloquean
+    por clave primaria en orden ascendente. De esta forma MySQL recorre el
+    índice PRIMARY y toma los bloqueos en un orden determinista, sin depender
+    del plan de ejecución que elija para el filtro por producto.
+
+    Args:
+        producto_ids (list): IDs de los productos cuyos lotes se van a descontar
+
+    Returns:
+        dict: {producto_id: [lotes ordenados FIFO]} (incluye productos sin lotes con lista vacía)
+    """
+    producto_ids = list(producto_ids)
+    lotes_por_producto = {pid: [] for pid in producto_ids}
+    if not producto_ids:
+        return lotes_por_producto
+
+    lote_ids = list(
+        Lote.objects.filter(
+            productos_id__in=producto_ids,
+            estado='activo',
+            cantidad__gt=0,
+        ).values_list('id', flat=True)
+    )
+    if not lote_ids:
+        return lotes_por_producto
+
+    # Volvemos a filtrar por estado y cantidad: entre la lectura y el bloqueo
+    # otra transacción pudo haber agotado o movido a merma alguno de los lotes
+    lotes = Lote.objects.select_for_update().filter(
+        id__in=lote_ids,
+        estado='activo',
+        cantidad__gt=0,
+    ).order_by('id')
+
+    for lote in lotes:
+        lotes_por_producto[lote.productos_id].append(lote)
+
+    # FIFO: primero los que vencen antes (y a igual fecha, los recibidos antes)
+    for lotes_producto in lotes_por_producto.values():
+        lotes_producto.sort(key=lambda l: (l.fecha_caducidad, l.fecha_recepcion, l.id))
+    return lotes_por_producto
+
+
+def descontar_fifo(producto, lotes, cantidad):
+    """
+    Descuenta `cantidad` de los lotes (ya bloqueados) del producto en orden FIFO.
+
+    Solo modifica los objetos en memoria; quien llama debe persistirlos
+    (por ejemplo con Lote.objects.bulk_update(lotes, ['cantidad', 'estado'])).
+
+    Args:
+        producto (Productos): Producto al que pertenecen los lotes (para mensajes)
+        lotes (list): Lotes activos del producto ordenados FIFO
+        cantidad (Decimal): Cantidad total a descontar
+
+    Returns:
+        list: Lotes modificados
+
+    Raises:
+        StockInsuficienteError: Si la suma de los lotes no alcanza
+    """
+    cantidad = Decimal(str(cantidad))
+    disponible = sum((Decimal(str(lote.cantidad)) for lote in lotes), Decimal('0'))
+    if disponible < cantidad:
+        raise StockInsuficienteError(
+            f'Stock insuficiente para {producto.nombre}. '
+            f'Disponible: {disponible}, Solicitado: {cantidad}'
+        )
+
+    modificados = []
+    restante = cantidad
+    for lote in lotes:
+        if restante <= Decimal('0'):
+            break
+        cantidad_lote = Decimal(str(lote.cantidad))
+        tomar = min(restante, cantidad_lote)
+        lote.cantidad = cantidad_lote - tomar
+        if lote.cantidad <= Decimal('0'):
+            lote.cantidad = Decimal('0')
+            lote.estado = 'agotado'
+        modificados.append(lote)
+        restante -= tomar
+    return modificados
+
+
+def resumen_lotes(lotes):
+    """
+    Calcula la cantidad total y la caducidad más próxima de una lista de lotes FIFO.
+
+    Args:
+        lotes (list): Lotes del producto ordenados FIFO (después de descontar)
+
+    Returns:
+        tuple: (cantidad total en lotes activos, fecha de caducidad más próxima o None)
+    """
+    restantes = [l for l in lotes if l.estado == 'activo' and l.cantidad > Decimal('0')]
+    total = sum((Decimal(str(l.cantidad)) for l in restantes), Decimal('0'))
+    caducidad = restantes[0].fecha_caducidad if restantes else None
+    return total, caducidad
@@ -0,0 +1,162 @@
+# ================================================================
+# =                                                              =
+# =         RESUMEN DEL DASHBOARD (KPIs EN POCAS CONSULTAS)      =
+# =                                                              =
+# ================================================================
+#
+# PROBLEMA QUE RESUELVE:
+# El dashboard pedía cada métrica a un endpoint distinto (ventas del día,
+# stock bajo, alertas, top producto, pérdida potencial...). Cada uno volvía
+# a calcular los límites del día, escribía varias líneas INFO en el log y
+# hacía sus propias consultas; stock_bajo_api incluso recorría todos los
+# productos en Python. Con varias pantallas refrescando cada 30 segundos la
+# carga sobre la BD se multiplicaba por cada pantalla.
+#
+# ESTRATEGIA:
+# - calcular_resumen() obtiene TODOS los KPIs con agregaciones condicionales
+#   (Count(filter=Q(...)), Sum(filter=...)): una consulta por tabla
+#   (ventas, productos, alertas, detalle de ventas). La pérdida potencial
+#   sale de la curva sobre los lotes (perdida_potencial.py, en caché el día)
+# - obtener_resumen() guarda el resultado en la caché por
+#   DASHBOARD_RESUMEN_SEGUNDOS: da igual cuántas pantallas lo consulten,
+#   la BD lo calcula como máximo una vez por intervalo
+
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum, Count, F, Q, Value, DecimalField
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from ventas.models import Ventas, DetalleVenta, Productos, Alertas
+from ventas.funciones.stock_bajo import filtro_stock_bajo
+from ventas.funciones.perdida_potencial import perdida_por_horizontes, HORIZONTES_POR_DEFECTO
+
+# Segundos que se reutiliza el resumen calculado
+DASHBOARD_RESUMEN_SEGUNDOS = getattr(settings, 'DASHBOARD_RESUMEN_SEGUNDOS', 10)
+
+# Horizontes (en días) de la pérdida potencial por vencimiento
+DIAS_PERDIDA_POTENCIAL = HORIZONTES_POR_DEFECTO
+
+CLAVE_CACHE = 'dashboard:resumen'
+
+
+def rango_dia_local(fecha=None):
+    """
+    Retorna el inicio y el fin (aware) de un día en la zona horaria local.
+
+    Las ventas se guardan en UTC; comparar contra este rango (fecha__gte=inicio,
+    fecha__lt=fin) toma el día completo de America/Santiago.
+
+    Args:
+        fecha (date, optional): Día local (por defecto, hoy)
+
+    Returns:
+        tuple: (inicio, fin) donde fin es las 00:00 del día siguiente
+    """
+    fecha = fecha or timezone.localdate()
+    inicio = timezone.make_aware(datetime.combine(fecha, datetime.min.time()))
+    fin = timezone.make_aware(datetime.combine(fecha + timedelta(days=1), datetime.min.time()))
+    return inicio, fin
+
+
+def calcular_resumen():
+    """
+    Calcula todos los KPIs del dashboard (sin caché).
+
+    Returns:
+        dict: {'ventas_del_dia', 'stock_bajo', 'alertas', 'top_producto',
+               'perdida_potencial', 'merma', 'generado'}
+    """
+    hoy = timezone.localdate()
+    inicio, fin = rango_dia_local(hoy)
+    decimal = DecimalField(max_digits=14, decimal_places=2)
+    cero = Value(0, output_field=decimal)
+
+    # 1. Ventas del día (una consulta)
+    ventas = Ventas.objects.filter(fecha__gte=inicio, fecha__lt=fin).aggregate(
+        total=Coalesce(Sum('total_con_iva'), cero, output_field=decimal),
+        transacciones=Count('id'),
+    )
+
+    # 2. Productos: stock bajo y merma (una consulta)
+    productos = Productos.objects.filter(eliminado__isnull=True).aggregate(
+        stock_bajo=Count('id', filter=Q(estado_merma='activo') & filtro_stock_bajo()),
+        en_merma=Count('id', filter=Q(estado_merma='en_merma')),
+    )
+
+    # Pérdida potencial por vencimiento: curva sobre los lotes (en caché todo el día)
+    perdida = perdida_por_horizontes(DIAS_PERDIDA_POTENCIAL)
+
+    # 3. Alertas activas de productos activos, por tipo y categoría (una consulta)
+    alertas = Alertas.objects.filter(
+        estado='activa',
+        productos__estado_merma='activo',
+    ).aggregate(
+        total=Count('id'),
+        roja=Count('id', filter=Q(tipo_alerta='roja')),
+        amarilla=Count('id', filter=Q(tipo_alerta='amarilla')),
+        verde=Count('id', filter=Q(tipo_alerta='verde')),
+        vencimiento=Count('id', filter=Q(categoria_alerta='vencimiento')),
+        stock_bajo=Count('id', filter=Q(categoria_alerta='stock_bajo')),
+        manual=Count('id', filter=Q(categoria_alerta='manual')),
+    )
+
+    # 4. Producto más vendido del día (una consulta agrupada)
+    top = DetalleVenta.objects.filter(
+        ventas__fecha__gte=inicio,
+        ventas__fecha__lt=fin,
+    ).values('productos__nombre').annotate(
+        total_unidades=Sum('cantidad'),
+        total_vendido=Sum(F('cantidad') * F('precio_unitario')),
+    ).order_by('-total_unidades').first()
+
+    return {
+        'ventas_del_dia': {
+            'total_ventas': float(ventas['total']),
+            'num_transacciones': ventas['transacciones'],
+        },
+        'stock_bajo': {
+            'num_productos': productos['stock_bajo'],
+        },
+        'alertas': {
+            'num_alertas': alertas['total'],
+            'por_tipo': {
+                'roja': alertas['roja'],
+                'amarilla': alertas['amarilla'],
+                'verde': alertas['verde'],
+            },
+            'por_categoria': {
+                'vencimiento': alertas['vencimiento'],
+                'stock_bajo': alertas['stock_bajo'],
+                'manual': alertas['manual'],
+            },
+        },
+        'top_producto': {
+            'nombre': top['productos__nombre'] if top else 'Sin ventas',
+            'unidades': float(top['total_unidades'] or 0) if top else 0,
+            'total_vendido': float(top['total_vendido'] or 0) if top else 0,
+        },
+        'perdida_potencial': {
+            str(dias): float(perdida[dias]) for dias in DIAS_PERDIDA_POTENCIAL
+        },
+        'merma': {
+            'num_productos': productos['en_merma'],
+        },
+        'generado': timezone.localtime().isoformat(),
+    }
+
+
+def obtener_resumen():
+    """
+    Retorna el resumen del dashboard desde la caché (o lo calcula si expiró).
+
+    Returns:
+        dict: Mismo formato que calcular_resumen()
+    """
+    resumen = cache.get(CLAVE_CACHE)
+    if resumen is None:
+        resumen = calcular_resumen()
+        cache.set(CLAVE_CACHE, resumen, DASHBOARD_RESUMEN_SEGUNDOS)
+    return resumen
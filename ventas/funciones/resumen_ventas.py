@@ -0,0 +1,345 @@
+# ================================================================
+# =                                                              =
+# =        RESUMEN DIARIO DE VENTAS (MANTENER Y CONSULTAR)       =
+# =                                                              =
+# ================================================================
+#
+# Mantiene la tabla `ventas_resumen_diario` (ver ventas/models/resumen_ventas.py)
+# y la usa para calcular los totales de los reportes.
+#
+# PROBLEMA QUE RESUELVE:
+# Los totales de los reportes se calculaban sumando `ventas` y
+# `detalle_venta` en cada consulta: un reporte anual recorría todas las
+# transacciones del año. Con el resumen se leen unas filas por día.
+#
+# CÓMO SE MANTIENE:
+# - Cada venta nueva se suma al resumen cuando el outbox procesa su evento
+#   'venta_registrada' (sumar_ventas + aplicar_sumas, en la misma
+#   transacción que el historial de boletas: si el evento se reprocesa, la
+#   venta ya tiene historial y no se vuelve a sumar)
+# - reconstruir_resumen() borra y recalcula un rango de días desde las
+#   ventas (comando `python manage.py reconstruir_resumen_ventas`). Deja
+#   fuera las ventas cuyo evento sigue pendiente o quedó en error: esas las
+#   suma el outbox cuando lo procese (si un evento en error se vuelve a
+#   dejar pendiente, no se suma dos veces)
+#
+# REPARTO DE MONTOS POR PRODUCTO:
+# El descuento global y el IVA son de la venta completa. Cada línea recibe
+# la parte proporcional a su subtotal, así la suma de los productos de una
+# venta coincide con sus totales (salvo redondeo de centavos). Las filas
+# sin producto guardan los totales exactos de cada venta.
+#
+# CONCURRENCIA:
+# aplicar_sumas() primero crea en cero las filas que falten con INSERT IGNORE
+# (la clave única usa producto_clave, ver el modelo) y después las bloquea
+# todas con SELECT ... FOR UPDATE antes de sumarles. Si dos procesadores del
+# outbox suman el mismo día a la vez, el segundo espera al primero y suma
+# sobre la misma fila en vez de crear otra.
+#
+# CONSULTAS:
+# totales_ventas() usa el resumen para los días anteriores a hoy y las
+# ventas directamente para:
+# - el día de hoy (el resumen de hoy puede ir unos segundos atrasado
+#   respecto del outbox)
+# - los días cerrados con ventas cuyo evento 'venta_registrada' sigue
+#   pendiente o quedó en error (esas ventas todavía no están en el resumen)
+# Los días anteriores al despliegue del resumen solo aparecen después de
+# correr `python manage.py reconstruir_resumen_ventas` (paso obligatorio al
+# desplegar, ver sql_modificaciones.txt).
+
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Sum, Count, Q
+from django.utils import timezone
+
+from ventas.models import Ventas, DetalleVenta, VentasResumenDiario, EventoOutbox
+from ventas.funciones.resumen_dashboard import rango_dia_local
+
+CAMPOS_MONTO = ('unidades', 'total_bruto', 'total_neto', 'total_iva', 'total_con_iva')
+
+# Ventas que se leen por consulta al reconstruir
+TAMANO_LOTE_RECONSTRUCCION = 2000
+
+# Estados del evento 'venta_registrada' cuya venta todavía no está en el resumen
+ESTADOS_SIN_RESUMEN = ('pendiente', 'error')
+
+CENTAVO = Decimal('0.01')
+MILESIMA = Decimal('0.001')
+
+
+def _fila_vacia():
+    fila = {campo: Decimal('0') for campo in CAMPOS_MONTO}
+    fila['tickets'] = 0
+    return fila
+
+
+# ================================================================
+# =                    SUMAR VENTAS                              =
+# ================================================================
+
+def sumar_ventas(ventas, detalles_por_venta, sumas=None):
+    """
+    Suma un grupo de ventas en el formato del resumen (en memoria).
+
+    Args:
+        ventas (iterable): Ventas a sumar
+        detalles_por_venta (dict): {venta_id: [DetalleVenta]}
+        sumas (dict, optional): Sumas anteriores a las que se agregan estas ventas
+
+    Returns:
+        dict: {(fecha, producto_id o None, canal_venta, medio_pago): {campo: valor}}
+    """
+    sumas = sumas if sumas is not None else defaultdict(_fila_vacia)
+
+    for venta in ventas:
+        fecha = timezone.localdate(venta.fecha)
+        detalles = detalles_por_venta.get(venta.id, [])
+
+        # Subtotal de cada línea (con IVA y su descuento) para repartir los totales
+        por_producto = defaultdict(lambda: {'unidades': Decimal('0'), 'bruto': Decimal('0'), 'subtotal': Decimal('0')})
+        for detalle in detalles:
+            linea = por_producto[detalle.productos_id]
+            linea['unidades'] += detalle.cantidad
+            linea['bruto'] += detalle.cantidad * detalle.precio_unitario
+            linea['subtotal'] += detalle.calcular_subtotal()
+        suma_subtotales = sum((linea['subtotal'] for linea in por_producto.values()), Decimal('0'))
+
+        total = sumas[(fecha, None, venta.canal_venta, venta.medio_pago)]
+        total['unidades'] += sum((linea['unidades'] for linea in por_producto.values()), Decimal('0'))
+        total['total_bruto'] += sum((linea['bruto'] for linea in por_producto.values()), Decimal('0'))
+        total['total_neto'] += venta.total_sin_iva
+        total['total_iva'] += venta.total_iva
+        total['total_con_iva'] += venta.total_con_iva
+        total['tickets'] += 1
+
+        for producto_id, linea in por_producto.items():
+            proporcion = linea['subtotal'] / suma_subtotales if suma_subtotales else Decimal('0')
+            fila = sumas[(fecha, producto_id, venta.canal_venta, venta.medio_pago)]
+            fila['unidades'] += linea['unidades']
+            fila['total_bruto'] += linea['bruto']
+            fila['total_neto'] += venta.total_sin_iva * proporcion
+            fila['total_iva'] += venta.total_iva * proporcion
+            fila['total_con_iva'] += venta.total_con_iva * proporcion
+            fila['tickets'] += 1
+
+    return sumas
+
+
+def _redondear(campo, valor):
+    return valor.quantize(MILESIMA if campo == 'unidades' else CENTAVO)
+
+
+def aplicar_sumas(sumas):
+    """
+    Agrega las sumas a las filas del resumen (las crea si no existen).
+
+    Debe llamarse DENTRO de una transacción. Las filas que faltan se crean
+    en cero (INSERT IGNORE) y luego todas se bloquean (SELECT ... FOR
+    UPDATE) antes de sumarles, así dos procesadores a la vez no duplican filas.
+
+    Args:
+        sumas (dict): Resultado de sumar_ventas()
+
+    Returns:
+        int: Filas del resumen escritas
+    """
+    if not sumas:
+        return 0
+
+    # 1. Filas en cero para las claves nuevas (las que ya existen se ignoran)
+    VentasResumenDiario.objects.bulk_create(
+        [
+            VentasResumenDiario(
+                fecha=fecha,
+                productos_id=producto_id,
+                producto_clave=producto_id or VentasResumenDiario.PRODUCTO_TOTAL,
+                canal_venta=canal_venta,
+                medio_pago=medio_pago,
+            )
+            for fecha, producto_id, canal_venta, medio_pago in sumas
+        ],
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+
+    # 2. Bloquear las filas (en orden de id) y sumarles
+    fechas = {clave[0] for clave in sumas}
+    claves_producto = {clave[1] or VentasResumenDiario.PRODUCTO_TOTAL for clave in sumas}
+    filas = {}
+    for fila in VentasResumenDiario.objects.select_for_update().filter(
+        fecha__in=fechas,
+        producto_clave__in=claves_producto,
+    ).order_by('id'):
+        filas[(fila.fecha, fila.productos_id, fila.canal_venta, fila.medio_pago)] = fila
+
+    ahora = timezone.now()
+    actualizadas = []
+    for clave, valores in sumas.items():
+        fila = filas[clave]
+        for campo in CAMPOS_MONTO:
+            setattr(fila, campo, _redondear(campo, getattr(fila, campo) + valores[campo]))
+        fila.tickets += valores['tickets']
+        fila.actualizado = ahora
+        actualizadas.append(fila)
+
+    VentasResumenDiario.objects.bulk_update(
+        actualizadas, [*CAMPOS_MONTO, 'tickets', 'actualizado'], batch_size=500
+    )
+    return len(actualizadas)
+
+
+# ================================================================
+# =                    RECONSTRUIR                               =
+# ================================================================
+
+def reconstruir_resumen(desde, hasta, tamano_lote=TAMANO_LOTE_RECONSTRUCCION):
+    """
+    Borra y recalcula desde las ventas el resumen de un rango de días.
+
+    Todo el rango se reemplaza en una transacción: conviene llamarla por
+    meses (así lo hace el comando).
+
+    Args:
+        desde (date): Primer día (incluido)
+        hasta (date): Último día (incluido)
+        tamano_lote (int): Ventas que se leen por consulta
+
+    Returns:
+        dict: {'ventas': int, 'filas': int}
+    """
+    inicio = rango_dia_local(desde)[0]
+    fin = rango_dia_local(hasta)[1]
+    sumas = defaultdict(_fila_vacia)
+    numero_ventas = 0
+
+    with transaction.atomic():
+        VentasResumenDiario.objects.filter(fecha__gte=desde, fecha__lte=hasta).delete()
+
+        # Las ventas con el evento todavía pendiente (o en error) las sumará el outbox
+        pendientes = EventoOutbox.objects.filter(
+            tipo='venta_registrada', estado__in=ESTADOS_SIN_RESUMEN,
+        ).values('referencia_id')
+        ventas = Ventas.objects.filter(fecha__gte=inicio, fecha__lt=fin).exclude(
+            id__in=pendientes,
+        ).only(
+            'id', 'fecha', 'canal_venta', 'medio_pago', 'total_sin_iva', 'total_iva', 'total_con_iva'
+        ).order_by('id')
+        ultimo_id = 0
+        while True:
+            grupo = list(ventas.filter(id__gt=ultimo_id)[:tamano_lote])
+            if not grupo:
+                break
+            ultimo_id = grupo[-1].id
+
+            detalles_por_venta = defaultdict(list)
+            for detalle in DetalleVenta.objects.filter(ventas_id__in=[v.id for v in grupo]).only(
+                'ventas_id', 'productos_id', 'cantidad', 'precio_unitario', 'descuento_pct'
+            ):
+                detalles_por_venta[detalle.ventas_id].append(detalle)
+
+            sumar_ventas(grupo, detalles_por_venta, sumas)
+            numero_ventas += len(grupo)
+
+        filas = aplicar_sumas(sumas)
+
+    return {'ventas': numero_ventas, 'filas': filas}
+
+
+# ================================================================
+# =                    CONSULTAS                                 =
+# ================================================================
+
+def dias_sin_resumen(desde=None, hasta=None):
+    """
+    Días con ventas que todavía no están en el resumen (evento pendiente o en error).
+
+    Args:
+        desde (date, optional): Primer día (incluido); sin límite si es None
+        hasta (date): Último día (incluido)
+
+    Returns:
+        set: Fechas (locales) de esos días
+    """
+    sin_procesar = EventoOutbox.objects.filter(
+        tipo='venta_registrada', estado__in=ESTADOS_SIN_RESUMEN,
+    ).values('referencia_id')
+    ventas = Ventas.objects.filter(id__in=sin_procesar, fecha__lt=rango_dia_local(hasta)[1])
+    if desde:
+        ventas = ventas.filter(fecha__gte=rango_dia_local(desde)[0])
+    return {timezone.localdate(fecha) for fecha in ventas.values_list('fecha', flat=True)}
+
+
+def totales_ventas(desde=None, hasta=None, canal_venta=None):
+    """
+    Totales de las ventas de un rango de días (para los reportes).
+
+    Los días anteriores a hoy se leen del resumen. El día de hoy y los días
+    cerrados que tienen ventas sin sumar al resumen (ver dias_sin_resumen)
+    se leen de las ventas.
+
+    Args:
+        desde (date, optional): Primer día (incluido); sin límite si es None
+        hasta (date, optional): Último día (incluido); hasta hoy si es None
+        canal_venta (str, optional): Solo ventas de este canal
+
+    Returns:
+        dict: {'total_neto', 'total_iva', 'total_con_iva', 'cantidad_ventas'}
+    """
+    hoy = timezone.localdate()
+    hasta = hasta or hoy
+    totales = {
+        'total_neto': Decimal('0.00'),
+        'total_iva': Decimal('0.00'),
+        'total_con_iva': Decimal('0.00'),
+        'cantidad_ventas': 0,
+    }
+
+    # Días que se leen de las ventas: hoy y los cerrados con eventos sin procesar
+    hasta_resumen = min(hasta, hoy - timedelta(days=1))
+    dias_desde_ventas = set()
+    if desde is None or desde <= hasta_resumen:
+        dias_desde_ventas = dias_sin_resumen(desde, hasta_resumen)
+    if hasta >= hoy and (desde is None or desde <= hoy):
+        dias_desde_ventas.add(hoy)
+
+    # 1. Días cerrados: filas de totales del resumen (una consulta)
+    if desde is None or desde <= hasta_resumen:
+        filas = VentasResumenDiario.objects.filter(
+            producto_clave=VentasResumenDiario.PRODUCTO_TOTAL,
+            fecha__lte=hasta_resumen,
+        ).exclude(fecha__in=dias_desde_ventas)
+        if desde:
+            filas = filas.filter(fecha__gte=desde)
+        if canal_venta:
+            filas = filas.filter(canal_venta=canal_venta)
+        resumen = filas.aggregate(
+            total_neto=Sum('total_neto'),
+            total_iva=Sum('total_iva'),
+            total_con_iva=Sum('total_con_iva'),
+            cantidad_ventas=Sum('tickets'),
+        )
+        for campo in totales:
+            totales[campo] += resumen[campo] or 0
+
+    # 2. Hoy y días sin resumen: directamente de las ventas (una consulta)
+    if dias_desde_ventas:
+        rangos = Q()
+        for dia in dias_desde_ventas:
+            inicio, fin = rango_dia_local(dia)
+            rangos |= Q(fecha__gte=inicio, fecha__lt=fin)
+        ventas_dias = Ventas.objects.filter(rangos)
+        if canal_venta:
+            ventas_dias = ventas_dias.filter(canal_venta=canal_venta)
+        resumen = ventas_dias.aggregate(
+            total_neto=Sum('total_sin_iva'),
+            total_iva=Sum('total_iva'),
+            total_con_iva=Sum('total_con_iva'),
+            cantidad_ventas=Count('id'),
+        )
+        for campo in totales:
+            totales[campo] += resumen[campo] or 0
+
+    return totales
@@ -0,0 +1,98 @@
+# ================================================================
+# =                                                              =
+# =            STOCK BAJO (CALCULADO EN LA BASE DE DATOS)        =
+# =                                                              =
+# ================================================================
+#
+# Un producto tiene STOCK BAJO cuando:
+# - cantidad <= stock_minimo (si stock_minimo está definido)
+# - cantidad <= 5 (si stock_minimo no está definido)
+#
+# PROBLEMA QUE RESUELVE:
+# stock_bajo_api cargaba todos los productos activos en Python para hacer
+# esa comparación, y el motor de alertas y el resumen del dashboard tenían
+# cada uno su propia copia de la regla. Ahora la regla vive aquí y la
+# evalúa la base de datos; todos la usan:
+# - stock_bajo_api (tabla del dashboard, paginada y por categoría)
+# - resumen del dashboard (conteo de productos con stock bajo)
+# - motor de alertas (alertas 'stock_bajo' de generar_alertas_automaticas)
+#
+# El filtro se escribe como dos ramas (con y sin stock_minimo) en vez de
+# comparar contra Coalesce(...): así la rama por defecto es un rango simple
+# sobre `cantidad` que MySQL puede resolver con el índice
+# idx_productos_estado_cantidad (estado_merma, eliminado, cantidad).
+
+from decimal import Decimal
+
+from django.db.models import F, Q, Value, DecimalField, BooleanField, ExpressionWrapper
+from django.db.models.functions import Coalesce
+
+from ventas.models import Productos
+
+# Stock mínimo que se usa cuando el producto no tiene uno definido
+STOCK_MINIMO_POR_DEFECTO = 5
+
+
+def stock_minimo_efectivo():
+    """
+    Expresión con el stock mínimo del producto, o el mínimo por defecto.
+
+    Returns:
+        Coalesce: Coalesce(stock_minimo, 5)
+    """
+    return Coalesce(
+        F('stock_minimo'),
+        Value(Decimal(STOCK_MINIMO_POR_DEFECTO)),
+        output_field=DecimalField(max_digits=10, decimal_places=3),
+    )
+
+
+def filtro_stock_bajo():
+    """
+    Condición de stock bajo, equivalente a cantidad <= Coalesce(stock_minimo, 5).
+
+    Returns:
+        Q: Filtro para usar en filter(), Count(filter=...) o anotaciones
+    """
+    return (
+        Q(stock_minimo__isnull=True, cantidad__lte=STOCK_MINIMO_POR_DEFECTO)
+        | Q(stock_minimo__isnull=False, cantidad__lte=F('stock_minimo'))
+    )
+
+
+def anotar_stock_bajo(queryset):
+    """
+    Agrega `es_stock_bajo` y `stock_minimo_efectivo` a un queryset de productos.
+
+    Args:
+        queryset (QuerySet): Productos
+
+    Returns:
+        QuerySet: El mismo queryset anotado
+    """
+    return queryset.annotate(
+        es_stock_bajo=ExpressionWrapper(filtro_stock_bajo(), output_field=BooleanField()),
+        stock_minimo_efectivo=stock_minimo_efectivo(),
+    )
+
+
+def productos_stock_bajo(categoria_id=None):
+    """
+    Productos activos con stock bajo, del más crítico al menos crítico.
+
+    Args:
+        categoria_id (int, optional): Solo productos de esta categoría
+
+    Returns:
+        QuerySet: Productos con `stock_minimo_efectivo` anotado
+    """
+    productos = Productos.objects.filter(
+        filtro_stock_bajo(),
+        eliminado__isnull=True,
+        estado_merma='activo',  # Solo productos activos (excluye inactivos y en_merma)
+    )
+    if categoria_id is not None:
+        productos = productos.filter(categorias_id=categoria_id)
+    return productos.annotate(
+        stock_minimo_efectivo=stock_minimo_efectivo(),
+    ).order_by('cantidad', 'nombre', 'id')
@@ -0,0 +1,264 @@
+# ================================================================
+# =                                                              =
+# =      STOCK PRECALCULADO POR PRODUCTO (TABLA stock_producto)  =
+# =                                                              =
+# ================================================================
+#
+# PROBLEMA QUE RESUELVE:
+# Productos.calcular_cantidad_desde_lotes() hacía un SUM y un exists()
+# sobre los lotes cada vez que se llamaba. Listar 2.000 productos en el
+# inventario costaba 4.000 consultas de agregación.
+#
+# ESTRATEGIA:
+# - La tabla stock_producto guarda, por producto y estado de lote, la suma
+#   de cantidades y el número de lotes (ver ventas/models/stock.py)
+# - recalcular_stock() vuelve a sumar los lotes SOLO de los productos
+#   indicados (una consulta agrupada) y escribe sus filas con un único
+#   INSERT ... ON DUPLICATE KEY UPDATE. Se llama dentro de la transacción
+#   que modificó los lotes, así la tabla nunca queda con un cambio a medias
+# - Antes de sumar, recalcular_stock() bloquea las filas de esos productos
+#   (SELECT ... FOR UPDATE, en orden de id). Sin ese bloqueo, dos
+#   transacciones que cambian lotes DISTINTOS del mismo producto (una
+#   recepción y una venta) suman sin ver el cambio de la otra y la última
+#   en confirmar deja un total viejo. Con el bloqueo la segunda espera a
+#   que la primera confirme y, en READ COMMITTED, su suma ya la incluye
+# - Caminos que la mantienen al día:
+#   * save()/delete() de un Lote (factura, producción, edición de producto,
+#     ajuste positivo, merma por lote): señal en ventas/signals.py
+#   * bulk_update()/update() de lotes (ventas del POS, ajuste negativo,
+#     merma completa): llaman a recalcular_stock() directamente
+# - Como recalcular_stock() es el paso por el que pasa TODO cambio de lotes,
+#   también registra un evento 'stock_modificado' por producto en el outbox
+#   (ver outbox.py): sus alertas de vencimiento y stock bajo se reevalúan
+#   después, en lote, sin recorrer todo el catálogo
+# - Para leer: cargar_stock() trae el stock de MUCHOS productos en una sola
+#   consulta y lo deja en cada producto, de modo que
+#   calcular_cantidad_desde_lotes() ya no consulta la BD. Para listados
+#   paginados, anotar_stock() agrega el stock como subconsultas al queryset
+#
+# REACTIVACIÓN DE PRODUCTOS EN MERMA:
+# Un producto en merma que vuelve a tener lotes activos (y sin historial de
+# merma activo) vuelve a estado 'activo'. Antes lo hacía el listado de
+# inventario al mostrarse; ahora lo hace reactivar_productos_en_merma() con
+# un solo UPDATE (comando `python manage.py reactivar_productos_merma`).
+#
+# Si algún camino externo modifica lotes por SQL directo, el comando
+# `python manage.py reconciliar_stock --corregir` deja la tabla igual a los lotes.
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import (
+    Sum, Count, Q, F, Value, Case, When, Exists, OuterRef, Subquery, DecimalField, IntegerField
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from ventas.models import Productos, Lote, StockProducto, HistorialMerma
+from ventas.funciones.catalogo_pos import invalidar_catalogo
+from ventas.funciones.outbox import registrar_eventos, TIPO_STOCK_MODIFICADO
+
+
+def sumar_lotes(producto_ids=None):
+    """
+    Suma los lotes agrupados por producto y estado (una consulta).
+
+    Args:
+        producto_ids (iterable, optional): Productos a sumar (None = todos)
+
+    Returns:
+        dict: {(producto_id, estado): (cantidad, lotes, lotes_con_stock)}
+    """
+    lotes = Lote.objects.all()
+    if producto_ids is not None:
+        lotes = lotes.filter(productos_id__in=list(producto_ids))
+    filas = (
+        lotes.order_by()  # Quitar el ordering del modelo para que el GROUP BY sea solo por producto y estado
+        .values('productos_id', 'estado')
+        .annotate(
+            total=Sum('cantidad'),
+            numero=Count('id'),
+            con_stock=Count('id', filter=Q(cantidad__gt=0)),
+        )
+    )
+    return {
+        (f['productos_id'], f['estado']): (f['total'] or Decimal('0'), f['numero'], f['con_stock'])
+        for f in filas
+    }
+
+
+def recalcular_stock(producto_ids):
+    """
+    Recalcula desde los lotes las filas de stock_producto de los productos indicados.
+
+    Debe llamarse DENTRO de la transacción que modificó los lotes. Bloquea
+    las filas de los productos hasta que esa transacción termine. También
+    deja pendiente la reevaluación de las alertas de esos productos.
+
+    Args:
+        producto_ids (iterable): IDs de los productos cuyos lotes cambiaron
+
+    Returns:
+        int: Cantidad de filas escritas
+    """
+    producto_ids = {int(pid) for pid in producto_ids if pid is not None}
+    if not producto_ids:
+        return 0
+
+    with transaction.atomic():
+        # Serializa a quienes recalculan los mismos productos (ver arriba);
+        # en orden de id para no generar deadlocks entre ellos
+        list(
+            Productos.objects.select_for_update()
+            .filter(id__in=producto_ids)
+            .order_by('id')
+            .values_list('id', flat=True)
+        )
+
+        registrar_eventos(TIPO_STOCK_MODIFICADO, producto_ids)
+        sumas = sumar_lotes(producto_ids)
+
+        # Las combinaciones que ya existían pero ya no tienen lotes quedan en 0
+        for clave in StockProducto.objects.filter(productos_id__in=producto_ids).values_list('productos_id', 'estado'):
+            sumas.setdefault(clave, (Decimal('0'), 0, 0))
+        if not sumas:
+            return 0
+
+        filas = [
+            StockProducto(productos_id=producto_id, estado=estado, cantidad=cantidad,
+                          lotes=numero, lotes_con_stock=con_stock)
+            for (producto_id, estado), (cantidad, numero, con_stock) in sumas.items()
+        ]
+        # MySQL usa la clave única (productos_id, estado) sin que se le indique;
+        # otros motores (sqlite en desarrollo) necesitan los campos explícitos
+        campos_unicos = ['productos', 'estado'] if connection.features.supports_update_conflicts_with_target else None
+        StockProducto.objects.bulk_create(
+            filas,
+            update_conflicts=True,
+            unique_fields=campos_unicos,
+            update_fields=['cantidad', 'lotes', 'lotes_con_stock', 'actualizado'],
+        )
+    return len(filas)
+
+
+def stock_de_productos(producto_ids):
+    """
+    Lee el stock precalculado de varios productos en una sola consulta.
+
+    Returns:
+        dict: {producto_id: {estado: (cantidad, lotes, lotes_con_stock)}}
+              (los productos sin lotes no aparecen)
+    """
+    stock = defaultdict(dict)
+    filas = StockProducto.objects.filter(productos_id__in=list(producto_ids)).values_list(
+        'productos_id', 'estado', 'cantidad', 'lotes', 'lotes_con_stock'
+    )
+    for producto_id, estado, cantidad, numero, con_stock in filas:
+        stock[producto_id][estado] = (cantidad, numero, con_stock)
+    return stock
+
+
+def cargar_stock(productos):
+    """
+    Deja el stock precalculado en cada producto de la lista (una sola consulta).
+
+    Después de llamarla, producto.calcular_cantidad_desde_lotes() y
+    producto.numero_lotes_con_stock() no vuelven a consultar la BD.
+
+    Args:
+        productos (list): Instancias de Productos
+
+    Returns:
+        list: La misma lista de productos
+    """
+    stock = stock_de_productos(p.id for p in productos)
+    for producto in productos:
+        producto._stock_por_estado = stock.get(producto.id, {})
+    return productos
+
+
+def anotar_stock(queryset):
+    """
+    Agrega al queryset de productos el stock precalculado como subconsultas.
+
+    Anotaciones:
+    - stock_lotes_activos: suma de los lotes activos (0 si no tiene)
+    - numero_lotes_activos: lotes activos con cantidad mayor a 0
+    - tiene_lotes: si el producto tiene algún lote (en cualquier estado)
+    - cantidad_desde_lotes: igual que calcular_cantidad_desde_lotes()
+      (suma de lotes activos, o `cantidad` si el producto no tiene lotes)
+
+    Args:
+        queryset (QuerySet): Queryset de Productos
+
+    Returns:
+        QuerySet: El queryset anotado (sin consultas extra por producto)
+    """
+    activo = StockProducto.objects.filter(productos=OuterRef('pk'), estado='activo')
+    decimal = DecimalField(max_digits=12, decimal_places=3)
+    return queryset.annotate(
+        stock_lotes_activos=Coalesce(
+            Subquery(activo.values('cantidad')[:1], output_field=decimal),
+            Value(Decimal('0')), output_field=decimal,
+        ),
+        numero_lotes_activos=Coalesce(
+            Subquery(activo.values('lotes_con_stock')[:1], output_field=IntegerField()),
+            Value(0),
+        ),
+        tiene_lotes=Exists(StockProducto.objects.filter(productos=OuterRef('pk'), lotes__gt=0)),
+    ).annotate(
+        cantidad_desde_lotes=Case(
+            When(tiene_lotes=True, then=F('stock_lotes_activos')),
+            default=Coalesce(F('cantidad'), Value(Decimal('0')), output_field=decimal),
+            output_field=decimal,
+        ),
+    )
+
+
+def reactivar_productos_en_merma(simular=False, tamano_lote=1000):
+    """
+    Vuelve a 'activo' los productos en merma que tienen lotes activos con stock.
+
+    Igual que antes en el inventario, NO se reactivan los productos que tienen
+    un registro activo en HistorialMerma. La caducidad (y elaboración, si la
+    tiene) pasan a ser las del lote activo más antiguo (FIFO).
+
+    Args:
+        simular (bool): Si es True solo retorna los productos, sin modificarlos
+        tamano_lote (int): Productos por UPDATE
+
+    Returns:
+        list: IDs de los productos reactivados (o que se reactivarían)
+    """
+    candidatos = Productos.objects.filter(
+        eliminado__isnull=True,
+        estado_merma='en_merma',
+    ).filter(
+        Exists(StockProducto.objects.filter(productos=OuterRef('pk'), estado='activo', lotes_con_stock__gt=0))
+    ).exclude(
+        Exists(HistorialMerma.objects.filter(producto=OuterRef('pk'), activo=True))
+    )
+    ids = list(candidatos.values_list('id', flat=True))
+    if simular or not ids:
+        return ids
+
+    lote_fifo = Lote.objects.filter(
+        productos=OuterRef('pk'),
+        estado='activo',
+        cantidad__gt=0,
+    ).order_by('fecha_caducidad', 'fecha_recepcion')
+
+    for inicio in range(0, len(ids), tamano_lote):
+        with transaction.atomic():
+            Productos.objects.filter(
+                id__in=ids[inicio:inicio + tamano_lote],
+                estado_merma='en_merma',
+            ).update(
+                estado_merma='activo',
+                caducidad=Subquery(lote_fifo.values('fecha_caducidad')[:1]),
+                elaboracion=Coalesce(Subquery(lote_fifo.values('fecha_elaboracion')[:1]), F('elaboracion')),
+                modificado=timezone.now(),
+            )
+            invalidar_catalogo()
+    return ids
@@ -0,0 +1,327 @@
+# ================================================================
+# =                                                              =
+# =          REPORTES EN SEGUNDO PLANO (TRABAJOS)                =
+# =                                                              =
+# ================================================================
+#
+# Genera las exportaciones pesadas (Excel, PDF, CSV de rangos grandes)
+# fuera de la petición HTTP, para que un reporte de un año no ocupe un
+# worker del servidor (ni choque con el timeout del proxy) mientras el POS
+# necesita atender ventas.
+#
+# FLUJO:
+# 1. El usuario pide la exportación: crear_trabajo() solo guarda una fila
+#    'pendiente' en `trabajos_reporte` (ver ventas/models/trabajos_reporte.py)
+# 2. El comando `python manage.py procesar_reportes` (un proceso aparte del
+#    servidor web) toma los pendientes con SKIP LOCKED y los genera
+# 3. El archivo queda en settings.REPORTES_DIRECTORIO y el trabajo 'listo'
+#    hasta `expira`; el navegador consulta el avance y lo descarga
+# 4. limpiar_expirados() borra los archivos vencidos (lo llama el comando)
+#
+# CÓMO SE GENERA EL ARCHIVO:
+# Se llama a la MISMA vista de exportación que usa la descarga directa
+# (exportar_ventas_excel, exportar_inventario_pdf, ...) con una petición
+# armada con los filtros guardados y el usuario que pidió el reporte, y su
+# respuesta se escribe al archivo. Así ambos caminos generan exactamente
+# el mismo reporte.
+#
+# AVANCE:
+# Las exportaciones que leen la BD con iterar_por_lotes() avisan cuántas
+# filas llevan (ver avisar_progreso() en ventas/utils/exportadores.py) y el
+# progreso se guarda como mucho una vez por segundo. Las demás pasan de
+# "tomado" a "listo" sin pasos intermedios.
+#
+# Si el procesador se cae a mitad de un trabajo, este queda 'procesando';
+# pasados MINUTOS_BLOQUEO otro procesador lo vuelve a tomar.
+
+from datetime import timedelta
+from pathlib import Path
+import logging
+import re
+import secrets
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.http import HttpRequest, QueryDict
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from ventas.models import TrabajoReporte
+from ventas.utils.exportadores import avisar_progreso
+
+logger = logging.getLogger('ventas')
+
+REPORTES_DIRECTORIO = Path(getattr(settings, 'REPORTES_DIRECTORIO', settings.BASE_DIR / 'reportes_generados'))
+REPORTES_HORAS_EXPIRACION = getattr(settings, 'REPORTES_HORAS_EXPIRACION', 24)
+
+# Después de este número de fallos el trabajo queda en estado 'error'
+MAX_INTENTOS = 3
+
+# Minutos tras los que un trabajo 'procesando' se considera abandonado
+MINUTOS_BLOQUEO = 30
+
+# Trabajos sin terminar que puede tener un usuario a la vez
+MAX_PENDIENTES_POR_USUARIO = 5
+
+# Segundos mínimos entre dos actualizaciones del progreso en la BD
+SEGUNDOS_ENTRE_AVANCES = 1
+
+# Exportaciones disponibles: reporte -> formato -> vista que genera el archivo
+EXPORTACIONES = {
+    'ventas': {
+        'excel': 'ventas.views.view_reportes_ventas.exportar_ventas_excel',
+        'pdf': 'ventas.views.view_reportes_ventas.exportar_ventas_pdf',
+        'csv': 'ventas.views.view_reportes_ventas.exportar_ventas_csv',
+    },
+    'inventario': {
+        'excel': 'ventas.views.view_reportes_inventario.exportar_inventario_excel',
+        'pdf': 'ventas.views.view_reportes_inventario.exportar_inventario_pdf',
+        'csv': 'ventas.views.view_reportes_inventario.exportar_inventario_csv',
+    },
+    'top_productos': {
+        'excel': 'ventas.views.view_top_productos.exportar_top_productos_excel',
+        'pdf': 'ventas.views.view_top_productos.exportar_top_productos_pdf',
+        'csv': 'ventas.views.view_top_productos.exportar_top_productos_csv',
+    },
+}
+
+# Parámetros que van en la URL de la vista (no en request.GET)
+ARGUMENTOS_URL = {
+    'top_productos': {'tipo': 'cantidad'},
+}
+
+ESTADOS_SIN_TERMINAR = ('pendiente', 'procesando')
+
+
+# ================================================================
+# =                   CREAR Y CONSULTAR TRABAJOS                 =
+# ================================================================
+
+def crear_trabajo(usuario, reporte, formato, parametros=None):
+    """
+    Registra un reporte para generarse en segundo plano.
+
+    Args:
+        usuario (User): Usuario que pide el reporte
+        reporte (str): Clave de EXPORTACIONES (ej: 'ventas')
+        formato (str): 'excel', 'pdf' o 'csv'
+        parametros (dict, optional): Filtros del reporte {nombre: valor}
+
+    Returns:
+        TrabajoReporte: El trabajo creado (estado 'pendiente')
+
+    Raises:
+        ValueError: Si el reporte o el formato no existen, o el usuario ya
+                    tiene MAX_PENDIENTES_POR_USUARIO trabajos sin terminar
+    """
+    if formato not in EXPORTACIONES.get(reporte, {}):
+        raise ValueError(f'Reporte no disponible: {reporte} ({formato})')
+
+    sin_terminar = TrabajoReporte.objects.filter(
+        usuario=usuario, estado__in=ESTADOS_SIN_TERMINAR
+    ).count()
+    if sin_terminar >= MAX_PENDIENTES_POR_USUARIO:
+        raise ValueError(
+            f'Ya tienes {sin_terminar} reportes en preparación. Espera a que terminen.'
+        )
+
+    return TrabajoReporte.objects.create(
+        usuario=usuario,
+        reporte=reporte,
+        formato=formato,
+        parametros={str(k): str(v) for k, v in (parametros or {}).items()},
+    )
+
+
+def ruta_archivo(trabajo):
+    """Ruta absoluta del archivo generado de un trabajo (o None)."""
+    return REPORTES_DIRECTORIO / trabajo.archivo if trabajo.archivo else None
+
+
+# ================================================================
+# =                   GENERAR EL ARCHIVO                         =
+# ================================================================
+
+def _armar_peticion(trabajo):
+    """Petición GET con los filtros del trabajo, como si la hiciera su usuario."""
+    request = HttpRequest()
+    request.method = 'GET'
+    request.user = trabajo.usuario
+    request.GET = QueryDict(mutable=True)
+
+    argumentos_url = ARGUMENTOS_URL.get(trabajo.reporte, {})
+    kwargs = {}
+    for nombre, por_defecto in argumentos_url.items():
+        kwargs[nombre] = trabajo.parametros.get(nombre, por_defecto)
+    for nombre, valor in trabajo.parametros.items():
+        if nombre not in argumentos_url:
+            request.GET[nombre] = valor
+    return request, kwargs
+
+
+def _aviso_de(trabajo):
+    """Función de avance que guarda el progreso del trabajo (como mucho 1 vez/seg)."""
+    ultimo = {'momento': 0.0}
+
+    def aviso(leidas, total):
+        ahora = time.monotonic()
+        if not total or ahora - ultimo['momento'] < SEGUNDOS_ENTRE_AVANCES:
+            return
+        ultimo['momento'] = ahora
+        # De 5 (tomado) a 90 (filas leídas); el resto es escribir el archivo
+        progreso = 5 + int(85 * min(leidas, total) / total)
+        TrabajoReporte.objects.filter(id=trabajo.id).update(progreso=progreso)
+
+    return aviso
+
+
+def generar_archivo(trabajo):
+    """
+    Genera el archivo de un trabajo llamando a su vista de exportación.
+
+    Args:
+        trabajo (TrabajoReporte): Trabajo a generar
+
+    Returns:
+        tuple: (ruta relativa a REPORTES_DIRECTORIO, nombre de descarga, content type)
+    """
+    vista = import_string(EXPORTACIONES[trabajo.reporte][trabajo.formato])
+    request, kwargs = _armar_peticion(trabajo)
+
+    REPORTES_DIRECTORIO.mkdir(parents=True, exist_ok=True)
+    relativa = f'reporte_{trabajo.id}_{secrets.token_hex(8)}'
+    destino = REPORTES_DIRECTORIO / relativa
+
+    with avisar_progreso(_aviso_de(trabajo)):
+        response = vista(request, **kwargs)
+        if response.status_code != 200:
+            raise RuntimeError(f'La exportación respondió con estado {response.status_code}')
+        try:
+            with open(destino, 'wb') as archivo:
+                if response.streaming:
+                    for parte in response.streaming_content:
+                        archivo.write(parte)
+                else:
+                    archivo.write(response.content)
+        except Exception:
+            # No dejar un archivo a medio escribir en el directorio de reportes
+            destino.unlink(missing_ok=True)
+            raise
+        finally:
+            response.close()
+
+    # El nombre de descarga es el mismo que daría la exportación directa
+    disposicion = response.get('Content-Disposition', '')
+    coincide = re.search(r'filename="?([^";]+)"?', disposicion)
+    nombre = coincide.group(1) if coincide else f'{trabajo.reporte}_{trabajo.id}'
+    content_type = response.get('Content-Type', 'application/octet-stream')
+    return relativa, nombre, content_type
+
+
+# ================================================================
+# =                   PROCESAR TRABAJOS                          =
+# ================================================================
+
+def tomar_trabajo():
+    """
+    Toma el trabajo pendiente más antiguo (o uno abandonado) y lo marca 'procesando'.
+
+    Usa SELECT ... FOR UPDATE SKIP LOCKED: varios procesadores no toman el mismo.
+
+    Returns:
+        TrabajoReporte o None si no hay trabajos
+    """
+    ahora = timezone.now()
+    with transaction.atomic():
+        trabajo = TrabajoReporte.objects.select_for_update(skip_locked=True).filter(
+            Q(estado='pendiente')
+            | Q(estado='procesando', iniciado__lt=ahora - timedelta(minutes=MINUTOS_BLOQUEO))
+        ).order_by('id').first()
+        if trabajo is None:
+            return None
+
+        trabajo.estado = 'procesando'
+        trabajo.iniciado = ahora
+        trabajo.intentos += 1
+        trabajo.progreso = 5
+        trabajo.save(update_fields=['estado', 'iniciado', 'intentos', 'progreso'])
+    return trabajo
+
+
+def procesar_trabajo(trabajo):
+    """
+    Genera el archivo de un trabajo ya tomado y guarda el resultado.
+
+    Args:
+        trabajo (TrabajoReporte): Trabajo en estado 'procesando'
+
+    Returns:
+        bool: True si quedó 'listo'
+    """
+    try:
+        relativa, nombre, content_type = generar_archivo(trabajo)
+    except Exception as e:
+        logger.error(f'Error al generar el reporte #{trabajo.id}: {e}', exc_info=True)
+        trabajo.estado = 'error' if trabajo.intentos >= MAX_INTENTOS else 'pendiente'
+        trabajo.ultimo_error = str(e)[:1000]
+        trabajo.progreso = 0
+        trabajo.save(update_fields=['estado', 'ultimo_error', 'progreso'])
+        return False
+
+    ahora = timezone.now()
+    trabajo.estado = 'listo'
+    trabajo.progreso = 100
+    trabajo.archivo = relativa
+    trabajo.nombre_archivo = nombre
+    trabajo.content_type = content_type
+    trabajo.terminado = ahora
+    trabajo.expira = ahora + timedelta(hours=REPORTES_HORAS_EXPIRACION)
+    trabajo.ultimo_error = None
+    trabajo.save(update_fields=[
+        'estado', 'progreso', 'archivo', 'nombre_archivo', 'content_type',
+        'terminado', 'expira', 'ultimo_error',
+    ])
+    logger.info(f'Reporte #{trabajo.id} ({trabajo.reporte}/{trabajo.formato}) generado')
+    return True
+
+
+def procesar_pendientes(max_trabajos=None):
+    """
+    Procesa trabajos pendientes hasta vaciar la cola.
+
+    Args:
+        max_trabajos (int, optional): Máximo de trabajos a procesar
+
+    Returns:
+        int: Trabajos tomados
+    """
+    total = 0
+    while max_trabajos is None or total < max_trabajos:
+        trabajo = tomar_trabajo()
+        if trabajo is None:
+            break
+        procesar_trabajo(trabajo)
+        total += 1
+    return total
+
+
+def limpiar_expirados():
+    """
+    Borra los archivos de los trabajos vencidos y los marca 'expirado'.
+
+    Returns:
+        int: Trabajos expirados
+    """
+    expirados = TrabajoReporte.objects.filter(estado='listo', expira__lt=timezone.now())
+    total = 0
+    for trabajo in expirados:
+        ruta = ruta_archivo(trabajo)
+        if ruta:
+            ruta.unlink(missing_ok=True)
+        trabajo.estado = 'expirado'
+        trabajo.archivo = None
+        trabajo.save(update_fields=['estado', 'archivo'])
+        total += 1
+    return total
@@ -0,0 +1,361 @@
+# ================================================================
+# =                                                              =
+# =          BARRIDO DE VENCIMIENTOS (LOTES Y PRODUCTOS)         =
+# =                                                              =
+# ================================================================
+#
+# Este archivo marca como vencidos los lotes cuya fecha de caducidad ya
+# pasó y deja al día los productos afectados.
+#
+# PROBLEMA QUE RESUELVE:
+# Los comandos validar_vencimientos y verificar_vencimientos recorrían los
+# PRODUCTOS vencidos y hacían producto.save() uno por uno, aunque la fecha
+# de caducidad real está en cada Lote. Un producto con un lote vencido y
+# otro vigente quedaba entero en merma, y un año de lotes acumulados eran
+# miles de consultas.
+#
+# ESTRATEGIA (por cada lote de N lotes vencidos, en UNA transacción corta):
+# 1. Tomar los N lotes activos más antiguos con caducidad anterior a hoy
+#    (SELECT ... FOR UPDATE SKIP LOCKED: no espera a las ventas del POS; lo
+#    que esté bloqueado se toma en la siguiente ejecución)
+# 2. Marcarlos 'vencido' con un solo UPDATE
+# 3. Registrar MovimientosInventario (uno por lote) con bulk_create
+# 4. Recalcular el stock precalculado (recalcular_stock, que también deja
+#    pendiente la reevaluación de alertas) y, con un UPDATE, la cantidad y
+#    la caducidad (lote FIFO vigente) de los productos afectados
+# 5. Los productos que se quedaron sin stock pasan a 'en_merma'
+# 6. Registrar HistorialMerma (uno por producto). Solo queda activo el de
+#    los productos que pasaron a 'en_merma' en el paso 5: un historial
+#    activo significa "el producto está en merma" (lista de merma,
+#    dashboard, reactivar_productos_en_merma). Si al producto le quedan
+#    lotes vigentes, el vencimiento parcial queda como historial inactivo
+#
+# Los productos antiguos que no tienen lotes se siguen revisando por su
+# propia `caducidad`, como hacían los comandos anteriores.
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Sum, Count, F, Value, Exists, OuterRef, Subquery, DecimalField
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from ventas.models import Productos, Lote, StockProducto, HistorialMerma, MovimientosInventario
+from ventas.funciones.catalogo_pos import invalidar_catalogo
+from ventas.funciones.outbox import registrar_eventos, TIPO_STOCK_MODIFICADO
+from ventas.funciones.stock_productos import recalcular_stock
+
+# Lotes vencidos por transacción
+TAMANO_LOTE_POR_DEFECTO = 1000
+
+MOTIVO_VENCIMIENTO = 'Vencimiento'
+
+
+def lotes_vencidos(hoy=None):
+    """
+    Retorna los lotes activos cuya fecha de caducidad es anterior a hoy.
+
+    Args:
+        hoy (date, optional): Fecha de referencia (por defecto, hoy)
+    """
+    hoy = hoy or timezone.localdate()
+    return Lote.objects.filter(estado='activo', fecha_caducidad__lt=hoy)
+
+
+def _productos_sin_lotes_vencidos(hoy):
+    """Productos activos SIN lotes cuya caducidad ya pasó (datos anteriores a los lotes)."""
+    return Productos.objects.filter(
+        eliminado__isnull=True,
+        estado_merma='activo',
+        caducidad__lt=hoy,
+    ).exclude(
+        Exists(Lote.objects.filter(productos=OuterRef('pk')))
+    )
+
+
+def _resumen_vacio():
+    return {
+        'lotes': 0,
+        'productos': 0,
+        'productos_a_merma': 0,
+        'productos_sin_lotes': 0,
+        'cantidad': Decimal('0'),
+        'valor': Decimal('0'),
+        'historiales': 0,
+        'movimientos': 0,
+        'lotes_procesados': 0,
+    }
+
+
+# ================================================================
+# =                       SIMULACIÓN                             =
+# ================================================================
+
+def simular_vencimientos(hoy=None):
+    """
+    Calcula lo que haría barrer_vencimientos() sin modificar nada.
+
+    Usa consultas agregadas (no recorre los lotes).
+
+    Returns:
+        dict: Mismo formato que barrer_vencimientos()
+    """
+    hoy = hoy or timezone.localdate()
+    decimal = DecimalField(max_digits=14, decimal_places=3)
+    resumen = _resumen_vacio()
+
+    vencidos = lotes_vencidos(hoy)
+    totales = vencidos.aggregate(
+        numero_lotes=Count('id'),
+        numero_productos=Count('productos', distinct=True),
+        cantidad_total=Coalesce(Sum('cantidad'), Value(Decimal('0')), output_field=decimal),
+        valor_total=Coalesce(Sum(F('cantidad') * F('productos__precio'), output_field=decimal),
+                       Value(Decimal('0')), output_field=decimal),
+    )
+    resumen['lotes'] = totales['numero_lotes']
+    resumen['productos'] = totales['numero_productos']
+    resumen['cantidad'] = totales['cantidad_total']
+    resumen['valor'] = totales['valor_total']
+
+    # Pasan a merma los productos activos a los que no les queda ningún lote vigente con stock
+    resumen['productos_a_merma'] = Productos.objects.filter(
+        eliminado__isnull=True,
+        estado_merma='activo',
+    ).filter(
+        Exists(vencidos.filter(productos=OuterRef('pk')))
+    ).exclude(
+        Exists(Lote.objects.filter(
+            productos=OuterRef('pk'), estado='activo', cantidad__gt=0, fecha_caducidad__gte=hoy,
+        ))
+    ).count()
+
+    sin_lotes = _productos_sin_lotes_vencidos(hoy).aggregate(
+        numero_productos=Count('id'),
+        cantidad_total=Coalesce(Sum('cantidad'), Value(Decimal('0')), output_field=decimal),
+        valor_total=Coalesce(Sum(F('cantidad') * F('precio'), output_field=decimal),
+                       Value(Decimal('0')), output_field=decimal),
+    )
+    resumen['productos_sin_lotes'] = sin_lotes['numero_productos']
+    resumen['productos'] += sin_lotes['numero_productos']
+    resumen['productos_a_merma'] += sin_lotes['numero_productos']
+    resumen['cantidad'] += sin_lotes['cantidad_total']
+    resumen['valor'] += sin_lotes['valor_total']
+    return resumen
+
+
+# ================================================================
+# =                       BARRIDO REAL                           =
+# ================================================================
+
+def _procesar_lotes(lotes, ahora, resumen, productos_vistos):
+    """
+    Marca vencidos los lotes indicados y registra la merma. Corre dentro de una transacción.
+
+    Args:
+        lotes (list): Dicts con id, productos_id y cantidad (ya bloqueados)
+        ahora (datetime): Fecha de la merma
+        resumen (dict): Contadores a actualizar
+        productos_vistos (set): Productos ya contados en lotes anteriores del barrido
+    """
+    Lote.objects.filter(id__in=[lote['id'] for lote in lotes]).update(estado='vencido')
+
+    producto_ids = {lote['productos_id'] for lote in lotes}
+    precios = dict(Productos.objects.filter(id__in=producto_ids).values_list('id', 'precio'))
+
+    merma_por_producto = defaultdict(lambda: [Decimal('0'), 0])
+    movimientos = []
+    for lote in lotes:
+        if lote['cantidad'] <= 0:
+            continue
+        merma = merma_por_producto[lote['productos_id']]
+        merma[0] += lote['cantidad']
+        merma[1] += 1
+        movimientos.append(MovimientosInventario(
+            tipo_movimiento='salida',
+            cantidad=lote['cantidad'],
+            productos_id=lote['productos_id'],
+            origen='merma',
+            referencia_id=lote['id'],
+            tipo_referencia='lote',
+        ))
+        resumen['cantidad'] += lote['cantidad']
+        resumen['valor'] += lote['cantidad'] * (precios.get(lote['productos_id']) or 0)
+
+    MovimientosInventario.objects.bulk_create(movimientos)
+
+    # Stock precalculado (y reevaluación de alertas) de los productos afectados
+    recalcular_stock(producto_ids)
+
+    # Cantidad y caducidad del producto desde sus lotes vigentes (un UPDATE)
+    lote_fifo = Lote.objects.filter(
+        productos=OuterRef('pk'),
+        estado='activo',
+        cantidad__gt=0,
+    ).order_by('fecha_caducidad', 'fecha_recepcion')
+    stock_activo = StockProducto.objects.filter(productos=OuterRef('pk'), estado='activo')
+    Productos.objects.filter(id__in=producto_ids).update(
+        cantidad=Coalesce(
+            Subquery(stock_activo.values('cantidad')[:1]),
+            Value(Decimal('0')),
+            output_field=DecimalField(max_digits=10, decimal_places=3),
+        ),
+        caducidad=Coalesce(Subquery(lote_fifo.values('fecha_caducidad')[:1]), F('caducidad')),
+        modificado=ahora,
+    )
+
+    # Los que se quedaron sin stock pasan a merma (sin caducidad: ese lote ya no existe)
+    agotados = list(
+        Productos.objects.filter(
+            id__in=producto_ids,
+            estado_merma='activo',
+            cantidad__lte=0,
+        ).values_list('id', flat=True)
+    )
+    Productos.objects.bulk_update(
+        [
+            Productos(
+                id=producto_id,
+                estado_merma='en_merma',
+                caducidad=None,
+                motivo_merma=MOTIVO_VENCIMIENTO,
+                fecha_merma=ahora,
+                cantidad_merma=merma_por_producto[producto_id][0] if producto_id in merma_por_producto else Decimal('0'),
+            )
+            for producto_id in agotados
+        ],
+        ['estado_merma', 'caducidad', 'motivo_merma', 'fecha_merma', 'cantidad_merma'],
+    )
+
+    # Historial activo solo para los que pasaron a merma; el resto (le
+    # quedan lotes vigentes y se sigue vendiendo) queda como registro inactivo
+    agotados_set = set(agotados)
+    historiales = [
+        HistorialMerma(
+            producto_id=producto_id,
+            cantidad_merma=cantidad,
+            motivo_merma=f'{MOTIVO_VENCIMIENTO} de {numero} lote(s)',
+            fecha_merma=ahora,
+            activo=producto_id in agotados_set,
+        )
+        for producto_id, (cantidad, numero) in merma_por_producto.items()
+    ]
+    HistorialMerma.objects.bulk_create(historiales)
+
+    resumen['lotes'] += len(lotes)
+    resumen['productos'] += len(producto_ids - productos_vistos)
+    productos_vistos.update(producto_ids)
+    resumen['productos_a_merma'] += len(agotados)
+    resumen['historiales'] += len(historiales)
+    resumen['movimientos'] += len(movimientos)
+
+
+def _procesar_productos_sin_lotes(hoy, ahora, tamano_lote, resumen):
+    """Mueve a merma los productos sin lotes cuya caducidad ya pasó, en lotes de `tamano_lote`."""
+    while True:
+        with transaction.atomic():
+            productos = list(
+                _productos_sin_lotes_vencidos(hoy)
+                .select_for_update(skip_locked=True)
+                .order_by('id')
+                .values('id', 'cantidad', 'precio')[:tamano_lote]
+            )
+            if not productos:
+                return
+
+            con_stock = [p for p in productos if p['cantidad'] and p['cantidad'] > 0]
+            HistorialMerma.objects.bulk_create([
+                HistorialMerma(
+                    producto_id=p['id'],
+                    cantidad_merma=p['cantidad'],
+                    motivo_merma=MOTIVO_VENCIMIENTO,
+                    fecha_merma=ahora,
+                    activo=True,
+                )
+                for p in con_stock
+            ])
+            MovimientosInventario.objects.bulk_create([
+                MovimientosInventario(
+                    tipo_movimiento='salida',
+                    cantidad=p['cantidad'],
+                    productos_id=p['id'],
+                    origen='merma',
+                    tipo_referencia='merma',
+                )
+                for p in con_stock
+            ])
+            Productos.objects.bulk_update(
+                [
+                    Productos(
+                        id=p['id'],
+                        cantidad=Decimal('0'),
+                        caducidad=None,
+                        estado_merma='en_merma',
+                        motivo_merma=MOTIVO_VENCIMIENTO,
+                        fecha_merma=ahora,
+                        cantidad_merma=p['cantidad'] or Decimal('0'),
+                        modificado=ahora,
+                    )
+                    for p in productos
+                ],
+                ['cantidad', 'caducidad', 'estado_merma', 'motivo_merma', 'fecha_merma', 'cantidad_merma', 'modificado'],
+            )
+            registrar_eventos(TIPO_STOCK_MODIFICADO, [p['id'] for p in productos])
+            invalidar_catalogo()
+
+        for p in con_stock:
+            resumen['cantidad'] += p['cantidad']
+            resumen['valor'] += p['cantidad'] * (p['precio'] or 0)
+        resumen['productos'] += len(productos)
+        resumen['productos_sin_lotes'] += len(productos)
+        resumen['productos_a_merma'] += len(productos)
+        resumen['historiales'] += len(con_stock)
+        resumen['movimientos'] += len(con_stock)
+
+        if len(productos) < tamano_lote:
+            return
+
+
+def barrer_vencimientos(hoy=None, tamano_lote=TAMANO_LOTE_POR_DEFECTO, progreso=None):
+    """
+    Marca vencidos todos los lotes con caducidad anterior a hoy y registra la merma.
+
+    Cada lote de `tamano_lote` lotes se procesa en su propia transacción.
+
+    Args:
+        hoy (date, optional): Fecha de referencia (por defecto, hoy)
+        tamano_lote (int): Lotes vencidos por transacción
+        progreso (callable, optional): Se llama con (número de lote, resumen)
+            después de cada transacción
+
+    Returns:
+        dict: {'lotes', 'productos', 'productos_a_merma', 'productos_sin_lotes',
+               'cantidad', 'valor', 'historiales', 'movimientos', 'lotes_procesados'}
+    """
+    hoy = hoy or timezone.localdate()
+    resumen = _resumen_vacio()
+    productos_vistos = set()
+
+    while True:
+        ahora = timezone.now()
+        with transaction.atomic():
+            lotes = list(
+                lotes_vencidos(hoy)
+                .select_for_update(skip_locked=True)
+                .order_by('fecha_caducidad', 'id')
+                .values('id', 'productos_id', 'cantidad')[:tamano_lote]
+            )
+            if lotes:
+                _procesar_lotes(lotes, ahora, resumen, productos_vistos)
+                invalidar_catalogo()
+
+        if not lotes:
+            break
+        resumen['lotes_procesados'] += 1
+        if progreso:
+            progreso(resumen['lotes_procesados'], resumen)
+        if len(lotes) < tamano_lote:
+            break
+
+    _procesar_productos_sin_lotes(hoy, timezone.now(), tamano_lote, resumen)
+    return resumen
@@ -0,0 +1,116 @@
+# ================================================================
+# =                                                              =
+# =        VENTAS POR DÍA DE LA SEMANA Y HORA (MAPA DE CALOR)    =
+# =                                                              =
+# ================================================================
+#
+# Cuenta las ventas y suma lo vendido por día de la semana x hora del día
+# (hora local de America/Santiago), para decidir turnos de panaderos y
+# cajeros con datos y no "a ojo".
+#
+# ESTRATEGIA:
+# - UNA consulta agrupada: ExtractWeekDay y ExtractHour en la zona horaria
+#   local (la BD convierte desde UTC), COUNT y SUM por celda. Como mucho
+#   7 x 24 = 168 filas, sin importar cuántas ventas tenga el rango
+# - El resultado se guarda en la caché por rango. Un rango que ya terminó
+#   no cambia (se guarda un día); si incluye hoy, solo unos minutos
+#
+# NOTA (MySQL): convertir a la hora local requiere las tablas de zonas
+# horarias cargadas en el servidor (mysql_tzinfo_to_sql), igual que
+# cualquier consulta de Django por fecha/hora con USE_TZ = True.
+
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Sum, Count
+from django.db.models.functions import ExtractWeekDay, ExtractHour
+from django.utils import timezone
+
+from ventas.models import Ventas
+from ventas.funciones.resumen_dashboard import rango_dia_local
+
+# Días que se muestran si no se indica un rango (4 semanas completas)
+DIAS_POR_DEFECTO = 28
+
+# Rango máximo permitido (un año)
+DIAS_MAXIMOS = 366
+
+# Segundos que se guarda un rango que incluye hoy / un rango cerrado
+SEGUNDOS_RANGO_ABIERTO = 5 * 60
+SEGUNDOS_RANGO_CERRADO = 24 * 60 * 60
+
+# Días de la semana de lunes a domingo (ExtractWeekDay: 1 = domingo ... 7 = sábado)
+DIAS_SEMANA = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
+
+
+def calcular_ventas_por_hora(desde, hasta):
+    """
+    Calcula ventas y monto por día de la semana x hora (sin caché).
+
+    Args:
+        desde (date): Primer día (incluido)
+        hasta (date): Último día (incluido)
+
+    Returns:
+        dict: {'desde', 'hasta', 'dias', 'celdas': [{dia, hora, ventas, total}],
+               'max_ventas', 'max_total'}; dia 0 = lunes ... 6 = domingo
+    """
+    zona = timezone.get_current_timezone()
+    inicio = rango_dia_local(desde)[0]
+    fin = rango_dia_local(hasta)[1]
+
+    filas = Ventas.objects.filter(
+        fecha__gte=inicio,
+        fecha__lt=fin,
+    ).annotate(
+        dia_semana=ExtractWeekDay('fecha', tzinfo=zona),
+        hora=ExtractHour('fecha', tzinfo=zona),
+    ).values('dia_semana', 'hora').annotate(
+        ventas=Count('id'),
+        total=Sum('total_con_iva'),
+    ).order_by()
+
+    celdas = [
+        {
+            # De domingo = 1 a lunes = 0
+            'dia': (fila['dia_semana'] + 5) % 7,
+            'hora': fila['hora'],
+            'ventas': fila['ventas'],
+            'total': float(fila['total'] or 0),
+        }
+        for fila in filas
+    ]
+    celdas.sort(key=lambda celda: (celda['dia'], celda['hora']))
+
+    return {
+        'desde': desde.isoformat(),
+        'hasta': hasta.isoformat(),
+        'dias': DIAS_SEMANA,
+        'celdas': celdas,
+        'max_ventas': max((celda['ventas'] for celda in celdas), default=0),
+        'max_total': max((celda['total'] for celda in celdas), default=0),
+    }
+
+
+def obtener_ventas_por_hora(desde=None, hasta=None):
+    """
+    Retorna el mapa de calor de un rango desde la caché (o lo calcula).
+
+    Args:
+        desde (date, optional): Primer día (por defecto, hace DIAS_POR_DEFECTO días)
+        hasta (date, optional): Último día (por defecto, hoy)
+
+    Returns:
+        dict: Mismo formato que calcular_ventas_por_hora()
+    """
+    hoy = timezone.localdate()
+    hasta = min(hasta or hoy, hoy)
+    desde = desde or hasta - timedelta(days=DIAS_POR_DEFECTO - 1)
+    desde = max(desde, hasta - timedelta(days=DIAS_MAXIMOS - 1))
+
+    clave = f'ventas:por_hora:{desde.isoformat()}:{hasta.isoformat()}'
+    datos = cache.get(clave)
+    if datos is None:
+        datos = calcular_ventas_por_hora(desde, hasta)
+        cache.set(clave, datos, SEGUNDOS_RANGO_ABIERTO if hasta >= hoy else SEGUNDOS_RANGO_CERRADO)
+    return datos
@@ -0,0 +1,97 @@
+# ================================================================
+# =                                                              =
+# =       COMANDO: CLASIFICAR ALERTAS EXISTENTES (UNA VEZ)      =
+# =                                                              =
+# ================================================================
+#
+# Llena la columna `categoria_alerta` de las alertas creadas antes de que
+# existiera. Se ejecuta UNA sola vez después de agregar la columna (las
+# alertas nuevas ya se crean con su categoría).
+#
+# Reglas (las mismas que usaba el generador buscando texto en el mensaje):
+# - Tiene factura asociada           -> 'factura'
+# - El mensaje contiene 'STOCK BAJO' -> 'stock_bajo'
+# - El mensaje contiene 'vence' o 'VENCIÓ' -> 'vencimiento'
+# - Cualquier otra                   -> queda 'manual'
+#
+# USO:
+#   python manage.py clasificar_alertas
+#   python manage.py clasificar_alertas --dry-run    # Solo contar
+#   python manage.py clasificar_alertas --lote 5000  # Filas por UPDATE
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Case, When, Value, Q, Count, Max, CharField
+
+from ventas.models import Alertas
+
+
+# Expresión que calcula la categoría a partir de los datos de la alerta
+CATEGORIA_CALCULADA = Case(
+    When(factura_proveedor__isnull=False, then=Value('factura')),
+    When(mensaje__contains='STOCK BAJO', then=Value('stock_bajo')),
+    When(Q(mensaje__contains='vence') | Q(mensaje__contains='VENCIÓ'), then=Value('vencimiento')),
+    default=Value('manual'),
+    output_field=CharField(),
+)
+
+
+class Command(BaseCommand):
+    """
+    Comando para asignar la categoría a las alertas antiguas.
+
+    Recorre la tabla por rangos de ID y actualiza cada rango con un solo
+    UPDATE ... CASE, así no bloquea la tabla completa de una vez.
+    """
+
+    help = 'Asigna categoria_alerta a las alertas creadas antes de que existiera la columna'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Muestra cuántas alertas quedarían en cada categoría sin modificarlas',
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=2000,
+            help='Cantidad de IDs por UPDATE (default: 2000)',
+        )
+
+    def handle(self, *args, **options):
+        # Solo se revisan las que siguen con el valor por defecto
+        pendientes = Alertas.objects.filter(categoria_alerta='manual')
+
+        self.stdout.write(self.style.SUCCESS('🏷️  Clasificando alertas existentes...'))
+
+        if options['dry_run']:
+            conteo = (
+                pendientes.annotate(calculada=CATEGORIA_CALCULADA)
+                .order_by()
+                .values('calculada')
+                .annotate(total=Count('id'))
+            )
+            for fila in conteo:
+                self.stdout.write(f'   - {fila["calculada"]}: {fila["total"]}')
+            return
+
+        ultimo_id = pendientes.aggregate(m=Max('id'))['m'] or 0
+        tamano = max(1, options['lote'])
+        actualizadas = 0
+        for desde in range(0, ultimo_id + 1, tamano):
+            with transaction.atomic():
+                actualizadas += pendientes.filter(
+                    id__gte=desde,
+                    id__lt=desde + tamano,
+                ).filter(
+                    # Las que siguen siendo manuales no se reescriben
+                    Q(factura_proveedor__isnull=False)
+                    | Q(mensaje__contains='STOCK BAJO')
+                    | Q(mensaje__contains='vence')
+                    | Q(mensaje__contains='VENCIÓ')
+                ).update(categoria_alerta=CATEGORIA_CALCULADA)
+
+        self.stdout.write(self.style.SUCCESS(f'\n✨ {actualizadas} alertas clasificadas\n'))
+        for fila in Alertas.objects.order_by().values('categoria_alerta').annotate(total=Count('id')):
+            self.stdout.write(f'   - {fila["categoria_alerta"]}: {fila["total"]}')
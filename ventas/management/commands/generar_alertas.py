@@ -14,6 +14,11 @@
 # - Manualmente cuando lo necesites
 # - Automáticamente con un cron job (cada día a las 6 AM, por ejemplo)
 # - Al iniciar el servidor (agregando al archivo wsgi.py o apps.py)
+#
+# Durante el día las alertas de los productos que cambian se reevalúan solas
+# (eventos 'stock_modificado' del outbox). Este comando es la PASADA COMPLETA
+# nocturna: actualiza los días para vencer y las facturas. Si no corrió, el
+# dashboard la hace en su primera carga del día.
 
 from django.core.management.base import BaseCommand
 from django.utils import timezone
@@ -79,6 +84,7 @@ class Command(BaseCommand):
             self.stdout.write(f'   🟡 Amarillas (14-29 días): {resultado.get("amarilla", 0)}')
             self.stdout.write(f'   🟢 Verdes (30+ días): {resultado.get("verde", 0)}')
             self.stdout.write(f'   📦 Stock Bajo: {resultado.get("stock_bajo", 0)}')
+            self.stdout.write(f'   ✔️  Resueltas: {resultado.get("resueltas", 0)}')
             self.stdout.write(
                 self.style.SUCCESS(f'   📊 Total: {resultado["total"]}\n')
             )
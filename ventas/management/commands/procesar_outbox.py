@@ -0,0 +1,106 @@
+# ================================================================
+# =                                                              =
+# =       COMANDO: PROCESAR EVENTOS PENDIENTES (OUTBOX)         =
+# =                                                              =
+# ================================================================
+#
+# Procesa los eventos de la tabla `eventos_outbox` que generan las ventas
+# (historial de boletas, movimientos de inventario y alertas de stock).
+# Ver ventas/funciones/outbox.py.
+#
+# USO:
+#   python manage.py procesar_outbox                 # Queda corriendo (cada 5 segundos)
+#   python manage.py procesar_outbox --una-vez       # Procesa lo pendiente y termina (cron)
+#   python manage.py procesar_outbox --hilos 4       # Varios procesadores a la vez
+#
+# Con OUTBOX_MODO = 'hilos' (por defecto) el propio servidor procesa los
+# eventos; igual conviene correr este comando con --una-vez en un cron para
+# recuperar los que quedaron pendientes si el servidor se reinició.
+
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from ventas.models import EventoOutbox
+from ventas.funciones.outbox import procesar_pendientes, OUTBOX_TAMANO_LOTE
+
+
+def _procesar_desde_hilo(tamano_lote):
+    """Cada hilo usa su propia conexión a la BD y la cierra al terminar."""
+    try:
+        return procesar_pendientes(tamano_lote)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    """
+    Comando para procesar los eventos pendientes del outbox.
+
+    Los eventos se toman con SKIP LOCKED, por lo que se pueden correr varios
+    hilos (o varias copias del comando) sin procesar dos veces el mismo evento.
+    """
+
+    help = 'Procesa los eventos pendientes (historial, movimientos y alertas de las ventas)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--una-vez',
+            action='store_true',
+            help='Procesa lo pendiente y termina (sin quedar esperando nuevos eventos)',
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=5,
+            help='Segundos de espera entre revisiones cuando no hay pendientes (default: 5)',
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=OUTBOX_TAMANO_LOTE,
+            help=f'Eventos por lote (default: {OUTBOX_TAMANO_LOTE})',
+        )
+        parser.add_argument(
+            '--hilos',
+            type=int,
+            default=1,
+            help='Cantidad de procesadores en paralelo (default: 1)',
+        )
+
+    def _procesar(self, tamano_lote, hilos):
+        """Procesa hasta vaciar la cola. Retorna el total de eventos tomados."""
+        if hilos <= 1:
+            return procesar_pendientes(tamano_lote)
+        with ThreadPoolExecutor(max_workers=hilos) as pool:
+            futuros = [pool.submit(_procesar_desde_hilo, tamano_lote) for _ in range(hilos)]
+            return sum(f.result() for f in futuros)
+
+    def handle(self, *args, **options):
+        tamano_lote = max(1, options['lote'])
+        hilos = max(1, options['hilos'])
+
+        self.stdout.write(self.style.SUCCESS('📨 Procesando eventos pendientes...'))
+
+        try:
+            while True:
+                inicio = time.monotonic()
+                total = self._procesar(tamano_lote, hilos)
+                if total:
+                    self.stdout.write(
+                        f'   ✅ {total} eventos tomados en {time.monotonic() - inicio:.2f}s'
+                    )
+                if options['una_vez']:
+                    break
+                time.sleep(options['intervalo'])
+        except KeyboardInterrupt:
+            self.stdout.write('\n   ⏹️  Detenido por el usuario')
+
+        errores = EventoOutbox.objects.filter(estado='error').count()
+        pendientes = EventoOutbox.objects.filter(estado='pendiente').count()
+        self.stdout.write(f'   ⏳ Pendientes: {pendientes}')
+        if errores:
+            self.stdout.write(self.style.ERROR(f'   ❌ Con error (revisar ultimo_error): {errores}'))
+        self.stdout.write(self.style.SUCCESS('\n✨ Proceso completado\n'))
@@ -0,0 +1,102 @@
+# ================================================================
+# =                                                              =
+# =       COMANDO: GENERAR REPORTES EN SEGUNDO PLANO            =
+# =                                                              =
+# ================================================================
+#
+# Genera las exportaciones que los usuarios pidieron "en segundo plano"
+# (tabla `trabajos_reporte`) y borra los archivos vencidos.
+# Ver ventas/funciones/trabajos_reporte.py.
+#
+# USO:
+#   python manage.py procesar_reportes                 # Queda corriendo (cada 5 segundos)
+#   python manage.py procesar_reportes --una-vez       # Procesa lo pendiente y termina (cron)
+#   python manage.py procesar_reportes --hilos 2       # Varios reportes a la vez
+#
+# Corre en un proceso aparte del servidor web: los reportes pesados no le
+# quitan workers al POS. Armar un Excel o un PDF usa sobre todo CPU, así
+# que para generar varios en paralelo conviene correr varias copias del
+# comando (los trabajos se toman con SKIP LOCKED y no se repiten) en vez
+# de muchos hilos en el mismo proceso.
+
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from ventas.models import TrabajoReporte
+from ventas.funciones.trabajos_reporte import procesar_pendientes, limpiar_expirados
+
+
+def _procesar_desde_hilo():
+    """Cada hilo usa su propia conexión a la BD y la cierra al terminar."""
+    try:
+        return procesar_pendientes()
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    """
+    Comando para generar los reportes pedidos en segundo plano.
+    """
+
+    help = 'Genera los reportes pedidos en segundo plano y borra los archivos vencidos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--una-vez',
+            action='store_true',
+            help='Procesa lo pendiente y termina (sin quedar esperando nuevos trabajos)',
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=5,
+            help='Segundos de espera entre revisiones cuando no hay pendientes (default: 5)',
+        )
+        parser.add_argument(
+            '--hilos',
+            type=int,
+            default=1,
+            help='Cantidad de reportes que se generan a la vez (default: 1)',
+        )
+
+    def _procesar(self, hilos):
+        """Procesa hasta vaciar la cola. Retorna el total de trabajos tomados."""
+        if hilos <= 1:
+            return procesar_pendientes()
+        with ThreadPoolExecutor(max_workers=hilos, thread_name_prefix='reportes') as pool:
+            futuros = [pool.submit(_procesar_desde_hilo) for _ in range(hilos)]
+            return sum(f.result() for f in futuros)
+
+    def handle(self, *args, **options):
+        hilos = max(1, options['hilos'])
+
+        self.stdout.write(self.style.SUCCESS('📄 Generando reportes pendientes...'))
+
+        try:
+            while True:
+                expirados = limpiar_expirados()
+                if expirados:
+                    self.stdout.write(f'   🗑️  {expirados} reportes vencidos eliminados')
+
+                inicio = time.monotonic()
+                total = self._procesar(hilos)
+                if total:
+                    self.stdout.write(
+                        f'   ✅ {total} reportes procesados en {time.monotonic() - inicio:.2f}s'
+                    )
+                if options['una_vez']:
+                    break
+                time.sleep(options['intervalo'])
+        except KeyboardInterrupt:
+            self.stdout.write('\n   ⏹️  Detenido por el usuario')
+
+        errores = TrabajoReporte.objects.filter(estado='error').count()
+        pendientes = TrabajoReporte.objects.filter(estado='pendiente').count()
+        self.stdout.write(f'   ⏳ Pendientes: {pendientes}')
+        if errores:
+            self.stdout.write(self.style.ERROR(f'   ❌ Con error (revisar ultimo_error): {errores}'))
+        self.stdout.write(self.style.SUCCESS('\n✨ Proceso completado\n'))
@@ -0,0 +1,56 @@
+# ================================================================
+# =                                                              =
+# =     COMANDO: REACTIVAR PRODUCTOS EN MERMA CON STOCK NUEVO    =
+# =                                                              =
+# ================================================================
+#
+# Vuelve a 'activo' los productos en merma que recibieron lotes nuevos
+# (por factura, producción o edición) y no tienen historial de merma activo.
+#
+# Antes esto se hacía al abrir el listado de inventario (una escritura
+# dentro de un GET, producto por producto). Ahora es un proceso aparte que
+# usa un solo UPDATE por lote de productos.
+#
+# USO:
+#   python manage.py reactivar_productos_merma             # Reactivar
+#   python manage.py reactivar_productos_merma --dry-run   # Solo mostrar cuáles
+#
+# Se recomienda ejecutarlo con un cron job (cada 5-10 minutos, por ejemplo).
+
+from django.core.management.base import BaseCommand
+
+from ventas.models import Productos
+from ventas.funciones.stock_productos import reactivar_productos_en_merma
+
+
+class Command(BaseCommand):
+    """
+    Comando para reactivar en lote los productos en merma que tienen stock.
+    """
+
+    help = 'Reactiva los productos en merma que tienen lotes activos con stock'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Muestra los productos que se reactivarían sin modificarlos',
+        )
+
+    def handle(self, *args, **options):
+        simular = options['dry_run']
+        self.stdout.write(self.style.SUCCESS('🔄 Buscando productos en merma con stock...'))
+
+        ids = reactivar_productos_en_merma(simular=simular)
+
+        if not ids:
+            self.stdout.write(self.style.SUCCESS('\n✅ No hay productos para reactivar\n'))
+            return
+
+        if simular:
+            self.stdout.write(self.style.WARNING(f'\n🔍 Se reactivarían {len(ids)} productos:'))
+            for producto_id, nombre in Productos.objects.filter(id__in=ids).values_list('id', 'nombre')[:50]:
+                self.stdout.write(f'   - #{producto_id} {nombre}')
+            return
+
+        self.stdout.write(self.style.SUCCESS(f'\n✨ {len(ids)} productos reactivados\n'))
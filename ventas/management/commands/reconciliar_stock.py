@@ -0,0 +1,98 @@
+# ================================================================
+# =                                                              =
+# =     COMANDO: RECONCILIAR STOCK PRECALCULADO CON LOS LOTES    =
+# =                                                              =
+# ================================================================
+#
+# Compara la tabla stock_producto con la suma real de los lotes y muestra
+# las diferencias. Con --corregir recalcula los productos que no cuadran.
+#
+# USO:
+#   python manage.py reconciliar_stock              # Solo revisar
+#   python manage.py reconciliar_stock --corregir   # Revisar y corregir
+#
+# La primera vez (tabla recién creada) se usa --corregir para llenarla.
+# Conviene dejarlo en un cron diario como control.
+
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ventas.models import StockProducto
+from ventas.funciones.stock_productos import sumar_lotes, recalcular_stock
+
+VACIO = (Decimal('0'), 0, 0)
+
+
+class Command(BaseCommand):
+    """
+    Comando para verificar (y opcionalmente corregir) el stock precalculado.
+
+    Usa dos consultas para revisar todo el inventario: una suma agrupada de
+    los lotes y una lectura de stock_producto.
+    """
+
+    help = 'Compara el stock precalculado (stock_producto) con los lotes y corrige las diferencias'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--corregir',
+            action='store_true',
+            help='Recalcula los productos con diferencias',
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=500,
+            help='Productos a recalcular por transacción (default: 500)',
+        )
+        parser.add_argument(
+            '--verbose',
+            action='store_true',
+            help='Muestra cada diferencia encontrada',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('🔎 Comparando stock precalculado con los lotes...'))
+
+        reales = sumar_lotes()
+        guardados = {
+            (producto_id, estado): (cantidad, lotes, con_stock)
+            for producto_id, estado, cantidad, lotes, con_stock in StockProducto.objects.values_list(
+                'productos_id', 'estado', 'cantidad', 'lotes', 'lotes_con_stock'
+            )
+        }
+
+        productos_con_diferencia = set()
+        for clave in set(reales) | set(guardados):
+            real = reales.get(clave, VACIO)
+            guardado = guardados.get(clave, VACIO)
+            if real != guardado:
+                productos_con_diferencia.add(clave[0])
+                if options['verbose']:
+                    producto_id, estado = clave
+                    self.stdout.write(
+                        self.style.WARNING(
+                            f'   - Producto #{producto_id} [{estado}]: tabla {guardado[0]} '
+                            f'({guardado[1]} lotes) / lotes {real[0]} ({real[1]} lotes)'
+                        )
+                    )
+
+        self.stdout.write(f'   📦 Combinaciones producto/estado revisadas: {len(set(reales) | set(guardados))}')
+        if not productos_con_diferencia:
+            self.stdout.write(self.style.SUCCESS('\n✅ El stock precalculado cuadra con los lotes\n'))
+            return
+
+        self.stdout.write(self.style.WARNING(f'   ⚠️  Productos con diferencias: {len(productos_con_diferencia)}'))
+
+        if not options['corregir']:
+            self.stdout.write('\n   Ejecuta con --corregir para recalcularlos\n')
+            return
+
+        ids = sorted(productos_con_diferencia)
+        tamano = max(1, options['lote'])
+        for inicio in range(0, len(ids), tamano):
+            with transaction.atomic():
+                recalcular_stock(ids[inicio:inicio + tamano])
+        self.stdout.write(self.style.SUCCESS(f'\n✨ {len(ids)} productos recalculados\n'))
@@ -0,0 +1,90 @@
+# ================================================================
+# =                                                              =
+# =     COMANDO: RECONSTRUIR EL RESUMEN DIARIO DE VENTAS         =
+# =                                                              =
+# ================================================================
+#
+# Recalcula la tabla ventas_resumen_diario desde las ventas, mes por mes
+# (una transacción por mes). Ver ventas/funciones/resumen_ventas.py.
+#
+# USO:
+#   python manage.py reconstruir_resumen_ventas                          # Todo el historial
+#   python manage.py reconstruir_resumen_ventas --desde 2025-01-01       # Desde una fecha
+#   python manage.py reconstruir_resumen_ventas --desde 2025-12-01 --hasta 2025-12-31
+#
+# La primera vez (tabla recién creada) se ejecuta sin opciones para llenarla.
+# Después solo hace falta si se corrigieron ventas a mano en la base de datos.
+
+import time
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+
+from ventas.models import Ventas
+from ventas.funciones.resumen_ventas import reconstruir_resumen
+
+
+class Command(BaseCommand):
+    """
+    Comando para recalcular el resumen diario de ventas de un rango de fechas.
+    """
+
+    help = 'Recalcula el resumen diario de ventas (ventas_resumen_diario) desde las ventas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--desde',
+            help='Primer día a recalcular, YYYY-MM-DD (default: día de la primera venta)',
+        )
+        parser.add_argument(
+            '--hasta',
+            help='Último día a recalcular, YYYY-MM-DD (default: hoy)',
+        )
+
+    def _fecha(self, valor):
+        try:
+            return datetime.strptime(valor, '%Y-%m-%d').date()
+        except ValueError:
+            raise CommandError(f'Fecha inválida: {valor} (formato YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        hasta = self._fecha(options['hasta']) if options['hasta'] else timezone.localdate()
+        if options['desde']:
+            desde = self._fecha(options['desde'])
+        else:
+            primera = Ventas.objects.aggregate(primera=Min('fecha'))['primera']
+            if primera is None:
+                self.stdout.write(self.style.SUCCESS('✅ No hay ventas registradas.'))
+                return
+            desde = timezone.localdate(primera)
+        if desde > hasta:
+            raise CommandError('--desde no puede ser posterior a --hasta')
+
+        self.stdout.write('=' * 60)
+        self.stdout.write(f'📊 Reconstruyendo resumen de ventas: {desde:%d/%m/%Y} a {hasta:%d/%m/%Y}')
+        self.stdout.write('=' * 60)
+
+        inicio = time.monotonic()
+        total_ventas = total_filas = 0
+        mes_desde = desde
+        while mes_desde <= hasta:
+            # Último día del mes (o `hasta`)
+            siguiente_mes = (mes_desde.replace(day=1) + timedelta(days=32)).replace(day=1)
+            mes_hasta = min(siguiente_mes - timedelta(days=1), hasta)
+
+            resultado = reconstruir_resumen(mes_desde, mes_hasta)
+            total_ventas += resultado['ventas']
+            total_filas += resultado['filas']
+            self.stdout.write(
+                f'   ⏳ {mes_desde:%m/%Y}: {resultado["ventas"]} ventas -> {resultado["filas"]} filas'
+            )
+            mes_desde = mes_hasta + timedelta(days=1)
+
+        self.stdout.write('=' * 60)
+        self.stdout.write(f'   🧾 Ventas sumadas: {total_ventas}')
+        self.stdout.write(f'   📋 Filas del resumen: {total_filas}')
+        self.stdout.write(f'   ⏱️  Tiempo: {time.monotonic() - inicio:.1f} s')
+        self.stdout.write('=' * 60)
+        self.stdout.write(self.style.SUCCESS('\n✨ Resumen reconstruido exitosamente\n'))
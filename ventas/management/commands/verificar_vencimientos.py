@@ -4,11 +4,18 @@
 # =                                                              =
 # ================================================================
 #
-# Este comando verifica diariamente qué productos han vencido
-# y los mueve automáticamente a estado de merma.
+# Este comando marca como vencidos los LOTES cuya fecha de caducidad ya
+# pasó y mueve a merma lo que se perdió. Ver ventas/funciones/vencimientos.py.
+#
+# Trabaja en lotes de --batch-size lotes vencidos, cada uno en su propia
+# transacción corta (un UPDATE de lotes, bulk_create de historial de merma
+# y movimientos, un UPDATE de productos), así que puede ponerse al día con
+# un año de lotes acumulados sin bloquear el POS.
 #
 # CÓMO EJECUTAR:
 # python manage.py verificar_vencimientos
+# python manage.py verificar_vencimientos --dry-run          # Solo mostrar el resumen
+# python manage.py verificar_vencimientos --batch-size 500   # Lotes por transacción
 #
 # PARA AUTOMATIZAR (Windows):
 # 1. Crear archivo .bat:
@@ -22,136 +29,106 @@
 #    - Acción: Iniciar programa
 #    - Programa: ruta\al\archivo.bat
 
+import time
+
 from django.core.management.base import BaseCommand
 from django.utils import timezone
-from datetime import date
-from ventas.models.productos import Productos
+
+from ventas.funciones.vencimientos import (
+    barrer_vencimientos, simular_vencimientos, TAMANO_LOTE_POR_DEFECTO
+)
 
 
 class Command(BaseCommand):
     """
-    Comando para verificar productos vencidos y moverlos a merma.
-    
+    Comando para marcar lotes vencidos y mover a merma lo que se perdió.
+
     Este comando se ejecuta diariamente para:
-    1. Buscar productos cuya fecha de caducidad ya pasó
-    2. Cambiar su estado_merma de 'activo' a 'vencido'
-    3. Generar un reporte de los productos procesados
+    1. Marcar 'vencido' los lotes activos con caducidad anterior a hoy
+    2. Registrar la merma (historial y movimientos de inventario)
+    3. Actualizar stock y caducidad de los productos; los que se quedan
+       sin stock pasan a 'en_merma'
     """
-    
-    help = 'Verifica productos vencidos y los mueve a estado de merma'
-    
+
+    help = 'Marca los lotes vencidos y mueve a merma lo que se perdió (en lotes)'
+
     def add_arguments(self, parser):
         """
         Argumentos opcionales del comando.
-        
+
         --dry-run: Simula la ejecución sin hacer cambios reales
+        --batch-size: Lotes vencidos por transacción
         """
         parser.add_argument(
             '--dry-run',
             action='store_true',
             help='Simula la ejecución sin hacer cambios en la base de datos',
         )
-    
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=TAMANO_LOTE_POR_DEFECTO,
+            help=f'Lotes vencidos por transacción (default: {TAMANO_LOTE_POR_DEFECTO})',
+        )
+
     def handle(self, *args, **options):
         """
         Lógica principal del comando.
         """
-        # Obtener la fecha actual
-        hoy = date.today()
-        
-        # Indicar si es simulación
+        hoy = timezone.localdate()
         dry_run = options['dry_run']
-        
+        tamano = max(1, options['batch_size'])
+
         if dry_run:
             self.stdout.write(
                 self.style.WARNING('🔍 MODO SIMULACIÓN - No se harán cambios reales')
             )
-        
-        # Línea separadora
+
         self.stdout.write('=' * 60)
         self.stdout.write(f'📅 Verificando vencimientos para: {hoy.strftime("%d/%m/%Y")}')
         self.stdout.write('=' * 60)
-        
-        # Buscar productos vencidos que aún están activos
-        productos_vencidos = Productos.objects.filter(
-            caducidad__lt=hoy,          # Fecha de caducidad menor a hoy
-            estado_merma='activo',       # Solo productos activos
-            eliminado__isnull=True       # No eliminados
-        )
-        
-        # Contar productos encontrados
-        total_vencidos = productos_vencidos.count()
-        
-        if total_vencidos == 0:
+
+        inicio = time.monotonic()
+        if dry_run:
+            resumen = simular_vencimientos(hoy)
+        else:
+            resumen = barrer_vencimientos(hoy, tamano_lote=tamano, progreso=self._mostrar_progreso)
+
+        if resumen['lotes'] == 0 and resumen['productos_sin_lotes'] == 0:
             self.stdout.write(
-                self.style.SUCCESS('✅ No hay productos vencidos. Todo está en orden.')
+                self.style.SUCCESS('✅ No hay lotes ni productos vencidos. Todo está en orden.')
             )
             return
-        
-        # Mostrar productos encontrados
-        self.stdout.write(
-            self.style.WARNING(f'\n⚠️  Se encontraron {total_vencidos} productos vencidos:\n')
-        )
-        
-        # Procesar cada producto
-        productos_procesados = 0
-        valor_total_merma = 0
-        
-        for producto in productos_vencidos:
-            # Calcular días vencidos
-            dias_vencido = (hoy - producto.caducidad).days
-            
-            # Calcular valor de la merma
-            stock = producto.cantidad if producto.cantidad > 0 else (producto.stock_actual or 0)
-            valor_merma = float(producto.precio) * stock
-            valor_total_merma += valor_merma
-            
-            # Mostrar información del producto
-            self.stdout.write(
-                f'  📦 {producto.nombre}'
-            )
-            self.stdout.write(
-                f'     Vencido hace: {dias_vencido} días'
-            )
-            self.stdout.write(
-                f'     Stock: {stock} unidades'
-            )
-            self.stdout.write(
-                f'     Valor perdido: ${valor_merma:,.0f}'
-            )
-            self.stdout.write('')  # Línea en blanco
-            
-            # Si no es simulación, hacer el cambio
-            if not dry_run:
-                producto.estado_merma = 'vencido'
-                producto.save()
-                productos_procesados += 1
-        
+
         # Resumen final
         self.stdout.write('=' * 60)
-        
         if dry_run:
+            self.stdout.write(self.style.WARNING('🔍 SIMULACIÓN: se harían estos cambios'))
+        self.stdout.write(f'   📦 Lotes vencidos: {resumen["lotes"]}')
+        self.stdout.write(f'   🏷️  Productos afectados: {resumen["productos"]}')
+        self.stdout.write(f'   🗑️  Productos que pasan a merma: {resumen["productos_a_merma"]}')
+        if resumen['productos_sin_lotes']:
+            self.stdout.write(f'   📋 Productos sin lotes vencidos: {resumen["productos_sin_lotes"]}')
+        self.stdout.write(f'   ⚖️  Cantidad perdida: {resumen["cantidad"]}')
+        if not dry_run:
             self.stdout.write(
-                self.style.WARNING(
-                    f'🔍 SIMULACIÓN: {total_vencidos} productos serían movidos a merma'
-                )
-            )
-        else:
-            self.stdout.write(
-                self.style.SUCCESS(
-                    f'✅ {productos_procesados} productos movidos a merma exitosamente'
-                )
+                f'   🧾 Registros creados: {resumen["historiales"]} de merma, '
+                f'{resumen["movimientos"]} movimientos'
             )
-        
         self.stdout.write(
-            self.style.ERROR(
-                f'💰 Valor total de merma: ${valor_total_merma:,.0f}'
-            )
+            self.style.ERROR(f'💰 Valor total de merma: ${resumen["valor"]:,.0f}')
         )
+        self.stdout.write(f'   ⏱️  Tiempo: {time.monotonic() - inicio:.1f} s')
         self.stdout.write('=' * 60)
-        
-        # Mensaje final
+
         if not dry_run:
             self.stdout.write(
                 self.style.SUCCESS('\n✨ Proceso completado exitosamente\n')
             )
+
+    def _mostrar_progreso(self, numero, resumen):
+        """Una línea por transacción confirmada."""
+        self.stdout.write(
+            f'   ⏳ Lote {numero}: {resumen["lotes"]} lotes vencidos, '
+            f'{resumen["productos_a_merma"]} productos a merma'
+        )
@@ -33,4 +33,19 @@ from .lotes import Lote
 from .historial_merma import HistorialMerma
 
 # --- Modelos de Historial de Boletas (NUEVO) ---
-from .historial_boletas import HistorialBoletas
\ No newline at end of file
+from .historial_boletas import HistorialBoletas
+
+# --- Modelos de Secuencia de Folios (NUEVO) ---
+from .folios import SecuenciaFolio
+
+# --- Modelos de Eventos Pendientes / Outbox (NUEVO) ---
+from .outbox import EventoOutbox
+
+# --- Modelos de Stock Precalculado (NUEVO) ---
+from .stock import StockProducto
+
+# --- Modelos de Resumen Diario de Ventas (NUEVO) ---
+from .resumen_ventas import VentasResumenDiario
+
+# --- Modelos de Trabajos de Reportes en Segundo Plano (NUEVO) ---
+from .trabajos_reporte import TrabajoReporte
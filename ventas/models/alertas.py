@@ -40,6 +40,16 @@ class Alertas(models.Model):
         ('roja', 'Roja (0-13 días)'),       # Urgente
     ]
     
+    # --- Opciones para la categoría de la alerta ---
+    # Indica QUÉ vigila la alerta. Antes se deducía buscando textos en el
+    # mensaje ('vence', 'STOCK BAJO'), algo que MySQL no puede indexar.
+    CATEGORIA_CHOICES = [
+        ('vencimiento', 'Vencimiento'),     # Producto próximo a vencer o vencido
+        ('stock_bajo', 'Stock bajo'),       # Producto con stock bajo el mínimo
+        ('factura', 'Factura'),             # Factura de proveedor por pagar
+        ('manual', 'Manual'),               # Creada a mano por un usuario
+    ]
+    
     # --- Opciones para el estado de la alerta ---
     # Permite hacer seguimiento de qué alertas se han atendido
     ESTADO_CHOICES = [
@@ -64,6 +74,15 @@ class Alertas(models.Model):
         verbose_name='Mensaje'
     )
     
+    # --- Campo: Categoría ---
+    # Qué vigila la alerta (las automáticas la fijan al crearse)
+    categoria_alerta = models.CharField(
+        max_length=20,
+        choices=CATEGORIA_CHOICES,
+        default='manual',
+        verbose_name='Categoría'
+    )
+    
     # --- Campo: Fecha de generación ---
     # Cuándo se creó la alerta (automático)
     fecha_generada = models.DateTimeField(
@@ -228,201 +247,14 @@ class Alertas(models.Model):
         - Amarilla: Factura vence en 7 días o menos
         - Verde: Factura vence en 8-30 días
         
+        El cálculo se hace en lote, con un número fijo de consultas
+        (ver ventas/funciones/motor_alertas.py).
+        
         Returns:
             dict: Diccionario con estadísticas de alertas generadas
         """
-        hoy = timezone.now().date()
-        
-        # Contadores para las estadísticas
-        alertas_creadas = {
-            'roja': 0,
-            'amarilla': 0,
-            'verde': 0,
-            'stock_bajo': 0,
-            'facturas_vencidas': 0,
-            'total': 0
-        }
-        
-        # Obtener todos los productos activos (no eliminados)
-        productos = Productos.objects.filter(
-            eliminado__isnull=True,
-            estado_merma='activo'  # Solo productos activos (no en merma)
-        )
-        
-        for producto in productos:
-            # ============================================================
-            # PARTE 1: ALERTAS DE VENCIMIENTO
-            # ============================================================
-            # Solo generar alertas de vencimiento si el producto tiene stock
-            if producto.cantidad > 0:
-                # Calcular días hasta vencer
-                dias_hasta_vencer = (producto.caducidad - hoy).days
-                
-                # Determinar el tipo de alerta según los días
-                if dias_hasta_vencer < 0:
-                    # Producto ya vencido (tratamos como roja urgente)
-                    tipo = 'roja'
-                    mensaje = f"{producto.nombre} YA VENCIÓ hace {abs(dias_hasta_vencer)} días"
-                elif dias_hasta_vencer <= 13:
-                    # Alerta ROJA: 0-13 días
-                    tipo = 'roja'
-                    mensaje = f"{producto.nombre} vence en {dias_hasta_vencer} días - URGENTE"
-                elif dias_hasta_vencer <= 29:
-                    # Alerta AMARILLA: 14-29 días
-                    tipo = 'amarilla'
-                    mensaje = f"{producto.nombre} vence en {dias_hasta_vencer} días - PRECAUCIÓN"
-                else:
-                    # Alerta VERDE: 30+ días (opcional, puedes omitir estas)
-                    tipo = 'verde'
-                    mensaje = f"{producto.nombre} vence en {dias_hasta_vencer} días - OK"
-                
-                # Verificar si ya existe una alerta activa de VENCIMIENTO para este producto
-                alerta_vencimiento = Alertas.objects.filter(
-                    productos=producto,
-                    estado='activa',
-                    mensaje__contains='vence'  # Distinguir alertas de vencimiento
-                ).first()
-                
-                if alerta_vencimiento:
-                    # Si existe, actualizar el tipo y mensaje si cambió
-                    if alerta_vencimiento.tipo_alerta != tipo or alerta_vencimiento.mensaje != mensaje:
-                        alerta_vencimiento.tipo_alerta = tipo
-                        alerta_vencimiento.mensaje = mensaje
-                        alerta_vencimiento.fecha_generada = timezone.now()
-                        alerta_vencimiento.save()
-                        alertas_creadas[tipo] += 1
-                        alertas_creadas['total'] += 1
-                else:
-                    # Si no existe, crear nueva alerta de vencimiento
-                    Alertas.objects.create(
-                        tipo_alerta=tipo,
-                        mensaje=mensaje,
-                        productos=producto,
-                        estado='activa'
-                    )
-                    alertas_creadas[tipo] += 1
-                    alertas_creadas['total'] += 1
-            
-            # ============================================================
-            # PARTE 2: ALERTAS DE STOCK BAJO
-            # ============================================================
-            # Determinar el stock mínimo (usar el definido o 5 por defecto)
-            stock_minimo = producto.stock_minimo if producto.stock_minimo is not None else 5
-            
-            # Verificar si el stock está bajo
-            if producto.cantidad <= stock_minimo:
-                # Stock bajo - generar alerta ROJA
-                tipo_stock = 'roja'
-                mensaje_stock = f"{producto.nombre} - STOCK BAJO: {producto.cantidad} unidades (mínimo: {stock_minimo})"
-                
-                # Verificar si ya existe una alerta activa de STOCK para este producto
-                alerta_stock = Alertas.objects.filter(
-                    productos=producto,
-                    estado='activa',
-                    mensaje__contains='STOCK BAJO'  # Distinguir alertas de stock
-                ).first()
-                
-                if alerta_stock:
-                    # Si existe, actualizar el mensaje si cambió
-                    if alerta_stock.mensaje != mensaje_stock:
-                        alerta_stock.mensaje = mensaje_stock
-                        alerta_stock.fecha_generada = timezone.now()
-                        alerta_stock.save()
-                        alertas_creadas['stock_bajo'] += 1
-                        alertas_creadas['total'] += 1
-                else:
-                    # Si no existe, crear nueva alerta de stock
-                    Alertas.objects.create(
-                        tipo_alerta=tipo_stock,
-                        mensaje=mensaje_stock,
-                        productos=producto,
-                        estado='activa'
-                    )
-                    alertas_creadas['stock_bajo'] += 1
-                    alertas_creadas['total'] += 1
-            else:
-                # Stock normal - resolver alertas de stock activas
-                alertas_stock_activas = Alertas.objects.filter(
-                    productos=producto,
-                    estado='activa',
-                    mensaje__contains='STOCK BAJO'
-                )
-                for alerta in alertas_stock_activas:
-                    alerta.marcar_como_resuelta()
-        
-        # ============================================================
-        # PARTE 3: ALERTAS DE FACTURAS VENCIDAS
-        # ============================================================
-        # Obtener facturas pendientes de pago
-        facturas_pendientes = FacturaProveedor.objects.filter(
-            eliminado__isnull=True,
-            estado_pago__in=['pendiente', 'parcial']  # Solo facturas no pagadas completamente
-        )
-        
-        for factura in facturas_pendientes:
-            if not factura.fecha_vencimiento:
-                continue  # Si no tiene fecha de vencimiento, saltar
-            
-            # Calcular días hasta vencer o días vencida
-            dias_para_vencer = (factura.fecha_vencimiento - hoy).days
-            
-            # Determinar tipo de alerta
-            if dias_para_vencer < 0:
-                # Factura ya vencida - ROJA urgente
-                tipo = 'roja'
-                mensaje = f"Factura {factura.numero_factura} de {factura.proveedor.nombre} VENCIDA hace {abs(dias_para_vencer)} días - ${factura.total_con_iva}"
-            elif dias_para_vencer <= 7:
-                # Factura vence en 7 días o menos - ROJA
-                tipo = 'roja'
-                mensaje = f"Factura {factura.numero_factura} de {factura.proveedor.nombre} vence en {dias_para_vencer} días - ${factura.total_con_iva}"
-            elif dias_para_vencer <= 30:
-                # Factura vence en 8-30 días - AMARILLA
-                tipo = 'amarilla'
-                mensaje = f"Factura {factura.numero_factura} de {factura.proveedor.nombre} vence en {dias_para_vencer} días - ${factura.total_con_iva}"
-            else:
-                # Factura vence en más de 30 días - VERDE (opcional, puedes omitir)
-                tipo = 'verde'
-                mensaje = f"Factura {factura.numero_factura} de {factura.proveedor.nombre} vence en {dias_para_vencer} días - ${factura.total_con_iva}"
-            
-            # Verificar si ya existe una alerta activa para esta factura
-            alerta_factura = Alertas.objects.filter(
-                factura_proveedor=factura,
-                estado='activa'
-            ).first()
-            
-            if alerta_factura:
-                # Si existe, actualizar el tipo y mensaje si cambió
-                if alerta_factura.tipo_alerta != tipo or alerta_factura.mensaje != mensaje:
-                    alerta_factura.tipo_alerta = tipo
-                    alerta_factura.mensaje = mensaje
-                    alerta_factura.fecha_generada = timezone.now()
-                    alerta_factura.save()
-                    alertas_creadas[tipo] += 1
-                    alertas_creadas['facturas_vencidas'] += 1
-                    alertas_creadas['total'] += 1
-            else:
-                # Si no existe, crear nueva alerta de factura
-                Alertas.objects.create(
-                    tipo_alerta=tipo,
-                    mensaje=mensaje,
-                    factura_proveedor=factura,
-                    productos=None,  # No es alerta de producto
-                    estado='activa'
-                )
-                alertas_creadas[tipo] += 1
-                alertas_creadas['facturas_vencidas'] += 1
-                alertas_creadas['total'] += 1
-            
-            # Si la factura se pagó completamente, resolver alertas activas
-            if factura.estado_pago == 'pagado':
-                alertas_factura_activas = Alertas.objects.filter(
-                    factura_proveedor=factura,
-                    estado='activa'
-                )
-                for alerta in alertas_factura_activas:
-                    alerta.marcar_como_resuelta()
-        
-        return alertas_creadas
+        from ventas.funciones.motor_alertas import evaluar_alertas
+        return evaluar_alertas()
     
     # ============================================================
     # =              CONFIGURACIÓN DEL MODELO                    =
@@ -440,5 +272,9 @@ class Alertas(models.Model):
             models.Index(fields=['tipo_alerta']),
             models.Index(fields=['estado']),
             models.Index(fields=['fecha_generada']),
+            # Búsqueda de la alerta activa de un producto por categoría (motor de alertas)
+            models.Index(fields=['productos', 'categoria_alerta', 'estado'], name='idx_prod_categoria_estado'),
+            # Contadores del dashboard por categoría
+            models.Index(fields=['categoria_alerta', 'estado'], name='idx_categoria_estado'),
         ]
 
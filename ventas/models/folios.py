@@ -0,0 +1,53 @@
+# ================================================================
+# =                                                              =
+# =           MODELO: SECUENCIA DE FOLIOS                       =
+# =                                                              =
+# ================================================================
+#
+# Este modelo guarda el siguiente número disponible de cada serie de
+# folios (por ejemplo 'BOL' para boletas).
+#
+# ESTRATEGIA:
+# - Cada proceso (worker WSGI) reserva un BLOQUE de números de una vez
+#   (ej: del 1201 al 1250) con un solo UPDATE sobre esta tabla
+# - Luego entrega los folios del bloque desde memoria, sin ir a la BD
+# - Dos procesos nunca reciben el mismo bloque, así los folios son únicos
+#   aunque se emitan miles por segundo desde varios terminales
+#
+# Ver: ventas/funciones/folios.py
+
+from django.db import models
+
+
+class SecuenciaFolio(models.Model):
+    """
+    Contador persistente de una serie de folios.
+
+    El campo `siguiente` es el primer número que todavía NO ha sido
+    reservado por ningún proceso.
+    """
+
+    serie = models.CharField(
+        max_length=10,
+        unique=True,
+        help_text='Prefijo de la serie (ej: BOL para boletas)'
+    )
+
+    siguiente = models.BigIntegerField(
+        default=1,
+        help_text='Primer número de la serie aún no reservado'
+    )
+
+    modificado = models.DateTimeField(
+        auto_now=True,
+        help_text='Fecha de la última reserva de bloque'
+    )
+
+    def __str__(self):
+        return f"{self.serie}: siguiente {self.siguiente}"
+
+    class Meta:
+        managed = False  # Django NO creará esta tabla (se crea con el script SQL)
+        db_table = 'secuencia_folio'
+        verbose_name = 'Secuencia de Folio'
+        verbose_name_plural = 'Secuencias de Folios'
@@ -47,7 +47,7 @@ class HistorialBoletas(models.Model):
     folio = models.CharField(
         max_length=20,
         db_index=True,  # Índice para búsquedas rápidas
-        help_text='Folio de la boleta (ej: BOL-20251209123456)'
+        help_text='Folio de la boleta (ej: BOL-0000001234)'
     )
     
     fecha_emision = models.DateTimeField(
@@ -244,5 +244,7 @@ class Lote(models.Model):
             models.Index(fields=['productos', 'estado']),
             models.Index(fields=['fecha_caducidad']),
             models.Index(fields=['origen']),
+            # Barrido de vencimientos: lotes activos con caducidad anterior a hoy
+            models.Index(fields=['estado', 'fecha_caducidad'], name='idx_estado_caducidad'),
         ]
 
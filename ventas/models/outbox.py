@@ -0,0 +1,85 @@
+# ================================================================
+# =                                                              =
+# =           MODELO: EVENTOS PENDIENTES (OUTBOX)               =
+# =                                                              =
+# ================================================================
+#
+# Este modelo guarda los "efectos secundarios" de una operación que NO
+# necesitan hacerse mientras el cajero espera la respuesta.
+#
+# EJEMPLO (venta del POS):
+# - Dentro de la transacción de la venta solo se escriben la venta, sus
+#   detalles, los lotes, los productos y UNA fila en esta tabla
+# - Un proceso aparte (ver ventas/funciones/outbox.py) lee las filas
+#   pendientes y genera el historial de la boleta, los movimientos de
+#   inventario y las alertas de stock bajo
+#
+# Como la fila se escribe en la MISMA transacción que la venta, si la venta
+# se revierte el evento tampoco existe, y si la venta se confirma el evento
+# queda guardado aunque el servidor se caiga antes de procesarlo.
+
+from django.db import models
+
+
+class EventoOutbox(models.Model):
+    """
+    Evento pendiente de procesar fuera de la petición HTTP.
+    """
+
+    ESTADO_CHOICES = [
+        ('pendiente', 'Pendiente'),     # Esperando al procesador
+        ('procesado', 'Procesado'),     # Efectos aplicados
+        ('error', 'Error'),             # Falló demasiadas veces (revisar ultimo_error)
+    ]
+
+    tipo = models.CharField(
+        max_length=50,
+        help_text='Tipo de evento (ej: venta_registrada)'
+    )
+
+    referencia_id = models.BigIntegerField(
+        help_text='ID del registro que originó el evento (ej: ID de la venta)'
+    )
+
+    datos = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text='Datos adicionales para procesar el evento'
+    )
+
+    estado = models.CharField(
+        max_length=20,
+        choices=ESTADO_CHOICES,
+        default='pendiente'
+    )
+
+    intentos = models.IntegerField(
+        default=0,
+        help_text='Veces que se intentó procesar el evento sin éxito'
+    )
+
+    ultimo_error = models.TextField(
+        blank=True,
+        null=True
+    )
+
+    creado = models.DateTimeField(auto_now_add=True)
+
+    procesado = models.DateTimeField(
+        blank=True,
+        null=True,
+        help_text='Fecha en que se aplicaron los efectos del evento'
+    )
+
+    def __str__(self):
+        return f"{self.tipo} #{self.referencia_id} ({self.estado})"
+
+    class Meta:
+        managed = False  # Django NO creará esta tabla (se crea con el script SQL)
+        db_table = 'eventos_outbox'
+        verbose_name = 'Evento pendiente'
+        verbose_name_plural = 'Eventos pendientes'
+        indexes = [
+            # El procesador busca siempre los pendientes en orden de llegada
+            models.Index(fields=['estado', 'id'], name='outbox_estado_id_idx'),
+        ]
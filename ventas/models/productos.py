@@ -300,6 +300,27 @@ class Productos(models.Model):
         """
         return bool(self.motivo_merma or self.fecha_merma or (self.cantidad_merma and self.cantidad_merma > Decimal('0')))
     
+    def _obtener_stock_por_estado(self):
+        """
+        Retorna el stock precalculado del producto por estado de lote.
+
+        Si el producto se cargó con ventas.funciones.stock_productos.cargar_stock()
+        se usa lo que ya trae; si no, se lee la tabla stock_producto (una consulta).
+
+        Returns:
+            dict: {estado: (cantidad, lotes, lotes_con_stock)}
+        """
+        stock = getattr(self, '_stock_por_estado', None)
+        if stock is None:
+            from .stock import StockProducto
+            stock = {
+                estado: (cantidad, lotes, con_stock)
+                for estado, cantidad, lotes, con_stock in StockProducto.objects.filter(
+                    productos=self
+                ).values_list('estado', 'cantidad', 'lotes', 'lotes_con_stock')
+            }
+        return stock
+
     def calcular_cantidad_desde_lotes(self):
         """
         Calcula la cantidad total del producto desde sus lotes activos.
@@ -307,32 +328,38 @@ class Productos(models.Model):
         Si el producto tiene lotes, retorna la suma de lotes activos.
         Si no tiene lotes, retorna la cantidad directa del producto.
         
+        La suma no se calcula aquí: se lee de la tabla stock_producto, que se
+        mantiene al día cada vez que cambia un lote (ver ventas/funciones/stock_productos.py).
+        
         Returns:
             Decimal: Cantidad total calculada desde lotes o cantidad directa (permite decimales)
         """
         try:
-            from .lotes import Lote
-            from decimal import Decimal
-            from django.db.models import Sum
-            cantidad_lotes = Lote.objects.filter(
-                productos=self,
-                estado='activo'  # Solo lotes activos (excluye inactivos, agotados, vencidos, en_merma)
-            ).aggregate(total=Sum('cantidad'))['total'] or Decimal('0')
+            stock = self._obtener_stock_por_estado()
             
-            # Convertir a Decimal si es necesario
-            if not isinstance(cantidad_lotes, Decimal):
-                cantidad_lotes = Decimal(str(cantidad_lotes))
-            
-            # Si tiene lotes, usar cantidad de lotes
+            # Si tiene lotes, usar cantidad de lotes activos
             # Si no tiene lotes, usar cantidad directa (compatibilidad)
-            if Lote.objects.filter(productos=self).exists():
-                return cantidad_lotes
+            if any(lotes for _, lotes, _ in stock.values()):
+                cantidad_lotes = stock.get('activo', (Decimal('0'), 0, 0))[0]
+                return Decimal(str(cantidad_lotes))
             else:
                 return Decimal(str(self.cantidad)) if self.cantidad else Decimal('0')
         except Exception:
             # Si hay error (tabla no existe, etc.), retornar cantidad directa
             return Decimal(str(self.cantidad)) if self.cantidad else Decimal('0')
     
+    def numero_lotes_con_stock(self, estado='activo'):
+        """
+        Cuenta los lotes del producto en un estado que todavía tienen cantidad.
+        
+        Returns:
+            int: Número de lotes (0 si no tiene)
+        """
+        try:
+            return self._obtener_stock_por_estado().get(estado, (Decimal('0'), 0, 0))[2]
+        except Exception:
+            return 0
+    
     def obtener_lote_mas_antiguo(self):
         """
         Obtiene el lote más antiguo (menor fecha de caducidad) con stock disponible.
@@ -0,0 +1,123 @@
+# ================================================================
+# =                                                              =
+# =          MODELO: RESUMEN DIARIO DE VENTAS (ROLLUP)           =
+# =                                                              =
+# ================================================================
+#
+# Este modelo guarda las ventas YA SUMADAS por día (local), producto,
+# canal de venta y medio de pago, para que los reportes de meses o años
+# lean unos cientos de filas en vez de recorrer todas las ventas.
+#
+# DOS TIPOS DE FILAS:
+# - Con producto: lo vendido de ese producto (unidades, bruto, neto, IVA)
+#   y en cuántas ventas apareció (tickets)
+# - Sin producto (productos = NULL): el TOTAL de las ventas de ese día,
+#   canal y medio de pago, con los montos exactos de cada venta (incluye el
+#   descuento global) y el número de ventas
+#
+# EJEMPLO:
+#   2025-12-09, pan,  presencial, efectivo -> 12 unid., bruto $24.000, 9 tickets
+#   2025-12-09, NULL, presencial, efectivo -> total $61.500, 15 tickets
+#
+# CLAVE ÚNICA:
+# MySQL considera distintos dos NULL dentro de un UNIQUE KEY, así que
+# `productos_id` no sirve para la clave: dos procesadores del outbox podrían
+# crear dos filas de totales para el mismo día, canal y medio de pago. La
+# clave usa `producto_clave` (NOT NULL): el id del producto, o
+# PRODUCTO_TOTAL (0) en las filas de totales.
+#
+# Las ventas siguen siendo la fuente de verdad. El procesador del outbox
+# suma cada venta nueva (ver ventas/funciones/resumen_ventas.py) y el
+# comando `python manage.py reconstruir_resumen_ventas` lo recalcula desde
+# las ventas para cualquier rango de fechas.
+
+from django.db import models
+from decimal import Decimal
+
+from .productos import Productos
+
+
+class VentasResumenDiario(models.Model):
+    """
+    Ventas sumadas de un día, producto, canal y medio de pago.
+    """
+
+    # Valor de producto_clave en las filas de totales (sin producto)
+    PRODUCTO_TOTAL = 0
+
+    fecha = models.DateField(
+        help_text='Día de las ventas (zona horaria local)'
+    )
+
+    productos = models.ForeignKey(
+        Productos,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='resumen_ventas',
+        help_text='Producto vendido (NULL = total de las ventas)'
+    )
+
+    producto_clave = models.IntegerField(
+        default=0,
+        help_text='ID del producto, o 0 en las filas de totales (para la clave única)'
+    )
+
+    canal_venta = models.CharField(max_length=20)
+
+    medio_pago = models.CharField(max_length=20)
+
+    unidades = models.DecimalField(
+        max_digits=14,
+        decimal_places=3,
+        default=Decimal('0.000'),
+        help_text='Unidades vendidas'
+    )
+
+    total_bruto = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        help_text='Cantidad x precio unitario, antes de descuentos (con IVA)'
+    )
+
+    total_neto = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        help_text='Total sin IVA, después de descuentos'
+    )
+
+    total_iva = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00'),
+    )
+
+    total_con_iva = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        help_text='Total pagado, después de descuentos'
+    )
+
+    tickets = models.IntegerField(
+        default=0,
+        help_text='Número de ventas (en las que aparece el producto)'
+    )
+
+    actualizado = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        producto = f"producto #{self.productos_id}" if self.productos_id else 'TOTAL'
+        return f"{self.fecha} {producto} [{self.canal_venta}/{self.medio_pago}]: ${self.total_con_iva}"
+
+    class Meta:
+        managed = False  # Django NO creará esta tabla (se crea con el script SQL)
+        db_table = 'ventas_resumen_diario'
+        verbose_name = 'Resumen Diario de Ventas'
+        verbose_name_plural = 'Resumen Diario de Ventas'
+        unique_together = [('fecha', 'producto_clave', 'canal_venta', 'medio_pago')]
+        indexes = [
+            models.Index(fields=['fecha', 'productos'], name='idx_resumen_fecha_producto'),
+        ]
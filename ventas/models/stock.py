@@ -0,0 +1,70 @@
+# ================================================================
+# =                                                              =
+# =           MODELO: STOCK PRECALCULADO POR PRODUCTO           =
+# =                                                              =
+# ================================================================
+#
+# Este modelo guarda el stock de cada producto AGRUPADO POR ESTADO DE LOTE
+# (activo, agotado, vencido, en_merma, inactivo), para no tener que sumar
+# los lotes cada vez que se muestra un producto.
+#
+# EJEMPLO:
+#   producto 7, estado 'activo'   -> cantidad 35.000, lotes 3, lotes_con_stock 3
+#   producto 7, estado 'en_merma' -> cantidad  0.000, lotes 1, lotes_con_stock 0
+#
+# Los lotes siguen siendo la fuente de verdad. Cada vez que se modifica un
+# lote, en la MISMA transacción se recalculan las filas de su producto
+# (ver ventas/funciones/stock_productos.py). El comando
+# `python manage.py reconciliar_stock` compara esta tabla con los lotes.
+
+from django.db import models
+from decimal import Decimal
+
+from .productos import Productos
+
+
+class StockProducto(models.Model):
+    """
+    Stock de un producto en un estado de lote.
+    """
+
+    productos = models.ForeignKey(
+        Productos,
+        on_delete=models.CASCADE,
+        related_name='stock_por_estado',
+        help_text='Producto al que pertenece el stock'
+    )
+
+    estado = models.CharField(
+        max_length=20,
+        help_text='Estado de los lotes sumados (ver Lote.ESTADO_CHOICES)'
+    )
+
+    cantidad = models.DecimalField(
+        max_digits=12,
+        decimal_places=3,
+        default=Decimal('0.000'),
+        help_text='Suma de la cantidad de los lotes en este estado'
+    )
+
+    lotes = models.IntegerField(
+        default=0,
+        help_text='Cantidad de lotes en este estado'
+    )
+
+    lotes_con_stock = models.IntegerField(
+        default=0,
+        help_text='Cantidad de lotes en este estado con cantidad mayor a 0'
+    )
+
+    actualizado = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Producto #{self.productos_id} [{self.estado}]: {self.cantidad}"
+
+    class Meta:
+        managed = False  # Django NO creará esta tabla (se crea con el script SQL)
+        db_table = 'stock_producto'
+        verbose_name = 'Stock de Producto'
+        verbose_name_plural = 'Stock de Productos'
+        unique_together = [('productos', 'estado')]
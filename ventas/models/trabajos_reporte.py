@@ -0,0 +1,143 @@
+# ================================================================
+# =                                                              =
+# =        MODELO: TRABAJOS DE REPORTES EN SEGUNDO PLANO         =
+# =                                                              =
+# ================================================================
+#
+# Este modelo guarda las exportaciones (Excel, PDF, CSV) que un usuario
+# pidió generar en segundo plano, en vez de esperar a que se armen dentro
+# de su petición HTTP.
+#
+# CICLO DE VIDA:
+#   pendiente -> procesando -> listo -> expirado
+#                           \-> error (después de MAX_INTENTOS fallos)
+#
+# - La vista solo crea la fila (estado 'pendiente') y responde de inmediato
+# - El comando `python manage.py procesar_reportes` toma los pendientes,
+#   genera el archivo y lo deja en settings.REPORTES_DIRECTORIO
+# - El navegador consulta el avance (progreso) y descarga el archivo
+#   cuando el trabajo queda 'listo'
+# - Pasado `expira`, el comando borra el archivo y marca el trabajo 'expirado'
+#
+# Ver ventas/funciones/trabajos_reporte.py.
+
+from django.db import models
+from django.contrib.auth.models import User
+
+
+class TrabajoReporte(models.Model):
+    """
+    Exportación de un reporte pedida para generarse en segundo plano.
+    """
+
+    ESTADO_CHOICES = [
+        ('pendiente', 'Pendiente'),     # Esperando al procesador
+        ('procesando', 'Procesando'),   # Un procesador lo está generando
+        ('listo', 'Listo'),             # Archivo disponible para descargar
+        ('error', 'Error'),             # Falló demasiadas veces (revisar ultimo_error)
+        ('expirado', 'Expirado'),       # El archivo ya se borró
+    ]
+
+    FORMATO_CHOICES = [
+        ('excel', 'Excel'),
+        ('pdf', 'PDF'),
+        ('csv', 'CSV'),
+    ]
+
+    usuario = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='trabajos_reporte',
+        help_text='Usuario que pidió el reporte (el único que puede descargarlo)'
+    )
+
+    reporte = models.CharField(
+        max_length=30,
+        help_text='Reporte a exportar (ej: ventas, inventario, top_productos)'
+    )
+
+    formato = models.CharField(
+        max_length=10,
+        choices=FORMATO_CHOICES
+    )
+
+    parametros = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text='Filtros del reporte (los mismos parámetros GET de la exportación)'
+    )
+
+    estado = models.CharField(
+        max_length=20,
+        choices=ESTADO_CHOICES,
+        default='pendiente'
+    )
+
+    progreso = models.IntegerField(
+        default=0,
+        help_text='Avance del trabajo (0 a 100)'
+    )
+
+    intentos = models.IntegerField(
+        default=0,
+        help_text='Veces que se intentó generar el reporte'
+    )
+
+    ultimo_error = models.TextField(
+        blank=True,
+        null=True
+    )
+
+    archivo = models.CharField(
+        max_length=255,
+        blank=True,
+        null=True,
+        help_text='Ruta del archivo generado, relativa a REPORTES_DIRECTORIO'
+    )
+
+    nombre_archivo = models.CharField(
+        max_length=150,
+        blank=True,
+        null=True,
+        help_text='Nombre con el que se descarga el archivo'
+    )
+
+    content_type = models.CharField(
+        max_length=100,
+        blank=True,
+        null=True
+    )
+
+    creado = models.DateTimeField(auto_now_add=True)
+
+    iniciado = models.DateTimeField(
+        blank=True,
+        null=True,
+        help_text='Fecha en que un procesador tomó el trabajo'
+    )
+
+    terminado = models.DateTimeField(
+        blank=True,
+        null=True
+    )
+
+    expira = models.DateTimeField(
+        blank=True,
+        null=True,
+        help_text='Fecha desde la que el archivo ya no se puede descargar'
+    )
+
+    def __str__(self):
+        return f"Reporte {self.reporte} ({self.formato}) #{self.id} [{self.estado}]"
+
+    class Meta:
+        managed = False  # Django NO creará esta tabla (se crea con el script SQL)
+        db_table = 'trabajos_reporte'
+        verbose_name = 'Trabajo de reporte'
+        verbose_name_plural = 'Trabajos de reportes'
+        indexes = [
+            # El procesador busca siempre los pendientes en orden de llegada
+            models.Index(fields=['estado', 'id'], name='trabajos_estado_id_idx'),
+            # "Mis reportes" de cada usuario, del más nuevo al más antiguo
+            models.Index(fields=['usuario', 'creado'], name='trabajos_usuario_creado_idx'),
+        ]
@@ -176,6 +176,18 @@ class Ventas(models.Model):
         validators=[MinValueValidator(Decimal('0.00'))]
     )
     
+    # --- Campo: Clave de idempotencia ---
+    # UUID que genera el POS para cada venta. Si el navegador reenvía la misma
+    # venta (por ejemplo, después de un corte de conexión) se reconoce por esta
+    # clave y se retorna la venta original en vez de registrarla dos veces.
+    clave_idempotencia = models.CharField(
+        max_length=36,
+        unique=True,
+        blank=True,
+        null=True,                  # Ventas antiguas o creadas fuera del POS no la tienen
+        help_text='UUID generado por el POS para evitar ventas duplicadas al reintentar'
+    )
+    
     # --- Relación: Cliente asociado a esta venta ---
     # Cada venta pertenece a UN cliente
     # ForeignKey = "Clave foránea" = conexión con la tabla de clientes
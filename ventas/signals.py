@@ -0,0 +1,83 @@
+# ================================================================
+# =                                                              =
+# =              SEÑALES DE LA APLICACIÓN VENTAS                 =
+# =                                                              =
+# ================================================================
+#
+# Las señales se registran en VentasConfig.ready() (ventas/apps.py).
+#
+# CATÁLOGO DEL POS:
+# El catálogo versionado (ventas/funciones/catalogo_pos.py) usa
+# `productos.modificado` como versión. Estas señales se aseguran de que:
+# - Un save() parcial (update_fields sin 'modificado') igual avance la fecha
+# - Un cambio en un lote avance la fecha de su producto
+# - El catálogo en caché se descarte en ambos casos
+#
+# Los caminos que usan update() o bulk_update() no disparan señales; esos
+# llaman directamente a marcar_productos_modificados().
+#
+# STOCK PRECALCULADO:
+# Cada save()/delete() de un Lote recalcula en la misma transacción las
+# filas de stock_producto de su producto (ver ventas/funciones/stock_productos.py).
+#
+# ALERTAS:
+# Un cambio de lotes ya deja pendiente la reevaluación de alertas de su
+# producto (dentro de recalcular_stock). Si lo que cambia es el propio
+# producto (cantidad, caducidad, stock mínimo, estado), se registra el mismo
+# evento 'stock_modificado' en el outbox (ver ventas/funciones/outbox.py).
+#
+# BÚSQUEDA DEL POS:
+# Los índices de prefijos (ventas/funciones/busqueda_pos.py) se reconstruyen
+# cuando se guarda o elimina un producto o un cliente.
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from ventas.models import Productos, Lote, Clientes
+from ventas.funciones.catalogo_pos import invalidar_catalogo, marcar_productos_modificados
+from ventas.funciones.busqueda_pos import invalidar_indice
+from ventas.funciones.stock_productos import recalcular_stock
+from ventas.funciones.outbox import registrar_eventos, TIPO_STOCK_MODIFICADO
+
+# Campos de Productos que forman parte del índice de búsqueda del POS
+CAMPOS_BUSQUEDA_PRODUCTO = {'nombre', 'marca', 'tipo', 'eliminado'}
+
+# Campos de Productos de los que dependen sus alertas de vencimiento y stock bajo
+CAMPOS_ALERTAS_PRODUCTO = {'cantidad', 'caducidad', 'stock_minimo', 'estado_merma', 'eliminado', 'nombre'}
+
+
+@receiver(post_save, sender=Productos)
+def producto_guardado(sender, instance, update_fields=None, **kwargs):
+    """Mantiene al día la versión del catálogo cuando se guarda un producto."""
+    if update_fields is not None and 'modificado' not in update_fields:
+        # auto_now solo se escribe si 'modificado' está en update_fields
+        marcar_productos_modificados([instance.pk])
+    else:
+        invalidar_catalogo()
+
+    # El índice de búsqueda solo guarda texto: no se reconstruye por cambios de stock
+    if update_fields is None or CAMPOS_BUSQUEDA_PRODUCTO.intersection(update_fields):
+        invalidar_indice('productos')
+
+    if update_fields is None or CAMPOS_ALERTAS_PRODUCTO.intersection(update_fields):
+        registrar_eventos(TIPO_STOCK_MODIFICADO, [instance.pk])
+
+
+@receiver(post_delete, sender=Productos)
+def producto_eliminado(sender, instance, **kwargs):
+    invalidar_catalogo()
+    invalidar_indice('productos')
+
+
+@receiver(post_save, sender=Lote)
+@receiver(post_delete, sender=Lote)
+def lote_modificado(sender, instance, **kwargs):
+    """Un cambio en un lote cambia el stock/caducidad visible de su producto."""
+    recalcular_stock([instance.productos_id])
+    marcar_productos_modificados([instance.productos_id])
+
+
+@receiver(post_save, sender=Clientes)
+@receiver(post_delete, sender=Clientes)
+def cliente_modificado(sender, instance, **kwargs):
+    invalidar_indice('clientes')
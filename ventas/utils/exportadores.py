@@ -9,18 +9,26 @@
 #
 # FUNCIONALIDADES:
 # - Exportación a Excel (XLSX) usando openpyxl
-# - Exportación a PDF usando ReportLab
+# - Exportación a Excel en modo "solo escritura" para reportes grandes
+# - Exportación a PDF usando ReportLab (una tabla por página)
+# - Exportación a CSV en streaming (filas leídas de la BD por lotes)
 # - Funciones reutilizables para todos los reportes
 
-from django.http import HttpResponse
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse, FileResponse
+from contextlib import contextmanager
+from contextvars import ContextVar
 from decimal import Decimal
 from datetime import datetime
+from xml.sax.saxutils import escape
 import csv
+import tempfile
 
 # Intentar importar openpyxl para Excel
 try:
     from openpyxl import Workbook
-    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
+    from openpyxl.cell import WriteOnlyCell
     from openpyxl.utils import get_column_letter
     OPENPYXL_AVAILABLE = True
 except ImportError:
@@ -31,9 +39,11 @@ try:
     from reportlab.lib.pagesizes import A4, letter
     from reportlab.lib import colors
     from reportlab.lib.units import cm
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
+    from reportlab.platypus import Table, TableStyle, Paragraph, PageBreak
     from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
     from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    from reportlab.pdfgen import canvas as pdf_canvas
     REPORTLAB_AVAILABLE = True
 except ImportError:
     REPORTLAB_AVAILABLE = False
@@ -133,6 +143,159 @@ def exportar_a_excel(datos, nombre_archivo, titulo="Reporte"):
     return response
 
 
+# ================================================================
+# =         EXPORTACIÓN A EXCEL EN MODO SOLO ESCRITURA          =
+# ================================================================
+#
+# exportar_a_excel() arma el libro completo en memoria: un objeto Cell con
+# su propio Border y Alignment por cada valor. Con 100.000 ventas eso son
+# cientos de MB y decenas de segundos.
+#
+# exportar_a_excel_streaming() usa el modo write_only de openpyxl: cada fila
+# se escribe al archivo apenas se agrega y se descarta, los estilos son
+# estilos con nombre compartidos por todas las celdas, y el archivo se arma
+# en un temporal en disco que se envía por partes (FileResponse).
+#
+# Qué reportes usan este modo se define en settings.EXPORTACION_EXCEL_STREAMING
+# (ver exportar_excel_reporte()).
+
+# Formato de Excel
+CONTENT_TYPE_XLSX = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+def _estilos_excel():
+    """
+    Crea los estilos con nombre del reporte (mismos colores que exportar_a_excel).
+    
+    Returns:
+        list: [NamedStyle] para título, fecha, encabezado, texto y número
+    """
+    borde = Border(
+        left=Side(style='thin'),
+        right=Side(style='thin'),
+        top=Side(style='thin'),
+        bottom=Side(style='thin')
+    )
+    return [
+        NamedStyle(
+            name='reporte_titulo',
+            font=Font(bold=True, size=14, color="000000"),
+            alignment=Alignment(horizontal='center', vertical='center'),
+        ),
+        NamedStyle(
+            name='reporte_fecha',
+            font=Font(size=10, italic=True),
+            alignment=Alignment(horizontal='center', vertical='center'),
+        ),
+        NamedStyle(
+            name='reporte_encabezado',
+            font=Font(bold=True, color="000000", size=12),
+            fill=PatternFill(start_color="FFD700", end_color="FFD700", fill_type="solid"),
+            border=borde,
+            alignment=Alignment(horizontal='center', vertical='center'),
+        ),
+        NamedStyle(
+            name='reporte_texto',
+            border=borde,
+            alignment=Alignment(horizontal='left', vertical='center'),
+        ),
+        NamedStyle(
+            name='reporte_numero',
+            border=borde,
+            alignment=Alignment(horizontal='right', vertical='center'),
+        ),
+    ]
+
+
+def _celda(ws, valor, estilo):
+    celda = WriteOnlyCell(ws, value=valor)
+    celda.style = estilo
+    return celda
+
+
+def exportar_a_excel_streaming(filas, encabezados, nombre_archivo, titulo="Reporte"):
+    """
+    Exporta filas a Excel (XLSX) sin armar el libro completo en memoria.
+    
+    Args:
+        filas: Iterable (idealmente un generador) de listas de valores
+        encabezados: Lista con los nombres de las columnas
+        nombre_archivo: Nombre del archivo sin extensión
+        titulo: Título del reporte
+        
+    Returns:
+        FileResponse: Archivo Excel descargable
+    """
+    
+    if not OPENPYXL_AVAILABLE:
+        # Fallback a CSV si openpyxl no está disponible
+        return exportar_csv_streaming(filas, encabezados, nombre_archivo)
+    
+    wb = Workbook(write_only=True)
+    for estilo in _estilos_excel():
+        wb.add_named_style(estilo)
+    ws = wb.create_sheet(title="Reporte")
+    
+    # El ancho de las columnas se define antes de escribir filas
+    for col_idx in range(1, max(len(encabezados), 4) + 1):
+        ws.column_dimensions[get_column_letter(col_idx)].width = 20
+    ws.merged_cells.add('A1:D1')
+    ws.merged_cells.add('A2:D2')
+    
+    # Título, fecha de generación y encabezados
+    ws.append([_celda(ws, titulo, 'reporte_titulo')])
+    ws.append([_celda(ws, f"Generado el: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}", 'reporte_fecha')])
+    ws.append([])
+    ws.append([_celda(ws, encabezado, 'reporte_encabezado') for encabezado in encabezados])
+    
+    # Datos: cada fila se escribe y se descarta
+    for fila in filas:
+        celdas = []
+        for valor in fila:
+            # Convertir Decimal a float para Excel
+            if isinstance(valor, Decimal):
+                valor = float(valor)
+            estilo = 'reporte_numero' if isinstance(valor, (int, float)) else 'reporte_texto'
+            celdas.append(_celda(ws, valor, estilo))
+        ws.append(celdas)
+    
+    # El archivo se arma en disco y se envía por partes
+    archivo = tempfile.TemporaryFile()
+    wb.save(archivo)
+    archivo.seek(0)
+    
+    return FileResponse(
+        archivo,
+        as_attachment=True,
+        filename=f'{nombre_archivo}.xlsx',
+        content_type=CONTENT_TYPE_XLSX,
+    )
+
+
+def exportar_excel_reporte(reporte, filas, encabezados, nombre_archivo, titulo="Reporte"):
+    """
+    Exporta un reporte a Excel con el exportador configurado para él.
+    
+    Los reportes listados en settings.EXPORTACION_EXCEL_STREAMING usan
+    exportar_a_excel_streaming(); el resto, exportar_a_excel().
+    
+    Args:
+        reporte: Nombre del reporte (ej: 'ventas', 'inventario', 'top_productos')
+        filas: Iterable de listas de valores (en el orden de los encabezados)
+        encabezados: Lista con los nombres de las columnas
+        nombre_archivo: Nombre del archivo sin extensión
+        titulo: Título del reporte
+        
+    Returns:
+        HttpResponse: Archivo Excel descargable
+    """
+    if reporte in getattr(settings, 'EXPORTACION_EXCEL_STREAMING', []):
+        return exportar_a_excel_streaming(filas, encabezados, nombre_archivo, titulo)
+    
+    datos = [dict(zip(encabezados, fila)) for fila in filas]
+    return exportar_a_excel(datos, nombre_archivo, titulo)
+
+
 def exportar_a_csv(datos, nombre_archivo):
     """
     Exporta datos a formato CSV (fallback si Excel no está disponible).
@@ -142,29 +305,129 @@ def exportar_a_csv(datos, nombre_archivo):
         nombre_archivo: Nombre del archivo sin extensión
         
     Returns:
-        HttpResponse: Archivo CSV descargable
+        StreamingHttpResponse: Archivo CSV descargable
     """
+    encabezados = list(datos[0].keys()) if datos else []
     
-    response = HttpResponse(content_type='text/csv; charset=utf-8')
-    response['Content-Disposition'] = f'attachment; filename="{nombre_archivo}.csv"'
+    filas = (
+        [fila.get(encabezado, '') for encabezado in encabezados]
+        for fila in datos
+    )
+    
+    return exportar_csv_streaming(
+        filas,
+        [str(h).replace('_', ' ').title() for h in encabezados] if encabezados else None,
+        nombre_archivo,
+    )
+
+
+# ================================================================
+# =              EXPORTACIÓN A CSV EN STREAMING                 =
+# ================================================================
+#
+# El CSV se escribe fila por fila mientras se envía (StreamingHttpResponse):
+# el navegador recibe los primeros bytes de inmediato y el worker no arma
+# el archivo completo en memoria.
+#
+# Las filas se leen de la BD con iterar_por_lotes(): consultas de
+# TAMANO_LOTE_EXPORTACION filas paginadas por id (sin OFFSET). No se usa
+# QuerySet.iterator() porque el driver de MySQL (mysqlclient) igual trae
+# el resultado completo a memoria antes de entregar la primera fila.
+
+# Filas que se leen por consulta al exportar
+TAMANO_LOTE_EXPORTACION = 2000
+
+# Función que recibe (filas leídas, total de filas) mientras iterar_por_lotes()
+# recorre un queryset. La registran los reportes en segundo plano para
+# mostrar el avance (ver ventas/funciones/trabajos_reporte.py)
+_aviso_progreso = ContextVar('aviso_progreso_exportacion', default=None)
+
+
+@contextmanager
+def avisar_progreso(funcion):
+    """
+    Llama a funcion(filas leídas, total) por cada lote que lea iterar_por_lotes().
     
-    writer = csv.writer(response)
+    Args:
+        funcion: Función que recibe (int, int)
+    """
+    token = _aviso_progreso.set(funcion)
+    try:
+        yield
+    finally:
+        _aviso_progreso.reset(token)
+
+
+class _Eco:
+    """Archivo falso para csv.writer: retorna la línea en vez de guardarla."""
     
-    if datos:
-        # Encabezados
-        encabezados = list(datos[0].keys())
-        writer.writerow([str(h).replace('_', ' ').title() for h in encabezados])
+    def write(self, valor):
+        return valor
+
+
+def iterar_por_lotes(queryset, campos, tamano_lote=TAMANO_LOTE_EXPORTACION, descendente=False):
+    """
+    Recorre un queryset por lotes de filas (values_list), paginando por id.
+    
+    Args:
+        queryset: QuerySet a recorrer (con sus filtros ya aplicados)
+        campos: Campos de values_list() que se leen de cada fila
+        tamano_lote: Filas por consulta
+        descendente: True para recorrer del id mayor al menor
         
-        # Datos
-        for fila in datos:
-            valores = []
-            for encabezado in encabezados:
-                valor = fila.get(encabezado, '')
-                if isinstance(valor, Decimal):
-                    valor = float(valor)
-                valores.append(valor)
-            writer.writerow(valores)
+    Yields:
+        tuple: (id, *campos) de cada fila
+    """
+    orden = '-pk' if descendente else 'pk'
+    filas = queryset.order_by(orden).values_list('pk', *campos)
+    
+    # Solo se cuenta el total si alguien sigue el avance
+    aviso = _aviso_progreso.get()
+    total = queryset.count() if aviso else None
+    leidas = 0
+    
+    ultimo_id = None
+    while True:
+        lote = filas
+        if ultimo_id is not None:
+            lote = lote.filter(pk__lt=ultimo_id) if descendente else lote.filter(pk__gt=ultimo_id)
+        lote = list(lote[:tamano_lote])
+        if not lote:
+            return
+        yield from lote
+        leidas += len(lote)
+        if aviso:
+            aviso(leidas, total)
+        if len(lote) < tamano_lote:
+            return
+        ultimo_id = lote[-1][0]
+
+
+def exportar_csv_streaming(filas, encabezados, nombre_archivo):
+    """
+    Exporta filas a CSV enviándolas a medida que se generan.
+    
+    Args:
+        filas: Iterable (idealmente un generador) de listas de valores
+        encabezados: Lista con los nombres de las columnas (None para omitir)
+        nombre_archivo: Nombre del archivo sin extensión
+        
+    Returns:
+        StreamingHttpResponse: Archivo CSV descargable
+    """
+    writer = csv.writer(_Eco())
+    
+    def generar():
+        if encabezados:
+            yield writer.writerow(encabezados)
+        for fila in filas:
+            yield writer.writerow([
+                float(valor) if isinstance(valor, Decimal) else valor
+                for valor in fila
+            ])
     
+    response = StreamingHttpResponse(generar(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{nombre_archivo}.csv"'
     return response
 
 
@@ -172,114 +435,253 @@ def exportar_a_csv(datos, nombre_archivo):
 # =              EXPORTACIÓN A PDF                              =
 # ================================================================
 
-def exportar_a_pdf(datos, nombre_archivo, titulo="Reporte", encabezados=None):
+# exportar_a_pdf() armaba UNA tabla con todas las filas y un Paragraph por
+# celda: ReportLab mide y reparte esa tabla completa entre páginas, y el
+# costo y la memoria crecen más rápido que el número de filas (5.000 filas:
+# ~13 s y ~150 MB; ver benchmark_pdf_reportes.py).
+#
+# exportar_a_pdf_por_paginas() dibuja página por página sobre un temporal
+# en disco:
+# - Las filas se toman de a FILAS_POR_PAGINA y cada grupo es una tabla
+#   chica (con su encabezado) que se dibuja y se descarta
+# - Anchos de columna fijos: se calculan una vez, midiendo el encabezado
+#   y el primer grupo de filas, y se usan en todo el documento
+# - Las celdas son texto simple; solo las que no caben en su columna se
+#   envuelven en un Paragraph, con un estilo compartido
+# - Un único TableStyle para todas las páginas
+# Si una página queda más alta de lo que cabe (textos envueltos), la tabla
+# se parte y lo que sobra pasa a la página siguiente.
+
+# Filas de datos por página (A4 vertical, letra de 9 puntos)
+FILAS_POR_PAGINA = 40
+
+# Márgenes y tamaños del PDF
+PDF_MARGEN = 2 * cm if REPORTLAB_AVAILABLE else 0
+PDF_RELLENO_CELDA = 12  # Relleno izquierdo + derecho de cada celda (puntos)
+
+
+def _valor_pdf(valor):
+    """Texto de una celda del PDF (mismo formato que el exportador anterior)."""
+    if isinstance(valor, Decimal):
+        return f"${valor:,.0f}"
+    if valor is None:
+        return ''
+    return str(valor)
+
+
+def _estilo_tabla_pdf(columnas_numericas):
+    """TableStyle compartido por las tablas de todas las páginas."""
+    comandos = [
+        # Encabezado
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#FFD700')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor('#000000')),
+        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+        
+        # Datos
+        ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+        ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+        ('ALIGN', (0, 1), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), 9),
+        ('TOPPADDING', (0, 1), (-1, -1), 2),
+        ('BOTTOMPADDING', (0, 1), (-1, -1), 2),
+        ('GRID', (0, 0), (-1, -1), 1, colors.grey),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ]
+    for columna in columnas_numericas:
+        comandos.append(('ALIGN', (columna, 1), (columna, -1), 'RIGHT'))
+    return TableStyle(comandos)
+
+
+def exportar_a_pdf_por_paginas(filas, encabezados, nombre_archivo, titulo="Reporte"):
     """
-    Exporta datos a formato PDF usando ReportLab.
+    Exporta filas a PDF dibujando una tabla por página.
     
     Args:
-        datos: Lista de diccionarios con los datos a exportar
+        filas: Iterable (idealmente un generador) de listas de valores
+        encabezados: Lista con los nombres de las columnas
         nombre_archivo: Nombre del archivo sin extensión
         titulo: Título del reporte
-        encabezados: Lista de nombres de columnas (opcional, se infiere de datos si no se proporciona)
         
     Returns:
-        HttpResponse: Archivo PDF descargable
+        FileResponse: Archivo PDF descargable
     """
     
     if not REPORTLAB_AVAILABLE:
         # Fallback a CSV si ReportLab no está disponible
-        return exportar_a_csv(datos, nombre_archivo)
+        return exportar_csv_streaming(filas, encabezados, nombre_archivo)
     
-    # Crear respuesta HTTP
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="{nombre_archivo}.pdf"'
-    
-    # Crear documento PDF
-    doc = SimpleDocTemplate(
-        response,
-        pagesize=A4,
-        rightMargin=2*cm,
-        leftMargin=2*cm,
-        topMargin=2*cm,
-        bottomMargin=2*cm
-    )
-    
-    # Contenedor para elementos
-    elements = []
+    archivo = tempfile.TemporaryFile()
+    lienzo = pdf_canvas.Canvas(archivo, pagesize=A4)
+    lienzo.setTitle(titulo)
+    ancho_pagina, alto_pagina = A4
+    ancho_util = ancho_pagina - 2 * PDF_MARGEN
     
-    # Estilos
+    # Estilos (se crean una vez)
     styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
+    estilo_titulo = ParagraphStyle(
         'CustomTitle',
         parent=styles['Heading1'],
         fontSize=18,
         textColor=colors.HexColor('#1a1a1a'),
-        spaceAfter=20,
         alignment=TA_CENTER
     )
+    estilo_celda = ParagraphStyle('CeldaPDF', parent=styles['Normal'], fontSize=9, leading=11)
+    estilo_encabezado = ParagraphStyle(
+        'EncabezadoPDF', parent=estilo_celda, fontName='Helvetica-Bold', alignment=TA_CENTER
+    )
     
-    # Título
-    elements.append(Paragraph(titulo, title_style))
-    elements.append(Paragraph(
-        f"Generado el: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}",
-        styles['Normal']
-    ))
-    elements.append(Spacer(1, 0.5*cm))
-    
-    # Tabla de datos
-    if datos:
-        # Obtener encabezados
-        if not encabezados:
-            encabezados = list(datos[0].keys())
-        
-        # Preparar datos para la tabla
-        tabla_data = []
-        
-        # Encabezados
-        tabla_data.append([
-            Paragraph(str(h).replace('_', ' ').title(), styles['Normal'])
-            for h in encabezados
-        ])
+    encabezado_tabla = [Paragraph(escape(str(h)), estilo_encabezado) for h in encabezados]
+    
+    estado = {'pagina': 0, 'estilo': None, 'anchos': None}
+    
+    def nueva_pagina():
+        """Cierra la página anterior (si hay) y retorna la altura disponible desde arriba."""
+        if estado['pagina']:
+            lienzo.showPage()
+        estado['pagina'] += 1
+        # Pie de página con el número
+        lienzo.setFont('Helvetica', 8)
+        lienzo.drawRightString(ancho_pagina - PDF_MARGEN, PDF_MARGEN / 2, f"Página {estado['pagina']}")
         
-        # Datos
-        for fila in datos:
-            valores = []
-            for encabezado in encabezados:
-                valor = fila.get(encabezado, '')
-                if isinstance(valor, Decimal):
-                    valor = f"${valor:,.0f}"
-                elif isinstance(valor, (int, float)):
-                    valor = str(valor)
-                valores.append(Paragraph(str(valor), styles['Normal']))
-            tabla_data.append(valores)
+        arriba = alto_pagina - PDF_MARGEN
+        if estado['pagina'] == 1:
+            # Título y fecha solo en la primera página
+            parrafo = Paragraph(escape(titulo), estilo_titulo)
+            _, alto = parrafo.wrap(ancho_util, alto_pagina)
+            parrafo.drawOn(lienzo, PDF_MARGEN, arriba - alto)
+            arriba -= alto + 10
+            lienzo.setFont('Helvetica', 10)
+            lienzo.drawString(PDF_MARGEN, arriba - 10, f"Generado el: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
+            arriba -= 10 + 0.5 * cm
+        return arriba
+    
+    def calcular_anchos(grupo):
+        """
+        Anchos según el texto más largo de cada columna (encabezado y primer grupo).
         
-        # Crear tabla
-        tabla = Table(tabla_data, colWidths=[None] * len(encabezados))
+        Si todo cabe, se reparte el sobrante en proporción. Si no, las columnas
+        angostas conservan su ancho y las anchas se reparten el resto (y se envuelven).
+        """
+        naturales = []
+        for i, encabezado in enumerate(encabezados):
+            ancho = stringWidth(str(encabezado), 'Helvetica-Bold', 9)
+            for fila in grupo:
+                ancho = max(ancho, stringWidth(_valor_pdf(fila[i]), 'Helvetica', 9))
+            naturales.append(ancho + PDF_RELLENO_CELDA)
         
-        # Estilo de la tabla
-        tabla.setStyle(TableStyle([
-            # Encabezado
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#FFD700')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor('#000000')),
-            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            
-            # Datos
-            ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-            ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-            ('ALIGN', (0, 1), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 9),
-            ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ]))
+        total = sum(naturales)
+        if total <= ancho_util:
+            return [ancho_util * ancho / total for ancho in naturales]
         
-        elements.append(tabla)
+        anchos = list(naturales)
+        pendientes = list(range(len(naturales)))
+        disponible = ancho_util
+        while pendientes:
+            reparto = disponible / len(pendientes)
+            angostas = [i for i in pendientes if naturales[i] <= reparto]
+            if not angostas:
+                for i in pendientes:
+                    anchos[i] = reparto
+                break
+            for i in angostas:
+                disponible -= naturales[i]
+                pendientes.remove(i)
+        return anchos
     
-    # Construir PDF
-    doc.build(elements)
+    def celda(valor, ancho_columna):
+        texto = _valor_pdf(valor)
+        # Solo se envuelve (Paragraph) lo que no cabe en una línea
+        if stringWidth(texto, 'Helvetica', 9) > ancho_columna - PDF_RELLENO_CELDA:
+            return Paragraph(escape(texto), estilo_celda)
+        return texto
     
-    return response
+    def dibujar(tabla, arriba):
+        """Dibuja la tabla desde `arriba`; lo que no cabe sigue en páginas nuevas."""
+        while True:
+            alto_disponible = arriba - PDF_MARGEN
+            _, alto = tabla.wrapOn(lienzo, ancho_util, alto_disponible)
+            if alto <= alto_disponible:
+                tabla.drawOn(lienzo, PDF_MARGEN, arriba - alto)
+                return arriba - alto
+            partes = tabla.split(ancho_util, alto_disponible)
+            if len(partes) < 2:
+                # Ni una fila cabe en lo que queda: seguir en una página nueva
+                arriba = nueva_pagina()
+                continue
+            _, alto = partes[0].wrapOn(lienzo, ancho_util, alto_disponible)
+            partes[0].drawOn(lienzo, PDF_MARGEN, arriba - alto)
+            tabla = partes[1]
+            arriba = nueva_pagina()
+    
+    def dibujar_grupo(grupo, arriba):
+        if estado['estilo'] is None:
+            # Columnas numéricas según la primera fila de datos
+            numericas = [
+                i for i, valor in enumerate(grupo[0][:len(encabezados)])
+                if isinstance(valor, (int, float, Decimal)) and not isinstance(valor, bool)
+            ]
+            estado['estilo'] = _estilo_tabla_pdf(numericas)
+            estado['anchos'] = calcular_anchos(grupo)
+        anchos = estado['anchos']
+        datos_tabla = [encabezado_tabla] + [
+            [celda(valor, ancho) for valor, ancho in zip(fila, anchos)] for fila in grupo
+        ]
+        tabla = Table(
+            datos_tabla,
+            colWidths=anchos,
+            style=estado['estilo'],
+            repeatRows=1,
+        )
+        return dibujar(tabla, arriba)
+    
+    arriba = nueva_pagina()
+    grupo = []
+    for fila in filas:
+        # La página siguiente se abre recién cuando llega otra fila
+        if len(grupo) == FILAS_POR_PAGINA:
+            dibujar_grupo(grupo, arriba)
+            grupo = []
+            arriba = nueva_pagina()
+        grupo.append(fila)
+    if grupo:
+        dibujar_grupo(grupo, arriba)
+    
+    lienzo.save()
+    archivo.seek(0)
+    
+    return FileResponse(
+        archivo,
+        as_attachment=True,
+        filename=f'{nombre_archivo}.pdf',
+        content_type='application/pdf',
+    )
+
 
+def exportar_a_pdf(datos, nombre_archivo, titulo="Reporte", encabezados=None):
+    """
+    Exporta datos a formato PDF usando ReportLab.
+    
+    Args:
+        datos: Lista de diccionarios con los datos a exportar
+        nombre_archivo: Nombre del archivo sin extensión
+        titulo: Título del reporte
+        encabezados: Lista de nombres de columnas (opcional, se infiere de datos si no se proporciona)
+        
+    Returns:
+        FileResponse: Archivo PDF descargable
+    """
+    if not encabezados:
+        encabezados = list(datos[0].keys()) if datos else []
+    
+    filas = ([fila.get(encabezado, '') for encabezado in encabezados] for fila in datos)
+    
+    return exportar_a_pdf_por_paginas(
+        filas,
+        [str(h).replace('_', ' ').title() for h in encabezados],
+        nombre_archivo,
+        titulo,
+    )
@@ -23,7 +23,7 @@ from .views_productos import (
 )
 
 # --- Vistas del Sistema POS (Punto de Venta) ---
-from .views_pos import pos_view, agregar_cliente_ajax, validar_producto_ajax, procesar_venta_ajax
+from .views_pos import pos_view, catalogo_pos_api, buscar_productos_api, buscar_clientes_api, agregar_cliente_ajax, validar_producto_ajax, validar_carrito_ajax, procesar_venta_ajax
 
 # --- Vistas del Sistema de Alertas ---
 from .views_alertas import (
@@ -65,6 +65,14 @@ from .view_reportes_inventario import (
     exportar_inventario_pdf
 )
 
+# --- Vistas de Reportes en Segundo Plano (NUEVO) ---
+from .view_trabajos_reporte import (
+    solicitar_reporte_api,
+    estado_trabajo_reporte_api,
+    mis_reportes_api,
+    descargar_reporte
+)
+
 # --- Vistas de Comprobante (RF-V3) ---
 from .view_comprobante import comprobante_pdf_view, comprobante_html_view
 
@@ -76,12 +84,14 @@ from .view_acciones_masivas import crear_alertas_masivo, mover_merma_masivo, act
 
 # --- Vistas de Métricas del Dashboard (NUEVO) ---
 from .view_dashboard_metrics import (
+    dashboard_resumen_api,
     ventas_del_dia_api,
     stock_bajo_api,
     alertas_pendientes_api,
     top_producto_api,
     ventas_del_dia_lista_api,
-    merma_lista_api
+    merma_lista_api,
+    ventas_por_hora_api
 )
 
 # --- Vistas de Proveedores y Facturas (NUEVO) ---
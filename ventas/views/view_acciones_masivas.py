@@ -27,6 +27,8 @@ import json
 
 # Importar los modelos necesarios
 from ..models import Productos, Alertas
+from ..funciones.catalogo_pos import invalidar_catalogo
+from ..funciones.motor_alertas import alerta_vencimiento
 
 
 # ================================================================
@@ -64,60 +66,53 @@ def crear_alertas_masivo(request):
             }, status=400)
         
         # Obtener los productos seleccionados
-        productos = Productos.objects.filter(
+        productos = list(Productos.objects.filter(
             id__in=ids_productos,
             eliminado__isnull=True  # Solo productos no eliminados
-        )
+        ))
         
-        # Contador de alertas creadas
-        alertas_creadas = 0
         hoy = date.today()
+        ahora = timezone.now()
+        
+        # Alertas de VENCIMIENTO activas de estos productos en UNA consulta
+        # (las de stock bajo o manuales no se tocan)
+        existentes = {}
+        for alerta in Alertas.objects.filter(
+            productos_id__in=[p.id for p in productos],
+            categoria_alerta='vencimiento',
+            estado='activa'
+        ).order_by('id'):
+            existentes.setdefault(alerta.productos_id, alerta)
         
-        # Crear una alerta para cada producto
+        nuevas = []
+        actualizadas = []
         for producto in productos:
-            # Calcular días hasta vencer
-            dias_hasta_vencer = (producto.caducidad - hoy).days
+            if producto.caducidad is None:
+                continue  # Sin fecha de caducidad no hay vencimiento que alertar
             
-            # Determinar el tipo de alerta según los días
-            if dias_hasta_vencer < 0:
-                # Producto ya vencido
-                tipo = 'roja'
-                mensaje = f"{producto.nombre} YA VENCIÓ hace {abs(dias_hasta_vencer)} días"
-            elif dias_hasta_vencer <= 13:
-                # Alerta ROJA: 0-13 días
-                tipo = 'roja'
-                mensaje = f"{producto.nombre} vence en {dias_hasta_vencer} días - URGENTE"
-            elif dias_hasta_vencer <= 29:
-                # Alerta AMARILLA: 14-29 días
-                tipo = 'amarilla'
-                mensaje = f"{producto.nombre} vence en {dias_hasta_vencer} días - PRECAUCIÓN"
-            else:
-                # Alerta VERDE: 30+ días
-                tipo = 'verde'
-                mensaje = f"{producto.nombre} vence en {dias_hasta_vencer} días - OK"
-            
-            # Verificar si ya existe una alerta activa para este producto
-            alerta_existente = Alertas.objects.filter(
-                productos=producto,
-                estado='activa'
-            ).first()
+            # Tipo (color) y mensaje según los días hasta vencer
+            tipo, mensaje = alerta_vencimiento(producto, hoy)
             
+            alerta_existente = existentes.get(producto.id)
             if alerta_existente:
                 # Actualizar la alerta existente
                 alerta_existente.tipo_alerta = tipo
                 alerta_existente.mensaje = mensaje
-                alerta_existente.fecha_generada = timezone.now()
-                alerta_existente.save()
+                alerta_existente.fecha_generada = ahora
+                actualizadas.append(alerta_existente)
             else:
                 # Crear nueva alerta
-                Alertas.objects.create(
+                nuevas.append(Alertas(
                     tipo_alerta=tipo,
                     mensaje=mensaje,
                     productos=producto,
+                    categoria_alerta='vencimiento',
                     estado='activa'
-                )
-            
-            alertas_creadas += 1
+                ))
+        
+        Alertas.objects.bulk_create(nuevas)
+        Alertas.objects.bulk_update(actualizadas, ['tipo_alerta', 'mensaje', 'fecha_generada'])
+        alertas_creadas = len(nuevas) + len(actualizadas)
         
         # Respuesta exitosa
         return JsonResponse({
@@ -379,8 +374,10 @@ def eliminar_masivo(request):
             id__in=ids_productos,
             eliminado__isnull=True  # Solo productos no eliminados previamente
         ).update(
-            eliminado=timezone.now()  # Marcar con fecha de eliminación
+            eliminado=timezone.now(),  # Marcar con fecha de eliminación
+            modificado=timezone.now()  # Para que el POS los quite de su catálogo
         )
+        invalidar_catalogo()
         
         # Respuesta exitosa
         return JsonResponse({
@@ -188,58 +188,35 @@ def procesar_ajuste_stock_ajax(request):
                 from ventas.models import Lote
                 from decimal import Decimal
                 
-                cantidad_restante = Decimal(str(cantidad))
+                from ventas.funciones.reserva_stock import (
+                    bloquear_lotes_activos, descontar_fifo, resumen_lotes, StockInsuficienteError
+                )
+                from ventas.funciones.stock_productos import recalcular_stock
                 
-                # Obtener lotes activos ordenados por fecha de caducidad (más antiguos primero)
-                lotes_activos = Lote.objects.filter(
-                    productos=producto,
-                    estado='activo',
-                    cantidad__gt=0
-                ).order_by('fecha_caducidad', 'fecha_recepcion')
+                # Bloquear los lotes activos del producto (mismo mecanismo que el POS)
+                # para que un ajuste y una venta simultáneos no descuenten el mismo stock
+                lotes_activos = bloquear_lotes_activos([producto.id])[producto.id]
                 
-                stock_disponible = sum(Decimal(str(l.cantidad)) for l in lotes_activos)
-                if stock_disponible < cantidad_restante:
+                try:
+                    lotes_modificados = descontar_fifo(producto, lotes_activos, cantidad)
+                except StockInsuficienteError:
+                    stock_disponible = sum(Decimal(str(l.cantidad)) for l in lotes_activos)
                     return JsonResponse({
                         'success': False,
                         'mensaje': f'Stock insuficiente. Disponible: {stock_disponible}, Solicitado: {cantidad}'
                     }, status=400)
                 
-                for lote in lotes_activos:
-                    if cantidad_restante <= Decimal('0'):
-                        break
-                    
-                    cantidad_lote = Decimal(str(lote.cantidad))
-                    cantidad_a_tomar = min(cantidad_restante, cantidad_lote)
-                    
-                    nueva_cantidad_lote = cantidad_lote - cantidad_a_tomar
-                    lote.cantidad = nueva_cantidad_lote
-                    
-                    if nueva_cantidad_lote <= Decimal('0'):
-                        lote.estado = 'agotado'
-                        lote.cantidad = Decimal('0')
-                    
-                    lote.save(update_fields=['cantidad', 'estado'])
-                    cantidad_restante = cantidad_restante - cantidad_a_tomar
+                Lote.objects.bulk_update(lotes_modificados, ['cantidad', 'estado'])
+                # bulk_update no dispara señales: actualizar el stock precalculado a mano
+                recalcular_stock([producto.id])
                 
-                # Actualizar cantidad del producto desde lotes (manejar Decimal)
-                cantidad_producto = Decimal(str(producto.cantidad)) if producto.cantidad else Decimal('0')
-                producto.cantidad = max(Decimal('0'), cantidad_producto - cantidad)
+                # Cantidad y caducidad del producto salen de los lotes bloqueados
+                # (no de producto.cantidad, que pudo cambiar desde que se leyó)
+                producto.cantidad, producto.caducidad = resumen_lotes(lotes_activos)
                 if producto.stock_actual is not None:
                     stock_actual_decimal = Decimal(str(producto.stock_actual)) if producto.stock_actual else Decimal('0')
                     producto.stock_actual = max(Decimal('0'), stock_actual_decimal - cantidad)
                 
-                # Actualizar fecha de caducidad del producto con la del lote más antiguo activo
-                lote_mas_antiguo = Lote.objects.filter(
-                    productos=producto,
-                    estado='activo',
-                    cantidad__gt=0
-                ).order_by('fecha_caducidad', 'fecha_recepcion').first()
-                
-                if lote_mas_antiguo and lote_mas_antiguo.fecha_caducidad:
-                    producto.caducidad = lote_mas_antiguo.fecha_caducidad
-                elif not lote_mas_antiguo:
-                    producto.caducidad = None
-                
                 producto.save(update_fields=['cantidad', 'stock_actual', 'caducidad'])
                 
                 # Crear movimiento en kardex
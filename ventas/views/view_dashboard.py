@@ -1,48 +1,62 @@
 from django.http import JsonResponse
-from ventas.models.productos import Productos
-from datetime import datetime, timedelta
+from ventas.funciones.perdida_potencial import (
+    obtener_curva, perdida_por_horizontes, HORIZONTES_POR_DEFECTO, DIAS_MAXIMOS
+)
 
 
 def calcular_perdida_por_dias(dias):
     """
     Función auxiliar que calcula la pérdida potencial para un número específico de días.
-    
+
+    Usa la curva de pérdida sobre los lotes (ver ventas/funciones/perdida_potencial.py),
+    que se calcula con una consulta agrupada y se guarda en caché durante el día.
+
     Args:
         dias (int): Número de días a calcular (7, 14, 30, etc.)
-    
+
     Returns:
         float: Pérdida total calculada
     """
-    # definimos la fecha actual
-    hoy = datetime.now().date()
-
-    # definimos la fecha de vencimiento según los días especificados
-    fecha_vencimiento = hoy + timedelta(days=dias)
-
-    # Obtenemos todos los productos que vencen en el período especificado
-    productos_a_vencer = Productos.objects.filter(
-        caducidad__gte=hoy,  # Caducan en o después de hoy
-        caducidad__lte=fecha_vencimiento,  # Caducan antes de nuestra fecha límite
-        eliminado__isnull=True  # Solo productos activos (no eliminados)
-    )
-
-    # Creamos una variable que sera la perdida
-    perdida_total_calculada = 0
+    return float(perdida_por_horizontes([dias])[dias])
 
-    # Recorremos cada producto
-    for producto in productos_a_vencer:
-        # Determinamos el stock real: usamos 'cantidad' si existe, sino 'stock_actual'
-        stock_real = producto.cantidad if producto.cantidad > 0 else (producto.stock_actual or 0)
 
-        # Solo calculamos pérdida si hay stock
-        if stock_real > 0:
-            # Calculamos el valor total de su stock
-            valor_stock_del_producto = producto.precio * stock_real
+def perdida_potencial_api(request):
+    """
+    Retorna la curva completa de pérdida potencial por vencimiento.
 
-            # Añadimos el valor al total acumulado
-            perdida_total_calculada += valor_stock_del_producto
+    Parámetros GET (opcionales):
+        - dias: Horizontes adicionales separados por coma (ej: ?dias=45,60),
+          hasta DIAS_MAXIMOS
 
-    return float(perdida_total_calculada)
+    Returns:
+        JSON con:
+        - horizontes: {'7': pérdida, '14': pérdida, '30': pérdida, ...}
+        - curva: [{fecha, dias, valor, acumulado}] un punto por día en que vence stock
+    """
+    horizontes = set(HORIZONTES_POR_DEFECTO)
+    for valor in request.GET.get('dias', '').split(','):
+        valor = valor.strip()
+        if valor.isdigit() and 0 < int(valor) <= DIAS_MAXIMOS:
+            horizontes.add(int(valor))
+
+    curva = obtener_curva()
+    perdidas = perdida_por_horizontes(sorted(horizontes), curva=curva)
+
+    puntos = []
+    acumulado = 0
+    for punto in curva:
+        acumulado += punto['valor']
+        puntos.append({
+            'fecha': punto['fecha'].isoformat(),
+            'dias': punto['dias'],
+            'valor': float(punto['valor']),
+            'acumulado': float(acumulado),
+        })
+
+    return JsonResponse({
+        'horizontes': {str(dias): float(perdida) for dias, perdida in perdidas.items()},
+        'curva': puntos,
+    })
 
 
 def perdida_siete_dias(request):
@@ -51,7 +65,7 @@ def perdida_siete_dias(request):
     en los proximos 7 dias siempre y cuando tengan stock
     """
     perdida_total = calcular_perdida_por_dias(7)
-    
+
     data = {
         'perdida_total': perdida_total,
     }
@@ -65,7 +79,7 @@ def perdida_catorce_dias(request):
     en los proximos 14 dias siempre y cuando tengan stock
     """
     perdida_total = calcular_perdida_por_dias(14)
-    
+
     data = {
         'perdida_total': perdida_total,
     }
@@ -79,7 +93,7 @@ def perdida_treinta_dias(request):
     en los proximos 30 dias siempre y cuando tengan stock
     """
     perdida_total = calcular_perdida_por_dias(30)
-    
+
     data = {
         'perdida_total': perdida_total,
     }
@@ -6,19 +6,59 @@
 #
 # Este archivo contiene las vistas API que proveen datos en tiempo real
 # para las métricas principales del dashboard.
+#
+# El dashboard usa dashboard_resumen_api (todos los KPIs en una respuesta,
+# ver ventas/funciones/resumen_dashboard.py). Los endpoints por métrica se
+# mantienen para las tablas detalladas y otras pantallas.
 
 from django.http import JsonResponse
-from django.db.models import Sum, Count, F
+from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
+from django.db.models import Sum, Count, Max, F, Q
 from django.utils import timezone
-from datetime import datetime, date, timedelta, timezone as dt_timezone
+from datetime import datetime, timezone as dt_timezone
 from decimal import Decimal
 from ventas.models.ventas import Ventas, DetalleVenta
 from ventas.models.productos import Productos
 from ventas.models.alertas import Alertas
+from ventas.funciones.resumen_dashboard import rango_dia_local, obtener_resumen
+from ventas.funciones.stock_bajo import productos_stock_bajo
+from ventas.funciones.ventas_por_hora import obtener_ventas_por_hora
 import logging
 
 logger = logging.getLogger('ventas')
 
+# Paginación de stock_bajo_api
+STOCK_BAJO_POR_PAGINA = 50
+STOCK_BAJO_MAX_POR_PAGINA = 200
+
+# Paginación de ventas_del_dia_lista_api
+VENTAS_DIA_POR_PAGINA = 50
+VENTAS_DIA_MAX_POR_PAGINA = 200
+
+
+def dashboard_resumen_api(request):
+    """
+    API que retorna todos los KPIs del dashboard en una sola respuesta.
+    
+    El resultado se guarda en caché unos segundos (DASHBOARD_RESUMEN_SEGUNDOS),
+    así varias pantallas refrescando a la vez no multiplican las consultas.
+    
+    Returns:
+        JSON con:
+        - ventas_del_dia: {total_ventas, num_transacciones}
+        - stock_bajo: {num_productos}
+        - alertas: {num_alertas, por_tipo, por_categoria}
+        - top_producto: {nombre, unidades, total_vendido}
+        - perdida_potencial: {'7', '14', '30'} (pérdida por vencimiento)
+        - merma: {num_productos}
+        - generado: Fecha y hora del cálculo
+    """
+    try:
+        return JsonResponse(obtener_resumen())
+    except Exception as e:
+        logger.error(f'Error en dashboard_resumen_api: {str(e)}', exc_info=True)
+        return JsonResponse({'error': str(e)}, status=500)
+
 
 def ventas_del_dia_api(request):
     """
@@ -30,49 +70,19 @@ def ventas_del_dia_api(request):
         - num_transacciones: Número de ventas realizadas
     """
     try:
-        # Obtener fecha de hoy en la zona horaria local (America/Santiago)
-        ahora = timezone.now()
-        ahora_local = timezone.localtime(ahora)  # Convertir a hora local
-        hoy_local = ahora_local.date()  # Obtener solo la fecha local
-        
-        logger.info(f'Fecha/hora actual del sistema (UTC): {ahora}')
-        logger.info(f'Fecha/hora local (America/Santiago): {ahora_local}')
-        logger.info(f'Fecha local calculada: {hoy_local}')
-        
-        # Las ventas están guardadas en UTC
-        # Necesitamos convertir el día local completo a UTC
-        # Inicio del día local (00:00:00 en hora local)
-        inicio_dia_local = datetime.combine(hoy_local, datetime.min.time())
-        # Fin del día local (23:59:59.999999 en hora local)
-        fin_dia_local = datetime.combine(hoy_local, datetime.max.time()) + timedelta(microseconds=999999)
-        
-        # Convertir a zona horaria aware usando la zona horaria configurada
-        inicio_dia_aware = timezone.make_aware(inicio_dia_local)
-        fin_dia_aware = timezone.make_aware(fin_dia_local)
-        
-        # Convertir a UTC para comparar con las fechas guardadas en la BD
-        inicio_dia_utc = inicio_dia_aware.astimezone(dt_timezone.utc)
-        fin_dia_utc = fin_dia_aware.astimezone(dt_timezone.utc)
-        
-        logger.info(f'Buscando ventas del día local {hoy_local}')
-        logger.info(f'Rango local: desde {inicio_dia_aware} hasta {fin_dia_aware}')
-        logger.info(f'Rango UTC: desde {inicio_dia_utc} hasta {fin_dia_utc}')
+        # Día completo en hora local (America/Santiago)
+        inicio_dia, fin_dia = rango_dia_local()
         
         # Obtener todas las ventas de hoy usando rango de fechas en UTC
         ventas_hoy = Ventas.objects.filter(
-            fecha__gte=inicio_dia_utc,
-            fecha__lte=fin_dia_utc
+            fecha__gte=inicio_dia,
+            fecha__lt=fin_dia
         )
         
-        # Calcular el total vendido
-        total_ventas = ventas_hoy.aggregate(
-            total=Sum('total_con_iva')
-        )['total'] or Decimal('0.00')
-        
-        # Contar número de transacciones
-        num_transacciones = ventas_hoy.count()
-        
-        logger.info(f'Ventas del día encontradas: {num_transacciones} transacciones, total: ${total_ventas}')
+        # Total vendido y número de transacciones en una consulta
+        totales = ventas_hoy.aggregate(total=Sum('total_con_iva'), num=Count('id'))
+        total_ventas = totales['total'] or Decimal('0.00')
+        num_transacciones = totales['num']
         
         return JsonResponse({
             'total_ventas': float(total_ventas),
@@ -89,45 +99,59 @@ def ventas_del_dia_api(request):
 
 def stock_bajo_api(request):
     """
-    API que retorna productos con stock bajo.
+    API que retorna productos con stock bajo (paginada).
     
     Un producto tiene stock bajo cuando:
     - cantidad <= stock_minimo (si stock_minimo está definido)
     - cantidad <= 5 (si stock_minimo no está definido)
     
+    La comparación la hace la base de datos (ver ventas/funciones/stock_bajo.py):
+    solo viajan las filas de la página pedida.
+    
+    Parámetros GET (opcionales):
+        - page: Número de página (por defecto 1)
+        - page_size: Productos por página (por defecto 50, máximo 200)
+        - categoria: ID de categoría para filtrar
+    
     Returns:
         JSON con:
-        - num_productos: Número de productos con stock bajo
-        - productos: Lista de productos con stock bajo
+        - num_productos: Número total de productos con stock bajo
+        - productos: Productos con stock bajo de la página
+        - pagina, num_paginas, tiene_siguiente: Datos de paginación
     """
     try:
-        # Obtener productos activos (no eliminados, no en merma, no inactivos)
-        productos = Productos.objects.filter(
-            eliminado__isnull=True,
-            estado_merma='activo'  # Solo productos activos (excluye inactivos y en_merma)
+        try:
+            por_pagina = min(max(int(request.GET.get('page_size', STOCK_BAJO_POR_PAGINA)), 1), STOCK_BAJO_MAX_POR_PAGINA)
+        except ValueError:
+            por_pagina = STOCK_BAJO_POR_PAGINA
+        categoria = request.GET.get('categoria')
+        categoria_id = int(categoria) if categoria and categoria.isdigit() else None
+        
+        productos = productos_stock_bajo(categoria_id).values(
+            'id', 'nombre', 'cantidad', 'stock_minimo_efectivo'
         )
         
-        logger.info(f'Productos activos encontrados: {productos.count()}')
-        
-        # Filtrar productos con stock bajo
-        productos_stock_bajo = []
-        for producto in productos:
-            stock_minimo = producto.stock_minimo if producto.stock_minimo is not None else 5
-            cantidad_actual = producto.cantidad or 0
-            
-            if cantidad_actual <= stock_minimo:
-                productos_stock_bajo.append({
-                    'id': producto.id,
-                    'nombre': producto.nombre,
-                    'cantidad': cantidad_actual,
-                    'stock_minimo': stock_minimo
-                })
-        
-        logger.info(f'Productos con stock bajo: {len(productos_stock_bajo)}')
+        # Paginación
+        paginador = Paginator(productos, por_pagina)
+        try:
+            pagina = paginador.page(request.GET.get('page', 1))
+        except (PageNotAnInteger, EmptyPage):
+            pagina = paginador.page(1)
         
         return JsonResponse({
-            'num_productos': len(productos_stock_bajo),
-            'productos': productos_stock_bajo
+            'num_productos': paginador.count,
+            'productos': [
+                {
+                    'id': producto['id'],
+                    'nombre': producto['nombre'],
+                    'cantidad': float(producto['cantidad'] or 0),
+                    'stock_minimo': float(producto['stock_minimo_efectivo']),
+                }
+                for producto in pagina.object_list
+            ],
+            'pagina': pagina.number,
+            'num_paginas': paginador.num_pages,
+            'tiene_siguiente': pagina.has_next(),
         })
     except Exception as e:
         logger.error(f'Error en stock_bajo_api: {str(e)}', exc_info=True)
@@ -146,6 +170,7 @@ def alertas_pendientes_api(request):
         JSON con:
         - num_alertas: Número total de alertas activas
         - por_tipo: Desglose por tipo (roja, amarilla, verde)
+        - por_categoria: Desglose por categoría (vencimiento, stock_bajo, manual)
     """
     # Contar alertas activas (solo de productos activos, no en merma, no inactivos)
     alertas_activas = Alertas.objects.filter(
@@ -153,19 +178,28 @@ def alertas_pendientes_api(request):
         productos__estado_merma='activo'  # Solo productos activos (excluye inactivos y en_merma)
     )
     
-    # Contar por tipo
-    alertas_rojas = alertas_activas.filter(tipo_alerta='roja').count()
-    alertas_amarillas = alertas_activas.filter(tipo_alerta='amarilla').count()
-    alertas_verdes = alertas_activas.filter(tipo_alerta='verde').count()
-    
-    total_alertas = alertas_activas.count()
+    # Contar por tipo y por categoría en UNA consulta (conteos condicionales)
+    conteos = alertas_activas.aggregate(
+        total=Count('id'),
+        roja=Count('id', filter=Q(tipo_alerta='roja')),
+        amarilla=Count('id', filter=Q(tipo_alerta='amarilla')),
+        verde=Count('id', filter=Q(tipo_alerta='verde')),
+        vencimiento=Count('id', filter=Q(categoria_alerta='vencimiento')),
+        stock_bajo=Count('id', filter=Q(categoria_alerta='stock_bajo')),
+        manual=Count('id', filter=Q(categoria_alerta='manual')),
+    )
     
     return JsonResponse({
-        'num_alertas': total_alertas,
+        'num_alertas': conteos['total'],
         'por_tipo': {
-            'roja': alertas_rojas,
-            'amarilla': alertas_amarillas,
-            'verde': alertas_verdes
+            'roja': conteos['roja'],
+            'amarilla': conteos['amarilla'],
+            'verde': conteos['verde']
+        },
+        'por_categoria': {
+            'vencimiento': conteos['vencimiento'],
+            'stock_bajo': conteos['stock_bajo'],
+            'manual': conteos['manual']
         }
     })
 
@@ -181,60 +215,30 @@ def top_producto_api(request):
         - total_vendido: Monto total generado por ese producto
     """
     try:
-        # Obtener fecha de hoy en la zona horaria local (America/Santiago)
-        ahora = timezone.now()
-        ahora_local = timezone.localtime(ahora)  # Convertir a hora local
-        hoy_local = ahora_local.date()  # Obtener solo la fecha local
-        
-        logger.info(f'Fecha/hora actual del sistema (UTC): {ahora}')
-        logger.info(f'Fecha/hora local (America/Santiago): {ahora_local}')
-        logger.info(f'Fecha local calculada: {hoy_local}')
-        
-        # Las ventas están guardadas en UTC
-        # Necesitamos convertir el día local completo a UTC
-        # Inicio del día local (00:00:00 en hora local)
-        inicio_dia_local = datetime.combine(hoy_local, datetime.min.time())
-        # Fin del día local (23:59:59.999999 en hora local)
-        fin_dia_local = datetime.combine(hoy_local, datetime.max.time()) + timedelta(microseconds=999999)
-        
-        # Convertir a zona horaria aware usando la zona horaria configurada
-        inicio_dia_aware = timezone.make_aware(inicio_dia_local)
-        fin_dia_aware = timezone.make_aware(fin_dia_local)
-        
-        # Convertir a UTC para comparar con las fechas guardadas en la BD
-        inicio_dia_utc = inicio_dia_aware.astimezone(dt_timezone.utc)
-        fin_dia_utc = fin_dia_aware.astimezone(dt_timezone.utc)
-        
-        logger.info(f'Buscando top producto del día local {hoy_local}')
-        logger.info(f'Rango local: desde {inicio_dia_aware} hasta {fin_dia_aware}')
-        logger.info(f'Rango UTC: desde {inicio_dia_utc} hasta {fin_dia_utc}')
+        # Día completo en hora local (America/Santiago)
+        inicio_dia, fin_dia = rango_dia_local()
         
         # Obtener detalles de ventas de hoy y agrupar por producto
         detalles_hoy = DetalleVenta.objects.filter(
-            ventas__fecha__gte=inicio_dia_utc,
-            ventas__fecha__lte=fin_dia_utc
+            ventas__fecha__gte=inicio_dia,
+            ventas__fecha__lt=fin_dia
         )
         
-        logger.info(f'Detalles de venta encontrados hoy: {detalles_hoy.count()}')
-        
-        if detalles_hoy.exists():
-            top_producto = detalles_hoy.values(
-                'productos__nombre'
-            ).annotate(
-                total_unidades=Sum('cantidad'),
-                total_vendido=Sum(F('cantidad') * F('precio_unitario'))
-            ).order_by('-total_unidades').first()
-            
-            if top_producto:
-                logger.info(f'Top producto del día: {top_producto["productos__nombre"]} - {top_producto["total_unidades"]} unidades')
-                return JsonResponse({
-                    'nombre': top_producto['productos__nombre'],
-                    'unidades': top_producto['total_unidades'],
-                    'total_vendido': float(top_producto['total_vendido'] or 0)
-                })
+        top_producto = detalles_hoy.values(
+            'productos__nombre'
+        ).annotate(
+            total_unidades=Sum('cantidad'),
+            total_vendido=Sum(F('cantidad') * F('precio_unitario'))
+        ).order_by('-total_unidades').first()
+        
+        if top_producto:
+            return JsonResponse({
+                'nombre': top_producto['productos__nombre'],
+                'unidades': top_producto['total_unidades'],
+                'total_vendido': float(top_producto['total_vendido'] or 0)
+            })
         
         # Si no hay ventas hoy
-        logger.info('No hay ventas hoy para calcular top producto')
         return JsonResponse({
             'nombre': 'Sin ventas',
             'unidades': 0,
@@ -250,39 +254,78 @@ def top_producto_api(request):
         }, status=500)
 
 
+# Formato de la fecha (UTC) en el cursor: sin caracteres que haya que escapar en la URL
+FORMATO_CURSOR = '%Y%m%dT%H%M%S.%f'
+
+
+def _cursor_venta(venta):
+    """Cursor de paginación de una venta: 'fecha UTC|id'."""
+    return f'{venta.fecha.astimezone(dt_timezone.utc).strftime(FORMATO_CURSOR)}|{venta.id}'
+
+
 def ventas_del_dia_lista_api(request):
     """
     API que retorna la lista detallada de ventas del día actual.
     
+    Las ventas vienen de la más reciente a la más antigua, paginadas por
+    cursor sobre (fecha, id): cada página es una consulta por índice, sin
+    OFFSET, y el número de productos de cada venta viene en la misma consulta.
+    
+    Parámetros GET (opcionales):
+        - limit: Ventas por página (por defecto 50, máximo 200)
+        - cursor: Valor `siguiente` de la página anterior (ventas más antiguas)
+        - after: ID de la última venta que ya se tiene; retorna solo las
+          ventas más nuevas (para refrescar el dashboard sin repetir la lista)
+    
     Returns:
         JSON con:
         - ventas: Lista de ventas con detalles (folio, fecha, total, cliente, etc.)
+        - total_ventas: Número de ventas del día
+        - siguiente: Cursor de la página siguiente (null si no hay más)
+        - ultimo_id: ID de la venta más nueva del día (para el siguiente ?after=)
+        - fecha: Día de las ventas (YYYY-MM-DD)
     """
     try:
-        # Obtener fecha de hoy en la zona horaria local
-        ahora = timezone.now()
-        ahora_local = timezone.localtime(ahora)
-        hoy_local = ahora_local.date()
-        
-        # Calcular rango del día en UTC
-        inicio_dia_local = datetime.combine(hoy_local, datetime.min.time())
-        fin_dia_local = datetime.combine(hoy_local, datetime.max.time()) + timedelta(microseconds=999999)
-        
-        inicio_dia_aware = timezone.make_aware(inicio_dia_local)
-        fin_dia_aware = timezone.make_aware(fin_dia_local)
-        
-        inicio_dia_utc = inicio_dia_aware.astimezone(dt_timezone.utc)
-        fin_dia_utc = fin_dia_aware.astimezone(dt_timezone.utc)
-        
-        # Obtener todas las ventas de hoy
+        try:
+            limite = min(max(int(request.GET.get('limit', VENTAS_DIA_POR_PAGINA)), 1), VENTAS_DIA_MAX_POR_PAGINA)
+        except ValueError:
+            limite = VENTAS_DIA_POR_PAGINA
+        
+        # Día completo en hora local (America/Santiago)
+        hoy = timezone.localdate()
+        inicio_dia, fin_dia = rango_dia_local(hoy)
         ventas_hoy = Ventas.objects.filter(
-            fecha__gte=inicio_dia_utc,
-            fecha__lte=fin_dia_utc
-        ).select_related('clientes').order_by('-fecha')
+            fecha__gte=inicio_dia,
+            fecha__lt=fin_dia
+        )
+        
+        # Número de ventas del día y la más nueva (una consulta)
+        conteo = ventas_hoy.aggregate(total=Count('id'), ultimo_id=Max('id'))
+        
+        # Página pedida, con el número de productos en la misma consulta
+        ventas = ventas_hoy.select_related('clientes').annotate(
+            num_productos=Count('detalles')
+        ).order_by('-fecha', '-id')
+        
+        after = request.GET.get('after')
+        cursor = request.GET.get('cursor')
+        if after:
+            ventas = ventas.filter(id__gt=int(after))
+        elif cursor:
+            fecha_cursor, id_cursor = cursor.rsplit('|', 1)
+            fecha_cursor = datetime.strptime(fecha_cursor, FORMATO_CURSOR).replace(tzinfo=dt_timezone.utc)
+            ventas = ventas.filter(
+                Q(fecha__lt=fecha_cursor) | Q(fecha=fecha_cursor, id__lt=int(id_cursor))
+            )
+        
+        # Se pide una venta de más para saber si hay otra página
+        pagina = list(ventas[:limite + 1])
+        siguiente = _cursor_venta(pagina[limite - 1]) if len(pagina) > limite else None
+        pagina = pagina[:limite]
         
         # Formatear ventas para el JSON
         ventas_lista = []
-        for venta in ventas_hoy:
+        for venta in pagina:
             fecha_local = timezone.localtime(venta.fecha)
             ventas_lista.append({
                 'id': venta.id,
@@ -292,13 +335,22 @@ def ventas_del_dia_lista_api(request):
                 'total': float(venta.total_con_iva),
                 'cliente': venta.clientes.nombre if venta.clientes else 'Cliente Genérico',
                 'canal': venta.canal_venta,
-                'num_productos': venta.detalles.count()
+                'num_productos': venta.num_productos
             })
         
         return JsonResponse({
             'ventas': ventas_lista,
-            'total_ventas': len(ventas_lista)
+            'total_ventas': conteo['total'],
+            'siguiente': siguiente,
+            'ultimo_id': conteo['ultimo_id'],
+            'fecha': hoy.isoformat(),
         })
+    except ValueError:
+        return JsonResponse({
+            'ventas': [],
+            'total_ventas': 0,
+            'error': 'Parámetros de paginación inválidos'
+        }, status=400)
     except Exception as e:
         logger.error(f'Error en ventas_del_dia_lista_api: {str(e)}', exc_info=True)
         return JsonResponse({
@@ -360,3 +412,33 @@ def merma_lista_api(request):
             'total_productos': 0,
             'error': str(e)
         }, status=500)
+
+
+def ventas_por_hora_api(request):
+    """
+    API que retorna ventas y monto por día de la semana x hora (mapa de calor).
+    
+    Las horas son de America/Santiago. Se calcula con una consulta agrupada
+    y se guarda en caché por rango (ver ventas/funciones/ventas_por_hora.py).
+    
+    Parámetros GET (opcionales):
+        - desde: Primer día, YYYY-MM-DD (por defecto, hace 28 días)
+        - hasta: Último día, YYYY-MM-DD (por defecto, hoy)
+    
+    Returns:
+        JSON con:
+        - dias: Nombres de los días (lunes a domingo)
+        - celdas: [{dia, hora, ventas, total}] solo las horas con ventas
+        - max_ventas, max_total: Máximos (para la escala de colores)
+    """
+    try:
+        desde = request.GET.get('desde')
+        hasta = request.GET.get('hasta')
+        desde = datetime.strptime(desde, '%Y-%m-%d').date() if desde else None
+        hasta = datetime.strptime(hasta, '%Y-%m-%d').date() if hasta else None
+    except ValueError:
+        return JsonResponse({'error': 'Fechas inválidas (formato YYYY-MM-DD)'}, status=400)
+    if desde and hasta and desde > hasta:
+        return JsonResponse({'error': 'La fecha desde no puede ser posterior a la fecha hasta'}, status=400)
+    
+    return JsonResponse(obtener_ventas_por_hora(desde, hasta))
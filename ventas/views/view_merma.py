@@ -202,6 +202,11 @@ def mover_a_merma_ajax(request):
         historial_creado = False
         
         with transaction.atomic():
+            # Bloquear los lotes activos de todos los productos (en orden de id)
+            # para que una venta simultánea en el POS no descuente los mismos lotes
+            from ventas.funciones.reserva_stock import bloquear_lotes_activos
+            bloquear_lotes_activos([p.id for p in productos])
+            
             for producto in productos:
                 # Guardar la cantidad que se va a merma antes de ponerla en 0
                 cantidad_original = producto.cantidad if producto.cantidad else Decimal('0')
@@ -293,6 +298,9 @@ def mover_a_merma_ajax(request):
                             for lote in lotes_activos:
                                 cantidad_total_merma += lote.cantidad
                             lotes_activos.update(estado='en_merma', cantidad=Decimal('0'))
+                            # update() no dispara señales: actualizar el stock precalculado a mano
+                            from ventas.funciones.stock_productos import recalcular_stock
+                            recalcular_stock([producto.id])
                             logger.info(f'Marcados {lotes_procesados} lotes como en_merma para producto {producto.id}')
                     
                 except Exception as e:
@@ -20,12 +20,12 @@
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
 from django.db.models import Sum, Count, Q
-from django.http import HttpResponse
 from decimal import Decimal
-import csv
 
 from ventas.models import Productos, Categorias
-from ventas.utils.exportadores import exportar_a_excel, exportar_a_pdf
+from ventas.utils.exportadores import (
+    exportar_a_pdf_por_paginas, exportar_csv_streaming, exportar_excel_reporte, iterar_por_lotes
+)
 
 
 # ================================================================
@@ -160,41 +160,56 @@ def reporte_inventario_view(request):
 # =     VISTA: EXPORTAR REPORTE INVENTARIO A CSV               =
 # ================================================================
 
-def _obtener_productos_inventario(request):
+def _filtrar_productos_inventario(request):
     """
-    Función auxiliar para obtener productos de inventario con filtros aplicados.
+    Función auxiliar que retorna los productos del inventario con los filtros aplicados.
     
     Args:
         request: HttpRequest con parámetros de filtro
         
     Returns:
-        list: Lista de diccionarios con datos de productos
+        QuerySet: Productos filtrados
     """
     productos = Productos.objects.filter(
         eliminado__isnull=True,
         estado_merma='activo'
-    ).select_related('categorias')
+    )
     
     categoria_id = request.GET.get('categoria_id')
     if categoria_id and categoria_id != '':
         productos = productos.filter(categorias_id=categoria_id)
     
-    # Preparar datos
-    datos = []
-    for producto in productos:
-        cantidad = producto.cantidad if producto.cantidad else 0
-        precio = producto.precio if producto.precio else Decimal('0.00')
-        valorizacion = cantidad * precio
+    return productos
+
+
+ENCABEZADOS_EXPORTACION_INVENTARIO = ['Producto', 'Categoría', 'Stock Actual', 'Precio', 'Valorización']
+
+
+def _filas_exportacion_inventario(request):
+    """
+    Genera las filas de la exportación de inventario, leídas de la BD por lotes.
+    
+    Args:
+        request: HttpRequest con parámetros de filtro
         
-        datos.append({
-            'Producto': producto.nombre,
-            'Categoría': producto.categorias.nombre if producto.categorias else 'Sin categoría',
-            'Stock Actual': cantidad,
-            'Precio': precio,
-            'Valorización': valorizacion,
-        })
+    Yields:
+        list: Valores de un producto, en el orden de ENCABEZADOS_EXPORTACION_INVENTARIO
+    """
+    filas_productos = iterar_por_lotes(
+        _filtrar_productos_inventario(request),
+        ['nombre', 'categorias__nombre', 'cantidad', 'precio'],
+    )
     
-    return datos
+    for _, nombre, categoria, cantidad, precio in filas_productos:
+        cantidad = cantidad or 0
+        precio = precio or Decimal('0.00')
+        yield [
+            nombre,
+            categoria or 'Sin categoría',
+            cantidad,
+            precio,
+            cantidad * precio,
+        ]
 
 
 @login_required
@@ -206,32 +221,14 @@ def exportar_inventario_csv(request):
         request: HttpRequest con parámetros de filtro
         
     Returns:
-        HttpResponse: Archivo CSV descargable
+        StreamingHttpResponse: Archivo CSV descargable
     """
-    datos = _obtener_productos_inventario(request)
-    
-    # Crear respuesta CSV
-    response = HttpResponse(content_type='text/csv; charset=utf-8')
-    response['Content-Disposition'] = 'attachment; filename="reporte_inventario.csv"'
-    
-    writer = csv.writer(response)
-    
-    # Encabezados
-    writer.writerow([
-        'Producto', 'Categoría', 'Stock Actual', 'Precio', 'Valorización'
-    ])
-    
-    # Datos
-    for item in datos:
-        writer.writerow([
-            item['Producto'],
-            item['Categoría'],
-            item['Stock Actual'],
-            float(item['Precio']),
-            float(item['Valorización']),
-        ])
-    
-    return response
+    # Filas leídas por lotes y enviadas a medida que se escriben
+    return exportar_csv_streaming(
+        _filas_exportacion_inventario(request),
+        ENCABEZADOS_EXPORTACION_INVENTARIO,
+        'reporte_inventario',
+    )
 
 
 @login_required
@@ -245,8 +242,6 @@ def exportar_inventario_excel(request):
     Returns:
         HttpResponse: Archivo Excel descargable
     """
-    datos = _obtener_productos_inventario(request)
-    
     titulo = "Reporte de Inventario"
     categoria_id = request.GET.get('categoria_id')
     if categoria_id and categoria_id != '':
@@ -256,7 +251,13 @@ def exportar_inventario_excel(request):
         except Categorias.DoesNotExist:
             pass
     
-    return exportar_a_excel(datos, 'reporte_inventario', titulo)
+    return exportar_excel_reporte(
+        'inventario',
+        _filas_exportacion_inventario(request),
+        ENCABEZADOS_EXPORTACION_INVENTARIO,
+        'reporte_inventario',
+        titulo,
+    )
 
 
 @login_required
@@ -268,10 +269,8 @@ def exportar_inventario_pdf(request):
         request: HttpRequest con parámetros de filtro
         
     Returns:
-        HttpResponse: Archivo PDF descargable
+        FileResponse: Archivo PDF descargable
     """
-    datos = _obtener_productos_inventario(request)
-    
     titulo = "Reporte de Inventario"
     categoria_id = request.GET.get('categoria_id')
     if categoria_id and categoria_id != '':
@@ -281,7 +280,10 @@ def exportar_inventario_pdf(request):
         except Categorias.DoesNotExist:
             pass
     
-    encabezados = ['Producto', 'Categoría', 'Stock Actual', 'Precio', 'Valorización']
-    
-    return exportar_a_pdf(datos, 'reporte_inventario', titulo, encabezados)
+    return exportar_a_pdf_por_paginas(
+        _filas_exportacion_inventario(request),
+        ENCABEZADOS_EXPORTACION_INVENTARIO,
+        'reporte_inventario',
+        titulo,
+    )
 
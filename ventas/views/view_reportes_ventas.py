@@ -22,13 +22,14 @@ from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
 from django.utils import timezone
 from django.db.models import Sum, Count, Q
-from django.http import HttpResponse
 from datetime import datetime, time as dt_time
 from decimal import Decimal
-import csv
 
 from ventas.models import Ventas, DetalleVenta, Clientes
-from ventas.utils.exportadores import exportar_a_excel, exportar_a_pdf
+from ventas.utils.exportadores import (
+    exportar_a_pdf_por_paginas, exportar_csv_streaming, exportar_excel_reporte, iterar_por_lotes
+)
+from ventas.funciones.resumen_ventas import totales_ventas
 
 
 # ================================================================
@@ -130,21 +131,25 @@ def reporte_ventas_view(request):
         # ============================================================
         # PASO 4: Calcular totales agregados
         # ============================================================
-        cantidad_ventas = ventas.count()
-        
-        if cantidad_ventas > 0:
-            # Calcular totales usando agregación
+        if cliente_id:
+            # El resumen diario no separa por cliente: se suman las ventas
             totales_calculados = ventas.aggregate(
                 total_neto=Sum('total_sin_iva'),
                 total_iva=Sum('total_iva'),
                 total_con_iva=Sum('total_con_iva'),
+                cantidad_ventas=Count('id'),
             )
-            
+        else:
+            # Días cerrados desde el resumen diario (ver ventas/funciones/resumen_ventas.py)
+            totales_calculados = totales_ventas(fecha_desde, fecha_hasta, canal_venta or None)
+        
+        cantidad_ventas = totales_calculados['cantidad_ventas'] or 0
+        if cantidad_ventas > 0:
             totales['total_neto'] = totales_calculados['total_neto'] or Decimal('0.00')
             totales['total_iva'] = totales_calculados['total_iva'] or Decimal('0.00')
             totales['total_con_iva'] = totales_calculados['total_con_iva'] or Decimal('0.00')
             totales['cantidad_ventas'] = cantidad_ventas
-            totales['promedio_venta'] = totales['total_con_iva'] / cantidad_ventas if cantidad_ventas > 0 else Decimal('0.00')
+            totales['promedio_venta'] = totales['total_con_iva'] / cantidad_ventas
         
         # Limitar resultados para visualización (paginación opcional)
         ventas = ventas[:100]
@@ -232,6 +237,44 @@ def _obtener_ventas_filtradas(request):
     return ventas.order_by('-fecha')
 
 
+ENCABEZADOS_EXPORTACION_VENTAS = [
+    'Folio', 'Fecha', 'Cliente', 'Canal', 'Total Neto', 'IVA', 'Total con IVA', 'Descuento'
+]
+
+
+def _filas_exportacion_ventas(request):
+    """
+    Genera las filas de la exportación de ventas, leídas de la BD por lotes.
+    
+    Las ventas van de la más nueva a la más antigua, como en el reporte
+    (id y fecha crecen juntos).
+    
+    Args:
+        request: HttpRequest con parámetros de filtro
+        
+    Yields:
+        list: Valores de una venta, en el orden de ENCABEZADOS_EXPORTACION_VENTAS
+    """
+    filas_ventas = iterar_por_lotes(
+        _obtener_ventas_filtradas(request),
+        ['folio', 'fecha', 'clientes__nombre', 'canal_venta',
+         'total_sin_iva', 'total_iva', 'total_con_iva', 'descuento'],
+        descendente=True,
+    )
+    
+    for venta_id, folio, fecha, cliente, canal, total_sin_iva, total_iva, total_con_iva, descuento in filas_ventas:
+        yield [
+            folio or f'VENTA-{venta_id}',
+            timezone.localtime(fecha).strftime('%d/%m/%Y %H:%M'),
+            cliente or 'Cliente Genérico',
+            canal,
+            total_sin_iva,
+            total_iva,
+            total_con_iva,
+            descuento,
+        ]
+
+
 @login_required
 def exportar_ventas_csv(request):
     """
@@ -241,37 +284,14 @@ def exportar_ventas_csv(request):
         request: HttpRequest con parámetros de filtro
         
     Returns:
-        HttpResponse: Archivo CSV descargable
+        StreamingHttpResponse: Archivo CSV descargable
     """
-    ventas = _obtener_ventas_filtradas(request)
-    
-    # Crear respuesta CSV
-    response = HttpResponse(content_type='text/csv; charset=utf-8')
-    response['Content-Disposition'] = 'attachment; filename="reporte_ventas.csv"'
-    
-    # Escribir CSV
-    writer = csv.writer(response)
-    
-    # Encabezados
-    writer.writerow([
-        'Folio', 'Fecha', 'Cliente', 'Canal', 
-        'Total Neto', 'IVA', 'Total con IVA', 'Descuento'
-    ])
-    
-    # Datos
-    for venta in ventas:
-        writer.writerow([
-            venta.folio or f'VENTA-{venta.id}',
-            venta.fecha.strftime('%d/%m/%Y %H:%M'),
-            venta.clientes.nombre if venta.clientes else 'Cliente Genérico',
-            venta.canal_venta,
-            float(venta.total_sin_iva),
-            float(venta.total_iva),
-            float(venta.total_con_iva),
-            float(venta.descuento),
-        ])
-    
-    return response
+    # Filas leídas por lotes y enviadas a medida que se escriben
+    return exportar_csv_streaming(
+        _filas_exportacion_ventas(request),
+        ENCABEZADOS_EXPORTACION_VENTAS,
+        'reporte_ventas',
+    )
 
 
 @login_required
@@ -285,22 +305,6 @@ def exportar_ventas_excel(request):
     Returns:
         HttpResponse: Archivo Excel descargable
     """
-    ventas = _obtener_ventas_filtradas(request)
-    
-    # Preparar datos
-    datos = []
-    for venta in ventas:
-        datos.append({
-            'Folio': venta.folio or f'VENTA-{venta.id}',
-            'Fecha': venta.fecha.strftime('%d/%m/%Y %H:%M'),
-            'Cliente': venta.clientes.nombre if venta.clientes else 'Cliente Genérico',
-            'Canal': venta.canal_venta,
-            'Total Neto': venta.total_sin_iva,
-            'IVA': venta.total_iva,
-            'Total con IVA': venta.total_con_iva,
-            'Descuento': venta.descuento,
-        })
-    
     # Generar título con filtros
     titulo = "Reporte de Ventas"
     fecha_desde_str = request.GET.get('fecha_desde')
@@ -308,7 +312,13 @@ def exportar_ventas_excel(request):
     if fecha_desde_str and fecha_hasta_str:
         titulo += f" ({fecha_desde_str} a {fecha_hasta_str})"
     
-    return exportar_a_excel(datos, 'reporte_ventas', titulo)
+    return exportar_excel_reporte(
+        'ventas',
+        _filas_exportacion_ventas(request),
+        ENCABEZADOS_EXPORTACION_VENTAS,
+        'reporte_ventas',
+        titulo,
+    )
 
 
 @login_required
@@ -320,23 +330,8 @@ def exportar_ventas_pdf(request):
         request: HttpRequest con parámetros de filtro
         
     Returns:
-        HttpResponse: Archivo PDF descargable
+        FileResponse: Archivo PDF descargable
     """
-    ventas = _obtener_ventas_filtradas(request)
-    
-    # Preparar datos
-    datos = []
-    for venta in ventas:
-        datos.append({
-            'Folio': venta.folio or f'VENTA-{venta.id}',
-            'Fecha': venta.fecha.strftime('%d/%m/%Y %H:%M'),
-            'Cliente': venta.clientes.nombre if venta.clientes else 'Cliente Genérico',
-            'Canal': venta.canal_venta,
-            'Total Neto': venta.total_sin_iva,
-            'IVA': venta.total_iva,
-            'Total con IVA': venta.total_con_iva,
-        })
-    
     # Generar título con filtros
     titulo = "Reporte de Ventas"
     fecha_desde_str = request.GET.get('fecha_desde')
@@ -344,7 +339,11 @@ def exportar_ventas_pdf(request):
     if fecha_desde_str and fecha_hasta_str:
         titulo += f" ({fecha_desde_str} a {fecha_hasta_str})"
     
-    encabezados = ['Folio', 'Fecha', 'Cliente', 'Canal', 'Total Neto', 'IVA', 'Total con IVA']
+    # Mismas filas que el CSV/Excel, sin la columna Descuento (no cabe en A4)
+    columnas = len(ENCABEZADOS_EXPORTACION_VENTAS) - 1
+    filas = (fila[:columnas] for fila in _filas_exportacion_ventas(request))
     
-    return exportar_a_pdf(datos, 'reporte_ventas', titulo, encabezados)
+    return exportar_a_pdf_por_paginas(
+        filas, ENCABEZADOS_EXPORTACION_VENTAS[:columnas], 'reporte_ventas', titulo
+    )
 
@@ -0,0 +1,146 @@
+# ================================================================
+# =                                                              =
+# =        VISTA: REPORTES EN SEGUNDO PLANO (TRABAJOS)          =
+# =                                                              =
+# ================================================================
+#
+# Permite pedir una exportación pesada (Excel, PDF o CSV de un rango
+# grande) sin esperar a que se genere dentro de la petición:
+#
+# - solicitar_reporte_api: registra el trabajo y responde de inmediato
+# - estado_trabajo_reporte_api: estado y avance de un trabajo (polling)
+# - mis_reportes_api: últimos trabajos del usuario (para retomar al volver)
+# - descargar_reporte: entrega el archivo cuando el trabajo está listo
+#
+# Los archivos los genera el comando `python manage.py procesar_reportes`
+# (ver ventas/funciones/trabajos_reporte.py).
+
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse, FileResponse, Http404
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils import timezone
+from django.views.decorators.http import require_POST
+
+from ventas.models import TrabajoReporte
+from ventas.funciones.trabajos_reporte import crear_trabajo, ruta_archivo
+
+# Trabajos que muestra mis_reportes_api
+MIS_REPORTES_LIMITE = 10
+
+# Campos del POST que no son filtros del reporte
+CAMPOS_NO_FILTRO = ('reporte', 'formato', 'csrfmiddlewaretoken')
+
+
+def _datos_trabajo(trabajo):
+    """Representación JSON de un trabajo."""
+    listo = trabajo.estado == 'listo' and trabajo.expira and trabajo.expira > timezone.now()
+    return {
+        'id': trabajo.id,
+        'reporte': trabajo.reporte,
+        'formato': trabajo.formato,
+        'estado': trabajo.estado,
+        'progreso': trabajo.progreso,
+        'creado': timezone.localtime(trabajo.creado).strftime('%d/%m/%Y %H:%M'),
+        'expira': timezone.localtime(trabajo.expira).strftime('%d/%m/%Y %H:%M') if trabajo.expira else None,
+        'nombre_archivo': trabajo.nombre_archivo,
+        'url_descarga': reverse('descargar_reporte', args=[trabajo.id]) if listo else None,
+        'error': 'No se pudo generar el reporte' if trabajo.estado == 'error' else None,
+    }
+
+
+@login_required
+@require_POST
+def solicitar_reporte_api(request):
+    """
+    Pide generar una exportación en segundo plano.
+
+    Parámetros POST:
+        - reporte: 'ventas', 'inventario' o 'top_productos'
+        - formato: 'excel', 'pdf' o 'csv'
+        - El resto: filtros del reporte (los mismos de la exportación directa,
+          ej: fecha_desde, fecha_hasta, cliente_id, canal_venta, categoria_id, tipo)
+
+    Returns:
+        JSON con success y el trabajo creado (o mensaje de error)
+    """
+    parametros = {
+        nombre: valor
+        for nombre, valor in request.POST.items()
+        if nombre not in CAMPOS_NO_FILTRO and valor != ''
+    }
+
+    try:
+        trabajo = crear_trabajo(
+            request.user,
+            request.POST.get('reporte', ''),
+            request.POST.get('formato', ''),
+            parametros,
+        )
+    except ValueError as e:
+        return JsonResponse({
+            'success': False,
+            'mensaje': str(e)
+        }, status=400)
+
+    return JsonResponse({
+        'success': True,
+        'mensaje': 'El reporte se está preparando. Puedes seguir trabajando.',
+        'trabajo': _datos_trabajo(trabajo),
+        'url_estado': reverse('api_estado_trabajo_reporte', args=[trabajo.id]),
+    })
+
+
+@login_required
+def estado_trabajo_reporte_api(request, trabajo_id):
+    """
+    Retorna el estado y el avance de un trabajo del usuario.
+
+    Args:
+        trabajo_id: ID del trabajo
+
+    Returns:
+        JSON con los datos del trabajo (url_descarga cuando está listo)
+    """
+    trabajo = get_object_or_404(TrabajoReporte, id=trabajo_id, usuario=request.user)
+    return JsonResponse(_datos_trabajo(trabajo))
+
+
+@login_required
+def mis_reportes_api(request):
+    """
+    Retorna los últimos trabajos del usuario, del más nuevo al más antiguo.
+
+    Returns:
+        JSON con trabajos: lista de trabajos
+    """
+    trabajos = TrabajoReporte.objects.filter(
+        usuario=request.user
+    ).order_by('-creado')[:MIS_REPORTES_LIMITE]
+    return JsonResponse({
+        'trabajos': [_datos_trabajo(trabajo) for trabajo in trabajos],
+    })
+
+
+@login_required
+def descargar_reporte(request, trabajo_id):
+    """
+    Descarga el archivo de un trabajo listo (solo su usuario).
+
+    Args:
+        trabajo_id: ID del trabajo
+
+    Returns:
+        FileResponse con el archivo, o 404 si no existe, no está listo o expiró
+    """
+    trabajo = get_object_or_404(TrabajoReporte, id=trabajo_id, usuario=request.user)
+    ruta = ruta_archivo(trabajo)
+    if trabajo.estado != 'listo' or trabajo.expira <= timezone.now() or not ruta or not ruta.exists():
+        raise Http404('El reporte no está disponible')
+
+    return FileResponse(
+        open(ruta, 'rb'),
+        as_attachment=True,
+        filename=trabajo.nombre_archivo,
+        content_type=trabajo.content_type,
+    )
@@ -69,6 +69,7 @@ def alertas_list_view(request):
     # --- Paso 2: Aplicar filtros si existen ---
     # Obtener parámetros de la URL (GET)
     tipo_filtro = request.GET.get('tipo_alerta', '')
+    categoria_filtro = request.GET.get('categoria_alerta', '')
     estado_filtro = request.GET.get('estado', '')
     producto_filtro = request.GET.get('producto', '').strip()
     fecha_desde = request.GET.get('fecha_desde', '')
@@ -78,6 +79,10 @@ def alertas_list_view(request):
     if tipo_filtro:
         alertas = alertas.filter(tipo_alerta=tipo_filtro)
     
+    # Filtrar por categoría (vencimiento, stock bajo, factura, manual)
+    if categoria_filtro:
+        alertas = alertas.filter(categoria_alerta=categoria_filtro)
+    
     # Filtrar por estado
     if estado_filtro:
         alertas = alertas.filter(estado=estado_filtro)
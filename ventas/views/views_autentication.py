@@ -107,16 +107,16 @@ def dashboard_view(request):
     """
     Vista del dashboard principal.
     
-    Genera alertas automáticamente al cargar el dashboard para:
-    - Productos por vencer
-    - Stock bajo
-    - Facturas vencidas o por vencer
+    Las alertas de productos se mantienen al día con cada cambio de stock
+    (ver ventas/funciones/outbox.py). Aquí solo se asegura que la pasada
+    completa (días para vencer, facturas) se haya hecho hoy, por si el
+    cron de `generar_alertas` no corrió.
     """
-    from ventas.models import Alertas
+    from ventas.funciones.motor_alertas import generar_alertas_del_dia
     
-    # Generar alertas automáticamente al cargar el dashboard
+    # Pasada completa de alertas, como máximo una vez al día
     try:
-        Alertas.generar_alertas_automaticas()
+        generar_alertas_del_dia()
     except Exception as e:
         # Si falla la generación de alertas, no bloquear la carga del dashboard
         import logging
@@ -25,7 +25,7 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
-from django.db import transaction
+from django.db import OperationalError
 from django.utils import timezone
 from django.conf import settings
 from decimal import Decimal
@@ -33,8 +33,15 @@ import json
 import logging
 
 # Importamos los modelos que necesitamos
-from ventas.models import Productos, Clientes, Ventas, DetalleVenta
+from ventas.models import Productos, Clientes
 from ventas.funciones.formularios_ventas import ClienteRapidoForm, FinalizarVentaForm
+from ventas.funciones.checkout import (
+    registrar_venta, normalizar_carrito, validar_carrito, normalizar_clave_idempotencia, VentaInvalidaError
+)
+from ventas.funciones.catalogo_pos import obtener_catalogo, obtener_cambios_catalogo
+from ventas.funciones.busqueda_pos import (
+    buscar_productos, buscar_clientes, LIMITE_POR_DEFECTO, LIMITE_MAXIMO
+)
 
 
 # ================================================================
@@ -51,7 +58,8 @@ def pos_view(request):
     Vista principal del Punto de Venta (POS).
     
     Muestra:
-    - Lista de productos disponibles
+    - Grilla de productos (la carga pos.js desde catalogo_pos_api)
+    - Buscador de clientes (usa buscar_clientes_api)
     - Formulario para agregar cliente
     - Carrito de compras (manejado con JavaScript en el navegador)
     
@@ -62,22 +70,14 @@ def pos_view(request):
         Una página HTML con la interfaz del POS
     """
     
-    # --- Paso 1: Obtener todos los productos activos (no eliminados) ---
-    # Filtramos solo los productos que:
-    # - No han sido eliminados (eliminado__isnull=True)
-    # - Están en estado activo (no en merma, no inactivos) (estado_merma='activo')
-    # - Tienen stock disponible (cantidad > 0)
-    # - Están ordenados alfabéticamente por nombre
-    # IMPORTANTE: Productos en merma o inactivos NO se muestran en POS
-    productos_disponibles = Productos.objects.filter(
-        eliminado__isnull=True,    # Solo productos no eliminados
-        estado_merma='activo',     # Solo productos activos (excluye inactivos y en_merma)
-        cantidad__gt=0             # Solo con stock disponible
-    ).select_related('categorias').order_by('nombre')
-    
-    # --- Paso 2: Obtener todos los clientes para el selector ---
-    # Los ordenamos alfabéticamente por nombre
-    clientes = Clientes.objects.all().order_by('nombre')
+    # --- Paso 1: Los productos NO se renderizan aquí ---
+    # La grilla de productos la arma pos.js con el catálogo versionado
+    # (api/pos/catalogo/), que se sirve desde caché y luego se actualiza
+    # con deltas. Así la carga del POS no depende del tamaño del catálogo.
+    
+    # --- Paso 2: Los clientes tampoco se cargan aquí ---
+    # El selector de clientes se llena con la búsqueda del POS
+    # (api/pos/buscar/clientes/) a medida que el cajero escribe.
     
     # --- Paso 3: Crear el formulario para agregar nuevos clientes ---
     form_cliente = ClienteRapidoForm()
@@ -86,8 +86,6 @@ def pos_view(request):
     # El "contexto" es un diccionario con todas las variables que
     # el template HTML necesita para mostrar la información
     contexto = {
-        'productos': productos_disponibles,  # Lista de productos
-        'clientes': clientes,                # Lista de clientes
         'form_cliente': form_cliente,        # Formulario de cliente
         'IVA_RATE': 0.19,                   # Tasa de IVA en Chile (19%)
     }
@@ -97,6 +95,109 @@ def pos_view(request):
     return render(request, 'pos.html', contexto)
 
 
+# ================================================================
+# =        VISTA API: CATÁLOGO VERSIONADO DEL POS (JSON)         =
+# ================================================================
+# 
+# pos.js llama a esta API al abrir el POS (catálogo completo) y luego
+# cada cierto tiempo con ?since=<versión> para recibir solo los cambios.
+# Ver ventas/funciones/catalogo_pos.py
+
+@login_required
+@require_http_methods(["GET"])
+def catalogo_pos_api(request):
+    """
+    API que retorna el catálogo de productos del POS.
+    
+    Parámetros GET:
+        since (int, opcional): Versión que ya tiene el navegador. Si viene,
+            solo se retornan los productos modificados desde esa versión
+            (con 'disponible': False los que hay que quitar de la grilla).
+    
+    Returns:
+        JsonResponse: {'success', 'version', 'completo', 'productos': [...]}
+    """
+    since = request.GET.get('since')
+    try:
+        since = int(since) if since not in (None, '') else None
+    except ValueError:
+        since = None
+    
+    # Sin versión (o inválida) se entrega el catálogo completo desde caché
+    if since is None or since <= 0:
+        catalogo = obtener_catalogo()
+        completo = True
+    else:
+        catalogo = obtener_cambios_catalogo(since)
+        completo = False
+    
+    return JsonResponse({
+        'success': True,
+        'version': catalogo['version'],
+        'completo': completo,
+        'productos': catalogo['productos'],
+    })
+
+
+# ================================================================
+# =        VISTAS API: BÚSQUEDA TYPEAHEAD DEL POS (JSON)         =
+# ================================================================
+# 
+# pos.js llama a estas APIs mientras el cajero escribe en los buscadores
+# de productos y clientes. Usan el índice de prefijos en memoria de
+# ventas/funciones/busqueda_pos.py y retornan pocos resultados por página.
+
+def _parametros_busqueda(request):
+    """
+    Lee q, pagina y limite de la petición.
+    
+    Returns:
+        tuple: (consulta, pagina, limite) con pagina >= 1 y limite entre 1 y LIMITE_MAXIMO
+    """
+    consulta = request.GET.get('q', '').strip()
+    try:
+        pagina = max(1, int(request.GET.get('pagina', 1)))
+    except ValueError:
+        pagina = 1
+    try:
+        limite = min(LIMITE_MAXIMO, max(1, int(request.GET.get('limite', LIMITE_POR_DEFECTO))))
+    except ValueError:
+        limite = LIMITE_POR_DEFECTO
+    return consulta, pagina, limite
+
+
+@login_required
+@require_http_methods(["GET"])
+def buscar_productos_api(request):
+    """
+    API de búsqueda de productos a la venta por nombre, marca, tipo o código.
+    
+    Parámetros GET: q, pagina (desde 1), limite (máx. LIMITE_MAXIMO)
+    
+    Returns:
+        JsonResponse: {'success', 'resultados': [...], 'pagina', 'hay_mas'}
+    """
+    consulta, pagina, limite = _parametros_busqueda(request)
+    resultado = buscar_productos(consulta, pagina=pagina, limite=limite)
+    return JsonResponse({'success': True, 'pagina': pagina, **resultado})
+
+
+@login_required
+@require_http_methods(["GET"])
+def buscar_clientes_api(request):
+    """
+    API de búsqueda de clientes por nombre o RUT.
+    
+    Parámetros GET: q, pagina (desde 1), limite (máx. LIMITE_MAXIMO)
+    
+    Returns:
+        JsonResponse: {'success', 'resultados': [...], 'pagina', 'hay_mas'}
+    """
+    consulta, pagina, limite = _parametros_busqueda(request)
+    resultado = buscar_clientes(consulta, pagina=pagina, limite=limite)
+    return JsonResponse({'success': True, 'pagina': pagina, **resultado})
+
+
 # ================================================================
 # =        VISTA API: AGREGAR CLIENTE RÁPIDO (JSON)              =
 # ================================================================
@@ -266,6 +367,40 @@ def validar_producto_ajax(request, producto_id):
         }, status=500)
 
 
+# ================================================================
+# =        VISTA API: VALIDAR CARRITO COMPLETO (JSON)            =
+# ================================================================
+# 
+# Valida todas las líneas del carrito en UNA petición (en lugar de
+# llamar a validar_producto_ajax por cada producto). pos.js la usa
+# antes de abrir el modal de pago.
+
+@login_required
+@require_http_methods(["POST"])
+def validar_carrito_ajax(request):
+    """
+    API que valida stock, cobertura FIFO y vencimiento de todo el carrito.
+    
+    Recibe JSON: {'carrito': [{'producto_id': int, 'cantidad': num}, ...]}
+    
+    Returns:
+        JsonResponse: {'success', 'valido', 'lineas': [...]} (ver checkout.validar_carrito)
+    """
+    try:
+        datos = json.loads(request.body)
+        carrito = datos.get('carrito') or []
+        if not isinstance(carrito, list) or not carrito:
+            return JsonResponse({'success': False, 'mensaje': 'El carrito está vacío'}, status=400)
+        
+        resultado = validar_carrito(normalizar_carrito(carrito))
+        return JsonResponse({'success': True, **resultado})
+    
+    except VentaInvalidaError as e:
+        return JsonResponse({'success': False, 'mensaje': e.mensaje}, status=e.status)
+    except (json.JSONDecodeError, ArithmeticError, ValueError):
+        return JsonResponse({'success': False, 'mensaje': 'Datos del carrito inválidos'}, status=400)
+
+
 # ================================================================
 # =           VISTA API: PROCESAR VENTA COMPLETA                 =
 # ================================================================
@@ -277,8 +412,6 @@ def validar_producto_ajax(request, producto_id):
 @login_required
 @require_http_methods(["POST"])
 def procesar_venta_ajax(request):
-    # Configurar logger
-    logger = logging.getLogger('ventas')
     """
     API para procesar una venta completa.
     
@@ -288,14 +421,17 @@ def procesar_venta_ajax(request):
     - Carrito con los productos (array de objetos)
     - Monto pagado
     - Descuento (opcional)
+    - Clave de idempotencia (opcional): UUID generado por pos.js para la venta.
+      Si la misma venta se reenvía (reintento tras un corte de conexión) se
+      retorna la venta original con 'repetida': True en vez de duplicarla.
     
-    Realiza:
-    1. Valida que todos los productos tengan stock
-    2. Calcula los totales (subtotal, IVA, total)
-    3. Crea el registro de la Venta
-    4. Crea los registros de DetalleVenta
-    5. Actualiza el stock de cada producto
-    6. Retorna el resultado
+    Si la base de datos no responde se retorna 503 para que pos.js deje la
+    venta en su cola local y la reintente con la misma clave.
+    
+    La venta se registra con el motor de checkout (ventas/funciones/checkout.py),
+    que carga y bloquea todos los productos y lotes del carrito de una vez,
+    calcula el FIFO en memoria y escribe todo con bulk_create/bulk_update.
+    Así el número de consultas por venta no crece con el tamaño del carrito.
     
     Args:
         request: Petición HTTP con los datos de la venta en JSON
@@ -303,6 +439,7 @@ def procesar_venta_ajax(request):
     Returns:
         JsonResponse con el resultado de la venta (ID, folio, etc.)
     """
+    logger = logging.getLogger('ventas')
     
     try:
         # --- Paso 1: Obtener los datos enviados desde JavaScript ---
@@ -315,6 +452,9 @@ def procesar_venta_ajax(request):
         medio_pago = datos.get('medio_pago', 'efectivo')  # Por defecto efectivo
         monto_pagado = Decimal(str(datos.get('monto_pagado', 0)))
         descuento_global = Decimal(str(datos.get('descuento', 0)))
+        clave_idempotencia = normalizar_clave_idempotencia(
+            datos.get('clave_idempotencia') or request.headers.get('Idempotency-Key')
+        )
         
         # --- Paso 2: Validaciones básicas ---
         if not cliente_id:
@@ -338,284 +478,30 @@ def procesar_venta_ajax(request):
                 'mensaje': 'Cliente no encontrado'
             }, status=404)
         
-        # --- Paso 3: Validar stock de todos los productos ---
-        # Antes de procesar, verificamos que TODOS los productos tengan stock
-        for item in carrito:
-            producto_id = item.get('producto_id')
-            cantidad_solicitada = Decimal(str(item.get('cantidad', 0)))
-            
-            try:
-                producto = Productos.objects.get(pk=producto_id)
-                
-                # Verificar que no esté eliminado
-                if producto.eliminado is not None:
-                    return JsonResponse({
-                        'success': False,
-                        'mensaje': f'El producto "{producto.nombre}" ya no está disponible'
-                    }, status=400)
-                
-                # Verificar stock (permite decimales)
-                if producto.cantidad < cantidad_solicitada:
-                    return JsonResponse({
-                        'success': False,
-                        'mensaje': f'Stock insuficiente para "{producto.nombre}". Disponible: {producto.cantidad}'
-                    }, status=400)
-                    
-            except Productos.DoesNotExist:
-                return JsonResponse({
-                    'success': False,
-                    'mensaje': f'Producto con ID {producto_id} no encontrado'
-                }, status=404)
-        
-        # --- Paso 4: Calcular totales ---
-        # IMPORTANTE: El precio del producto YA INCLUYE IVA (precio final al consumidor)
-        # Por lo tanto, debemos calcular:
-        # 1. Total con IVA incluido (precio mostrado × cantidad)
-        # 2. Subtotal sin IVA (total / 1.19)
-        # 3. IVA (subtotal sin IVA × 0.19)
-        # 4. Total final = precio original (con IVA incluido)
-        
-        total_con_iva_incluido = Decimal('0.00')
-        
-        # Sumamos el precio de cada producto del carrito (precio ya incluye IVA)
-        for item in carrito:
-            producto_id = item.get('producto_id')
-            cantidad = Decimal(str(item.get('cantidad', 0)))  # Permite decimales
-            precio_unitario = Decimal(str(item.get('precio_unitario', 0)))  # Precio con IVA incluido
-            descuento_item = Decimal(str(item.get('descuento', 0)))
-            
-            # Calcular subtotal de este item (precio con IVA incluido)
-            subtotal_item_con_iva = cantidad * precio_unitario
-            
-            # Aplicar descuento si existe
-            if descuento_item > 0:
-                subtotal_item_con_iva = subtotal_item_con_iva - (subtotal_item_con_iva * descuento_item / 100)
-            
-            total_con_iva_incluido += subtotal_item_con_iva
-        
-        # Aplicar descuento global (si existe)
-        total_con_iva_incluido = total_con_iva_incluido - descuento_global
-        
-        # Calcular subtotal sin IVA (desglosar el IVA del precio)
-        # Subtotal sin IVA = Total con IVA / 1.19
-        IVA_RATE = Decimal('0.19')
-        total_sin_iva = total_con_iva_incluido / (Decimal('1') + IVA_RATE)
-        
-        # Calcular IVA (19% del subtotal sin IVA)
-        total_iva = total_sin_iva * IVA_RATE
-        
-        # Total final = precio original (con IVA incluido)
-        total_con_iva = total_con_iva_incluido
-        
-        # Redondear a 2 decimales
-        from decimal import ROUND_HALF_UP
-        total_sin_iva = total_sin_iva.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-        total_iva = total_iva.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-        total_con_iva = total_con_iva.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-        
-        # Calcular vuelto
-        vuelto = monto_pagado - total_con_iva
-        
-        # Verificar que el monto pagado sea suficiente
-        if vuelto < 0:
-            return JsonResponse({
-                'success': False,
-                'mensaje': f'Monto insuficiente. Total: ${total_con_iva:.2f}, Pagado: ${monto_pagado:.2f}'
-            }, status=400)
-        
-        # --- Paso 4.5: VALIDAR STOCK ANTES DE PROCESAR VENTA ---
-        # Verificar que todos los productos tengan stock suficiente
-        for item in carrito:
-            producto_id = item.get('producto_id')
-            cantidad = Decimal(str(item.get('cantidad', 0)))  # Permite decimales
-            
-            try:
-                producto = Productos.objects.get(pk=producto_id, eliminado__isnull=True)
-                stock_disponible = producto.cantidad if producto.cantidad else Decimal('0')
-                
-                if stock_disponible < cantidad:
-                    return JsonResponse({
-                        'success': False,
-                        'mensaje': f'Stock insuficiente para {producto.nombre}. Disponible: {stock_disponible}, Solicitado: {cantidad}'
-                    }, status=400)
-            except Productos.DoesNotExist:
-                return JsonResponse({
-                    'success': False,
-                    'mensaje': f'Producto con ID {producto_id} no encontrado'
-                }, status=404)
-        
-        # --- Paso 5: Crear la venta en la base de datos ---
-        # Usamos una TRANSACCIÓN para asegurar que todo se guarde correctamente
-        # o NADA se guarde si hay un error (atomicidad)
-        with transaction.atomic():
-            
-            # Generar folio único (puedes mejorarlo con un sistema más robusto)
-            folio = f"BOL-{timezone.now().strftime('%Y%m%d%H%M%S')}"
-            
-            # Calcular vuelto (solo para pagos en efectivo)
-            # Para otros métodos de pago, el vuelto es 0
-            vuelto_calculado = Decimal('0.00')
-            if medio_pago == 'efectivo':
-                vuelto_calculado = vuelto
-            else:
-                # Para otros métodos, el monto pagado debe ser exactamente el total
-                if monto_pagado != total_con_iva:
-                    # Si hay diferencia, ajustar monto_pagado al total
-                    monto_pagado = total_con_iva
-            
-            # Crear el registro de Venta
-            venta = Ventas.objects.create(
-                clientes=cliente,
-                canal_venta=canal_venta,
-                total_sin_iva=total_sin_iva,
-                total_iva=total_iva,
-                descuento=descuento_global,
-                total_con_iva=total_con_iva,
-                folio=folio,
-                medio_pago=medio_pago,
-                monto_pagado=monto_pagado,
-                vuelto=vuelto_calculado,
-            )
-            
-            # --- Paso 6: Crear los detalles de venta y actualizar stock ---
-            for item in carrito:
-                producto_id = item.get('producto_id')
-                cantidad = Decimal(str(item.get('cantidad', 0)))  # Permite decimales
-                precio_unitario = Decimal(str(item.get('precio_unitario', 0)))
-                descuento_pct = Decimal(str(item.get('descuento', 0)))
-                
-                # Obtener el producto
-                producto = Productos.objects.get(pk=producto_id)
-                
-                # Crear el detalle de venta
-                DetalleVenta.objects.create(
-                    ventas=venta,
-                    productos=producto,
-                    cantidad=cantidad,
-                    precio_unitario=precio_unitario,
-                    descuento_pct=descuento_pct,
-                )
-                
-                # Validar stock disponible antes de actualizar
-                stock_disponible = producto.calcular_cantidad_desde_lotes() if hasattr(producto, 'calcular_cantidad_desde_lotes') else producto.cantidad
-                if stock_disponible < cantidad:
-                    raise ValueError(
-                        f'Stock insuficiente para {producto.nombre}. '
-                        f'Disponible: {stock_disponible}, Solicitado: {cantidad}'
-                    )
-                
-                # Reducir cantidad de lotes usando FIFO (First In First Out)
-                # Vender primero los lotes más antiguos (los que vencen primero)
-                from ventas.models import Lote
-                cantidad_restante = Decimal(str(cantidad))  # Asegurar que sea Decimal
-                
-                # Obtener lotes activos ordenados por fecha de caducidad (más antiguos primero)
-                lotes_activos = Lote.objects.filter(
-                    productos=producto,
-                    estado='activo',
-                    cantidad__gt=0
-                ).order_by('fecha_caducidad', 'fecha_recepcion')
-                
-                for lote in lotes_activos:
-                    if cantidad_restante <= Decimal('0'):
-                        break
-                    
-                    # Asegurar que lote.cantidad sea Decimal
-                    cantidad_lote = Decimal(str(lote.cantidad))
-                    
-                    # Calcular cuánto tomar de este lote
-                    cantidad_a_tomar = min(cantidad_restante, cantidad_lote)
-                    
-                    logger.info(f'[VENTA FIFO] Lote {lote.id}: cantidad antes={cantidad_lote}, tomando={cantidad_a_tomar}')
-                    
-                    # Reducir la cantidad del lote
-                    nueva_cantidad_lote = cantidad_lote - cantidad_a_tomar
-                    lote.cantidad = nueva_cantidad_lote
-                    
-                    # Si el lote se agotó, marcarlo como agotado
-                    if nueva_cantidad_lote <= Decimal('0'):
-                        lote.estado = 'agotado'
-                        lote.cantidad = Decimal('0')
-                        logger.info(f'[VENTA FIFO] Lote {lote.id} agotado')
-                    
-                    lote.save(update_fields=['cantidad', 'estado'])
-                    logger.info(f'[VENTA FIFO] Lote {lote.id}: cantidad después={lote.cantidad}, estado={lote.estado}')
-                    cantidad_restante = cantidad_restante - cantidad_a_tomar
-                
-                # Si aún queda cantidad por vender (no debería pasar si la validación fue correcta)
-                if cantidad_restante > Decimal('0'):
-                    raise ValueError(
-                        f'Error: No se pudo reducir completamente el stock. '
-                        f'Quedan {cantidad_restante} unidades sin asignar a lotes.'
-                    )
-                
-                # Refrescar el producto desde la BD para obtener datos actualizados
-                producto.refresh_from_db()
-                
-                # Actualizar la cantidad total del producto desde lotes
-                # Siempre recalcular desde lotes si el producto tiene lotes
-                if hasattr(producto, 'calcular_cantidad_desde_lotes'):
-                    nueva_cantidad_producto = producto.calcular_cantidad_desde_lotes()
-                    logger.info(f'[VENTA] Recalculando cantidad desde lotes: {nueva_cantidad_producto}')
-                else:
-                    nueva_cantidad_producto = producto.cantidad - cantidad
-                    logger.info(f'[VENTA] Reduciendo cantidad directamente: {nueva_cantidad_producto}')
-                
-                producto.cantidad = nueva_cantidad_producto
-                logger.info(f'[VENTA] Cantidad del producto actualizada a: {producto.cantidad}')
-                
-                # Actualizar fecha de caducidad del producto con la del lote más antiguo activo
-                lote_mas_antiguo = Lote.objects.filter(
-                    productos=producto,
-                    estado='activo',
-                    cantidad__gt=0
-                ).order_by('fecha_caducidad', 'fecha_recepcion').first()
-                
-                if lote_mas_antiguo and lote_mas_antiguo.fecha_caducidad:
-                    producto.caducidad = lote_mas_antiguo.fecha_caducidad
-                elif not lote_mas_antiguo:
-                    # Si no hay lotes activos, limpiar fecha de caducidad
-                    producto.caducidad = None
-                
-                # Guardar cambios en el producto
-                producto.save(update_fields=['cantidad', 'caducidad'])
-                
-                # Log para debugging
-                logger.info(f'[VENTA] Producto {producto.nombre}: cantidad actualizada a {producto.cantidad} después de vender {cantidad} unidades')
-                
-                # Crear movimiento de inventario para trazabilidad
-                try:
-                    from ventas.models import MovimientosInventario
-                    MovimientosInventario.objects.create(
-                        tipo_movimiento='salida',
-                        cantidad=cantidad,
-                        productos=producto,
-                        origen='venta',
-                        referencia_id=venta.id,
-                        tipo_referencia='venta'
-                    )
-                except Exception as e:
-                    # Si falla la creación del movimiento, registrar pero no fallar la venta
-                    logger.warning(f'Error al crear movimiento de inventario: {e}')
-            
-            # --- Paso 6.5: Guardar historial de boleta (sin afectar la transacción principal) ---
-            try:
-                from ventas.funciones.historial_boletas import guardar_historial_boleta
-                usuario_emisor = request.user.username if request.user.is_authenticated else None
-                guardar_historial_boleta(venta, usuario_emisor=usuario_emisor)
-            except Exception as e:
-                # Si falla el guardado del historial, registrar pero no fallar la venta
-                logger.warning(f'Error al guardar historial de boleta: {e}')
-        
-        # --- Paso 7: Retornar respuesta exitosa ---
+        # --- Paso 3: Registrar la venta (validación de stock, FIFO y escritura) ---
+        usuario_emisor = request.user.username if request.user.is_authenticated else None
+        resultado = registrar_venta(
+            cliente=cliente,
+            lineas=normalizar_carrito(carrito),
+            canal_venta=canal_venta,
+            medio_pago=medio_pago,
+            monto_pagado=monto_pagado,
+            descuento_global=descuento_global,
+            usuario_emisor=usuario_emisor,
+            clave_idempotencia=clave_idempotencia,
+        )
+        venta = resultado['venta']
+        
+        # --- Paso 4: Retornar respuesta exitosa ---
         return JsonResponse({
             'success': True,
             'mensaje': 'Venta procesada correctamente',
+            'repetida': resultado['repetida'],  # True si era un reintento de una venta ya registrada
             'venta': {
                 'id': venta.id,
                 'folio': venta.folio,
-                'total': float(total_con_iva),
-                'vuelto': float(vuelto),
+                'total': float(resultado['total_con_iva']),
+                'vuelto': float(resultado['vuelto']),
                 'fecha': venta.fecha.strftime('%d/%m/%Y %H:%M'),
             }
         })
@@ -625,6 +511,22 @@ def procesar_venta_ajax(request):
             'success': False,
             'mensaje': 'Error al procesar los datos JSON'
         }, status=400)
+    
+    except VentaInvalidaError as e:
+        # Errores de validación del carrito (stock, producto inexistente, monto)
+        return JsonResponse({
+            'success': False,
+            'mensaje': e.mensaje
+        }, status=e.status)
+    
+    except OperationalError as e:
+        # Corte o saturación de la BD: error transitorio, el POS reintentará
+        logger.warning(f'BD no disponible al procesar venta: {e}')
+        return JsonResponse({
+            'success': False,
+            'reintentar': True,
+            'mensaje': 'No se pudo conectar con la base de datos. La venta quedará pendiente y se reintentará.'
+        }, status=503)
         
     except Exception as e:
         # Si hay cualquier error, la transacción se revierte automáticamente
@@ -640,4 +542,3 @@ def procesar_venta_ajax(request):
             'success': False,
             'mensaje': mensaje_error
         }, status=500)
-
@@ -1,7 +1,9 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q, Sum
+from django.db.models import Q, Sum, Min, Value, Exists, OuterRef
+from django.db.models.functions import Lower, Trim, Coalesce
+from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
 from django.views.decorators.csrf import csrf_exempt
@@ -11,14 +13,27 @@ from ventas.models.productos import Productos, Nutricional
 from ventas.models.movimientos import MovimientosInventario
 from ventas.models.ventas import DetalleVenta
 from ventas.models.alertas import Alertas
+from ventas.models.historial_merma import HistorialMerma
+from ventas.funciones.stock_productos import anotar_stock
 from django.utils import timezone
 
+# Productos por página en el listado de inventario
+PRODUCTOS_POR_PAGINA = 50
+
 def inventario_view(request):
+    """
+    Lista el inventario paginado con una sola consulta anotada por página.
+
+    La cantidad desde lotes y el número de lotes activos salen del stock
+    precalculado (tabla stock_producto) con subconsultas, y si el producto
+    tiene historial de merma activo con un EXISTS. La página ya no reactiva
+    productos en merma: eso lo hace `python manage.py reactivar_productos_merma`.
+    """
     q = (request.GET.get('q') or '').strip()
     # Filtro para mostrar inactivos
     mostrar_inactivos = request.GET.get('mostrar_inactivos', 'false').lower() == 'true'
     
-    qs = Productos.objects.select_related('categorias').filter(eliminado__isnull=True)
+    qs = Productos.objects.filter(eliminado__isnull=True)
     
     # Por defecto, mostrar productos activos Y productos en merma (para que se vean en inventario)
     # Si mostrar_inactivos=True, mostrar activos, inactivos y en_merma
@@ -36,61 +51,33 @@ def inventario_view(request):
             Q(categorias__nombre__icontains=q)
         )
 
-    # Deduplicar: clave por (nombre, marca)
-    productos = []
-    seen = set()
-    for p in qs.order_by('nombre', 'marca'):
-        key = (p.nombre.strip().lower(), (p.marca or '').strip().lower())
-        if key in seen:
-            continue
-        seen.add(key)
-        
-        # Calcular cantidad desde lotes si existen
-        p.cantidad_desde_lotes = p.calcular_cantidad_desde_lotes()
-        
-        # Contar lotes activos
-        try:
-            from ventas.models import Lote
-            lotes_activos = Lote.objects.filter(
-                productos=p,
-                estado='activo',
-                cantidad__gt=0
-            )
-            p.numero_lotes_activos = lotes_activos.count()
-            
-            # Si el producto está en merma pero tiene lotes activos (no inactivos), reactivarlo automáticamente
-            # PERO solo si NO tiene registros activos en HistorialMerma
-            if p.estado_merma == 'en_merma' and p.numero_lotes_activos > 0:
-                try:
-                    from ventas.models import HistorialMerma
-                    tiene_historial_activo = HistorialMerma.objects.filter(
-                        producto=p,
-                        activo=True
-                    ).exists()
-                    
-                    # Solo reactivar si NO tiene historial activo (es decir, fue reactivado manualmente)
-                    if not tiene_historial_activo:
-                        p.estado_merma = 'activo'
-                        # Actualizar fecha de caducidad con la del lote más antiguo (FIFO)
-                        lote_mas_antiguo = lotes_activos.order_by('fecha_caducidad', 'fecha_recepcion').first()
-                        if lote_mas_antiguo:
-                            p.caducidad = lote_mas_antiguo.fecha_caducidad
-                            if lote_mas_antiguo.fecha_elaboracion:
-                                p.elaboracion = lote_mas_antiguo.fecha_elaboracion
-                        p.save(update_fields=['estado_merma', 'caducidad', 'elaboracion'])
-                except Exception:
-                    # Si HistorialMerma no existe, usar el comportamiento anterior
-                    p.estado_merma = 'activo'
-                    lote_mas_antiguo = lotes_activos.order_by('fecha_caducidad', 'fecha_recepcion').first()
-                    if lote_mas_antiguo:
-                        p.caducidad = lote_mas_antiguo.fecha_caducidad
-                        if lote_mas_antiguo.fecha_elaboracion:
-                            p.elaboracion = lote_mas_antiguo.fecha_elaboracion
-                    p.save(update_fields=['estado_merma', 'caducidad', 'elaboracion'])
-        except Exception:
-            p.numero_lotes_activos = 0
-        
-        productos.append(p)
+    # Deduplicar en la BD: por cada (nombre, marca) sin mayúsculas ni espacios
+    # se muestra solo el primer producto registrado
+    primeros = (
+        qs.annotate(
+            clave_nombre=Lower(Trim('nombre')),
+            clave_marca=Lower(Trim(Coalesce('marca', Value('')))),
+        )
+        .order_by()
+        .values('clave_nombre', 'clave_marca')
+        .annotate(primero=Min('id'))
+        .values('primero')
+    )
+    qs = anotar_stock(
+        Productos.objects.select_related('categorias').filter(id__in=primeros)
+    ).annotate(
+        # Para marcar en la tabla los productos con merma aún sin resolver
+        tiene_historial_merma_activo=Exists(
+            HistorialMerma.objects.filter(producto=OuterRef('pk'), activo=True)
+        ),
+    ).order_by('nombre', 'marca', 'id')
+
+    # Paginación
+    paginador = Paginator(qs, PRODUCTOS_POR_PAGINA)
+    try:
+        productos = paginador.page(request.GET.get('page', 1))
+    except (PageNotAnInteger, EmptyPage):
+        productos = paginador.page(1)
 
     return render(request, 'inventario.html', {
         'productos': productos, 